@@ -149,22 +149,31 @@ class RegionOfInterest(object):
     # @return generator for VideoRegionOfInterestMeta instances attached to buffer
     @classmethod
     def _iterate(self, buffer: Gst.Buffer):
+        for roi_meta in self._iterate_meta(buffer):
+            yield RegionOfInterest(roi_meta)
+
+    ## @brief Iterate by raw VideoRegionOfInterestMeta structures attached to buffer without wrapping them into
+    # RegionOfInterest instances
+    # @param buffer buffer with GstVideoRegionOfInterestMeta instances attached
+    # @return generator for VideoRegionOfInterestMeta structures attached to buffer
+    @staticmethod
+    def _iterate_meta(buffer: Gst.Buffer):
         try:
             meta_api = hash(GObject.GType.from_name("GstVideoRegionOfInterestMetaAPI"))
         except:
             return
         gpointer = ctypes.c_void_p()
+        buffer_ptr = hash(buffer)
         while True:
             try:
-                value = libgst.gst_buffer_iterate_meta_filtered(hash(buffer), ctypes.byref(gpointer), meta_api)
+                value = libgst.gst_buffer_iterate_meta_filtered(buffer_ptr, ctypes.byref(gpointer), meta_api)
             except:
                 value = None
 
             if not value:
                 return
 
-            roi_meta = ctypes.cast(value, ctypes.POINTER(VideoRegionOfInterestMeta)).contents
-            yield RegionOfInterest(roi_meta)
+            yield ctypes.cast(value, ctypes.POINTER(VideoRegionOfInterestMeta)).contents
 
     ## @brief Construct RegionOfInterest instance from VideoRegionOfInterestMeta. After this, RegionOfInterest will
     # obtain all tensors (detection & inference results) from VideoRegionOfInterestMeta
@@ -20,6 +20,16 @@ from gi.repository import GObject, Gst
 from .util import libgst, libgobject, G_VALUE_ARRAY_POINTER, GValueArray, GValue, G_VALUE_POINTER
 from .util import GVATensorMeta
 
+# GType values are resolved once: Tensor.__getitem__ is called for every field access
+_GTYPE_INVALID = hash(GObject.TYPE_INVALID)
+_GTYPE_STRING = hash(GObject.TYPE_STRING)
+_GTYPE_INT = hash(GObject.TYPE_INT)
+_GTYPE_DOUBLE = hash(GObject.TYPE_DOUBLE)
+_GTYPE_VARIANT = hash(GObject.TYPE_VARIANT)
+_GTYPE_POINTER = hash(GObject.TYPE_POINTER)
+_GTYPE_FLOAT = hash(GObject.TYPE_FLOAT)
+_GTYPE_UINT = hash(GObject.TYPE_UINT)
+
 ## @brief This class represents tensor - map-like storage for inference result information, such as output blob
 # description (output layer dims, layout, rank, precision, etc.), inference result in a raw and interpreted forms.
 # Tensor is based on GstStructure and, in general, can contain arbitrary (user-defined) fields of simplest data types,
@@ -190,26 +200,26 @@ class Tensor:
     def __getitem__(self, key):
         key = key.encode('utf-8')
         gtype = libgst.gst_structure_get_field_type(self.__structure, key)
-        if gtype == hash(GObject.TYPE_INVALID):  # key is not found
+        if gtype == _GTYPE_INVALID:  # key is not found
             return None
-        elif gtype == hash(GObject.TYPE_STRING):
+        elif gtype == _GTYPE_STRING:
             res = libgst.gst_structure_get_string(self.__structure, key)
             return res.decode("utf-8") if res else None
-        elif gtype == hash(GObject.TYPE_INT):
+        elif gtype == _GTYPE_INT:
             value = ctypes.c_int()
             res = libgst.gst_structure_get_int(
                 self.__structure, key, ctypes.byref(value))
             return value.value if res else None
-        elif gtype == hash(GObject.TYPE_DOUBLE):
+        elif gtype == _GTYPE_DOUBLE:
             value = ctypes.c_double()
             res = libgst.gst_structure_get_double(
                 self.__structure, key, ctypes.byref(value))
             return value.value if res else None
-        elif gtype == hash(GObject.TYPE_VARIANT):
+        elif gtype == _GTYPE_VARIANT:
             # TODO Returning pointer for now that can be used with other ctypes functions
             #      Return more useful python value
             return libgst.gst_structure_get_value(self.__structure,key)
-        elif gtype == hash(GObject.TYPE_POINTER):
+        elif gtype == _GTYPE_POINTER:
             # TODO Returning pointer for now that can be used with other ctypes functions
             #      Return more useful python value
             return libgst.gst_structure_get_value(self.__structure,key)
@@ -225,9 +235,9 @@ class Tensor:
                 value = list()
                 for i in range(0, gvalue_array.contents.n_values):
                     g_value = libgobject.g_value_array_get_nth(gvalue_array, ctypes.c_uint(i))
-                    if g_value.contents.g_type == hash(GObject.TYPE_FLOAT):
+                    if g_value.contents.g_type == _GTYPE_FLOAT:
                         value.append(libgobject.g_value_get_float(g_value))
-                    elif g_value.contents.g_type == hash(GObject.TYPE_UINT):
+                    elif g_value.contents.g_type == _GTYPE_UINT:
                         value.append(libgobject.g_value_get_uint(g_value))
                     else:
                         raise TypeError(
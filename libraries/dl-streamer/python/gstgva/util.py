@@ -104,6 +104,15 @@ libgst.gst_buffer_get_memory.restype = GST_MEMORY_POINTER
 libgst.gst_memory_is_type.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
 libgst.gst_memory_is_type.restype = ctypes.c_bool
 
+# void (*GDestroyNotify)(gpointer data)
+G_DESTROY_NOTIFY = ctypes.CFUNCTYPE(None, ctypes.c_void_p)
+
+libgst.gst_memory_new_wrapped.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_size_t,
+                                          ctypes.c_size_t, ctypes.c_size_t, ctypes.c_void_p, G_DESTROY_NOTIFY]
+libgst.gst_memory_new_wrapped.restype = ctypes.c_void_p
+libgst.gst_buffer_append_memory.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+libgst.gst_buffer_append_memory.restype = None
+
 # gst miniobject
 libgst.gst_mini_object_make_writable.argtypes = [ctypes.c_void_p]
 libgst.gst_mini_object_make_writable.restype = ctypes.c_void_p
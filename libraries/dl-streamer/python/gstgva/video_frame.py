@@ -28,6 +28,12 @@ from .region_of_interest import RegionOfInterest
 from .tensor import Tensor
 from .util import libgst, gst_buffer_data, VideoInfoFromCaps
 
+_DETECTION_NAME = b"detection"
+_OBJECT_ID_NAME = b"object_id"
+_CONFIDENCE_FIELD = b"confidence"
+_LABEL_ID_FIELD = b"label_id"
+_ID_FIELD = b"id"
+
 
 ## @brief This class represents video frame - object for working with RegionOfInterest and Tensor objects which
 # belong to this video frame (image). RegionOfInterest describes detected object (bounding boxes) and its Tensor
@@ -35,6 +41,25 @@ from .util import libgst, gst_buffer_data, VideoInfoFromCaps
 # VideoFrame also provides access to underlying GstBuffer and GstVideoInfo describing frame's video information (such
 # as image width, height, channels, strides, etc.). You also can get cv::Mat object representing this video frame.
 class VideoFrame:
+    ## @brief numpy structured dtype of records returned by regions_array(). Fields missing in region's metadata are
+    # set to -1 (label_id, object_id) or NaN (confidence). roi_type is GQuark of region label (see
+    # RegionOfInterest.label), tensors_number is number of Tensor objects returned by RegionOfInterest.tensors(),
+    # detection is True if one of them is detection Tensor
+    REGIONS_DTYPE = numpy.dtype([
+        ('region_id', numpy.int32),
+        ('parent_id', numpy.int32),
+        ('x', numpy.int32),
+        ('y', numpy.int32),
+        ('w', numpy.int32),
+        ('h', numpy.int32),
+        ('label_id', numpy.int32),
+        ('confidence', numpy.float64),
+        ('object_id', numpy.int64),
+        ('roi_type', numpy.uint32),
+        ('tensors_number', numpy.int32),
+        ('detection', numpy.bool_)
+    ])
+
     ## @brief Construct VideoFrame instance from Gst.Buffer and GstVideo.VideoInfo or Gst.Caps.
     #  The preferred way of creating VideoFrame is to use Gst.Buffer and GstVideo.VideoInfo
     #  @param buffer Gst.Buffer to which metadata is attached and retrieved
@@ -72,6 +97,61 @@ class VideoFrame:
     def regions(self):
         return RegionOfInterest._iterate(self.__buffer)
 
+    ## @brief Get all regions attached to VideoFrame as numpy structured array. Unlike regions(), this method walks
+    # GstVideoRegionOfInterestMeta list once and reads detection and object id fields directly from underlying
+    # GstStructures without creating RegionOfInterest and Tensor objects, so it scales to frames with hundreds of
+    # regions
+    #  @param tensor_name (optional) name of per-region Tensor (e.g. embeddings or classification result) which data
+    # should be stacked into 2D array
+    #  @return numpy structured array with REGIONS_DTYPE records, one per region in attach order. If tensor_name is
+    # specified, tuple of this array and numpy.ndarray of shape (regions number, tensor size) is returned. Rows for
+    # regions without such Tensor are filled with zeros
+    def regions_array(self, tensor_name: str = None):
+        tensor_name = tensor_name.encode('utf-8') if tensor_name else None
+        records = []
+        tensor_structures = []
+
+        confidence = ctypes.c_double()
+        label_id = ctypes.c_int()
+        object_id = ctypes.c_int()
+
+        for roi_meta in RegionOfInterest._iterate_meta(self.__buffer):
+            roi_confidence = numpy.nan
+            roi_label_id = -1
+            roi_object_id = -1
+            roi_tensor = None
+            roi_tensors_number = 0
+            roi_detection = False
+
+            param = roi_meta._params
+            while param:
+                structure = param.contents.data
+                name = libgst.gst_structure_get_name(structure)
+                if name != _OBJECT_ID_NAME:
+                    roi_tensors_number += 1
+                if name == _DETECTION_NAME:
+                    roi_detection = True
+                    if libgst.gst_structure_get_double(structure, _CONFIDENCE_FIELD, ctypes.byref(confidence)):
+                        roi_confidence = confidence.value
+                    if libgst.gst_structure_get_int(structure, _LABEL_ID_FIELD, ctypes.byref(label_id)):
+                        roi_label_id = label_id.value
+                elif name == _OBJECT_ID_NAME:
+                    if libgst.gst_structure_get_int(structure, _ID_FIELD, ctypes.byref(object_id)):
+                        roi_object_id = object_id.value
+                if tensor_name is not None and name == tensor_name:
+                    roi_tensor = structure
+                param = param.contents.next
+
+            records.append((roi_meta.id, roi_meta.parent_id, roi_meta.x, roi_meta.y, roi_meta.w, roi_meta.h,
+                            roi_label_id, roi_confidence, roi_object_id, roi_meta.roi_type, roi_tensors_number,
+                            roi_detection))
+            tensor_structures.append(roi_tensor)
+
+        regions = numpy.array(records, dtype=self.REGIONS_DTYPE)
+        if tensor_name is None:
+            return regions
+        return regions, self.__stack_tensors(tensor_structures)
+
     ## @brief Get Tensor objects attached to VideoFrame
     #  @return iterator of Tensor objects attached to VideoFrame
     def tensors(self):
@@ -253,6 +333,23 @@ class VideoFrame:
             ctypes.c_byte * data_size)).contents
         return numpy.ndarray(shape, buffer=plane_raw, dtype=numpy.uint8)
 
+    @staticmethod
+    def __stack_tensors(tensor_structures) -> numpy.ndarray:
+        rows = [Tensor(structure).data() if structure else None for structure in tensor_structures]
+        present = [row for row in rows if row is not None]
+        if not present:
+            return numpy.zeros((len(rows), 0), dtype=numpy.float32)
+
+        size, dtype = present[0].size, present[0].dtype
+        if any(row.size != size for row in present):
+            raise RuntimeError("VideoFrame.regions_array: Tensors of different sizes can't be stacked")
+
+        stacked = numpy.zeros((len(rows), size), dtype=dtype)
+        for i, row in enumerate(rows):
+            if row is not None:
+                stacked[i] = row.ravel()
+        return stacked
+
     @staticmethod
     def __get_label_by_label_id(region_tensor: Gst.Structure, label_id: int) -> str:
         if region_tensor and region_tensor.has_field("labels"):
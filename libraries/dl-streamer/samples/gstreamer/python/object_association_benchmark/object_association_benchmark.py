@@ -0,0 +1,116 @@
+# ==============================================================================
+# Copyright (C) 2025 Intel Corporation
+#
+# SPDX-License-Identifier: MIT
+# ==============================================================================
+
+import os
+import sys
+import time
+import importlib.util
+import numpy
+from argparse import ArgumentParser
+
+from deep_sort_realtime.deep_sort.tracker import Tracker
+from deep_sort_realtime.deep_sort.detection import Detection
+from deep_sort_realtime.deep_sort.nn_matching import NearestNeighborDistanceMetric
+
+DEFAULT_PLUGIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                  "..", "..", "..", "..", "src", "gst", "python")
+
+parser = ArgumentParser(add_help=False)
+_args = parser.add_argument_group('Options')
+_args.add_argument("-n", "--objects", help="Optional. Comma-separated numbers of objects per frame",
+                   default="10,50,200", type=str)
+_args.add_argument("-f", "--frames", help="Optional. Number of frames in synthetic stream",
+                   default=300, type=int)
+_args.add_argument("-e", "--embedding-size", help="Optional. Size of per-object embedding",
+                   default=256, type=int)
+_args.add_argument("--max-tracks", help="Optional. Value of max-tracks property", default=0, type=int)
+_args.add_argument("--embedding-budget", help="Optional. Value of embedding-budget property", default=0, type=int)
+_args.add_argument("-p", "--plugin-dir", help="Optional. Directory with python_object_association.py",
+                   default=DEFAULT_PLUGIN_DIR, type=str)
+args = parser.parse_args()
+
+WIDTH, HEIGHT = 1920, 1080
+MAX_IOU_DISTANCE = 0.7
+
+
+def load_plugin_module(plugin_dir: str):
+    path = os.path.join(plugin_dir, "python_object_association.py")
+    spec = importlib.util.spec_from_file_location("python_object_association", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def synthetic_stream(objects_number: int, frames_number: int, embedding_size: int):
+    rng = numpy.random.default_rng(0)
+    sizes = rng.uniform(30, 120, (objects_number, 2))
+    positions = rng.uniform(0, 1, (objects_number, 2)) * ([WIDTH, HEIGHT] - sizes)
+    velocities = rng.uniform(-4, 4, (objects_number, 2))
+    identities = rng.normal(size=(objects_number, embedding_size)).astype(numpy.float32)
+
+    for _ in range(frames_number):
+        positions = numpy.clip(positions + velocities, 0, [WIDTH, HEIGHT] - sizes)
+        boxes = numpy.hstack([positions + rng.normal(0, 1, positions.shape), sizes])
+        embeddings = identities + rng.normal(0, 0.05, identities.shape).astype(numpy.float32)
+        yield boxes, embeddings
+
+
+def legacy_association(module, boxes, tracks):
+    result = []
+    for box in boxes:
+        for track in tracks:
+            if module.iou(list(box), track.to_tlwh()) > MAX_IOU_DISTANCE:
+                result.append(track.track_id)
+                break
+    return result
+
+
+def vectorized_association(module, boxes, tracks):
+    if not len(boxes) or not tracks:
+        return []
+    track_boxes = numpy.array([track.to_tlwh() for track in tracks])
+    return module.greedy_assignment(module.iou_matrix(boxes, track_boxes), MAX_IOU_DISTANCE)
+
+
+def run(module, objects_number: int):
+    metric = NearestNeighborDistanceMetric("cosine", MAX_IOU_DISTANCE, 100)
+    tracker = Tracker(metric, max_iou_distance=MAX_IOU_DISTANCE, max_age=70, n_init=3)
+    timings = {"tracker": 0., "legacy": 0., "vectorized": 0.}
+
+    for boxes, embeddings in synthetic_stream(objects_number, args.frames, args.embedding_size):
+        start = time.perf_counter()
+        detections = [Detection(box, 0.9, embedding) for box, embedding in zip(boxes, embeddings)]
+        tracker.predict()
+        tracker.update(detections)
+        module.limit_tracker_state(tracker, args.max_tracks, args.embedding_budget)
+        tracks = [t for t in tracker.tracks if t.is_confirmed() and t.time_since_update <= 1]
+        timings["tracker"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        legacy_association(module, boxes, tracks)
+        timings["legacy"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        vectorized_association(module, boxes, tracks)
+        timings["vectorized"] += time.perf_counter() - start
+
+    samples = sum(len(features) for features in tracker.metric.samples.values())
+    return {key: value / args.frames * 1000 for key, value in timings.items()}, len(tracker.tracks), samples
+
+
+def main():
+    module = load_plugin_module(args.plugin_dir)
+    print("{:>8} {:>12} {:>16} {:>20} {:>8} {:>10}".format(
+        "objects", "tracker, ms", "iou loop, ms", "iou matrix, ms", "tracks", "samples"))
+    for objects_number in [int(n) for n in args.objects.split(",")]:
+        timings, tracks, samples = run(module, objects_number)
+        print("{:>8} {:>12.3f} {:>16.3f} {:>20.3f} {:>8} {:>10}".format(
+            objects_number, timings["tracker"], timings["legacy"], timings["vectorized"], tracks, samples))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
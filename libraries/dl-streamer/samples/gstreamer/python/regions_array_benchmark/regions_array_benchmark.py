@@ -0,0 +1,63 @@
+# ==============================================================================
+# Copyright (C) 2025 Intel Corporation
+#
+# SPDX-License-Identifier: MIT
+# ==============================================================================
+
+from gstgva import VideoFrame
+import timeit
+from argparse import ArgumentParser
+
+import gi
+gi.require_version('Gst', '1.0')
+gi.require_version('GstVideo', '1.0')
+from gi.repository import Gst, GstVideo
+
+parser = ArgumentParser(add_help=False)
+_args = parser.add_argument_group('Options')
+_args.add_argument("-n", "--regions", help="Optional. Comma-separated numbers of regions per frame",
+                   default="10,100,300", type=str)
+_args.add_argument("-r", "--repeat", help="Optional. Number of iterations per measurement",
+                   default=200, type=int)
+args = parser.parse_args()
+
+WIDTH, HEIGHT = 1920, 1080
+
+
+def create_frame(regions_number: int) -> VideoFrame:
+    video_info = GstVideo.VideoInfo()
+    video_info.set_format(GstVideo.VideoFormat.BGRX, WIDTH, HEIGHT)
+    frame = VideoFrame(Gst.Buffer.new_allocate(None, video_info.size, None), video_info)
+    for i in range(regions_number):
+        x, y = (i * 37) % (WIDTH - 100), (i * 53) % (HEIGHT - 100)
+        roi = frame.add_region(x, y, 64, 96, "person", 0.5 + (i % 50) / 100)
+        roi.detection()['label_id'] = i % 3
+        roi.set_object_id(i + 1)
+        roi.add_tensor("classification")['label'] = "adult"
+    return frame
+
+
+def iterate_regions(frame: VideoFrame):
+    result = []
+    for roi in frame.regions():
+        rect = roi.rect()
+        result.append((roi.region_id(), rect.x, rect.y, rect.w, rect.h,
+                       roi.label_id(), roi.confidence(), roi.object_id()))
+    return result
+
+
+def main():
+    Gst.init(None)
+    print("{:>8} {:>20} {:>20} {:>8}".format("regions", "regions(), us", "regions_array(), us", "speedup"))
+    for regions_number in [int(n) for n in args.regions.split(",")]:
+        frame = create_frame(regions_number)
+        assert len(frame.regions_array()) == regions_number
+
+        iterator_time = timeit.timeit(lambda: iterate_regions(frame), number=args.repeat) / args.repeat
+        array_time = timeit.timeit(lambda: frame.regions_array(), number=args.repeat) / args.repeat
+        print("{:>8} {:>20.1f} {:>20.1f} {:>8.1f}x".format(regions_number, iterator_time * 1e6,
+                                                          array_time * 1e6, iterator_time / array_time))
+
+
+if __name__ == '__main__':
+    main()
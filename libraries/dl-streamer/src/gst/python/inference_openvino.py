@@ -12,16 +12,133 @@ gi.require_version('GstBase', '1.0')
 gi.require_version('GstVideo', '1.0')
 
 from gi.repository import Gst, GObject, GLib, GstBase, GstVideo
+import ctypes
+import itertools
+import threading
 import numpy as np
 
-from openvino.runtime import Core, Layout, Type, InferRequest, AsyncInferQueue
+from openvino.runtime import Core, Layout, Type, InferRequest, AsyncInferQueue, Tensor
 from openvino.preprocess import PrePostProcessor
 
+from gstgva.util import libgst, G_DESTROY_NOTIFY
+
 Gst.init(None)
 
 TENSORS_CAPS = Gst.Caps.from_string("other/tensors")
 
 
+# Slot ids are unique across pools, they are passed as user_data of wrapped Gst.Memory
+_slot_ids = itertools.count(1)
+
+# Pools with slots wrapped into Gst.Memory. Downstream may keep these buffers after the element is
+# destroyed, so the pool stays referenced here until the last of its memories is freed
+_wrapped_pools_lock = threading.Lock()
+_wrapped_pools = dict()
+
+
+def _on_memory_freed(user_data):
+    with _wrapped_pools_lock:
+        pool = _wrapped_pools.get(user_data or 0)
+    if pool is not None:
+        pool.on_memory_freed(user_data)
+
+
+# ctypes callback is module level so it outlives any element and pool
+_memory_freed_notify = G_DESTROY_NOTIFY(_on_memory_freed)
+
+
+class OutputTensorSlot:
+    def __init__(self, outputs, pooled: bool):
+        self.slot_id = next(_slot_ids)
+        self.pooled = pooled
+        self.arrays = [np.empty(output.shape, dtype=output.element_type.to_dtype())
+                       for output in outputs]
+        self.tensors = [Tensor(array, shared_memory=True) for array in self.arrays]
+        self.address = self.arrays[0].ctypes.data if self.arrays else None
+        self.memories_alive = 0
+
+
+class OutputTensorPool:
+    """Preallocated sets of output tensors which memory is handed downstream without copying.
+
+    A slot is bound to an infer request before inference, its arrays are wrapped into Gst.Memory after
+    inference and the slot returns to the pool when the last of these Gst.Memory objects is freed.
+    If all slots are in use, a temporary slot is allocated instead of blocking the streaming thread.
+    """
+
+    def __init__(self, outputs, size: int):
+        self.outputs = outputs
+        self.lock = threading.Lock()
+        self.free = [OutputTensorSlot(outputs, True) for _ in range(size)]
+        self.in_use = dict()
+        self.size = size
+        self.acquired = 0
+        self.misses = 0
+        self.peak_in_use = 0
+
+    def acquire(self) -> OutputTensorSlot:
+        with self.lock:
+            self.acquired += 1
+            if self.free:
+                slot = self.free.pop()
+            else:
+                self.misses += 1
+                slot = OutputTensorSlot(self.outputs, False)
+            slot.memories_alive = 0
+            self.in_use[slot.slot_id] = slot
+            self.peak_in_use = max(self.peak_in_use, len(self.in_use))
+            return slot
+
+    def bound_slot(self, infer_request) -> OutputTensorSlot:
+        # Slot which tensors are set as outputs of infer_request, found by the address of the first output
+        address = infer_request.get_output_tensor(0).data.ctypes.data
+        with self.lock:
+            for slot in self.in_use.values():
+                if slot.address == address:
+                    return slot
+        return None
+
+    def wrap(self, slot: OutputTensorSlot, buffer: Gst.Buffer):
+        with _wrapped_pools_lock:
+            _wrapped_pools[slot.slot_id] = self
+        try:
+            for array in slot.arrays:
+                mem = libgst.gst_memory_new_wrapped(0, array.ctypes.data, array.nbytes, 0, array.nbytes,
+                                                    slot.slot_id, _memory_freed_notify)
+                if not mem:
+                    raise RuntimeError("Unable to wrap output tensor into Gst.Memory")
+                with self.lock:
+                    slot.memories_alive += 1
+                libgst.gst_buffer_append_memory(hash(buffer), mem)
+        except Exception:
+            # Memories already appended to buffer release the slot when they are freed
+            with self.lock:
+                if slot.memories_alive == 0:
+                    self._release_locked(slot.slot_id)
+            raise
+
+    def stats(self) -> str:
+        with self.lock:
+            return "size={},in-use={},peak-in-use={},acquired={},misses={}".format(
+                self.size, len(self.in_use), self.peak_in_use, self.acquired, self.misses)
+
+    def on_memory_freed(self, slot_id: int):
+        with self.lock:
+            slot = self.in_use.get(slot_id)
+            if slot is None:
+                return
+            slot.memories_alive -= 1
+            if slot.memories_alive <= 0:
+                self._release_locked(slot_id)
+
+    def _release_locked(self, slot_id: int):
+        slot = self.in_use.pop(slot_id, None)
+        if slot is not None and slot.pooled:
+            self.free.append(slot)
+        with _wrapped_pools_lock:
+            _wrapped_pools.pop(slot_id, None)
+
+
 class InferenceOpenVINO(GstBase.BaseTransform):
     __gstmetadata__ = ('OpenVINO inference', 'Transform',
                        'OpenVINO™ toolkit inference element', 'dkl')
@@ -33,6 +150,8 @@ class InferenceOpenVINO(GstBase.BaseTransform):
         "model": (GObject.TYPE_STRING, "model", "OpenVINO™ toolkit model path", "", GObject.ParamFlags.READWRITE),
         "device": (GObject.TYPE_STRING, "device", "Inference device", "CPU", GObject.ParamFlags.READWRITE),
         "nireq": (GObject.TYPE_INT64, "nireq", "Number inference requests", 0, GLib.MAXINT, 0, GObject.ParamFlags.READWRITE),
+        "output-pool-size": (GObject.TYPE_INT64, "output-pool-size", "Number of preallocated output tensor sets bound to inference requests and passed downstream without copying. Values not larger than the number of inference requests are raised to that number plus one. 0 disables the pool and output tensors are copied", 0, GLib.MAXINT, 0, GObject.ParamFlags.READWRITE),
+        "output-pool-stats": (GObject.TYPE_STRING, "output-pool-stats", "Output tensor pool statistics: pool size, slots in use by downstream, peak usage, acquired slots and misses (allocations when the pool was exhausted)", "", GObject.ParamFlags.READABLE),
     }
 
     def __init__(self, gproperties=__gproperties__):
@@ -47,11 +166,15 @@ class InferenceOpenVINO(GstBase.BaseTransform):
         self.model = None
         self.compiled_model = None
         self.infer_queue = None
+        self.infer_request = None
+        self.output_pool = None
 
     def do_set_property(self, prop: GObject.GParamSpec, value):
         self.property[prop.name] = value
 
     def do_get_property(self, prop: GObject.GParamSpec):
+        if prop.name == "output-pool-stats":
+            return self.output_pool.stats() if self.output_pool else ""
         return self.property[prop.name]
 
     def read_model(self):
@@ -69,6 +192,29 @@ class InferenceOpenVINO(GstBase.BaseTransform):
                 self.infer_queue = AsyncInferQueue(
                     self.compiled_model, self.property['nireq'])
                 self.infer_queue.set_callback(self.completion_callback)
+            else:
+                self.infer_request = self.compiled_model.create_infer_request()
+            self.create_output_pool()
+            if self.output_pool and self.infer_queue:
+                # Each request keeps a bound slot, it is replaced in completion_callback()
+                for i in range(len(self.infer_queue)):
+                    self.bind_output_slot(self.infer_queue[i], self.output_pool.acquire())
+
+    def create_output_pool(self):
+        if self.property['output-pool-size'] <= 0:
+            return
+        outputs = self.compiled_model.outputs
+        if any(output.get_partial_shape().is_dynamic for output in outputs):
+            Gst.warning("Model has dynamic output shapes, output-pool-size is ignored")
+            return
+        # Every request keeps one bound slot, the rest are in flight downstream
+        requests_num = len(self.infer_queue) if self.infer_queue else 1
+        pool_size = self.property['output-pool-size']
+        if pool_size <= requests_num:
+            Gst.warning("output-pool-size {} is not larger than number of inference requests {}, using {}".format(
+                pool_size, requests_num, requests_num + 1))
+            pool_size = requests_num + 1
+        self.output_pool = OutputTensorPool(outputs, pool_size)
 
     def do_transform_caps(self, direction, caps, filter):
         self.read_model()
@@ -102,27 +248,46 @@ class InferenceOpenVINO(GstBase.BaseTransform):
         if self.infer_queue:
             self.infer_queue.start_async(tensors, (src, mems, maps))
         else:
-            results = self.compiled_model.infer_new_request(tensors)
-            self.push_results(src, mems, maps, results.values())
+            slot = None
+            if self.output_pool:
+                slot = self.output_pool.acquire()
+                self.bind_output_slot(self.infer_request, slot)
+            self.infer_request.infer(tensors)
+            self.push_results(src, mems, maps, self.infer_request.results.values(), slot)
 
         # Return GST_BASE_TRANSFORM_FLOW_DROPPED as we push buffer in function push_results()
         return Gst.FlowReturn.CUSTOM_SUCCESS
 
+    def bind_output_slot(self, infer_request, slot):
+        for i, tensor in enumerate(slot.tensors):
+            infer_request.set_output_tensor(i, tensor)
+
     def completion_callback(self, infer_request, args):
         (src, mems, maps) = args
-        self.push_results(src, mems, maps, infer_request.results.values())
-
-    def push_results(self, src, mems, maps, tensors):
+        results = infer_request.results.values()
+        slot = None
+        if self.output_pool:
+            # The request is not handed out again until this callback returns, so outputs written into its
+            # slot go downstream and a fresh slot is bound for the next inference
+            slot = self.output_pool.bound_slot(infer_request)
+            self.bind_output_slot(infer_request, self.output_pool.acquire())
+        self.push_results(src, mems, maps, results, slot)
+
+    def push_results(self, src, mems, maps, tensors, slot=None):
         # Unmap input Gst.Memory
         for mem, map in zip(mems, maps):
             mem.unmap(map)
 
-        # Wrap output tensors into Gst.Memory and attach to Gst.Buffer
         dst = Gst.Buffer.new()
-        for tensor in tensors:
-            mem = Gst.Memory.new_wrapped(
-                0, tensor.tobytes(), tensor.nbytes, 0, None, None)
-            dst.append_memory(mem)
+        if slot:
+            # Output tensors were written directly into pooled memory, hand it downstream without copy
+            self.output_pool.wrap(slot, dst)
+        else:
+            # Wrap copies of output tensors into Gst.Memory and attach to Gst.Buffer
+            for tensor in tensors:
+                mem = Gst.Memory.new_wrapped(
+                    0, tensor.tobytes(), tensor.nbytes, 0, None, None)
+                dst.append_memory(mem)
 
         # Copy timestamps from input buffer
         dst.copy_into(src, Gst.BufferCopyFlags.TIMESTAMPS, 0, 0)
@@ -138,6 +303,8 @@ class InferenceOpenVINO(GstBase.BaseTransform):
     def do_stop(self):
         if self.infer_queue:
             self.infer_queue.wait_all()
+        if self.output_pool:
+            Gst.info("Output tensor pool stats: {}".format(self.output_pool.stats()))
         return True
 
     TYPE_NAME = {
@@ -17,6 +17,8 @@ from gstgva import VideoFrame
 import traceback
 import warnings
 
+import numpy as np
+
 from deep_sort_realtime.deep_sort.tracker import Tracker
 from deep_sort_realtime.deep_sort.detection import Detection
 from deep_sort_realtime.deep_sort.nn_matching import NearestNeighborDistanceMetric
@@ -34,6 +36,8 @@ N_INIT_DEFAULT = 3
 MAX_AGE_DEFAULT = 70
 MAX_IOU_DISTANCE_DEFAULT = 0.7
 NN_BUDGET_DEFAULT = 100
+MAX_TRACKS_DEFAULT = 0
+EMBEDDING_BUDGET_DEFAULT = 0
 
 
 def iou(bbox_1: list, bbox_2: list) -> float:
@@ -53,6 +57,73 @@ def iou(bbox_1: list, bbox_2: list) -> float:
     return intersection_area / union_area
 
 
+def iou_matrix(bboxes_1: np.ndarray, bboxes_2: np.ndarray) -> np.ndarray:
+    """Vectorized version of `iou` for every pair of boxes in (N, 4) and (M, 4) tlwh arrays. Returns (N, M) matrix"""
+    bboxes_1 = np.asarray(bboxes_1, dtype=np.float64).reshape(-1, 4)
+    bboxes_2 = np.asarray(bboxes_2, dtype=np.float64).reshape(-1, 4)
+
+    xA = np.maximum(bboxes_1[:, None, 0], bboxes_2[None, :, 0])
+    yA = np.maximum(bboxes_1[:, None, 1], bboxes_2[None, :, 1])
+    xB = np.minimum((bboxes_1[:, 0] + bboxes_1[:, 2])[:, None],
+                    (bboxes_2[:, 0] + bboxes_2[:, 2])[None, :])
+    yB = np.minimum((bboxes_1[:, 1] + bboxes_1[:, 3])[:, None],
+                    (bboxes_2[:, 1] + bboxes_2[:, 3])[None, :])
+
+    intersection_area = np.maximum(0, xB - xA + 1) * np.maximum(0, yB - yA + 1)
+    areas_sum = (bboxes_1[:, 2] * bboxes_1[:, 3])[:, None] + \
+        (bboxes_2[:, 2] * bboxes_2[:, 3])[None, :]
+    union_area = np.where(areas_sum == intersection_area,
+                          intersection_area, areas_sum - intersection_area)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = intersection_area / union_area
+    return np.nan_to_num(result, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def greedy_assignment(scores: np.ndarray, threshold: float) -> list:
+    """One-to-one assignment of rows to columns of score matrix, best scores first.
+    Returns list of (row, column) pairs with score above threshold"""
+    if scores.size == 0:
+        return []
+
+    rows, cols = np.nonzero(scores > threshold)
+    order = np.argsort(-scores[rows, cols], kind='stable')
+
+    matches = []
+    used_rows = np.zeros(scores.shape[0], dtype=bool)
+    used_cols = np.zeros(scores.shape[1], dtype=bool)
+    for row, col in zip(rows[order], cols[order]):
+        if used_rows[row] or used_cols[col]:
+            continue
+        used_rows[row] = used_cols[col] = True
+        matches.append((row, col))
+    return matches
+
+
+def limit_tracker_state(tracker: Tracker, max_tracks: int, embedding_budget: int):
+    """Bound tracker memory: drop least recently updated tracks above `max_tracks` and trim the oldest
+    embedding samples of the largest galleries above `embedding_budget` in total. 0 means no limit"""
+    if max_tracks and len(tracker.tracks) > max_tracks:
+        # stable sort keeps older tracks first among equally fresh ones
+        tracker.tracks.sort(key=lambda track: track.time_since_update)
+        removed = tracker.tracks[max_tracks:]
+        del tracker.tracks[max_tracks:]
+        for track in removed:
+            tracker.metric.samples.pop(track.track_id, None)
+
+    if not embedding_budget:
+        return
+
+    samples = tracker.metric.samples
+    total = sum(len(features) for features in samples.values())
+    while total > embedding_budget:
+        features = max(samples.values(), key=len)
+        if len(features) <= 1:
+            break  # keep at least the most recent sample of every gallery
+        del features[0]
+        total -= 1
+
+
 class Identifier(GstBase.BaseTransform):
 
     __gstmetadata__ = ('ID assignment tracking algorithm', 'Transform',
@@ -100,6 +171,18 @@ class Identifier(GstBase.BaseTransform):
             """Fix samples per class to at most this number. Removes
 \t\tthe oldest samples when the budget is reached.""",
             0, GLib.MAXINT, NN_BUDGET_DEFAULT, GObject.ParamFlags.READWRITE
+        ),
+        "max-tracks": (
+            int, "max-tracks",
+            """Maximum number of tracks kept by the tracker. Least recently updated
+        tracks are removed when the limit is reached. 0 means unlimited.""",
+            0, GLib.MAXINT, MAX_TRACKS_DEFAULT, GObject.ParamFlags.READWRITE
+        ),
+        "embedding-budget": (
+            int, "embedding-budget",
+            """Maximum total number of embedding samples kept for all tracks. Oldest
+        samples of the largest galleries are removed first. 0 means unlimited.""",
+            0, GLib.MAXINT, EMBEDDING_BUDGET_DEFAULT, GObject.ParamFlags.READWRITE
         )
     }
 
@@ -119,6 +202,8 @@ class Identifier(GstBase.BaseTransform):
         self._max_iou_distance = self.property['max-iou-distance']
         self._max_age = self.property['max-age']
         self._n_init = self.property['n-init']
+        self._max_tracks = self.property['max-tracks']
+        self._embedding_budget = self.property['embedding-budget']
 
     def __init_on_start(self):
         self.__get_properties()
@@ -156,7 +241,9 @@ class Identifier(GstBase.BaseTransform):
         return self.__init_on_start()
 
     def __get_detections(self, regions):
-        detections = []
+        bounding_boxes = []
+        confidences = []
+        embeddings = []
         for region in regions:
             tensors = [t for t in region.tensors()]
             if len(tensors) > 2:
@@ -168,21 +255,27 @@ class Identifier(GstBase.BaseTransform):
             embedding = None
             for tensor in tensors:
                 if not tensor.is_detection():
-                    embedding = tensor.data().copy()
+                    embedding = tensor.data()  # view on meta memory, copied once below
                     break
             if embedding is None:
                 continue
 
-            bounding_box = list(region.rect())
-            confidence = region.confidence()
-            detections.append(
-                Detection(bounding_box, confidence, embedding))
+            bounding_boxes.append(list(region.rect()))
+            confidences.append(region.confidence())
+            embeddings.append(embedding)
 
-        return detections
+        if not embeddings:
+            return []
+
+        # Gather all embeddings of the frame into one contiguous matrix, detections keep row views of it
+        embeddings = np.stack(embeddings)
+        return [Detection(bounding_box, confidence, embedding)
+                for bounding_box, confidence, embedding in zip(bounding_boxes, confidences, embeddings)]
 
     def __get_tracks(self, detections):
         self._tracker.predict()
         self._tracker.update(detections)
+        limit_tracker_state(self._tracker, self._max_tracks, self._embedding_budget)
 
         confirmed_tracks = [
             track for track in self._tracker.tracks
@@ -202,11 +295,14 @@ class Identifier(GstBase.BaseTransform):
                 region.set_object_id(int(track.track_id))
 
     def __write_ids_to_regions(self, dst_vf, regions, tracks):
-        for region in regions:
-            for track in tracks:
-                if iou(list(region.rect()), track.to_tlwh()) > self._max_iou_distance:
-                    region.set_object_id(int(track.track_id))
-                    break
+        if not regions or not tracks:
+            return
+
+        region_boxes = np.array([list(region.rect()) for region in regions])
+        track_boxes = np.array([track.to_tlwh() for track in tracks])
+        for region_index, track_index in greedy_assignment(iou_matrix(region_boxes, track_boxes),
+                                                           self._max_iou_distance):
+            regions[region_index].set_object_id(int(tracks[track_index].track_id))
 
     def do_transform_ip(self, in_buffer: Gst.Buffer):
         try:
@@ -11,12 +11,13 @@ gi.require_version('Gst', '1.0')
 gi.require_version('GstBase', '1.0')
 gi.require_version('GstVideo', '1.0')
 
-from gi.repository import Gst, GObject, GstBase
+from gi.repository import Gst, GObject, GLib, GstBase
 
 import torch
 import numpy as np
 import traceback
 import importlib
+import threading
 
 from gstgva import VideoFrame
 from typing import List
@@ -145,11 +146,12 @@ class InferencePyTorch(GstBase.BaseTransform):
     __gsttemplates__ = (Gst.PadTemplate.new("sink", Gst.PadDirection.SINK, Gst.PadPresence.ALWAYS, TENSORS_CAPS),
                         Gst.PadTemplate.new("src", Gst.PadDirection.SRC, Gst.PadPresence.ALWAYS, TENSORS_CAPS))
 
-    # TODO: support batching
     __gproperties__ = {
         "model": (GObject.TYPE_STRING, "model", "The full module name of the PyTorch model to be imported from torchvision or model path. Ex. 'torchvision.models.resnet50' or '/path/to/model.pth'", "", GObject.ParamFlags.READWRITE),
         "model-weights": (GObject.TYPE_STRING, "model_weights", "PyTorch model weights path. If model-weights is empty, the default weights will be used", "", GObject.ParamFlags.READWRITE),
-        "device": (GObject.TYPE_STRING, "device", "Inference device", "cpu", GObject.ParamFlags.READWRITE)
+        "device": (GObject.TYPE_STRING, "device", "Inference device", "cpu", GObject.ParamFlags.READWRITE),
+        "batch-size": (GObject.TYPE_UINT, "batch_size", "Number of input tensors stacked into one forward pass", 1, GLib.MAXUINT, 1, GObject.ParamFlags.READWRITE),
+        "batch-timeout": (GObject.TYPE_UINT, "batch_timeout", "Maximum time in milliseconds to wait for a batch to be filled before running inference on a partial batch. 0 means wait until the batch is full (or EOS)", 0, GLib.MAXUINT, 0, GObject.ParamFlags.READWRITE)
     }
 
     def __init__(self, gproperties=__gproperties__):
@@ -167,6 +169,14 @@ class InferencePyTorch(GstBase.BaseTransform):
         self.output_tensors_info = list()
         self.gst_alloc = Gst.Allocator.find()
 
+        # Batching state. Queued buffers are copied into preallocated input tensor slots and kept only to
+        # restore timestamps of output buffers
+        self.batch_lock = threading.Lock()
+        self.batch_tensor = None
+        self.batch_buffers = list()  # (input Gst.Buffer, number of occupied slots)
+        self.batch_slots = 0
+        self.batch_timer = None
+
     def init_pytorch_model(self):
         model_str = self.property["model"]
         if not model_str:
@@ -217,12 +227,31 @@ class InferencePyTorch(GstBase.BaseTransform):
 
         return True
 
+    def do_stop(self):
+        with self.batch_lock:
+            self.reset_batch()
+        return True
+
+    def do_sink_event(self, event):
+        if event.type == Gst.EventType.EOS:
+            # Run inference on partial batch before EOS is forwarded downstream
+            with self.batch_lock:
+                self.flush_batch()
+        elif event.type == Gst.EventType.FLUSH_STOP:
+            with self.batch_lock:
+                self.reset_batch()
+
+        return GstBase.BaseTransform.do_sink_event(self, event)
+
     def do_get_property(self, prop: GObject.GParamSpec):
         return self.property[prop.name]
 
     def do_set_property(self, prop: GObject.GParamSpec, value):
-        if prop.name == "device":
-            self.device = torch.device(value)
+        if prop.name in ("device", "batch-size"):
+            with self.batch_lock:
+                self.drop_batch_tensor()
+                if prop.name == "device":
+                    self.device = torch.device(value)
 
         self.property[prop.name] = value
 
@@ -318,8 +347,10 @@ class InferencePyTorch(GstBase.BaseTransform):
 
     def do_set_caps(self, incaps, outcaps):
         try:
-            self.input_tensors_info = gst_caps_to_tensor_info(incaps, 0)
-            self.output_tensors_info = gst_caps_to_tensor_info(outcaps, 0)
+            with self.batch_lock:
+                self.drop_batch_tensor()  # reallocated for the new input shape on the next buffer
+                self.input_tensors_info = gst_caps_to_tensor_info(incaps, 0)
+                self.output_tensors_info = gst_caps_to_tensor_info(outcaps, 0)
 
             if not self.gst_alloc:
                 raise RuntimeError("Allocator not found")
@@ -356,9 +387,6 @@ class InferencePyTorch(GstBase.BaseTransform):
 
     def do_generate_output(self):
         try:
-            dst = Gst.Buffer.new()
-            self.add_model_info(dst)
-
             # Input Gst.Buffer
             src = self.queued_buf
             mems = [src.get_memory(i) for i in range(src.n_memory())]
@@ -367,42 +395,39 @@ class InferencePyTorch(GstBase.BaseTransform):
             if len(self.input_tensors_info) != 1:
                 raise RuntimeError("Input tensors size != 1")
 
-            for mem in mems:
-                res, map = mem.map(Gst.MapFlags.READ | Gst.MapFlags.WRITE)
-                if not res:
-                    raise RuntimeError("Unable to map gst buffer memory")
+            input_tensor_info = self.input_tensors_info[0]
+            if not input_tensor_info.shape:
+                raise RuntimeError(
+                    "Input shape is empty. Unable to create tensor")
 
-                input_tensor_info = self.input_tensors_info[0]
+            with self.batch_lock:
+                self.reserve_batch_slots(len(mems))
 
-                if not input_tensor_info.shape:
-                    raise RuntimeError(
-                        "Input shape is empty. Unable to create tensor")
+                for mem in mems:
+                    res, map = mem.map(Gst.MapFlags.READ)
+                    if not res:
+                        raise RuntimeError("Unable to map gst buffer memory")
 
-                nd_arr = np.ndarray(shape=input_tensor_info.shape,
-                                    buffer=map.data, dtype=input_tensor_info.data_type)
-                tensor = torch.Tensor(nd_arr, device=self.device).float(
-                ).unsqueeze(0)  # FIXME: support batching
+                    nd_arr = np.ndarray(shape=input_tensor_info.shape,
+                                        buffer=map.data, dtype=input_tensor_info.data_type)
+                    # Copy (and convert to float) directly into the preallocated batch slot
+                    self.batch_tensor[self.batch_slots].copy_(
+                        torch.from_numpy(nd_arr))
+                    self.batch_slots += 1
 
-                with torch.no_grad():
-                    output_tensor = self.model.forward(
-                        tensor)[0]  # FIXME: support batching
+                    # Unmap input Gst.Memory
+                    mem.unmap(map)
 
-                # Unmap input Gst.Memory
-                mem.unmap(map)
+                self.batch_buffers.append((src, len(mems)))
 
-                if isinstance(output_tensor, dict):
-                    for tensor in output_tensor.values():
-                        self.append_tensor_to_buffer(dst, tensor)
-                elif isinstance(output_tensor, torch.Tensor):
-                    self.append_tensor_to_buffer(dst, output_tensor)
-                else:
-                    raise RuntimeError(
-                        f"Unsupported inference output type: '{type(output_tensor)}'")
+                if self.batch_slots >= self.property["batch-size"]:
+                    return self.flush_batch()
 
-            # Copy timestamps from input buffer
-            dst.copy_into(src, Gst.BufferCopyFlags.TIMESTAMPS, 0, 0)
-            # Push buffer downstream
-            self.srcpad.push(dst)
+                if len(self.batch_buffers) == 1 and self.property["batch-timeout"]:
+                    self.batch_timer = threading.Timer(
+                        self.property["batch-timeout"] / 1000, self.on_batch_timeout)
+                    self.batch_timer.daemon = True
+                    self.batch_timer.start()
         except Exception as exc:
             Gst.error(f"Error during generating output buffer: {exc}")
             traceback.print_exc()
@@ -410,8 +435,89 @@ class InferencePyTorch(GstBase.BaseTransform):
 
         return Gst.FlowReturn.OK
 
+    def reserve_batch_slots(self, slots_num: int):
+        capacity = max(self.property["batch-size"], slots_num)
+        if self.batch_slots + slots_num > capacity:
+            # Buffer doesn't fit into current batch, run inference on what is already queued
+            ret = self.flush_batch()
+            if ret != Gst.FlowReturn.OK:
+                raise RuntimeError(f"Failed to push batch downstream: {ret}")
+
+        if self.batch_tensor is None or self.batch_tensor.shape[0] < capacity:
+            input_tensor_info = self.input_tensors_info[0]
+            self.batch_tensor = torch.empty(
+                (capacity, *input_tensor_info.shape), dtype=torch.float32, device=self.device)
+
+    def on_batch_timeout(self):
+        with self.batch_lock:
+            if self.batch_buffers:
+                ret = self.flush_batch()
+                if ret != Gst.FlowReturn.OK:
+                    Gst.warning(f"Failed to push partial batch on timeout: {ret}")
+
+    def reset_batch(self):
+        if self.batch_timer:
+            self.batch_timer.cancel()
+            self.batch_timer = None
+        self.batch_buffers.clear()
+        self.batch_slots = 0
+
+    # Must be called with batch_lock held
+    def drop_batch_tensor(self):
+        # Queued slots live in the current tensor, run inference on them before it is released
+        ret = self.flush_batch()
+        if ret != Gst.FlowReturn.OK:
+            Gst.warning(f"Failed to push partial batch: {ret}")
+        self.batch_tensor = None
+
+    # Must be called with batch_lock held
+    def flush_batch(self) -> Gst.FlowReturn:
+        if self.batch_timer:
+            self.batch_timer.cancel()
+            self.batch_timer = None
+
+        if not self.batch_buffers:
+            return Gst.FlowReturn.OK
+
+        buffers = list(self.batch_buffers)
+        slots_num = self.batch_slots
+        self.reset_batch()
+
+        try:
+            with torch.no_grad():
+                outputs = self.model.forward(self.batch_tensor[:slots_num])
+
+            ret = Gst.FlowReturn.OK
+            slot = 0
+            for src, n_slots in buffers:
+                dst = Gst.Buffer.new()
+                self.add_model_info(dst)
+
+                for output_tensor in (outputs[i] for i in range(slot, slot + n_slots)):
+                    if isinstance(output_tensor, dict):
+                        for tensor in output_tensor.values():
+                            self.append_tensor_to_buffer(dst, tensor)
+                    elif isinstance(output_tensor, torch.Tensor):
+                        self.append_tensor_to_buffer(dst, output_tensor)
+                    else:
+                        raise RuntimeError(
+                            f"Unsupported inference output type: '{type(output_tensor)}'")
+                slot += n_slots
+
+                # Copy timestamps from input buffer
+                dst.copy_into(src, Gst.BufferCopyFlags.TIMESTAMPS, 0, 0)
+                # Push buffer downstream
+                ret = self.srcpad.push(dst)
+                if ret != Gst.FlowReturn.OK:
+                    break
+            return ret
+        except Exception as exc:
+            Gst.error(f"Error during batch inference: {exc}")
+            traceback.print_exc()
+            return Gst.FlowReturn.ERROR
+
     def append_tensor_to_buffer(self, buf: Gst.Buffer, tensor: torch.Tensor):
-        tensor_nd_arr = tensor.numpy()
+        tensor_nd_arr = tensor.cpu().numpy()
 
         mem = self.gst_alloc.alloc(tensor_nd_arr.nbytes)
         if not mem:
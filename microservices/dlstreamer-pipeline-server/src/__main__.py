@@ -65,14 +65,54 @@ signal.signal(signal.SIGTERM, sig_cleanup_handler)
 signal.signal(signal.SIGABRT, sig_cleanup_handler)
 
 
-def watch_file_cbfunc():
-    log.info('Config file has been updated, restarting DL Streamer Pipeline Server with latest cofig ')
+def update_model_paths(cfg: PipelineServerConfig):
+    """Download models from model registry and point pipelines to them"""
+    model_registry_client = ModelRegistryClient()
+    if model_registry_client.is_ready:
+        model_registry_client.start_download_models(pipelines_cfg=cfg.get_pipelines_config())
+        model_path_dict = model_registry_client.get_model_path(cfg.get_pipelines_config())
+        log.info("Model Path Dict: %s", model_path_dict)
+        if model_path_dict:
+            cfg.update_pipeline_config(model_path_dict)
+    return model_registry_client
+
+
+def reload_config(app_cfg):
+    """Restart only the pipelines changed in app_cfg. Restart DL Streamer
+    Pipeline Server if other settings changed or the update fails."""
+    if pipeline_server_mgr is not None and app_cfg is not None:
+        try:
+            cfg = pipeline_server_mgr.config
+            cfg.set_app_config(app_cfg)
+            update_model_paths(cfg)
+            if pipeline_server_mgr.reconcile(cfg.get_app_config()):
+                log.info('Applied latest config without restarting DL Streamer Pipeline Server')
+                return
+        except Exception as e:
+            log.exception('Failed to apply latest config. {}'.format(e))
+    log.info('Restarting DL Streamer Pipeline Server with latest config')
     exit_handler()
 
 
+def watch_file_cbfunc():
+    log.info('Config file has been updated, applying latest config')
+    app_cfg = None
+    try:
+        app_cfg = pipeline_server_mgr.config.read_app_config()
+    except Exception as e:
+        log.exception('Failed to read config file. {}'.format(e))
+    reload_config(app_cfg)
+
+
 def callback_func(key, _json):
-    log.info('key {} has been updated in ETCD, restarting DL Streamer Pipeline Server with latest config '.format(key))
-    exit_handler()
+    log.info('key {} has been updated in ETCD, applying latest config'.format(key))
+    app_cfg = None
+    if key.rstrip('/').endswith('/config'):
+        try:
+            app_cfg = json.loads(_json) if isinstance(_json, (str, bytes)) else _json
+        except Exception as e:
+            log.exception('Failed to parse config from ETCD. {}'.format(e))
+    reload_config(app_cfg)
     
 
 def main(cfg: PipelineServerConfig):
@@ -107,13 +147,7 @@ def main(cfg: PipelineServerConfig):
     app_cfg = cfg.get_app_config()
     log.info(json.dumps(app_cfg,indent=4))
 
-    model_registry_client = ModelRegistryClient()
-    if model_registry_client.is_ready:
-        model_registry_client.start_download_models(pipelines_cfg=cfg.get_pipelines_config())
-        model_path_dict = model_registry_client.get_model_path(cfg.get_pipelines_config())
-        log.info("Model Path Dict: %s", model_path_dict)
-        if model_path_dict:
-            cfg.update_pipeline_config(model_path_dict)
+    model_registry_client = update_model_paths(cfg)
 
     # define pipeline server and pipelines
     pipeline_server_mgr = PipelineServerManager(cfg,pipeline_root="/var/cache/pipeline_root")
@@ -141,7 +175,7 @@ def main(cfg: PipelineServerConfig):
 
     # start opentelemetry exporter
     if strtobool(os.getenv("ENABLE_OPEN_TELEMETRY","false")):
-        otel_exporter = OpenTelemetryExporter()
+        otel_exporter = OpenTelemetryExporter(pipeline_server_mgr)
         # Start the metrics collection in a separate thread
         otel_exporter.start()
 
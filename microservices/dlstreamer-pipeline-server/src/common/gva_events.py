@@ -0,0 +1,76 @@
+#
+# Apache v2 license
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+#
+
+"""In-memory store of events added by the gva_event_meta gvapython scripts.
+
+A frame carries a small {"gva-events-ref": <id>} message (GVAJSONMeta) that
+points to its event list here, so adding an event does not serialize the
+events. They are serialized once, by gva_event_convert or by the publisher.
+Stored lists are never modified: every change stores a new list under a new
+reference, so tee'd buffers sharing a reference keep their own events.
+"""
+import itertools
+from collections import OrderedDict
+from threading import Lock
+
+EVENTS_REF_KEY = "gva-events-ref"
+_EVENTS_REF_PREFIX = '{{"{}":'.format(EVENTS_REF_KEY)
+# event lists kept in memory, least recently used are dropped first
+MAX_EVENT_LISTS = 4096
+
+
+class EventCache:
+    """Bounded table of immutable event lists keyed by reference id"""
+
+    def __init__(self, max_lists=MAX_EVENT_LISTS):
+        self._max_lists = max_lists
+        self._events = OrderedDict()
+        self._ids = itertools.count()
+        self._lock = Lock()
+
+    def put(self, events):
+        """Store events, return the reference message pointing to them"""
+        with self._lock:
+            ref = next(self._ids)
+            self._events[ref] = tuple(events)
+            while len(self._events) > self._max_lists:
+                self._events.popitem(last=False)
+        return '{}{}}}'.format(_EVENTS_REF_PREFIX, ref)
+
+    def get(self, message):
+        """Events referenced by message, None if message is not a reference
+        or its events were dropped from the cache
+        """
+        ref = parse_ref(message)
+        if ref is None:
+            return None
+        with self._lock:
+            events = self._events.get(ref)
+            if events is not None:
+                self._events.move_to_end(ref)
+            return events
+
+    def __len__(self):
+        with self._lock:
+            return len(self._events)
+
+
+def is_ref(message):
+    """True if message is an events reference"""
+    return message.startswith(_EVENTS_REF_PREFIX)
+
+
+def parse_ref(message):
+    """Reference id of an events reference message, None for other messages"""
+    if not is_ref(message):
+        return None
+    try:
+        return int(message[len(_EVENTS_REF_PREFIX):-1])
+    except ValueError:
+        return None
+
+
+cache = EventCache()
@@ -136,6 +136,13 @@ class PipelineServerConfig:
             
         def get_app_cfg(self):
             return self._app_cfg
+
+        def read_app_cfg(self):
+            """Read app config again from its source, without applying it"""
+            if self.eii_mode:
+                return self._cfg_mgr.get_app_config().get_dict()
+            with open("config.json", "r") as f:
+                return json.load(f)["config"]
                 
         def get_app_interface(self):
             return self._app_interface
@@ -196,6 +203,11 @@ class PipelineServerConfig:
     def get_app_config(self):
         return self._cfg_handler.get_app_cfg()
     
+    def read_app_config(self):
+        """Read the current app config from config.json or ETCD. The returned
+        config is not applied, see set_app_config."""
+        return self._cfg_handler.read_app_cfg()
+
     def get_app_interface(self):
         return self._cfg_handler.get_app_interface()
 
@@ -11,6 +11,8 @@ import os
 import queue
 import time
 import re
+import shutil
+import uuid
 
 from collections import defaultdict
 from distutils.util import strtobool
@@ -69,6 +71,7 @@ class PipelineInstance:
         self.is_running = False
         self.subscriber = None
         self.ingestor = None
+        self.publisher = None
 
     def _mutable_deepcopy(self, obj):
         """creates a deepcopy of mutable objects"""
@@ -223,7 +226,12 @@ class PipelineInstance:
 
         self.log.info('Starting Pipeline Server pipeline {} {} {}'.format(
             src, dest,model_params))
-        self.instance_id = self.pipeline.start(request=copy.deepcopy(self.request),
+        pipeline_request = copy.deepcopy(self.request)
+        if 'scheduling' in self.config and not (pipeline_request and 'scheduling' in pipeline_request):
+            # scheduling hints of the pipeline config, e.g. a low priority for image_ingestor
+            pipeline_request = pipeline_request or {}
+            pipeline_request['scheduling'] = self.config['scheduling']
+        self.instance_id = self.pipeline.start(request=pipeline_request,
                                                source=src,
                                                destination=dest,
                                                parameters=model_params,
@@ -261,63 +269,117 @@ class PipelineInstance:
             request (Dict[str, Any]): request carrying image path to execute pipeline on
         """
         MSG_PREFIX = "[{}]:".format(instance_id)
-        if not self.source_type == "image_ingestor":
-            raise ValueError("Request execution is supported only for image_ingestor pipelines")
-        if instance_id != self.instance_id:
-            raise ValueError("Invalid instance id- {}".format(instance_id))
+        self._validate_request_target(instance_id)
         
         DATA=None
         ERR=None
         if not self.is_async and not self.is_appdest:
             return None, "Pipeline destination must be appsink for synchronous request"
 
-        try:
-            # clear response queue to remove any stale data
-            while not self.publisher.image_publisher.response_queue.empty():
-                self.log.info("{} Clearing stale data from response queue".format(MSG_PREFIX))
-                try:
-                    self.publisher.image_publisher.response_queue.get_nowait()
-                except queue.Empty:
-                    break
-
-            self.ingestor.request_queue.put(request, timeout=REQUEST_PUT_TIMEOUT)
-            self.log.info("{} Request submitted: {}".format(MSG_PREFIX, request))
-            DATA="Request submitted. Check destination for response."
-            ERR = None
-        except queue.Full:
-            ERR = "Could not execute requeust due to timeout."
-            self.log.error(MSG_PREFIX, ERR)
+        correlation_id, ERR = self._submit_request(request, REQUEST_PUT_TIMEOUT)
+        if ERR:
+            self.log.error("{} {}".format(MSG_PREFIX, ERR))
             return DATA, ERR
+        DATA="Request submitted. Check destination for response."
         
         if not self.is_async:
-        # wait for response
-            if not isinstance(self.publisher.image_publisher,ImagePublisher):
-                ERR = "Invalid publisher type for image ingestor"
-                DATA=None
-                self.log.error(MSG_PREFIX, ERR)
+            RESPONSE_TIMEOUT = 5
+            response = self._get_response(correlation_id,
+                                          request.get("timeout", RESPONSE_TIMEOUT),
+                                          request.get("publish_frame", False))
+            ERR = response.get("error")
+            if ERR:
+                DATA = None
+                self.log.error("{} {}".format(MSG_PREFIX, ERR))
             else:
-                try:
-                    RESPONSE_TIMEOUT = 5
-                    timeout = request.get("timeout", RESPONSE_TIMEOUT)
-                    response = self.publisher.image_publisher.response_queue.get(timeout=timeout)    # only one publisher for image_ingestor
-                    # self.log.info("Request executed. Response: {}".format(response))
-                    frame, metadata = response     # frame-bytes, metadata
-
-                    publish_frame = request.get("publish_frame", False)
-                    if not publish_frame:
-                        enc_frame = ""
-                    else:
-                        enc_frame = base64.b64encode(frame).decode("utf-8")
-
-                    resp_data = {"metadata":metadata, "blob":enc_frame} 
-                    DATA= json.dumps(resp_data) 
-                    ERR= None
-                except queue.Empty:
-                    DATA= None
-                    ERR= "Request execution timed out"
-                    self.log.error(MSG_PREFIX, ERR)
+                DATA = json.dumps({"metadata": response["metadata"], "blob": response["blob"]})
         return DATA, ERR
 
+    def execute_batch_request(self,
+                              instance_id: str,
+                              requests: List[Dict[str, Any]],
+                              timeout: float=5,
+                              publish_frame: bool=False,
+                              REQUEST_PUT_TIMEOUT=5)->Tuple[Union[List[Dict[str, Any]], None], Union[None, str]]:
+        """execute a batch of requests on a queued image_ingestor pipeline.
+        All requests are submitted before waiting, so images are pipelined
+        through the inference elements.
+
+        Args:
+            instance_id (str): pipeline instance id
+            requests (List[Dict[str, Any]]): requests carrying image source to execute pipeline on
+            timeout (float): seconds to wait for all responses of a synchronous pipeline
+            publish_frame (bool): include base64 encoded frames in the responses
+
+        Returns:
+            Tuple: results in request order and error message. A result holds
+            the correlation_id of its request and, for synchronous pipelines,
+            metadata and blob or an error
+        """
+        MSG_PREFIX = "[{}]:".format(instance_id)
+        self._validate_request_target(instance_id)
+        if not self.is_async and not self.is_appdest:
+            return None, "Pipeline destination must be appsink for synchronous request"
+
+        results = []
+        for request in requests:
+            correlation_id, err = self._submit_request(request, REQUEST_PUT_TIMEOUT)
+            result = {"correlation_id": correlation_id}
+            if err:
+                self.log.error("{} {}".format(MSG_PREFIX, err))
+                result["error"] = err
+            results.append(result)
+        self.log.info("{} Batch of {} requests submitted".format(MSG_PREFIX, len(requests)))
+
+        if not self.is_async:
+            deadline = time.time() + timeout
+            for result in results:
+                if "error" not in result:
+                    result.update(self._get_response(result["correlation_id"],
+                                                     max(0, deadline - time.time()),
+                                                     publish_frame))
+        return results, None
+
+    def _validate_request_target(self, instance_id: str)->None:
+        if not self.source_type == "image_ingestor":
+            raise ValueError("Request execution is supported only for image_ingestor pipelines")
+        if instance_id != self.instance_id:
+            raise ValueError("Invalid instance id- {}".format(instance_id))
+
+    def _submit_request(self,
+                        request: Dict[str, Any],
+                        put_timeout: float)->Tuple[str, Union[None, str]]:
+        """Tag request with a correlation id and enqueue it to the image ingestor.
+        For synchronous pipelines the response is registered before enqueueing,
+        so concurrent callers each receive their own response.
+        """
+        correlation_id = str(request.get("correlation_id") or uuid.uuid4().hex)
+        request = dict(request, correlation_id=correlation_id)
+        if not self.is_async:
+            if not isinstance(self.publisher.image_publisher, ImagePublisher):
+                return correlation_id, "Invalid publisher type for image ingestor"
+            self.publisher.image_publisher.expect(correlation_id)
+        try:
+            self.ingestor.request_queue.put(request, timeout=put_timeout)
+        except queue.Full:
+            if not self.is_async:
+                self.publisher.image_publisher.cancel(correlation_id)
+            return correlation_id, "Could not execute requeust due to timeout."
+        self.log.debug("Request submitted: {}".format(correlation_id))
+        return correlation_id, None
+
+    def _get_response(self,
+                      correlation_id: str,
+                      timeout: float,
+                      publish_frame: bool)->Dict[str, Any]:
+        """Wait for the response of a submitted request"""
+        response = self.publisher.image_publisher.wait(correlation_id, timeout)
+        if response is None:
+            return {"error": "Request execution timed out"}
+        frame, metadata = response     # frame-bytes, metadata
+        enc_frame = base64.b64encode(frame).decode("utf-8") if publish_frame else ""
+        return {"metadata": metadata, "blob": enc_frame}
+
     def get_status(self):
         """Return status dict of pipeline instance"""
         if self.instance_id is not None:
@@ -337,6 +399,18 @@ class PipelineInstance:
         self.pipeline = None
         self.log.info("Pipeline instance stopped: {}".format(self.instance_id))
 
+    def get_publisher_status(self)->List[Dict[str,Any]]:
+        """Queue occupancy and drop counters of the destination publishers"""
+        if self.publisher is None:
+            return []
+        return self.publisher.get_queue_stats()
+
+    def get_encoder_status(self)->Optional[Dict[str,Any]]:
+        """Encode latency histogram and queue depth of the publisher encoder pool"""
+        if self.publisher is None:
+            return None
+        return self.publisher.get_encoder_stats()
+
 
 class Pipeline:
     """Manages a single pipeline in the pipeline server. Handles spawns a new 
@@ -466,20 +540,27 @@ class PipelineServerManager:
         self.server_running = False
         self.pipeline_path = os.path.join(self.pipeline_root, self.pipeline_name)
         self.gencam_serial_availability = dict()   # anytime, allow only 1 gencam serial to be used
+        self._autostarted = set()   # instance ids started with the pipeline config payload
 
         if not os.path.isdir(self.pipeline_path):
             os.makedirs(self.pipeline_path)
         self.log.info("PipelineServerManager initialized")
 
 
-    def _initialize_pipelines(self)->None:
-        """Initialize pipelines from app config"""
+    def _initialize_pipelines(self, versions: Optional[List[str]]=None)->None:
+        """Initialize pipelines from app config
+
+        Args:
+            versions (List[str], optional): initialize only these pipelines. Defaults to all.
+        """
         pipeline_configs = self.app_config['pipelines']
         publishers = self.config.get_publishers()
                 
         for i, pipeline_cfg in enumerate(pipeline_configs):
             #TODO: add camera serial check
             pipeline_version = pipeline_cfg['name']
+            if versions is not None and pipeline_version not in versions:
+                continue
             sub_cfg = None
             pub_cfg = None
             sub_topic = None
@@ -531,11 +612,128 @@ class PipelineServerManager:
         # start pipelines with autostart enabled
         for ver, pipeline in self._PIPELINES.items():
             if pipeline.auto_start:
-                # try to start pipeline instance with default request
-                request = pipeline.pipeline_config.get("payload")
-        
-                instance_id = pipeline.start(request=request)
-                self.log.info("Autostarted pipeline: {} ID: {}".format(ver, instance_id))                
+                self._autostart(ver, pipeline)
+
+    def _autostart(self, version: str, pipeline: Pipeline)->str:
+        """start pipeline instance with default request from pipeline config"""
+        request = pipeline.pipeline_config.get("payload")
+
+        instance_id = pipeline.start(request=request)
+        self._autostarted.add(instance_id)
+        self.log.info("Autostarted pipeline: {} ID: {}".format(version, instance_id))
+        return instance_id
+
+    def reconcile(self, app_config: Dict[str, Any])->bool:
+        """Apply an updated app config without restarting the pipeline server.
+
+        Pipelines are matched by name. Only pipelines that were added, removed
+        or whose configuration changed are touched: running instances of a
+        changed pipeline are stopped and started again with their original
+        request on the new configuration, autostarted ones with the new payload.
+        Inference elements whose model-instance-id and definition did not
+        change keep their loaded model.
+
+        Args:
+            app_config (Dict[str, Any]): new app config ("config" section of config.json)
+
+        Returns:
+            bool: True if the config was applied, False if settings other than
+                pipelines changed and the server must be restarted
+        """
+        old_settings = {k: v for k, v in self.app_config.items() if k != 'pipelines'}
+        new_settings = {k: v for k, v in app_config.items() if k != 'pipelines'}
+        if old_settings != new_settings:
+            self.log.info("Settings other than pipelines changed, restart required")
+            return False
+
+        old_pipelines = {p['name']: p for p in self.app_config.get('pipelines', [])}
+        new_pipelines = {p['name']: p for p in app_config.get('pipelines', [])}
+        removed = [v for v in old_pipelines if v not in new_pipelines]
+        added = [v for v in new_pipelines if v not in old_pipelines]
+        changed = [v for v in new_pipelines
+                   if v in old_pipelines and new_pipelines[v] != old_pipelines[v]]
+        self.log.info("Reconciling pipelines. Added: {} Removed: {} Changed: {}".format(
+            added, removed, changed))
+
+        restart_requests = {}
+        for version in removed + changed:
+            restart_requests[version] = self._stop_pipeline_instances(version)
+            self._release_model_instances(old_pipelines[version].get('pipeline', ''),
+                                          new_pipelines.get(version, {}).get('pipeline'))
+        for version in removed:
+            pipeline = self._PIPELINES.pop(version, None)
+            if pipeline is not None:
+                shutil.rmtree(pipeline.pipeline_dir, ignore_errors=True)
+
+        self.app_config = app_config
+        if not (added or removed or changed):
+            return True
+        self._initialize_pipelines(versions=added + changed)
+        self.pserv.pipeline_manager.reload_pipelines()
+
+        for version in added + changed:
+            pipeline = self._PIPELINES[version]
+            for request in restart_requests.get(version, []):
+                _, err = self.start_instance(self.pipeline_name, version, request)
+                if err:
+                    self.log.error("Failed to restart pipeline {}: {}".format(version, err))
+            if pipeline.auto_start:
+                self._autostart(version, pipeline)
+        return True
+
+    def _stop_pipeline_instances(self, version: str)->List[Optional[Dict[str, Any]]]:
+        """Stop running instances of a pipeline.
+
+        Returns:
+            List: requests of stopped instances that were not autostarted
+        """
+        requests = []
+        for instance_id, pdata in list(Pipeline._INSTANCES.items()):
+            pinst = pdata.get("obj")
+            if pinst is None or pinst.version != version:
+                continue
+            if pinst.is_running:
+                if instance_id not in self._autostarted:
+                    requests.append(pinst.request)
+                self.stop_instance(instance_id)
+            self._autostarted.discard(instance_id)
+            Pipeline._INSTANCES.pop(instance_id, None)
+            if version in self._PIPELINES:
+                self._PIPELINES[version].instance_refcount -= 1
+        return requests
+
+    def _release_model_instances(self, old_launch_str: str, new_launch_str: Optional[str])->None:
+        """Forget model-instance-ids whose element was removed or redefined so
+        that their model is loaded again on the next start"""
+        new_elements = {minst_id: elem for _, minst_id, elem
+                        in self._get_model_instance_ids(new_launch_str or '')}
+        for gvaelement, minst_id, elem in self._get_model_instance_ids(old_launch_str):
+            if minst_id is None or new_elements.get(minst_id) == elem:
+                continue
+            self._GVAELEMENT_MODEL_INSTANCE_ID[gvaelement].pop(minst_id, None)
+            self.pserv.pipeline_manager.release_model_instance(minst_id)
+            self.log.info("Released model-instance-id: {}".format(minst_id))
+
+    @staticmethod
+    def _get_model_instance_ids(launch_str: str)->List[Tuple[str, Optional[str], str]]:
+        """gva inference elements in a launch string
+
+        Returns:
+            List: tuples of element type, model-instance-id (None if not set) and element definition
+        """
+        elements = []
+        for elem in launch_str.split('!'):
+            if "gvadetect" in elem:
+                gvaelement = "gvadetect"
+            elif "gvaclassify" in elem:
+                gvaelement = "gvaclassify"
+            elif "gvainference" in elem:
+                gvaelement = "gvainference"
+            else:
+                continue
+            match = re.search(r"\s*model-instance-id\s*=\s*(\w+)\s*", elem)
+            elements.append((gvaelement, match.group(1) if match else None, elem.strip()))
+        return elements
     
     def _get_pinstance_data(self, 
                             instance_id: str)->Tuple[PipelineInstance, Dict[str,Any]]:
@@ -573,13 +771,26 @@ class PipelineServerManager:
             self.log.error(errmsg)
             return None, errmsg
 
+    def _add_publisher_status(self, status: Dict[str, Any])->Dict[str, Any]:
+        """add destination publisher queue and encoder stats to pipeline instance status"""
+        if status:
+            inst_book = Pipeline._INSTANCES.get(status.get("id"))
+            if inst_book and "obj" in inst_book:
+                status["publishers"] = inst_book["obj"].get_publisher_status()
+                encoder_status = inst_book["obj"].get_encoder_status()
+                if encoder_status is not None:
+                    status["encoder"] = encoder_status
+        return status
+
     def get_all_instance_status(self)-> List[Dict]:
         """GET /pipelines/status"""
-        return self.pserv.pipeline_manager.get_all_instance_status()
+        return [self._add_publisher_status(status)
+                for status in self.pserv.pipeline_manager.get_all_instance_status()]
 
     def get_instance_status(self, instance_id: str) -> List[Dict]:
         """GET /pipelines/{instance_id}/status"""
-        return self.pserv.pipeline_manager.get_instance_status(instance_id)
+        return self._add_publisher_status(
+            self.pserv.pipeline_manager.get_instance_status(instance_id))
 
     def stop_instance(self, 
                       instance_id: str)->str:
@@ -610,19 +821,8 @@ class PipelineServerManager:
         
         MODEL_IDS_TO_SET={"gvadetect":[],"gvaclassify":[],"gvainference":[]}    # update instance_id once pipeline is started
         
-        for elem in launch_str.split('!'):
-            if "gvadetect" in elem:
-                gvaelement = "gvadetect"
-            elif "gvaclassify" in elem:
-                gvaelement = "gvaclassify"
-            elif "gvainference" in elem:
-                gvaelement = "gvainference"
-            else:
-                continue
-            
+        for gvaelement, minst_id, _ in self._get_model_instance_ids(launch_str):
             model_inst_data = self._GVAELEMENT_MODEL_INSTANCE_ID[gvaelement]
-            match = re.search(r"\s*model-instance-id\s*=\s*(\w+)\s*", elem)
-            minst_id = match.group(1) if match else None
             if minst_id is not None:    # check if model instance id is errored out
                 if minst_id in model_inst_data:
                     if model_inst_data[minst_id].get('id') is not None:
@@ -665,6 +865,28 @@ class PipelineServerManager:
             self.log.exception("Failed to execute request.{} {}".format(instance_id, e))
             return None, "Failed to execute request"
 
+    def execute_batch_request_on_instance(self,
+                                          name:str,
+                                          version:str,
+                                          instance_id:str,
+                                          requests:List[Dict[str,Any]],
+                                          timeout:float=5,
+                                          publish_frame:bool=False)->Tuple[Union[List[Dict[str,Any]], None], Union[None, str]]:
+        """POST /pipelines/{name}/{version}/{instance_id}/batch"""
+        try:
+            pinstance, _ = self._get_pinstance_data(instance_id)
+        except KeyError:
+            return None, "Pipeline instance not found"
+
+        try:
+            return pinstance.execute_batch_request(instance_id, requests,
+                                                   timeout=timeout,
+                                                   publish_frame=publish_frame,
+                                                   REQUEST_PUT_TIMEOUT=5)
+        except Exception as e:
+            self.log.exception("Failed to execute batch request.{} {}".format(instance_id, e))
+            return None, "Failed to execute batch request"
+
     def stop_pipelines(self)-> None:
         """Stop any running pipeline instances"""
         self.log.info('Stopping Pipelines ...')        
@@ -8,9 +8,12 @@
  and interacting with the model registry microservice."""
 # pylint: disable=broad-exception-caught
 import os
-import io
+import hashlib
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from typing import Union
 import threading
+import time
 import json
 import zipfile
 from enum import Enum
@@ -20,6 +23,10 @@ from pydantic import BaseModel
 from pydantic import field_validator
 from src.common.log import get_logger
 
+# delay before resuming an interrupted download, doubled for every retry
+DOWNLOAD_RETRY_DELAY = 1
+DOWNLOAD_RETRY_MAX_DELAY = 30
+
 class RequestMethod(Enum):
     """Request Method Enum"""
     GET = "get"
@@ -78,14 +85,25 @@ class ModelRegistryClient:
                 var_name="MR_SAVED_MODELS_DIR",
                 default_value="./mr_models")
 
+            # content addressed store of downloaded artifacts, see _get_model_artifacts_zip_file
+            self._cache_dir = os.path.join(self._saved_models_dir, ".cache")
+            self._download_workers = self._get_int_env_var_or_default_value(
+                var_name="MR_DOWNLOAD_WORKERS", default_value=4)
+            self._download_retries = self._get_int_env_var_or_default_value(
+                var_name="MR_DOWNLOAD_RETRIES", default_value=3)
+            # one download at a time per model, concurrent requests for it wait and reuse it
+            self._model_locks = {}
+            self._model_locks_lock = threading.Lock()
+
             if self._url:
                 self.is_ready = True
 
             self._logger.debug(
                 "ModelRegistryClient initialized with url=%s, request_timeout=%s, "
-                "saved_models_dir=%s, verify_cert=%s, is_ready=%s", self._url, 
+                "saved_models_dir=%s, verify_cert=%s, download_workers=%s, "
+                "download_retries=%s, is_ready=%s", self._url,
                 self._request_timeout, self._saved_models_dir, self._verify_cert,
-                self.is_ready)
+                self._download_workers, self._download_retries, self.is_ready)
 
             if not self.is_ready:
                 self._logger.error("Model Registry Client is not ready. "
@@ -148,8 +166,31 @@ class ModelRegistryClient:
 
         return value
 
+    def _get_int_env_var_or_default_value(self, var_name: str, default_value: int) -> int:
+        """
+        Returns the positive integer value of an environment variable, or a default
+        if not set, empty or not a positive integer.
+
+        Args:
+            var_name (str): The name of the environment variable.
+            default_value (int): The default value.
+
+        Returns:
+            int: The value of the environment variable or the default value.
+        """
+        try:
+            value = int(os.getenv(var_name, str(default_value)))
+            if value > 0:
+                return value
+        except ValueError:
+            pass
+        return self._get_env_var_or_default_value(var_name=var_name,
+                                                  default_value=default_value,
+                                                  use_default=True)
+
     def _send_request(self, url: str, method: RequestMethod = RequestMethod.GET,
-                       params=None, data=None, stream: bool=False) -> Response:
+                       params=None, data=None, stream: bool=False,
+                       headers: dict=None) -> Response:
         """Sends a HTTP/HTTPS request and retries the request 2 times while attempting
         to obtain a new JWT if the response's status code is 401
 
@@ -159,6 +200,7 @@ class ModelRegistryClient:
             data: A dictionary, list of tuples, bytes or a file object to send to the specified url
             stream: A Boolean indication if the response should be immediately downloaded (False)
             or streamed (True).
+            headers: A dictionary of HTTP headers to send with the request.
         """
         resp_s_code = None
         num_retries = 0
@@ -168,6 +210,7 @@ class ModelRegistryClient:
             while (resp_s_code is None or resp_s_code == 401) and num_retries < max_retries:
                 response = requests.request(method=method.value, url=url,
                                             params=params, data=data,
+                                            headers=headers,
                                             # headers=self._auth_header,
                                             verify=self._verify_cert,
                                             timeout=self._request_timeout,
@@ -246,46 +289,149 @@ class ModelRegistryClient:
 
         return model
 
-    def _get_model_artifacts_zip_file_data(self, model_id: str):
-        """Get the zip file data for a model using its id
+    def _get_model_artifacts_zip_file(self, model_id: str) -> Union[str, None]:
+        """Get the path of the zip file containing the artifacts for a model using its id.
+
+        Artifacts are kept in a content addressed cache in the saved models
+        directory: ``.cache/sha256/<digest>.zip`` with ``.cache/models/<model_id>``
+        holding the digest of the model's zip file. A model found in the cache
+        is not downloaded again.
 
         Args:
             model_id (str): The id of the model
 
-        Raises:
-            ValueError: The content type is not application/zip.
-            ValueError: The received file \"{filename}\" is not a ZIP file.
-
         Returns:
-            bytes | None: The zip file data. Otherwise, None
+            str | None: The path of the zip file. Otherwise, None
         """
-        # if not self._is_connected:
-        #     self._logger.error("Failed to get model artifacts: Not connected to the " \
-        #                        "model registry microservice.")
-        #     return None
-
-        zip_file_data = None
+        zip_file_path = None
         try:
+            index_path = os.path.join(self._cache_dir, "models", model_id)
+            if os.path.exists(index_path):
+                with open(index_path, "r", encoding="utf-8") as index_file:
+                    digest = index_file.read().strip()
+                cached_path = os.path.join(self._cache_dir, "sha256", digest + ".zip")
+                if os.path.exists(cached_path):
+                    self._logger.debug(
+                        "Zip file containing artifacts for a model with ID: %s found in cache.",
+                        model_id)
+                    return cached_path
+
             self._logger.debug(
                 "Zip file containing artifacts for a model with ID: %s requested.",
                 model_id)
 
-            resp = self._send_request(url=self._url+"/models/"+model_id+"/files",
-                                      method=RequestMethod.GET, stream=True)
-
-            content_type = resp.headers.get("Content-Type")
-            if content_type != "application/zip":
-                raise ValueError("The content type is not application/zip.")
-
-            zip_file_data = resp.content
+            os.makedirs(os.path.join(self._cache_dir, "sha256"), exist_ok=True)
+            os.makedirs(os.path.dirname(index_path), exist_ok=True)
+            part_path = os.path.join(self._cache_dir, model_id + ".zip.part")
+            digest = self._download_file(self._url+"/models/"+model_id+"/files", part_path)
+
+            with zipfile.ZipFile(part_path, 'r') as zip_ref:
+                corrupt_member = zip_ref.testzip()
+            if corrupt_member is not None:
+                os.remove(part_path)
+                raise ValueError(f"Checksum mismatch for {corrupt_member} in the "
+                                 f"artifacts for model: {model_id}")
+
+            zip_file_path = os.path.join(self._cache_dir, "sha256", digest + ".zip")
+            os.replace(part_path, zip_file_path)
+            with open(index_path, "w", encoding="utf-8") as index_file:
+                index_file.write(digest)
             self._logger.debug(
-                "Zip file containing artifacts for a model with ID: %s returned.",
-                model_id)
+                "Zip file containing artifacts for a model with ID: %s returned (sha256: %s).",
+                model_id, digest)
+        except PermissionError:
+            raise
         except Exception as e:
             self._logger.error("Exception occurred while getting artifacts for model:"
                                "%s", e)
 
-        return zip_file_data
+        return zip_file_path
+
+    def _download_file(self, url: str, file_path: str) -> str:
+        """Stream the response for url to file_path in chunks. An interrupted
+        download is resumed with a Range request up to MR_DOWNLOAD_RETRIES times,
+        after an exponential backoff capped at DOWNLOAD_RETRY_MAX_DELAY seconds.
+        A partial file left by an earlier attempt is resumed as well.
+
+        Args:
+            url (str): The URL of the zip file
+            file_path (str): The path to save the file to
+
+        Raises:
+            ValueError: The content type is not application/zip.
+            ValueError: The size of the downloaded file does not match.
+
+        Returns:
+            str: The hex SHA-256 digest of the file
+        """
+        chunk_size = 1024 * 1024
+        offset = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+        expected_size = None
+        num_retries = 0
+        sha256 = hashlib.sha256()
+        if offset:
+            with open(file_path, "rb") as part_file:
+                for chunk in iter(lambda: part_file.read(chunk_size), b""):
+                    sha256.update(chunk)
+
+        while True:
+            headers = {"Range": f"bytes={offset}-"} if offset else None
+            resp = self._send_request(url=url, method=RequestMethod.GET,
+                                      stream=True, headers=headers)
+            try:
+                if resp is None:
+                    raise requests.exceptions.ConnectionError(
+                        "No response from the model registry microservice")
+                if resp.status_code == 416:
+                    # partial file is already complete or invalid, start over
+                    offset, sha256 = 0, hashlib.sha256()
+                    os.remove(file_path)
+                    raise requests.exceptions.RequestException("Range not satisfiable")
+                if resp.status_code not in (200, 206):
+                    raise ValueError(f"Status Code: {resp.status_code}")
+
+                content_type = resp.headers.get("Content-Type")
+                if content_type != "application/zip":
+                    raise ValueError("The content type is not application/zip.")
+
+                if resp.status_code == 206:
+                    content_range = resp.headers.get("Content-Range", "")
+                    total = content_range.rsplit("/", 1)[-1]
+                    expected_size = int(total) if total.isdigit() else None
+                else:
+                    if offset:
+                        # the server does not support ranges, start over
+                        self._logger.debug("Range requests are not supported, "
+                                           "restarting download of %s", url)
+                        offset, sha256 = 0, hashlib.sha256()
+                    content_length = resp.headers.get("Content-Length")
+                    expected_size = int(content_length) if content_length else None
+
+                with open(file_path, "r+b" if offset else "wb") as part_file:
+                    part_file.seek(offset)
+                    part_file.truncate()
+                    for chunk in resp.iter_content(chunk_size=chunk_size):
+                        part_file.write(chunk)
+                        sha256.update(chunk)
+                        offset += len(chunk)
+                break
+            except requests.exceptions.RequestException as e:
+                num_retries = num_retries + 1
+                if num_retries > self._download_retries:
+                    raise
+                delay = min(DOWNLOAD_RETRY_DELAY * 2 ** (num_retries - 1), DOWNLOAD_RETRY_MAX_DELAY)
+                self._logger.warning("Download of %s interrupted at %s bytes (%s), "
+                                     "resuming in %s s (attempt %s of %s)", url, offset, e,
+                                     delay, num_retries, self._download_retries)
+                time.sleep(delay)
+            finally:
+                if resp is not None:
+                    resp.close()
+
+        if expected_size is not None and offset != expected_size:
+            os.remove(file_path)
+            raise ValueError(f"Received {offset} bytes, expected {expected_size} bytes.")
+        return sha256.hexdigest()
 
     def get_model_path(self, pipelines_cfg: list) -> dict:
         """
@@ -356,6 +502,9 @@ class ModelRegistryClient:
         """Download and save the artifacts for models locally based on the 
         `model_params` in the provided  `pipelines_cfg` parameter.
 
+        Models are downloaded in parallel by up to MR_DOWNLOAD_WORKERS threads.
+        A model referenced by several pipelines is downloaded once.
+
         Args:
             pipelines_cfg (list): A list of configurations associated to each pipeline
         
@@ -363,7 +512,6 @@ class ModelRegistryClient:
             tuple: The flag where the model(s) artifacts was saved successfully, error_message
         """
         is_artifacts_saved = False
-        deployment_dirpath = None
         msg = None
 
         # if not self._is_connected:
@@ -376,73 +524,88 @@ class ModelRegistryClient:
         if pipelines_cfg:
             self._pipelines_cfg = pipelines_cfg
 
-        try:
-            for pipeline in self._pipelines_cfg:
-                list_pipeline_model_params = pipeline.get("model_params")
-                if list_pipeline_model_params:
-                    for pipeline_model_params in list_pipeline_model_params:
-                            msg = None
-                            params = ModelQueryParams(**pipeline_model_params)
-                            model = self._get_model(params)
-                            if not model:
-                                msg = "Model is not found."
-                                raise ValueError(msg)
+        downloads = []
+        for pipeline in self._pipelines_cfg or []:
+            list_pipeline_model_params = pipeline.get("model_params")
+            if list_pipeline_model_params:
+                for pipeline_model_params in list_pipeline_model_params:
+                    downloads.append((pipeline, pipeline_model_params))
+        if not downloads:
+            return is_artifacts_saved, msg
+
+        with ThreadPoolExecutor(max_workers=min(self._download_workers,
+                                                len(downloads))) as executor:
+            results = list(executor.map(lambda args: self._download_model(*args),
+                                        downloads))
+
+        is_artifacts_saved = all(is_saved for is_saved, _ in results)
+        failed_msgs = [msg for is_saved, msg in results if not is_saved and msg]
+        if failed_msgs:
+            msg = " ".join(failed_msgs)
+        else:
+            msg = " ".join(msg for _, msg in results if msg) or None
+        return is_artifacts_saved, msg
 
-                            model_id = model["id"]
+    def _get_model_lock(self, model_dirpath: str) -> threading.Lock:
+        with self._model_locks_lock:
+            return self._model_locks.setdefault(model_dirpath, threading.Lock())
 
-                            models_pipeline_dirpath = (self._saved_models_dir + \
-                                "/" + "_".join((model["name"],
-                                                "m-"+model["version"],
-                                                model["precision"][0]))).lower()
-
-                            deployment_dirpath = (
-                                models_pipeline_dirpath + "/deployment").lower()
-
-                            dir_info = ("Directory", models_pipeline_dirpath)
-                            is_already_saved = False
-
-                            if not (os.path.exists(deployment_dirpath) or \
-                                    os.path.exists(models_pipeline_dirpath)):
-
-                                self._logger.info("Downloading model files...")
-                                zip_file_data = self._get_model_artifacts_zip_file_data(
-                                    model_id)
-
-                                if zip_file_data:
-                                    if not os.path.exists(models_pipeline_dirpath):
-                                        os.makedirs(models_pipeline_dirpath)
-
-                                    with zipfile.ZipFile(io.BytesIO(zip_file_data), 'r') as zip_ref:
-                                        ignored_filenames = (".DS_Store", "__MACOSX")
-                                        for file_info in zip_ref.infolist():
-                                            file_root_dirname = zip_ref.filelist[0].filename
-                                            fname = file_info.filename
-                                            if not "deployment" in file_root_dirname:
-                                                fname = fname.replace(
-                                                    file_root_dirname, "")
-                                            if fname and \
-                                                not file_info.is_dir() and \
-                                                    not any(name in fname for name in ignored_filenames):
-                                                extract_path = os.path.join(models_pipeline_dirpath, fname)
-                                                os.makedirs(os.path.dirname(extract_path), exist_ok=True)
-                                                file_info.filename = os.path.basename(file_info.filename)
-                                                zip_ref.extract(file_info, os.path.dirname(extract_path))
-
-                                    is_artifacts_saved = True
-                                else:
-                                    msg = "Model artifacts are not found."
-                            else:
-                                is_already_saved = True
-                                is_artifacts_saved = True
+    def _download_model(self, pipeline: dict, pipeline_model_params: dict):
+        """Download and save the artifacts for a model of a pipeline
 
-                            if os.path.exists(deployment_dirpath):
-                                dir_info = ("Deployment directory", deployment_dirpath)
+        Args:
+            pipeline (dict): The configuration of the pipeline
+            pipeline_model_params (dict): The model query parameters
 
-                            if msg is None:
-                                verb_phrase = "already exists " if is_already_saved else "was created "
-                                msg = f"{dir_info[0]} ({dir_info[1]}) {verb_phrase}" \
-                                    f"for the {pipeline['name']} pipeline."
-                                self._logger.info(msg)
+        Returns:
+            tuple: The flag where the model artifacts were saved successfully, message
+        """
+        is_artifacts_saved = False
+        msg = None
+        try:
+            params = ModelQueryParams(**pipeline_model_params)
+            model = self._get_model(params)
+            if not model:
+                msg = "Model is not found."
+                raise ValueError(msg)
+
+            model_id = model["id"]
+
+            models_pipeline_dirpath = (self._saved_models_dir + \
+                "/" + "_".join((model["name"],
+                                "m-"+model["version"],
+                                model["precision"][0]))).lower()
+
+            deployment_dirpath = (
+                models_pipeline_dirpath + "/deployment").lower()
+
+            dir_info = ("Directory", models_pipeline_dirpath)
+            is_already_saved = False
+
+            with self._get_model_lock(models_pipeline_dirpath):
+                if not (os.path.exists(deployment_dirpath) or \
+                        os.path.exists(models_pipeline_dirpath)):
+
+                    self._logger.info("Downloading model files...")
+                    zip_file_path = self._get_model_artifacts_zip_file(model_id)
+
+                    if zip_file_path:
+                        self._extract_model_artifacts(zip_file_path, models_pipeline_dirpath)
+                        is_artifacts_saved = True
+                    else:
+                        msg = "Model artifacts are not found."
+                else:
+                    is_already_saved = True
+                    is_artifacts_saved = True
+
+            if os.path.exists(deployment_dirpath):
+                dir_info = ("Deployment directory", deployment_dirpath)
+
+            if msg is None:
+                verb_phrase = "already exists " if is_already_saved else "was created "
+                msg = f"{dir_info[0]} ({dir_info[1]}) {verb_phrase}" \
+                    f"for the {pipeline['name']} pipeline."
+                self._logger.info(msg)
 
         except Exception as e:
             if isinstance(e, PermissionError):
@@ -455,3 +618,35 @@ class ModelRegistryClient:
                                "%s", e)
 
         return is_artifacts_saved, msg
+
+    def _extract_model_artifacts(self, zip_file_path: str, models_pipeline_dirpath: str):
+        """Extract the artifacts from the zip file on disk. Files are extracted
+        to a temporary directory renamed once complete, so an interrupted
+        extraction is not mistaken for saved artifacts.
+
+        Args:
+            zip_file_path (str): The path of the zip file
+            models_pipeline_dirpath (str): The directory to save the artifacts to
+        """
+        extract_dirpath = models_pipeline_dirpath + ".part"
+        if os.path.exists(extract_dirpath):
+            shutil.rmtree(extract_dirpath)
+        os.makedirs(extract_dirpath)
+
+        with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
+            ignored_filenames = (".DS_Store", "__MACOSX")
+            for file_info in zip_ref.infolist():
+                file_root_dirname = zip_ref.filelist[0].filename
+                fname = file_info.filename
+                if not "deployment" in file_root_dirname:
+                    fname = fname.replace(
+                        file_root_dirname, "")
+                if fname and \
+                    not file_info.is_dir() and \
+                        not any(name in fname for name in ignored_filenames):
+                    extract_path = os.path.join(extract_dirpath, fname)
+                    os.makedirs(os.path.dirname(extract_path), exist_ok=True)
+                    file_info.filename = os.path.basename(file_info.filename)
+                    zip_ref.extract(file_info, os.path.dirname(extract_path))
+
+        os.replace(extract_dirpath, models_pipeline_dirpath)
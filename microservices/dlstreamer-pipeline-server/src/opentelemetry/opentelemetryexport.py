@@ -8,7 +8,6 @@ import time
 import os
 import psutil
 import threading
-import requests
 from opentelemetry import metrics
 from opentelemetry.sdk.metrics import MeterProvider
 from opentelemetry.sdk.resources import Resource
@@ -16,10 +15,23 @@ from opentelemetry.exporter.otlp.proto.http.metric_exporter import OTLPMetricExp
 from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
 from src.common.log import get_logger
 
+LATENCY_QUANTILES = ("p50", "p95", "p99")
+# the scrape endpoint outlives exporters recreated on config reload
+_prometheus_server_port = None
+# pipeline status is collected once for all observable callbacks of an export
+STATUS_CACHE_SECONDS = 0.5
+
 class OpenTelemetryExporter:
-    def __init__(self):
-        """Initialize the OpenTelemetry metrics exporter."""
+    def __init__(self, pipeline_server_mgr=None):
+        """Initialize the OpenTelemetry metrics exporter.
+
+        :param pipeline_server_mgr: PipelineServerManager whose pipeline
+            instances are observed in-process
+        """
         self.log = get_logger(f'{__name__}')
+        self.pipeline_server_mgr = pipeline_server_mgr
+        self._status_lock = threading.Lock()
+        self._status_cache = ([], 0.0)
 
         # Fetch values from environment variables
         service_name = os.getenv("SERVICE_NAME", "dlstreamer-pipeline-server")
@@ -29,10 +41,6 @@ class OpenTelemetryExporter:
 
         self.log.debug(f"Collector URL: {self.collector_url}")
 
-        api_host = os.getenv("PIPELINE_API_HOST", "localhost")
-        api_port = os.getenv("REST_SERVER_PORT", "8080")
-        self.api_url = f"http://{api_host}:{api_port}/pipelines/status"
-        
         # How often to export metrics to the collector
         # 10 seconds by default, but can be overridden by setting the env variable it
         otel_export_interval_millis = int(os.getenv("OTEL_EXPORT_INTERVAL_MILLIS", 10000))  # 10 seconds
@@ -49,10 +57,19 @@ class OpenTelemetryExporter:
             export_interval_millis=otel_export_interval_millis
         )
         
+        metric_readers = [metric_reader]
+        # Optional endpoint for Prometheus to scrape the server directly
+        self.prometheus_port = os.getenv("OTEL_PROMETHEUS_PORT", "")
+        self._prometheus_reader = None
+        if self.prometheus_port:
+            self._prometheus_reader = self._create_prometheus_reader(int(self.prometheus_port))
+            if self._prometheus_reader is not None:
+                metric_readers.append(self._prometheus_reader)
+
         # Initialize the MeterProvider with the Resource and Metric Reader
         meter_provider = MeterProvider(
             resource=resource, 
-            metric_readers=[metric_reader]
+            metric_readers=metric_readers
         )
         
         # Set the global MeterProvider
@@ -80,42 +97,129 @@ class OpenTelemetryExporter:
             description="Tracks FPS for each active pipeline instance in DLStreamer Pipeline Server"
         )
 
+        self.latency_gauge = self.meter.create_observable_gauge(
+            "pipeline_latency_seconds",
+            callbacks=[self.latency_callback],
+            description="Tracks p50/p95/p99 latency from source to sink for each active pipeline instance"
+        )
+
+        self.element_latency_gauge = self.meter.create_observable_gauge(
+            "element_latency_seconds",
+            callbacks=[self.element_latency_callback],
+            description="Tracks p50/p95/p99 latency of each element when ENABLE_ELEMENT_LATENCY is set"
+        )
+
+        self.frame_counter = self.meter.create_observable_counter(
+            "frame_count_per_pipeline",
+            callbacks=[self.frame_count_callback],
+            description="Counts frames processed by each active pipeline instance"
+        )
+
+        self.publisher_queue_gauge = self.meter.create_observable_gauge(
+            "publisher_queue_size",
+            callbacks=[self.publisher_queue_callback],
+            description="Tracks frames waiting in the queue of each destination publisher"
+        )
+
+        self.publisher_dropped_counter = self.meter.create_observable_counter(
+            "publisher_dropped_frames",
+            callbacks=[self.publisher_dropped_callback],
+            description="Counts frames dropped by the queue of each destination publisher"
+        )
+
+        self.encoder_queue_gauge = self.meter.create_observable_gauge(
+            "encoder_queue_depth",
+            callbacks=[self.encoder_queue_callback],
+            description="Tracks frames waiting to be encoded or published by the encoder pool"
+        )
+
+        self.encode_latency_gauge = self.meter.create_observable_gauge(
+            "encode_latency_seconds",
+            callbacks=[self.encode_latency_callback],
+            description="Tracks p50/p95/p99 frame encode time of the encoder pool"
+        )
+
+        # cpu_percent(None) compares against the previous call and never blocks,
+        # the first call only sets the baseline
+        self._process = psutil.Process(os.getpid())
+        self._process.cpu_percent(interval=None)
+
         # Initialize threading
         self._running = False
         self._thread = None
 
+    def _create_prometheus_reader(self, port):
+        """Start the Prometheus scrape endpoint, None if not installed or the port is unavailable."""
+        try:
+            from prometheus_client import start_http_server
+            from opentelemetry.exporter.prometheus import PrometheusMetricReader
+        except ImportError as e:
+            self.log.error(f"Prometheus endpoint not available, missing package: {e}")
+            return None
+        global _prometheus_server_port
+        if _prometheus_server_port is None:
+            try:
+                start_http_server(port)
+            except OSError as e:
+                self.log.error(f"Prometheus endpoint not started on port {port}: {e}")
+                return None
+            _prometheus_server_port = port
+            self.log.info(f"Prometheus metrics endpoint started on port {port}")
+        return PrometheusMetricReader()
+
     def get_container_stats(self):
         """Get CPU and memory usage stats of the current process."""
-        # Get CPU usage
-        cpu_percent = psutil.cpu_percent(interval=1)
+        # CPU usage since the previous call
+        cpu_percent = self._process.cpu_percent(interval=None)
 
         # Get memory usage
-        memory_usage = psutil.Process(os.getpid()).memory_info().rss  # Memory in bytes
+        memory_usage = self._process.memory_info().rss  # Memory in bytes
 
         return cpu_percent, memory_usage
 
+    def fetch_pipeline_status(self):
+        """Fetch status of running pipelines from the pipeline server manager."""
+        if self.pipeline_server_mgr is None:
+            return []
+        with self._status_lock:
+            statuses, timestamp = self._status_cache
+            if time.monotonic() - timestamp < STATUS_CACHE_SECONDS:
+                return statuses
+            try:
+                instances = self.pipeline_server_mgr.pserv.pipeline_manager.pipeline_instances
+                statuses = []
+                for status in self.pipeline_server_mgr.get_all_instance_status():
+                    state = status.get("state")
+                    if getattr(state, "name", state) != "RUNNING":
+                        continue
+                    instance = instances.get(status["id"])
+                    status["frame_count"] = getattr(instance, "frame_count", None)
+                    statuses.append(status)
+            except Exception as e:
+                self.log.error(f"Error fetching pipeline data: {e}")
+                statuses = []
+            self._status_cache = (statuses, time.monotonic())
+        return statuses
+
     def fetch_pipeline_fps(self):
-        """Fetch FPS data from the API and update metrics."""
-        try:
-            response = requests.get(self.api_url, timeout=5)  # 5-second timeout
-            if response.status_code == 200:
-                pipelines = response.json()
-                self.log.debug(f"Pipeline API Response: {pipelines}")
-
-                fps_data = {}
-                for pipeline in pipelines:
-                    if pipeline["state"] == "RUNNING":  # Only consider running pipelines
-                        pipeline_id = pipeline["id"]
-                        avg_fps = pipeline["avg_fps"]
-
-                        fps_data[pipeline_id] = avg_fps
-                        self.log.debug(f"Extracted FPS Data: {fps_data}")
-                return fps_data
-            else:
-                self.log.error(f"Failed to fetch pipeline data. Status code: {response.status_code}")
-        except requests.RequestException as e:
-            self.log.error(f"Error fetching pipeline data: {e}")
-        return {}
+        """Fetch FPS of running pipelines."""
+        fps_data = {}
+        for pipeline in self.fetch_pipeline_status():
+            fps_data[pipeline["id"]] = pipeline["avg_fps"]
+            self.log.debug(f"Extracted FPS Data: {fps_data}")
+        return fps_data
+
+    def fetch_pipeline_latency(self):
+        """Fetch pipeline and per element latency percentiles of running pipelines."""
+        latency_data = {}
+        for pipeline in self.fetch_pipeline_status():
+            if pipeline.get("pipeline_latency") or pipeline.get("element_latency"):
+                latency_data[pipeline["id"]] = {
+                    "pipeline": pipeline.get("pipeline_latency"),
+                    "elements": pipeline.get("element_latency") or {}
+                }
+        self.log.debug(f"Extracted latency Data: {latency_data}")
+        return latency_data
 
     def fps_callback(self, options):
         """Observable gauge callback for FPS metrics."""
@@ -130,6 +234,71 @@ class OpenTelemetryExporter:
         ]
 
 
+    def latency_callback(self, options):
+        """Observable gauge callback for pipeline latency percentiles."""
+        observations = []
+        for pipeline_id, latency in self.fetch_pipeline_latency().items():
+            if latency["pipeline"]:
+                observations.extend(
+                    metrics.Observation(latency["pipeline"][quantile],
+                                        {"pipeline_id": pipeline_id, "quantile": quantile})
+                    for quantile in LATENCY_QUANTILES)
+        return observations
+
+    def element_latency_callback(self, options):
+        """Observable gauge callback for per element latency percentiles."""
+        observations = []
+        for pipeline_id, latency in self.fetch_pipeline_latency().items():
+            for element, element_latency in latency["elements"].items():
+                observations.extend(
+                    metrics.Observation(element_latency[quantile],
+                                        {"pipeline_id": pipeline_id, "element": element,
+                                         "quantile": quantile})
+                    for quantile in LATENCY_QUANTILES)
+        return observations
+
+    def frame_count_callback(self, options):
+        """Observable counter callback for processed frames."""
+        return [metrics.Observation(pipeline["frame_count"], {"pipeline_id": pipeline["id"]})
+                for pipeline in self.fetch_pipeline_status()
+                if pipeline.get("frame_count") is not None]
+
+    def _publisher_observations(self, key):
+        observations = []
+        for pipeline in self.fetch_pipeline_status():
+            for index, publisher in enumerate(pipeline.get("publishers") or []):
+                observations.append(metrics.Observation(
+                    publisher[key], {"pipeline_id": pipeline["id"],
+                                     "publisher": publisher.get("type"),
+                                     "index": index}))
+        return observations
+
+    def publisher_queue_callback(self, options):
+        """Observable gauge callback for publisher queue occupancy."""
+        return self._publisher_observations("size")
+
+    def publisher_dropped_callback(self, options):
+        """Observable counter callback for frames dropped by publisher queues."""
+        return self._publisher_observations("dropped")
+
+    def encoder_queue_callback(self, options):
+        """Observable gauge callback for encoder pool queue depth."""
+        return [metrics.Observation(pipeline["encoder"]["queue_depth"],
+                                    {"pipeline_id": pipeline["id"]})
+                for pipeline in self.fetch_pipeline_status() if pipeline.get("encoder")]
+
+    def encode_latency_callback(self, options):
+        """Observable gauge callback for encode time percentiles."""
+        observations = []
+        for pipeline in self.fetch_pipeline_status():
+            encode_latency = (pipeline.get("encoder") or {}).get("encode_latency")
+            if encode_latency:
+                observations.extend(
+                    metrics.Observation(encode_latency[quantile],
+                                        {"pipeline_id": pipeline["id"], "quantile": quantile})
+                    for quantile in LATENCY_QUANTILES)
+        return observations
+
     def export_metrics(self):
         """Collect container CPU and memory metrics and expose them to OpenTelemetry Collector."""
         while self._running:
@@ -159,4 +328,7 @@ class OpenTelemetryExporter:
         if self._running:
             self._running = False
             self._thread.join()  # Wait for the thread to finish
+            if self._prometheus_reader is not None:
+                # unregister from the scrape endpoint, a new exporter registers its own
+                self._prometheus_reader.shutdown()
             self.log.info("OpenTelemetry Metrics collection stopped.")
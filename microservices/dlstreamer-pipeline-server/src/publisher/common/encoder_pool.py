@@ -0,0 +1,132 @@
+#
+# Apache v2 license
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+#
+
+"""Worker pool encoding frames concurrently for the pipeline publisher.
+"""
+import threading as th
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.common.log import get_logger
+from src.server.latency_tracker import LatencyTracker
+
+
+class EncoderPool():
+    """Encode frames on worker threads and publish them in submission order.
+
+    OpenCV releases the GIL while encoding, so frames submitted back to back
+    are encoded in parallel. Results are held in a reorder buffer and handed
+    to ``publish_fn`` strictly in the order frames were submitted (i.e. by
+    ``frame_id``), one at a time, by a sequencer thread. A blocking
+    ``publish_fn`` holds back publishing only, not encoding or ``stats()``.
+    """
+
+    def __init__(self, workers, encode_fn, publish_fn, error_fn=None, max_pending=None):
+        """Constructor
+        :param int workers: Number of encoder threads
+        :param encode_fn: Callable(frame, meta_data) returning (frame, meta_data)
+        :param publish_fn: Callable(frame, meta_data) invoked in submission order
+        :param error_fn: Callable(exception) invoked when encode_fn raises.
+            The failed frame is skipped.
+        :param int max_pending: Maximum frames submitted but not yet published.
+            submit() blocks when reached. Defaults to twice the worker count.
+        """
+        if workers <= 0:
+            raise ValueError("Number of encoder workers must be a positive integer")
+        self.log = get_logger(f'{__name__}')
+        self.workers = workers
+        self.max_pending = max_pending if max_pending else 2 * workers
+        self.encode_fn = encode_fn
+        self.publish_fn = publish_fn
+        self.error_fn = error_fn
+        self.latency = LatencyTracker()
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix="publisher-encoder")
+        self._slots = th.BoundedSemaphore(self.max_pending)
+        self._lock = th.Lock()
+        self._ready = th.Condition(self._lock)
+        self._reorder = {}
+        self._next_seq = 0
+        self._submitted = 0
+        self._stopped = False
+        self._sequencer = th.Thread(target=self._publish_loop,
+                                    name="publisher-sequencer", daemon=True)
+        self._sequencer.start()
+
+    def submit(self, frame, meta_data):
+        """Queue frame for encoding. Blocks while max_pending frames are in flight.
+
+        :param frame: video frame
+        :param meta_data: Meta data
+        :type: Dict
+        """
+        self._slots.acquire()
+        with self._lock:
+            seq = self._submitted
+            self._submitted += 1
+        self._executor.submit(self._encode, seq, frame, meta_data)
+
+    def stop(self):
+        """Wait for in-flight frames to be published and stop the workers.
+        """
+        self._executor.shutdown(wait=True)
+        with self._ready:
+            self._stopped = True
+            self._ready.notify()
+        self._sequencer.join()
+
+    def stats(self):
+        """Encoder pool metrics.
+
+        :return: worker count, frames waiting to be encoded or published and
+            encode latency summary in seconds (None before the first frame)
+        :rtype: Dict
+        """
+        with self._lock:
+            queue_depth = self._submitted - self._next_seq
+        return {
+            "workers": self.workers,
+            "queue_depth": queue_depth,
+            "max_pending": self.max_pending,
+            "encode_latency": self.latency.snapshot()
+        }
+
+    def _encode(self, seq, frame, meta_data):
+        start = time.perf_counter()
+        try:
+            result = self.encode_fn(frame, meta_data)
+        except Exception as e:
+            self.log.exception(f'Error in publisher thread: {e}')
+            if self.error_fn:
+                self.error_fn(e)
+            result = None
+        self.latency.observe(time.perf_counter() - start)
+
+        with self._ready:
+            self._reorder[seq] = result
+            if seq == self._next_seq:
+                self._ready.notify()
+
+    def _publish_loop(self):
+        # Single publisher thread: frames are published in order and
+        # publish_fn runs without holding the reorder buffer lock
+        while True:
+            with self._ready:
+                while self._next_seq not in self._reorder:
+                    if self._stopped:
+                        return
+                    self._ready.wait()
+                result = self._reorder.pop(self._next_seq)
+                self._next_seq += 1
+            try:
+                if result is not None:
+                    self.publish_fn(*result)
+            except Exception as e:
+                self.log.exception(f'Error in publisher thread: {e}')
+                if self.error_fn:
+                    self.error_fn(e)
+            finally:
+                self._slots.release()
@@ -0,0 +1,76 @@
+#
+# Apache v2 license
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+#
+
+"""Zero-copy read-only view of a pipeline output buffer.
+"""
+import ctypes
+
+import gi
+
+gi.require_version('Gst', '1.0')
+# pylint: disable=wrong-import-position
+import numpy as np
+from gi.repository import Gst
+from gstgva.util import libgst, GstMapInfo
+
+
+class _BufferMapping():
+    """Keeps the Gst.Sample alive and its buffer mapped for reading.
+    The buffer is unmapped once the last view referencing it is released.
+    """
+
+    def __init__(self, sample):
+        """Constructor
+        :param Gst.Sample sample: Sample to map
+        """
+        self._sample = sample
+        self._buffer = sample.get_buffer()
+        if self._buffer is None:
+            raise ValueError("Sample has no buffer")
+        self._ptr = hash(self._buffer)
+        self._mapping = GstMapInfo()
+        self._mapped = bool(libgst.gst_buffer_map(self._ptr, self._mapping, Gst.MapFlags.READ))
+        if not self._mapped:
+            raise ValueError("Couldn't map buffer")
+        self.address = ctypes.cast(self._mapping.data, ctypes.c_void_p).value
+        self.size = self._mapping.size
+
+    @property
+    def __array_interface__(self):
+        # views created from this object reference it as their base, so the
+        # buffer stays mapped as long as any of them is alive
+        return {
+            'shape': (self.size,),
+            'typestr': '|u1',
+            'data': (self.address, True),
+            'version': 3
+        }
+
+    def __del__(self):
+        if getattr(self, '_mapped', False):
+            libgst.gst_buffer_unmap(self._ptr, self._mapping)
+            self._mapped = False
+
+
+class MappedFrame(np.ndarray):
+    """Read-only uint8 NumPy view over the mapped buffer of a Gst.Sample.
+
+    Behaves like any 1-D ndarray (``np.frombuffer``, ``memoryview``,
+    ``base64.b64encode`` and OpenCV consume it directly) while the sample
+    stays referenced and mapped. The mapping is released when the frame and
+    every view derived from it are garbage collected. Use ``tobytes()``
+    (or ``bytes(frame)``) only where an owned copy is required.
+    """
+
+    def __new__(cls, sample):
+        mapping = _BufferMapping(sample)
+        if mapping.size == 0:
+            return np.empty(0, dtype=np.uint8).view(cls)
+        return np.asarray(mapping).view(cls)
+
+    def __reduce__(self):
+        # pickling (e.g. multiprocessing) always needs an owned copy
+        return np.asarray(self).copy().__reduce__()
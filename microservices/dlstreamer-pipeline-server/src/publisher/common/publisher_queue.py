@@ -0,0 +1,124 @@
+#
+# Apache v2 license
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+#
+
+"""Bounded fan-out queue between the pipeline publisher and its destinations.
+"""
+import threading as th
+from collections import deque
+
+DROP_OLDEST = "drop-oldest"
+DROP_NEWEST = "drop-newest"
+BLOCK = "block"
+QUEUE_POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+DEFAULT_QUEUE_POLICY = DROP_OLDEST
+
+
+class PublisherQueue():
+    """Thread safe bounded queue that wakes its consumer on new data.
+
+    Replaces a plain ``deque(maxlen=...)`` polled with ``time.sleep``.
+    ``append``/``popleft`` keep the deque semantics (``popleft`` raises
+    ``IndexError`` when nothing arrives in time) so destination threads
+    need no other change. What happens on a full queue depends on policy:
+
+    * ``drop-oldest``: evict the oldest item (previous deque behavior)
+    * ``drop-newest``: discard the item being appended
+    * ``block``: wait until the destination frees a slot
+    """
+
+    def __init__(self, maxlen, policy=DEFAULT_QUEUE_POLICY):
+        """Constructor
+        :param int maxlen: Queue capacity
+        :param str policy: Overflow policy, one of QUEUE_POLICIES
+        """
+        if policy not in QUEUE_POLICIES:
+            raise ValueError("Invalid queue policy '{}'. Supported policies: {}".format(
+                policy, ", ".join(QUEUE_POLICIES)))
+        if maxlen is None or int(maxlen) <= 0:
+            raise ValueError("Queue size must be a positive integer")
+        self.maxlen = int(maxlen)
+        self.policy = policy
+        self._items = deque()
+        self._cond = th.Condition()
+        self._closed = False
+        self.enqueued = 0
+        self.dropped = 0
+
+    def append(self, item):
+        """Add item to the queue, applying the overflow policy when full.
+
+        :param item: Item to enqueue
+        :return: True if item was queued, False if it was dropped
+        :rtype: bool
+        """
+        with self._cond:
+            if len(self._items) >= self.maxlen and not self._closed:
+                if self.policy == DROP_NEWEST:
+                    self.dropped += 1
+                    return False
+                if self.policy == DROP_OLDEST:
+                    self._items.popleft()
+                    self.dropped += 1
+                else:
+                    self._cond.wait_for(
+                        lambda: len(self._items) < self.maxlen or self._closed)
+            if self._closed:
+                self.dropped += 1
+                return False
+            self._items.append(item)
+            self.enqueued += 1
+            self._cond.notify_all()
+            return True
+
+    def popleft(self, timeout=None):
+        """Remove and return the oldest item.
+
+        :param float timeout: Seconds to wait for an item. None waits until
+            an item arrives or the queue is closed, 0 does not wait.
+        :return: Oldest item
+        :raises IndexError: if the queue is still empty after timeout
+        """
+        with self._cond:
+            if not self._items and timeout != 0:
+                self._cond.wait_for(lambda: self._items or self._closed, timeout)
+            if not self._items:
+                raise IndexError("pop from an empty publisher queue")
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def close(self):
+        """Wake up all waiters. Further appends are dropped.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def clear(self):
+        """Discard all queued items.
+        """
+        with self._cond:
+            self._items.clear()
+            self._cond.notify_all()
+
+    def stats(self):
+        """Queue occupancy and drop counters.
+
+        :return: size, capacity, policy, enqueued and dropped counts
+        :rtype: Dict
+        """
+        with self._cond:
+            return {
+                "policy": self.policy,
+                "size": len(self._items),
+                "capacity": self.maxlen,
+                "enqueued": self.enqueued,
+                "dropped": self.dropped
+            }
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
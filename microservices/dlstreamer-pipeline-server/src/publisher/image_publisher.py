@@ -9,16 +9,17 @@
 
 import os
 import queue
-import time
-from collections import deque
 import threading as th
 from distutils.util import strtobool
 
 import numpy as np
 
 from src.common.log import get_logger
+from src.publisher.common.publisher_queue import PublisherQueue, BLOCK
 
-DEFAULT_RESP_QUEUE_SIZE = 1    # if an old item is not picked, it is discarded as soon as new one comes synchronous
+# the pipeline waits for a free slot, correlated responses of a batch are never dropped
+DEFAULT_RESP_QUEUE_SIZE = 1
+QUEUE_WAIT_TIMEOUT = 0.5
 
 class ImagePublisher():
     """Image Publisher.
@@ -27,8 +28,10 @@ class ImagePublisher():
     def __init__(self, qsize=DEFAULT_RESP_QUEUE_SIZE):
         """Constructor
         """
-        self.queue = deque(maxlen=qsize)
-        self.response_queue = queue.Queue(maxsize=1)  # hold item from input request
+        self.queue = PublisherQueue(qsize, policy=BLOCK)
+        self.response_queue = queue.Queue(maxsize=1)  # responses of requests without correlation id
+        self._responses = {}    # correlation id -> [event, response]
+        self._responses_lock = th.Lock()
         self.stop_ev = th.Event()
         # self.topic = pub_topic
 
@@ -48,10 +51,36 @@ class ImagePublisher():
         if self.stop_ev.set():
             return
         self.stop_ev.set()
+        self.queue.close()
         self.th.join()
         self.th = None
         self.log.info('ImagePublisher thread stopped')
 
+    def expect(self, correlation_id):
+        """Register a caller waiting for the response of correlation_id.
+        Must be called before the request is submitted.
+        """
+        with self._responses_lock:
+            self._responses[correlation_id] = [th.Event(), None]
+
+    def cancel(self, correlation_id):
+        """Stop waiting for correlation_id, a late response is discarded"""
+        with self._responses_lock:
+            self._responses.pop(correlation_id, None)
+
+    def wait(self, correlation_id, timeout=None):
+        """Wait for the response of correlation_id registered with expect.
+
+        :return: Tuple of frame and metadata, None on timeout
+        """
+        with self._responses_lock:
+            entry = self._responses.get(correlation_id)
+        if entry is None:
+            return None
+        entry[0].wait(timeout)
+        self.cancel(correlation_id)
+        return entry[1]
+
     def error_handler(self, msg):
         self.log.error('Error in RequestPubisher thread')
         self.stop()
@@ -63,12 +92,11 @@ class ImagePublisher():
         try:
             while not self.stop_ev.is_set():
                 try:
-                    frame, meta_data = self.queue.popleft()
+                    frame, meta_data = self.queue.popleft(timeout=QUEUE_WAIT_TIMEOUT)
                     self.log.info('Received data from gst queue')
                     self._publish(frame, meta_data)
                 except IndexError:
                     self.log.debug("No data in request publisher queue")
-                    time.sleep(0.005)
                     
         except Exception as e:
             self.error_handler(e)
@@ -84,8 +112,27 @@ class ImagePublisher():
         # meta_data['topic'] = self.topic
         msg = meta_data
 
-        self.response_queue.put((frame, msg))
-        self.log.info('Message Sent {} to ImagePublisher: {}'.format(meta_data))
+        correlation_id = meta_data.get('correlation_id')
+        if correlation_id is not None:
+            with self._responses_lock:
+                entry = self._responses.get(correlation_id)
+                if entry is not None:
+                    entry[1] = (frame, msg)
+                    entry[0].set()
+            if entry is None:
+                self.log.debug('No caller waiting for response {}'.format(correlation_id))
+            return
+
+        try:
+            self.response_queue.put_nowait((frame, msg))
+        except queue.Full:
+            # nobody collected the previous response, keep the latest
+            try:
+                self.response_queue.get_nowait()
+            except queue.Empty:
+                pass
+            self.response_queue.put_nowait((frame, msg))
+        self.log.info('Message Sent to ImagePublisher: {}'.format(meta_data))
 
 
     def close(self):
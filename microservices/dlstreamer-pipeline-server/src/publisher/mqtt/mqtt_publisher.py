@@ -9,19 +9,18 @@ Publishes data from a pipeline with gstreamer app destination.
 """
 
 # pylint: disable=wrong-import-position
-import json
 import os
-import base64
-import time
 import threading as th
-from collections import deque
 
 from src.common.log import get_logger
 from src.publisher.common.filter import Filter
+from src.publisher.common.publisher_queue import PublisherQueue, DEFAULT_QUEUE_POLICY
 from utils.mqtt_client import MQTTClient
+from utils.mqtt_payload import encode_payload, check_payload_format, PAYLOAD_FORMAT_JSON
 
 
 DEFAULT_APPDEST_MQTT_QUEUE_SIZE = 1000
+QUEUE_WAIT_TIMEOUT = 0.5
 
 
 class MQTTPublisher():
@@ -33,7 +32,8 @@ class MQTTPublisher():
         :param json app_cfg: Application config
             the meta-data for the frame (df: True)
         """
-        self.queue = deque(maxlen=qsize)
+        self.queue = PublisherQueue(config.get('queue_size', qsize),
+                                    config.get('queue_policy', DEFAULT_QUEUE_POLICY))
         self.stop_ev = th.Event()
         self.topic = config.get('topic', "dlstreamer_pipeline_results")
         assert len(self.topic) > 0, f'No specified topic'
@@ -51,6 +51,8 @@ class MQTTPublisher():
             self.port = int(self.port)
 
         self.publish_frame = config.get("publish_frame", False)
+        self.payload_format = config.get("payload_format", PAYLOAD_FORMAT_JSON)
+        check_payload_format(self.payload_format)
 
         self.qos = config.get('qos', 0)
         self.protocol = config.get('protocol', 4)
@@ -80,6 +82,7 @@ class MQTTPublisher():
         if self.stop_ev.set():
             return
         self.stop_ev.set()
+        self.queue.close()
         self.th.join()
         self.th = None
         self.log.info('MQTT publisher thread stopped')
@@ -95,11 +98,10 @@ class MQTTPublisher():
         try:
             while not self.stop_ev.is_set():
                 try:
-                    frame, meta_data = self.queue.popleft()
+                    frame, meta_data = self.queue.popleft(timeout=QUEUE_WAIT_TIMEOUT)
                     self._publish(frame, meta_data)
                 except IndexError:
                     self.log.debug("No data in client queue")
-                    time.sleep(0.005)
                     
         except Exception as e:
             self.error_handler(e)
@@ -122,19 +124,16 @@ class MQTTPublisher():
                 return
 
         
-        msg = dict()
-        msg["metadata"]=meta_data
         if self.publish_frame:
-            # Encode frame and convert to utf-8 string
-            msg["blob"]=base64.b64encode(frame).decode('utf-8') 
+            blob = frame
             self.log.info(
                 f"Publishing frames along with meta data: {meta_data}")
         else:
-            msg["blob"]=""
+            blob = None
             self.log.info(
                 f"Publishing meta data: {meta_data}")
-         
-        msg = json.dumps(msg)
+
+        msg = encode_payload(meta_data, blob, self.payload_format)
 
         self.log.info(f'Publishing message to topic: {self.topic}')
         self.client.publish(self.topic, payload=msg)
@@ -12,15 +12,15 @@ Publishes data from a pipeline with gstreamer app destination.
 import json
 import os
 import base64
-import time
 import threading as th
-from collections import deque
 from asyncua.sync import Client, ua
 
 from src.common.log import get_logger
 from src.publisher.common.filter import Filter
+from src.publisher.common.publisher_queue import PublisherQueue, DEFAULT_QUEUE_POLICY
 
 DEFAULT_APPDEST_OPCUA_QUEUE_SIZE = 1000
+QUEUE_WAIT_TIMEOUT = 0.5
 
 
 class OPCUAPublisher():
@@ -35,7 +35,8 @@ class OPCUAPublisher():
         self.publish_frame = False
         self.initialized=False
         self.stop_ev = th.Event()
-        self.queue = deque(maxlen=qsize)
+        self.queue = PublisherQueue(opcua_cfg.get('queue_size', qsize),
+                                    opcua_cfg.get('queue_policy', DEFAULT_QUEUE_POLICY))
         self.log = get_logger(f'{__name__} (OPCUA)')
 
         opcua_server_ip = os.getenv("OPCUA_SERVER_IP", "").strip()
@@ -90,6 +91,7 @@ class OPCUAPublisher():
         if self.stop_ev.set():
             return
         self.stop_ev.set()
+        self.queue.close()
         self.th.join()
         self.th = None
         self.log.info('OPCUA publisher thread stopped')
@@ -105,11 +107,10 @@ class OPCUAPublisher():
         try:
             while not self.stop_ev.is_set():
                 try:
-                    frame, meta_data = self.queue.popleft()
+                    frame, meta_data = self.queue.popleft(timeout=QUEUE_WAIT_TIMEOUT)
                     self._publish(frame, meta_data)
                 except IndexError:
                     self.log.debug("No data in client queue for OPCUA")
-                    time.sleep(0.005)
         except Exception as e:
             self.error_handler(e)
     
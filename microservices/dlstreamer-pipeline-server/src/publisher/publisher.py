@@ -24,7 +24,6 @@ import datetime
 from time import time_ns
 from gi.repository import Gst
 from distutils.util import strtobool
-from gstgva.util import gst_buffer_data
 from typing import Dict, List
 
 from src.server.gstreamer_app_source import GvaFrameData
@@ -34,6 +33,9 @@ from utils import publisher_utils as utils
 from src.publisher.mqtt.mqtt_publisher import MQTTPublisher
 from src.publisher.opcua.opcua_publisher import OPCUAPublisher
 from src.publisher.s3.s3_writer import S3Writer
+from src.publisher.common.publisher_queue import PublisherQueue
+from src.publisher.common.encoder_pool import EncoderPool
+from src.publisher.common.mapped_frame import MappedFrame
 
 
 class Publisher:
@@ -80,6 +82,11 @@ class Publisher:
 
         self.frame_id = 0
 
+        # number of threads encoding frames in parallel, 0 encodes on the publisher thread
+        self.encode_workers = self.app_cfg.get('encode_workers', 0)
+        self.encode_queue_size = self.app_cfg.get('encode_queue_size', None)
+        self.encoder_pool = None
+
         self.overlayed_frame = None
         self.send_overlayed_frame = False
         self.publish_raw_frame = self.app_cfg.get('publish_raw_frame', False)
@@ -93,6 +100,13 @@ class Publisher:
         """Start the publisher.
         """
         self.log.debug('Starting publisher thread')
+        if self.encode_workers > 0:
+            self.log.info("Starting {} frame encoder threads".format(self.encode_workers))
+            self.encoder_pool = EncoderPool(self.encode_workers,
+                                            self._process_frame,
+                                            self._publish,
+                                            error_fn=self.error_handler,
+                                            max_pending=self.encode_queue_size)
         self.th = th.Thread(target=self._run)
         self.th.start()
 
@@ -104,6 +118,8 @@ class Publisher:
         self.stop_ev.set()
         self.th.join()
         self.th = None
+        if self.encoder_pool is not None:
+            self.encoder_pool.stop()
         if os.getenv('RUN_MODE') == "EII":  #todo: check if this is needed
             for p in self.publishers:
                 if isinstance(p, EdgeGrpcPublisher):
@@ -121,6 +137,34 @@ class Publisher:
         self.pipeline_instance_id = instance_id
         self.get_pipeline_status = get_pipeline_status
 
+    def get_queue_stats(self):
+        """Get queue occupancy and drop counters of destination publishers.
+
+        :return: Queue stats per destination publisher
+        :rtype: List
+        """
+        stats = []
+        for p in self.publishers:
+            client_queue = getattr(p, 'queue', None)
+            if isinstance(client_queue, PublisherQueue):
+                client_stats = {'type': type(p).__name__}
+                client_stats.update(client_queue.stats())
+                if isinstance(p, S3Writer):
+                    client_stats['uploads'] = p.get_upload_stats()
+                stats.append(client_stats)
+        return stats
+
+    def get_encoder_stats(self):
+        """Get encoder pool metrics.
+
+        :return: Encode latency histogram and queue depth, None if frames
+            are encoded on the publisher thread
+        :rtype: Dict
+        """
+        if self.encoder_pool is None:
+            return None
+        return self.encoder_pool.stats()
+
     def _get_meta_publisher_config(self,meta_destination):
         """Get config for meta publishers
         :param meta_destination: Frame destination
@@ -298,16 +342,14 @@ class Publisher:
 
         :param results: Video frame and additional metadata
         :type: Gst.Sample
-        :return: Return frame
-        :rtype: bytes
+        :return: Return read-only view of the mapped frame, keeps the sample
+            alive until released
+        :rtype: MappedFrame
         :return: Return Meta data of the frame
         :rtype: Dict
         """
-        # Get buffer data
-        with gst_buffer_data(results.get_buffer(), Gst.MapFlags.READ) as data:
-            frame = bytes(data)
-            # Discarding gst buffer data
-            del data
+        # Map buffer data without copying
+        frame = MappedFrame(results)
 
         caps = results.get_caps()
         # Get buffer width & height
@@ -372,25 +414,29 @@ class Publisher:
             return True
         return False
 
+    @staticmethod
+    def _get_gva_meta_regions(meta_data):
+        """ROI metadata of the frame as utils.GvaMetaRegions, accepts the
+        published list of region dictionaries as well
+        """
+        gva_meta = meta_data.get('gva_meta', [])
+        if isinstance(gva_meta, utils.GvaMetaRegions):
+            return gva_meta
+        return utils.GvaMetaRegions.from_list(gva_meta)
+
     def _add_tracking_info(self, meta_data: dict):
         if 'objects' in meta_data.get('annotations', {}):
-            for annotation in meta_data['annotations']['objects']:
-                id = None
-                if self.tracking:
-                    self.log.info("Tracking enabled: Deduplicating detections in metadata")
-                    bbox = annotation['bbox']
-                    for region in meta_data['gva_meta']:
-                        gva_bbox = (region['x'],
-                                    region['y'],
-                                    region['width'] + region['x'],
-                                    region['height'] + region['y'])
-                        if bbox == list(gva_bbox):
-                            id = region['object_id']
-                            break
-                    annotation.update({'object_id': id})
-                else:
-                    self.log.debug("Tracking disabled: Setting object id to None")
-                    annotation.update({'object_id': id})
+            objects = meta_data['annotations']['objects']
+            if self.tracking:
+                self.log.debug("Tracking enabled: Deduplicating detections in metadata")
+                regions = self._get_gva_meta_regions(meta_data)
+                object_ids = regions.match_object_ids(
+                    [annotation['bbox'] for annotation in objects])
+            else:
+                self.log.debug("Tracking disabled: Setting object id to None")
+                object_ids = [None] * len(objects)
+            for annotation, object_id in zip(objects, object_ids):
+                annotation.update({'object_id': object_id})
             meta_data.update({'gva_meta': []})
         return meta_data
 
@@ -403,43 +449,15 @@ class Publisher:
         :type: Dict
         """
 
-        def convert_x1y1wh_to_x1y1x2y2(boxes: list):
-            """
-            Convert the bounding box from x1y1wh format (top left co-ordinates, width, height)
-            to x1y1x2y2 format(top left and bottom right co-ordinates)
-
-            Args:
-                boxes (list): Bounding box in x1y1wh format (top left co-ordinates, width, height).
-            """
-            boxes = np.array(boxes)
-            boxes = np.concatenate([boxes[:, :2], boxes[:, :2] + boxes[:, 2:]],
-                                axis=-1)
-            return boxes.tolist()
-
-        boxes = []
-        labels = []
-        scores = []
-
-        for annotation in meta_data['gva_meta']:
-            box = [
-                annotation['x'], annotation['y'],
-                annotation['width'], annotation['height']
-            ]
-            label = annotation['tensor'][0]['label']
-            score = annotation['tensor'][0]['confidence']
-            boxes.append(box)
-            labels.append(label)
-            scores.append(score)
-
-        self.log.debug("boxes are = {}".format(boxes))
+        regions = self._get_gva_meta_regions(meta_data)
+        boxes = regions.boxes_x1y1x2y2().tolist()
+        labels = regions.labels()
+        scores = regions.scores()
+
+        self.log.debug("x1,y1,x2,y2 boxes = {}".format(boxes))
         self.log.debug("labels are = {}".format(labels))
         self.log.debug("scores are = {}".format(scores))
 
-        if len(boxes):
-            boxes = convert_x1y1wh_to_x1y1x2y2(boxes)
-
-        self.log.debug(
-            "x1,y1,w,h to x1,y1,x2,y2 converted boxes = {}".format(boxes))
         converted_result = {'objects': []}
 
         for box, score, label in zip(boxes, scores, labels):
@@ -493,6 +511,11 @@ class Publisher:
         if self.add_timestamp:
             meta_data['time'] = int(datetime.datetime.now(datetime.timezone.utc).timestamp()*1e9)
 
+        if isinstance(frame, MappedFrame):
+            # frame was not encoded. Copy it once before fan-out so that destination
+            # queues do not hold pipeline buffers and starve upstream buffer pools
+            frame = frame.tobytes()
+
         for publisher in self.publishers:
             # add data to S3, and block publish for others if enabled
             if isinstance(publisher,S3Writer):
@@ -507,6 +530,78 @@ class Publisher:
             
             publisher.queue.append((frame, meta_data))
 
+    def _process_frame(self, frame, meta_data):
+        """Encode raw frame and finalize metadata before publishing.
+        Runs on the encoder pool threads when `encode_workers` is set.
+
+        :param frame: video frame
+        :type: MappedFrame
+        :param meta_data: Meta data
+        :type: Dict
+        :return: Return frame to publish, encoded image or the unmodified frame
+        :rtype: numpy.ndarray
+        :return: Return Meta data of the frame
+        :rtype: Dict
+        """
+        # raw frame:
+        #    - if encoding params set or publish raw frame is not enabled, encode frame with opencv.
+        #      Any issues with encoding, throw error.
+        #    - Else publish raw frame
+        # (pipeline) encoded frame:
+        #    - Update metadata (encoding type/level)
+        if meta_data['caps'].split(',')[0] == "video/x-raw":
+            self.log.debug("Processing raw frame")
+            if self.mqtt_publish_frame or self.grpc_publish or self.opcua_publish_frame or self.s3_config:
+                if (self.encoding == True) or (not self.publish_raw_frame):
+                    self.log.debug("Encoding frame of format {}".format(meta_data["img_format"]))
+                    try:
+                        # Decided per frame: frames are processed concurrently by the encoder pool,
+                        # shared publisher state must not be modified here
+                        if meta_data.get("task", None) is None and self.send_overlayed_frame:
+                            self.log.debug("task key is missing in metadata. not overlaying annotation on this frame")
+                        frame, meta_data['encoding_type'], meta_data[
+                            'encoding_level'] = utils.encode_frame(
+                                self.encoding_type, self.encoding_level,
+                                frame, meta_data['height'],
+                                meta_data['width'],
+                                channels=meta_data['channels'],
+                                meta_data=meta_data)
+                        frame = frame[1].tobytes()
+                        ret_ov = meta_data.pop('overlayText', None)  # upon overlay, discard overlay text, if present
+                        if ret_ov is not None:
+                            self.log.debug("Discarded overlay text from metadata")
+                    except ValueError as e:
+                        self.log.error(
+                            f"Value error occured when encoding the image {e}"
+                        )
+                        self.error_handler(e)
+                    except cv2.error as e:
+                        self.log.error(
+                            f"CV2 error occured when encoding the image {e}"
+                        )
+                        self.error_handler(e)
+            else:
+                self.log.debug("Publishing raw frame")
+        else:
+            self.log.debug(
+                "Encoded frame received, disabled opencv encoding"
+            )
+            meta_data['encoding_type'], meta_data[
+                'encoding_level'] = self._get_pipeline_encoding_properties(
+                )
+
+        if self.tags:
+            meta_data['tags'] = self.tags
+        self._add_tracking_info(meta_data)
+        if self.convert_metadata_to_dcaas_format:
+            self._convert_inference_result(meta_data)
+        if isinstance(meta_data.get('gva_meta'), utils.GvaMetaRegions):
+            meta_data['gva_meta'] = meta_data['gva_meta'].to_list()
+        if self.s3_config:
+            s3_metadata = self._add_s3_metadata(meta_data, self.s3_config)
+            meta_data.update(s3_metadata)
+        return frame, meta_data
+
     def _run(self):
         """Private thread run method.
         """
@@ -536,66 +631,19 @@ class Publisher:
                     if results.video_frame:
                         utils.get_gva_meta_messages(results.video_frame,
                                                     meta_data)
-                        meta_data['gva_meta'] = utils.get_gva_meta_regions(
+                        meta_data['gva_meta'] = utils.get_gva_meta_region_columns(
                             results.video_frame)
 
-
-                    # raw frame:
-                    #    - if encoding params set or publish raw frame is not enabled, encode frame with opencv.
-                    #      Any issues with encoding, throw error.
-                    #    - Else publish raw frame
-                    # (pipeline) encoded frame:
-                    #    - Update metadata (encoding type/level)
-                    if meta_data['caps'].split(',')[0] == "video/x-raw":
-                        self.log.debug("Processing raw frame")
-                        if self.mqtt_publish_frame or self.grpc_publish or self.opcua_publish_frame or self.s3_config:
-                            if (self.encoding == True) or (not self.publish_raw_frame):
-                                self.log.debug("Encoding frame of format {}".format(meta_data["img_format"]))
-                                try:
-                                    if meta_data.get("task", None) is None and self.send_overlayed_frame:
-                                        self.send_overlayed_frame = False
-                                        self.log.debug("task key is missing in metadata. overriding overlaying annotation to False")
-                                    frame, meta_data['encoding_type'], meta_data[
-                                        'encoding_level'] = utils.encode_frame(
-                                            self.encoding_type, self.encoding_level,
-                                            frame, meta_data['height'],
-                                            meta_data['width'],
-                                            channels=meta_data['channels'],
-                                            meta_data=meta_data)
-                                    frame = frame[1].tobytes()
-                                    ret_ov = meta_data.pop('overlayText', None)  # upon overlay, discard overlay text, if present
-                                    if ret_ov is not None:
-                                        self.log.debug("Discarded overlay text from metadata")
-                                except ValueError as e:
-                                    self.log.error(
-                                        f"Value error occured when encoding the image {e}"
-                                    )
-                                    self.error_handler(e)
-                                except cv2.error as e:
-                                    self.log.error(
-                                        f"CV2 error occured when encoding the image {e}"
-                                    )
-                                    self.error_handler(e)
-                        else:
-                            self.log.debug("Publishing raw frame")
-                    else:
-                        self.log.debug(
-                            "Encoded frame received, disabled opencv encoding"
-                        )
-                        meta_data['encoding_type'], meta_data[
-                            'encoding_level'] = self._get_pipeline_encoding_properties(
-                            )
-
                     self._add_pipeline_info_metadata(meta_data)
                     self._add_frame_id_metadata(meta_data)
-                    if self.tags:
-                        meta_data['tags'] = self.tags
-                    self._add_tracking_info(meta_data)
-                    if self.convert_metadata_to_dcaas_format:
-                        self._convert_inference_result(meta_data)
-                    if self.s3_config:
-                        s3_metadata = self._add_s3_metadata(meta_data, self.s3_config)
-                        meta_data.update(s3_metadata)
+
+                    if self.encoder_pool is not None:
+                        # encoded and published in frame_id order by the pool
+                        self.encoder_pool.submit(frame, meta_data)
+                        del frame
+                        continue
+
+                    frame, meta_data = self._process_frame(frame, meta_data)
 
                     # TODO: put into clients respective queues
                     self._publish(frame, meta_data)
@@ -9,19 +9,27 @@ Publishes data from a pipeline with gstreamer app destination.
 """
 
 # pylint: disable=wrong-import-position
+import io
 import json
 import os
-import base64
+import tarfile
 import time
 import threading as th
-from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 from src.common.log import get_logger
 from src.publisher.common.filter import Filter
+from src.publisher.common.publisher_queue import PublisherQueue, DEFAULT_QUEUE_POLICY
+from src.server.latency_tracker import LatencyTracker
 from utils.s3_client import S3Client
 
 
 DEFAULT_APPDEST_S3_QUEUE_SIZE = 1000
+QUEUE_WAIT_TIMEOUT = 0.5
+DEFAULT_UPLOAD_WORKERS = 1
+DEFAULT_MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
+DEFAULT_BUNDLE_MAX_FRAMES = 100
+DEFAULT_BUNDLE_INTERVAL = 10.0
 
 
 class S3Writer():
@@ -33,7 +41,8 @@ class S3Writer():
         :param json config: S3 publisher config
             the meta-data for the frame (df: True)
         """
-        self.queue = deque(maxlen=qsize)
+        self.queue = PublisherQueue(config.get('queue_size', qsize),
+                                    config.get('queue_policy', DEFAULT_QUEUE_POLICY))
         self.stop_ev = th.Event()
 
         self.host = os.getenv("S3_STORAGE_HOST")
@@ -48,6 +57,33 @@ class S3Writer():
 
         self.th = None
         self.log = get_logger(f'{__name__} ({self.s3_bucket_name})')
+
+        # concurrent uploads
+        self.upload_workers = config.get("upload_workers", DEFAULT_UPLOAD_WORKERS)
+        if self.upload_workers <= 0:
+            raise ValueError("upload_workers must be a positive integer")
+        self.multipart_threshold = config.get("multipart_threshold", 0)
+        self.multipart_chunksize = config.get("multipart_chunksize", DEFAULT_MULTIPART_CHUNKSIZE)
+        self.upload_pool = None
+        self.upload_slots = th.BoundedSemaphore(2 * self.upload_workers)
+        self.upload_latency = LatencyTracker()
+        self.stats_lock = th.Lock()
+        self.uploads_in_flight = 0
+        self.uploads_completed = 0
+        self.uploads_failed = 0
+        self.bytes_uploaded = 0
+
+        # bundle mode: pack frames and metadata into one tar object per window
+        bundle_cfg = config.get("bundle", None)
+        self.bundle = []
+        self.bundle_start = None
+        self.bundle_enabled = bool(bundle_cfg)
+        if self.bundle_enabled:
+            self.bundle_max_frames = bundle_cfg.get("max_frames", DEFAULT_BUNDLE_MAX_FRAMES)
+            self.bundle_interval = bundle_cfg.get("interval", DEFAULT_BUNDLE_INTERVAL)
+            if self.s3_metadata_write_wait:
+                self.log.warning("block is not supported along with bundle, S3 writes will not block other publishers")
+                self.s3_metadata_write_wait = False
         if not self.host:
             self.log.error(f'Empty value given for S3_STORAGE_HOST. It cannot be blank')
             self.initialized=False
@@ -77,6 +113,8 @@ class S3Writer():
         """Start publisher.
         """
         self.log.info("Starting S3 writer thread")
+        self.upload_pool = ThreadPoolExecutor(max_workers=self.upload_workers,
+                                              thread_name_prefix="s3-upload")
         self.th = th.Thread(target=self._run)
         self.th.start()
 
@@ -87,15 +125,38 @@ class S3Writer():
         if self.stop_ev.set():
             return
         self.stop_ev.set()
+        self.queue.close()
         if self.th:
             self.th.join()
             self.th = None
+            if self.upload_pool is not None:
+                self.upload_pool.shutdown(wait=True)
+                self.upload_pool = None
             self.log.info('S3 writer thread stopped')
 
     def error_handler(self, msg):
         self.log.error('Error in S3 thread: {}'.format(msg))
         self.stop()
 
+    def get_upload_stats(self):
+        """Upload latency and backlog, to size upload_workers.
+
+        :return: Upload stats
+        :rtype: Dict
+        """
+        with self.stats_lock:
+            stats = {
+                "workers": self.upload_workers,
+                "in_flight": self.uploads_in_flight,
+                "completed": self.uploads_completed,
+                "failed": self.uploads_failed,
+                "bytes": self.bytes_uploaded,
+                "bundled_frames": len(self.bundle)
+            }
+        stats["backlog"] = len(self.queue) + stats["in_flight"] + stats["bundled_frames"]
+        stats["latency"] = self.upload_latency.snapshot()
+        return stats
+
     def _run(self):
         """Run method for publisher.
         """
@@ -103,25 +164,61 @@ class S3Writer():
         try:
             while not self.stop_ev.is_set():
                 try:
-                    frame, meta_data = self.queue.popleft()
-                    self._publish(frame, meta_data)
+                    frame, meta_data = self.queue.popleft(timeout=QUEUE_WAIT_TIMEOUT)
+                    if self.bundle_enabled:
+                        self._add_to_bundle(frame, meta_data)
+                    else:
+                        self._submit(self._publish, frame, meta_data)
                 except IndexError:
                     self.log.debug("No data in client queue")
-                    time.sleep(0.005)
+                if self.bundle_enabled and self.bundle and \
+                        time.monotonic() - self.bundle_start >= self.bundle_interval:
+                    self._flush_bundle()
+            if self.bundle_enabled and self.bundle:
+                self._flush_bundle()
                     
         except Exception as e:
             self.error_handler(e)
-    
-    def _publish(self, frame, meta_data):
-        """Write object data to s3 storage. 
-        Upon successful upload, s3write_complete event is set which is required for unblock other publisher
-        when block is set to True.
 
-        :param frame: video frame
-        :type: bytes
-        :param meta_data: Meta data
-        :type: Dict
+    def _submit(self, upload_fn, *args):
+        """Run upload on the upload pool. Blocks while all workers are busy
+        and as many uploads are waiting, leaving the backlog in the client queue.
         """
+        if self.upload_pool is None:
+            self._upload_task(upload_fn, *args)
+            return
+        self.upload_slots.acquire()
+        try:
+            self.upload_pool.submit(self._upload_task, upload_fn, *args)
+        except Exception:
+            self.upload_slots.release()
+            raise
+
+    def _upload_task(self, upload_fn, *args):
+        with self.stats_lock:
+            self.uploads_in_flight += 1
+        start = time.perf_counter()
+        failed = False
+        try:
+            upload_fn(*args)
+        except Exception as e:
+            failed = True
+            self.log.error(f"Error writing to S3 storage: {e}")
+            # do not leave other publishers waiting on a failed write
+            self.s3write_complete.set()
+        finally:
+            self.upload_latency.observe(time.perf_counter() - start)
+            with self.stats_lock:
+                self.uploads_in_flight -= 1
+                if failed:
+                    self.uploads_failed += 1
+                else:
+                    self.uploads_completed += 1
+            if self.upload_pool is not None:
+                self.upload_slots.release()
+
+    def _get_object_name(self, meta_data):
+        """Object key of the frame, <folder_prefix>/<img_handle>.<ext>"""
         ext = ""
         if meta_data['caps'].split(',')[0] == "image/jpeg" or meta_data['encoding_type']=='jpeg':
             ext = ".jpg"
@@ -129,6 +226,77 @@ class S3Writer():
             ext = ".png"
                 
         object_path = self.s3_folder_prefix + "/" if not self.s3_folder_prefix.endswith("/") else self.s3_folder_prefix        
-        object_name = f"{object_path}{meta_data['img_handle']}" + ext
-        self.s3_client.publish(self.s3_bucket_name, object_name, payload=frame)
+        return f"{object_path}{meta_data['img_handle']}" + ext
+
+    def _upload(self, object_name, payload):
+        """Upload object, using multipart upload when above multipart_threshold"""
+        if self.multipart_threshold and len(payload) >= self.multipart_threshold:
+            success = self.s3_client.publish_multipart(self.s3_bucket_name, object_name, payload,
+                                                       self.multipart_chunksize)
+        else:
+            success = self.s3_client.publish(self.s3_bucket_name, object_name, payload=payload)
+        if not success:
+            raise RuntimeError(f"Failed to upload {object_name}")
+        with self.stats_lock:
+            self.bytes_uploaded += len(payload)
+
+    def _publish(self, frame, meta_data):
+        """Write object data to s3 storage. 
+        Upon successful upload, s3write_complete event is set which is required for unblock other publisher
+        when block is set to True.
+
+        :param frame: video frame
+        :type: bytes-like
+        :param meta_data: Meta data
+        :type: Dict
+        """
+        object_name = self._get_object_name(meta_data)
+        # S3 upload needs an owned bytes object
+        self._upload(object_name, bytes(frame))
+        self.s3write_complete.set()
+
+    def _add_to_bundle(self, frame, meta_data):
+        """Add frame to current bundle, uploading it once max_frames is reached"""
+        if not self.bundle:
+            self.bundle_start = time.monotonic()
+        with self.stats_lock:
+            self.bundle.append((frame, meta_data))
         self.s3write_complete.set()
+        if len(self.bundle) >= self.bundle_max_frames:
+            self._flush_bundle()
+
+    def _flush_bundle(self):
+        """Hand the current bundle over to the upload pool"""
+        with self.stats_lock:
+            bundle, self.bundle = self.bundle, []
+        self._submit(self._publish_bundle, bundle)
+
+    def _publish_bundle(self, bundle):
+        """Write frames and their metadata as one tar object.
+        Members are named after the per frame object keys, <folder_prefix>/<img_handle>.<ext>
+        and <folder_prefix>/<img_handle>.json. The bundle is stored as
+        <folder_prefix>/bundle_<img_handle of first frame>_<number of frames>.tar
+
+        :param bundle: frames and metadata
+        :type: List
+        """
+        buf = io.BytesIO()
+        mtime = time.time()
+        with tarfile.open(fileobj=buf, mode="w") as tar:
+            for frame, meta_data in bundle:
+                object_name = self._get_object_name(meta_data)
+                self._add_tar_member(tar, object_name, bytes(frame), mtime)
+                meta_name = os.path.splitext(object_name)[0] + ".json"
+                self._add_tar_member(tar, meta_name, json.dumps(meta_data, default=str).encode('utf-8'), mtime)
+
+        object_path = self.s3_folder_prefix + "/" if not self.s3_folder_prefix.endswith("/") else self.s3_folder_prefix
+        object_name = f"{object_path}bundle_{bundle[0][1]['img_handle']}_{len(bundle)}.tar"
+        self._upload(object_name, buf.getvalue())
+        self.log.debug(f"Uploaded bundle of {len(bundle)} frames: {object_name}")
+
+    @staticmethod
+    def _add_tar_member(tar, name, data, mtime):
+        info = tarfile.TarInfo(name=name)
+        info.size = len(data)
+        info.mtime = mtime
+        tar.addfile(info, io.BytesIO(data))
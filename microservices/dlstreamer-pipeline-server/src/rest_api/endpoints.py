@@ -18,6 +18,13 @@ logger = get_logger('REST API Endpoints')
 
 BAD_REQUEST_RESPONSE = 'Invalid pipeline, version or instance'
 NOT_IMPLEMENTED = 'Unsupported endpoint'
+# raw image bytes are only sent with multipart/form-data
+BYTES_SOURCE_IN_JSON = 'Invalid Request, source type "bytes" requires multipart/form-data, use "base64_image" in JSON'
+
+
+def _has_bytes_source(request):
+    source = request.get("source") if isinstance(request, dict) else None
+    return isinstance(source, dict) and source.get("type") == "bytes"
 
 class Endpoints:
 
@@ -251,6 +258,8 @@ class Endpoints:
             "POST on /pipelines/{name}/{version}/{instance_id}".format(name=name, version=str(version), instance_id=instance_id))
         if connexion.request.is_json:
             try:
+                if _has_bytes_source(connexion.request.get_json()):
+                    return (BYTES_SOURCE_IN_JSON, HTTPStatus.BAD_REQUEST)
                 pipeline_id, err = Endpoints.pipeline_server_manager.execute_request_on_instance(
                     name, version, instance_id, connexion.request.get_json())
                 if pipeline_id is not None:
@@ -262,6 +271,52 @@ class Endpoints:
 
         return('Invalid Request, Body must be valid JSON', HTTPStatus.BAD_REQUEST)
 
+    def pipelines_name_version_instance_id_batch_post(name, version, instance_id, **kwargs):  # noqa: E501
+        """pipelines_name_version_instance_id_batch_post
+
+        Send a batch of requests to pipeline instance. Accepts a JSON
+        body with a list of requests or multipart/form-data with one or
+        more "images" files # noqa: E501
+
+        :param name:
+        :type name: str
+        :param version:
+        :type version: str
+        :param instance_id:
+        :type instance_id: str
+
+        :rtype: list
+        """
+
+        logger.debug(
+            "POST on /pipelines/{name}/{version}/{instance_id}/batch".format(name=name, version=str(version), instance_id=instance_id))
+        try:
+            if connexion.request.is_json:
+                body = connexion.request.get_json()
+                requests = body.get("requests", [])
+                timeout = body.get("timeout", 5)
+                publish_frame = body.get("publish_frame", False)
+                if any(_has_bytes_source(request) for request in requests):
+                    return (BYTES_SOURCE_IN_JSON, HTTPStatus.BAD_REQUEST)
+            else:
+                form = connexion.request.form
+                requests = [{"source": {"type": "bytes",
+                                        "name": image.filename,
+                                        "data": image.read()}}
+                            for image in connexion.request.files.getlist("images")]
+                timeout = float(form.get("timeout", 5))
+                publish_frame = str(form.get("publish_frame", "false")).lower() == "true"
+            if not requests:
+                return ('Invalid Request, no requests or images in batch', HTTPStatus.BAD_REQUEST)
+            results, err = Endpoints.pipeline_server_manager.execute_batch_request_on_instance(
+                name, version, instance_id, requests, timeout, publish_frame)
+            if results is not None:
+                return results
+            return (err, HTTPStatus.BAD_REQUEST)
+        except Exception as error:
+            logger.error('Exception in pipelines_name_version_instance_id_batch_post %s', error)
+            return ('Unexpected error', HTTPStatus.INTERNAL_SERVER_ERROR)
+
     def pipelines_name_version_instance_id_models_files_post(name,
                                                              version,
                                                              instance_id):  # noqa: E501
@@ -386,7 +441,8 @@ class Endpoints:
                             pipeline_cfg["parameters"][pipeline_param_name] = model_path
 
                         while p_instance_state in (Pipeline.State.QUEUED.name,
-                                                   Pipeline.State.RUNNING.name):
+                                                   Pipeline.State.RUNNING.name,
+                                                   Pipeline.State.PAUSED.name):
                             p = Endpoints.pipeline_server_manager.get_pipeline_instance_summary(instance_id)[0]
                             p_instance_state = p.get("state")
                             logger.debug("Pipeline instance (%s) state: %s", p.get('id'),
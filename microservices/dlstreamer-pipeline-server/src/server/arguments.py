@@ -62,6 +62,29 @@ def parse_options(args=None):
                         action="store",
                         type=lambda x: bool(util.strtobool(x)),
                         default=bool(util.strtobool(os.getenv('EMIT_SOURCE_AND_DESTINATION', 'false'))))
+    parser.add_argument("--enable-element-latency",
+                        dest="enable_element_latency",
+                        help="Add pad probes to each pipeline element and report per element latency "
+                        "in the pipeline status",
+                        action="store",
+                        type=lambda x: bool(util.strtobool(x)),
+                        default=bool(util.strtobool(os.getenv('ENABLE_ELEMENT_LATENCY', 'false'))))
+    parser.add_argument("--share-model-instances",
+                        dest="share_model_instances",
+                        help="Assign a shared model-instance-id to inference elements that load the same "
+                        "model with the same settings, so the model is compiled once across pipeline instances",
+                        action="store",
+                        type=lambda x: bool(util.strtobool(x)),
+                        default=bool(util.strtobool(os.getenv('SHARE_MODEL_INSTANCES', 'false'))))
+    parser.add_argument("--model-cache-dir", action="store",
+                        dest="model_cache_dir",
+                        help="Directory where OpenVINO persists compiled models (CACHE_DIR) across restarts",
+                        type=str, default=os.getenv('MODEL_CACHE_DIR', ''))
+    parser.add_argument("--device_capacity", action="store",
+                        dest="device_capacity",
+                        help="JSON object of the load each inference device sustains, e.g. "
+                        "{\"GPU\": 8}, queued pipelines start when their device has headroom",
+                        type=str, default=os.getenv('DEVICE_CAPACITY', '{}'))
 
     if (isinstance(args, dict)):
         args = ["--{}={}".format(key, value)
@@ -70,6 +93,7 @@ def parse_options(args=None):
     try:
         result = parser.parse_args(args)
         parse_network_preference(result)
+        parse_device_capacity(result)
     except Exception:
         print("Unrecognized argument passed to PipelineServer")
         parser.print_help()
@@ -77,6 +101,15 @@ def parse_options(args=None):
     return result
 
 
+def parse_device_capacity(options):
+    try:
+        options.device_capacity = {device.upper(): float(capacity) for device, capacity
+                                   in json.loads(options.device_capacity).items()}
+    except Exception as error:
+        raise ValueError("Invalid device capacity {}, expected a JSON object such as "
+                         "{{\"GPU\": 8}}: {}".format(options.device_capacity, error)) from error
+
+
 def parse_network_preference(options):
     try:
         options.network_preference = json.loads(options.network_preference)
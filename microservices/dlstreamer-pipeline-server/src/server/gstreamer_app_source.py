@@ -14,11 +14,13 @@ import gi
 gi.require_version('Gst', '1.0')
 gi.require_version('GstApp', '1.0')
 # pylint: disable=wrong-import-position
+import numpy as np
 from gi.repository import Gst
 from gstgva.util import GVAJSONMeta
 from src.server.app_source import AppSource
 from src.server.gstreamer_app_destination import GvaSample
 from src.server.gstreamer_pipeline import GStreamerPipeline
+from src.server.wrapped_buffer import wrap_data, wrap_file
 # pylint: enable=wrong-import-position
 
 fields = ['data',
@@ -27,7 +29,8 @@ fields = ['data',
           'info',
           'message',
           'segment',
-          'duration']
+          'duration',
+          'path']
 
 GvaFrameData = namedtuple('GvaFrameData', fields)
 GvaFrameData.__new__.__defaults__ = (None,) * len(fields)
@@ -65,11 +68,13 @@ class GStreamerAppSource(AppSource, Thread):
     def _create_input_frame(self, item):
         if (isinstance(item, GvaFrameData)):
             gst_buffer = None
-            if (item.data):
-                if (not isinstance(item.data, bytes)):
-                    raise Exception("GvaFrameData must contain bytes")
-                gst_buffer = Gst.Buffer.new_allocate(None, len(item.data))
-                gst_buffer.fill(0, item.data)
+            if (item.data is not None) or (item.path):
+                if (item.data is None):
+                    gst_buffer = wrap_file(item.path)
+                elif (isinstance(item.data, (bytes, bytearray, memoryview, np.ndarray))):
+                    gst_buffer = wrap_data(item.data)
+                else:
+                    raise Exception("GvaFrameData must contain bytes, memoryview or numpy array")
                 if (item.pts):
                     gst_buffer.pts = item.pts
                     gst_buffer.dts = item.pts
@@ -5,6 +5,7 @@
 #
 
 import copy
+import hashlib
 import json
 import os
 import string
@@ -20,6 +21,7 @@ from gi.repository import GLib, Gst, GstApp
 from src.server.app_destination import AppDestination
 from src.server.app_source import AppSource
 from src.server.common.utils import logging
+from src.server.latency_tracker import LatencyTracker
 from src.server.pipeline import Pipeline
 from src.server.rtsp.gstreamer_rtsp_destination import GStreamerRtspDestination
 from src.server.rtsp.gstreamer_rtsp_server import GStreamerRtspServer
@@ -46,6 +48,22 @@ class GStreamerPipeline(Pipeline):
                               "GvaInferenceBinRegion",
                               "GvaVideoToTensorBackend"]
     G_PARAM_WRITABLE_FLAG = 2
+    # properties that must match for inference elements to share a model
+    # instance, precision is part of the model path. A shared instance also
+    # shares its preprocessing and labels
+    SHARED_MODEL_INSTANCE_PROPERTIES = ["model",
+                                        "device",
+                                        "nireq",
+                                        "batch-size",
+                                        "model-proc",
+                                        "ie-config",
+                                        "reshape",
+                                        "reshape-width",
+                                        "reshape-height",
+                                        "pre-process-backend",
+                                        "pre-process-config",
+                                        "labels",
+                                        "labels-file"]
 
     SOURCE_ALIAS = "auto_source"
     GST_ELEMENTS_WITH_SOURCE_SETUP = ("GstURISourceBin")
@@ -83,9 +101,11 @@ class GStreamerPipeline(Pipeline):
         self.stop_time = None
         self._avg_fps = 0
         self._gst_launch_string = None
-        self.latency_times = dict()
-        self.sum_pipeline_latency = 0
-        self.count_pipeline_latency = 0
+        self.pipeline_latency = LatencyTracker()
+        self.element_latency = {}
+        self.model_instances = []
+        self.startup_time = None
+        self._launch_time = None
         self._real_base = None
         self._stream_base = None
         self._year_base = None
@@ -101,6 +121,7 @@ class GStreamerPipeline(Pipeline):
         self.appsink_element = None
         self._app_destinations = []
         self._cached_element_keys = []
+        self._shared_element_keys = []
         self._logger = logging.get_logger('GSTPipeline', is_static=True)
         self.rtsp_path = None
         self._debug_message = ""
@@ -121,6 +142,13 @@ class GStreamerPipeline(Pipeline):
         self.rtsp_server = GStreamerPipeline._rtsp_server
         self.webrtc_manager = GStreamerPipeline._webrtc_manager
 
+    @staticmethod
+    def release_model_instance(model_instance_id):
+        # cache keys are <element type>_<model-instance-id>
+        for key in [key for key in GStreamerPipeline._inference_element_cache
+                    if key.split('_', 1)[-1] == model_instance_id]:
+            del GStreamerPipeline._inference_element_cache[key]
+
     @staticmethod
     def mainloop_quit():
         if (GStreamerPipeline._rtsp_server):
@@ -213,13 +241,31 @@ class GStreamerPipeline(Pipeline):
 
         if (new_state == Pipeline.State.ERROR):
             for key in self._cached_element_keys:
-                for pipeline in GStreamerPipeline._inference_element_cache[key].pipelines:
+                if key in self._shared_element_keys:
+                    # ids assigned by SHARE_MODEL_INSTANCES are shared by every
+                    # pipeline using the same model, one failing pipeline must
+                    # not stop the others
+                    self._leave_cached_element(key)
+                    continue
+                # may already be released by release_model_instance
+                cached_element = GStreamerPipeline._inference_element_cache.pop(key, None)
+                if cached_element is None:
+                    continue
+                for pipeline in cached_element.pipelines:
                     if (self != pipeline):
                         pipeline.stop()
-                del GStreamerPipeline._inference_element_cache[key]
 
         self._finished_callback()
 
+    def _leave_cached_element(self, key):
+        cached_element = GStreamerPipeline._inference_element_cache.get(key)
+        if cached_element is None:
+            return
+        if self in cached_element.pipelines:
+            cached_element.pipelines.remove(self)
+        if not cached_element.pipelines:
+            del GStreamerPipeline._inference_element_cache[key]
+
     def _delete_pipeline_with_lock(self, new_state):
         with(self._create_delete_lock):
             self._delete_pipeline(new_state)
@@ -236,6 +282,24 @@ class GStreamerPipeline(Pipeline):
                     self.state = Pipeline.State.ABORTED
         return self.status()
 
+    def pause(self):
+        with(self._create_delete_lock):
+            if self.state is Pipeline.State.RUNNING and self.pipeline:
+                self._logger.info("Pausing Pipeline {id}".format(id=self.identifier))
+                self.pipeline.set_state(Gst.State.PAUSED)
+                self.state = Pipeline.State.PAUSED
+                return True
+        return False
+
+    def resume(self):
+        with(self._create_delete_lock):
+            if self.state is Pipeline.State.PAUSED and self.pipeline:
+                self._logger.info("Resuming Pipeline {id}".format(id=self.identifier))
+                self.state = Pipeline.State.RUNNING
+                self.pipeline.set_state(Gst.State.PLAYING)
+                return True
+        return False
+
     def params(self):
         request = copy.deepcopy(self.request)
         if "models" in request:
@@ -279,9 +343,19 @@ class GStreamerPipeline(Pipeline):
             "elapsed_time": elapsed_time,
             "message": message
         }
-        if self.count_pipeline_latency != 0:
-            status_obj["avg_pipeline_latency"] = self.sum_pipeline_latency / \
-                self.count_pipeline_latency
+        pipeline_latency = self.pipeline_latency.snapshot()
+        if pipeline_latency:
+            status_obj["avg_pipeline_latency"] = pipeline_latency["avg"]
+            status_obj["pipeline_latency"] = pipeline_latency
+        element_latency = {name: tracker.snapshot()
+                           for name, tracker in self.element_latency.items()
+                           if tracker.count}
+        if element_latency:
+            status_obj["element_latency"] = element_latency
+        if self.startup_time is not None:
+            status_obj["startup_time"] = self.startup_time
+        if self.model_instances:
+            status_obj["model_instances"] = self.model_instances
 
         return status_obj
 
@@ -372,11 +446,48 @@ class GStreamerPipeline(Pipeline):
                             and model_instance_id in [x.name for x in element.list_properties()]
                             and element.get_property(model_instance_id))]
         for element, key in gva_elements:
-            if key not in GStreamerPipeline._inference_element_cache:
+            cache_hit = key in GStreamerPipeline._inference_element_cache
+            if not cache_hit:
                 GStreamerPipeline._inference_element_cache[key] = GStreamerPipeline.CachedElement(
                     element, [])
             self._cached_element_keys.append(key)
             GStreamerPipeline._inference_element_cache[key].pipelines.append(self)
+            self.model_instances.append({"element": element.get_property("name"),
+                                         "model_instance_id": key.split('_', 1)[-1],
+                                         "cache_hit": cache_hit})
+
+    def _get_inference_elements(self, property_name):
+        return [element for element in self.pipeline.iterate_elements()
+                if (element.__gtype__.name in self.GVA_INFERENCE_ELEMENT_TYPES
+                    and property_name in [x.name for x in element.list_properties()])]
+
+    def _set_model_cache_dir(self):
+        # OpenVINO writes compiled models to CACHE_DIR and loads them from
+        # there on the next compile, including after a server restart
+        cache_dir = self._options.model_cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        for element in self._get_inference_elements("ie-config"):
+            ie_config = element.get_property("ie-config") or ""
+            if "CACHE_DIR" in ie_config:
+                continue
+            entries = [entry for entry in ie_config.split(",") if entry]
+            entries.append("CACHE_DIR={}".format(cache_dir))
+            element.set_property("ie-config", ",".join(entries))
+
+    def _set_shared_model_instance_id(self):
+        model_instance_id = "model-instance-id"
+        for element in self._get_inference_elements(model_instance_id):
+            if element.get_property(model_instance_id) or not element.get_property("model"):
+                continue
+            properties = [x.name for x in element.list_properties()]
+            key = [element.__gtype__.name] + [
+                str(element.get_property(name)) if name in properties else None
+                for name in self.SHARED_MODEL_INSTANCE_PROPERTIES]
+            # derived from the settings only, so the id is stable across
+            # pipeline instances and server restarts
+            instance_id = "shared_" + hashlib.sha1(json.dumps(key).encode()).hexdigest()[:16]
+            element.set_property(model_instance_id, instance_id)
+            self._shared_element_keys.append(element.__gtype__.name + '_' + instance_id)
 
     def _set_default_models(self):
         model_device_pairing = [("model", "device"),
@@ -565,6 +676,26 @@ class GStreamerPipeline(Pipeline):
             sink_pad = sink.get_static_pad("sink")
             sink_pad.add_probe(Gst.PadProbeType.BUFFER,
                                 GStreamerPipeline.appsink_probe_callback, self)
+        if self._options and self._options.enable_element_latency:
+            self._set_element_latency_probes(src, sink)
+
+    def _set_element_latency_probes(self, src, sink):
+        # only elements with a single always sink and src pad, where a buffer
+        # leaving the src pad can be matched to the one that entered by PTS
+        for element in self.pipeline.iterate_elements():
+            if element in (src, sink) or element.get_parent() != self.pipeline:
+                continue
+            sink_pads = element.sinkpads
+            src_pads = element.srcpads
+            if len(sink_pads) != 1 or len(src_pads) != 1:
+                continue
+            name = element.get_name()
+            tracker = LatencyTracker()
+            self.element_latency[name] = tracker
+            sink_pads[0].add_probe(Gst.PadProbeType.BUFFER,
+                                   GStreamerPipeline.element_sink_probe_callback, tracker)
+            src_pads[0].add_probe(Gst.PadProbeType.BUFFER,
+                                  GStreamerPipeline.element_src_probe_callback, tracker)
 
     def start(self):
         if self.model_manager:
@@ -585,6 +716,7 @@ class GStreamerPipeline(Pipeline):
                 format(template=self._gst_launch_string))
 
             try:
+                self._launch_time = time.time()
                 self.pipeline = Gst.parse_launch(self._gst_launch_string)
                 self._set_properties()
                 self._set_bus_messages_flag()
@@ -592,6 +724,10 @@ class GStreamerPipeline(Pipeline):
                 self._set_model_property("model-proc")
                 self._set_model_property("labels")
                 self._set_model_property("labels-file")
+                if self._options and self._options.model_cache_dir:
+                    self._set_model_cache_dir()
+                if self._options and self._options.share_model_instances:
+                    self._set_shared_model_instance_id()
                 self._cache_inference_elements()
                 self._set_model_instance_id()
                 self._set_source_and_sink()
@@ -745,8 +881,7 @@ class GStreamerPipeline(Pipeline):
     @staticmethod
     def source_probe_callback(unused_pad, info, self):
         buffer = info.get_buffer()
-        pts = buffer.pts
-        self.latency_times[pts] = time.time()
+        self.pipeline_latency.begin(buffer.pts)
         return Gst.PadProbeReturn.OK
 
     def source_setup_callback(self, unused_bin, src_element, unused_udata):
@@ -757,11 +892,26 @@ class GStreamerPipeline(Pipeline):
     @staticmethod
     def appsink_probe_callback(unused_pad, info, self):
         buffer = info.get_buffer()
-        pts = buffer.pts
-        source_time = self.latency_times.pop(pts, -1)
-        if source_time != -1:
-            self.sum_pipeline_latency += time.time() - source_time
-            self.count_pipeline_latency += 1
+        self.pipeline_latency.end(buffer.pts)
+        if self.startup_time is None and self._launch_time is not None:
+            # includes model loading and compilation
+            self.startup_time = time.time() - self._launch_time
+            self._logger.info("Pipeline {id} produced first frame after {time:.3f}s, "
+                              "model instances reused: {hits}/{total}".format(
+                                  id=self.identifier, time=self.startup_time,
+                                  hits=sum(1 for instance in self.model_instances
+                                           if instance["cache_hit"]),
+                                  total=len(self.model_instances)))
+        return Gst.PadProbeReturn.OK
+
+    @staticmethod
+    def element_sink_probe_callback(unused_pad, info, tracker):
+        tracker.begin(info.get_buffer().pts)
+        return Gst.PadProbeReturn.OK
+
+    @staticmethod
+    def element_src_probe_callback(unused_pad, info, tracker):
+        tracker.end(info.get_buffer().pts)
         return Gst.PadProbeReturn.OK
 
     def on_sample_app_destination(self, sink):
@@ -0,0 +1,135 @@
+#
+# Apache v2 license
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+#
+
+"""Fixed size latency tracking for pipeline and element pad probes, frame
+encoding and uploads.
+"""
+import time
+from threading import Lock
+
+import numpy as np
+
+DEFAULT_PENDING_SIZE = 256
+DEFAULT_WINDOW_SIZE = 1024
+PERCENTILES = (50, 95, 99)
+
+
+class LatencyTracker():
+    """Match buffers entering and leaving a section of the pipeline by key
+    (usually PTS) and keep the latest latencies for percentile reporting.
+
+    All storage is preallocated. Buffers still pending are kept in a ring in
+    arrival order: a buffer that never leaves (dropped by a leaky queue,
+    ``inference-interval``, ``videorate`` ...) is discarded once a later
+    buffer is matched or the ring wraps, so memory does not grow on long
+    running streams.
+    """
+
+    def __init__(self, pending_size=DEFAULT_PENDING_SIZE, window_size=DEFAULT_WINDOW_SIZE):
+        """Constructor
+        :param int pending_size: Maximum number of buffers in flight tracked
+        :param int window_size: Number of most recent latencies used for percentiles
+        """
+        if pending_size <= 0 or window_size <= 0:
+            raise ValueError("Latency tracker sizes must be positive integers")
+        self._lock = Lock()
+        self._pending_size = pending_size
+        self._pending_keys = [None] * pending_size
+        self._pending_times = [0.0] * pending_size
+        self._head = 0
+        self._tail = 0
+        self._window = np.zeros(window_size, dtype=np.float64)
+        self._window_pos = 0
+        self.count = 0
+        self.unmatched = 0
+        self._sum = 0.0
+        self._max = 0.0
+
+    def begin(self, key, now=None):
+        """Record a buffer entering the tracked section.
+
+        :param key: Buffer identifier, e.g. PTS
+        :param float now: Timestamp in seconds, defaults to time.perf_counter()
+        """
+        if now is None:
+            now = time.perf_counter()
+        with self._lock:
+            if self._head - self._tail == self._pending_size:
+                self._tail += 1
+                self.unmatched += 1
+            slot = self._head % self._pending_size
+            self._pending_keys[slot] = key
+            self._pending_times[slot] = now
+            self._head += 1
+
+    def end(self, key, now=None):
+        """Record a buffer leaving the tracked section.
+
+        :param key: Buffer identifier given to begin()
+        :param float now: Timestamp in seconds, defaults to time.perf_counter()
+        :return: Latency in seconds, None if the buffer was not tracked
+        :rtype: float
+        """
+        if now is None:
+            now = time.perf_counter()
+        with self._lock:
+            for index in range(self._tail, self._head):
+                slot = index % self._pending_size
+                if self._pending_keys[slot] == key:
+                    break
+            else:
+                return None
+            # buffers that entered before this one and are still pending were dropped
+            self.unmatched += index - self._tail
+            for skipped in range(self._tail, index + 1):
+                self._pending_keys[skipped % self._pending_size] = None
+            self._tail = index + 1
+            latency = now - self._pending_times[slot]
+            self._record(latency)
+            return latency
+
+    def observe(self, latency):
+        """Record a latency measured by the caller, e.g. around a function call.
+
+        :param float latency: Latency in seconds
+        """
+        with self._lock:
+            self._record(latency)
+
+    def _record(self, latency):
+        # called with self._lock held
+        self._window[self._window_pos % len(self._window)] = latency
+        self._window_pos += 1
+        self.count += 1
+        self._sum += latency
+        self._max = max(self._max, latency)
+
+    def average(self):
+        """Average latency in seconds of all matched buffers, None if there are none"""
+        with self._lock:
+            return self._sum / self.count if self.count else None
+
+    def snapshot(self):
+        """Latency summary in seconds.
+
+        :return: count, unmatched, avg and max over all matched buffers, p50/p95/p99
+            over the most recent window_size buffers. None if no buffer was matched.
+        :rtype: Dict
+        """
+        with self._lock:
+            if not self.count:
+                return None
+            samples = self._window[:min(self._window_pos, len(self._window))]
+            percentiles = np.percentile(samples, PERCENTILES)
+            summary = {
+                "count": self.count,
+                "unmatched": self.unmatched,
+                "avg": self._sum / self.count,
+                "max": self._max
+            }
+        for percentile, value in zip(PERCENTILES, percentiles):
+            summary["p{}".format(percentile)] = float(value)
+        return summary
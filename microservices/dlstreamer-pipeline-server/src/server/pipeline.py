@@ -13,9 +13,11 @@ class Pipeline:
         COMPLETED = auto()
         ERROR = auto()
         ABORTED = auto()
+        PAUSED = auto()
 
         def stopped(self):
-            return not (self is Pipeline.State.QUEUED or self is Pipeline.State.RUNNING)
+            return not (self is Pipeline.State.QUEUED or self is Pipeline.State.RUNNING
+                        or self is Pipeline.State.PAUSED)
 
     def __init__(self, identifier, config, model_manager, request, finished_callback, options):
         pass
@@ -26,6 +28,12 @@ class Pipeline:
     def status(self):
         pass
 
+    def pause(self):
+        return False
+
+    def resume(self):
+        return False
+
     def params(self):
         pass
 
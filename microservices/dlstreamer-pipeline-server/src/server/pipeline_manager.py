@@ -7,20 +7,21 @@
 import os
 import json
 import string
+import time
 import traceback
 from threading import Lock
-from collections import deque
 from collections import defaultdict
 import uuid
 import jsonschema
 from src.server.common.utils import logging
 from src.server.pipeline import Pipeline
+from src.server.pipeline_scheduler import PriorityScheduler
 from src.server import schema
 
 class PipelineManager:
 
     def __init__(self, model_manager, pipeline_dir, max_running_pipelines,
-                 ignore_init_errors=False):
+                 ignore_init_errors=False, scheduler=None):
         self.max_running_pipelines = max_running_pipelines
         self.model_manager = model_manager
         self.running_pipelines = 0
@@ -28,7 +29,10 @@ class PipelineManager:
         self.pipeline_instances = {}
         self.pipeline_state = {}
         self.pipelines = {}
-        self.pipeline_queue = deque()
+        # queued and paused instances, see PipelineScheduler
+        self.pipeline_queue = scheduler if scheduler is not None else PriorityScheduler()
+        # frames in flight of each running instance when it first reported latency
+        self._baseline_load = {}
         self.pipeline_dir = pipeline_dir
         self.logger = logging.get_logger('PipelineManager', is_static=True)
         self._run_counter_lock = Lock()
@@ -138,6 +142,19 @@ class PipelineManager:
         self.log_banner("Completed Loading Pipelines")
         return not error_occurred
 
+    def reload_pipelines(self):
+        """Reload pipeline definitions from pipeline_dir. Running instances
+        keep the definition they were created with."""
+        return self._load_pipelines()
+
+    def release_model_instance(self, model_instance_id):
+        """Release inference elements cached for model_instance_id, so the
+        next pipeline using it loads its model again"""
+        for pipeline_type in self.pipeline_types.values():
+            release = getattr(pipeline_type, "release_model_instance", None)
+            if release:
+                release(model_instance_id)
+
     def _update_defaults_from_env(self, config):
         config = Pipeline.get_config_section(
             config, ["parameters", "properties"])
@@ -304,27 +321,56 @@ class PipelineManager:
             request,
             self._pipeline_finished,
             options)
-        self.pipeline_queue.append(instance_id)
+        self.pipeline_queue.append(instance_id, request)
         self._start()
         return instance_id, None
 
+    def _get_active_load(self):
+        # load of started instances that are not paused, in cost units. The
+        # estimated cost is scaled by the average number of frames in flight
+        # (Little's law) relative to the first value the instance reported
+        active_load = {}
+        for instance_id, instance in list(self.pipeline_instances.items()):
+            if instance.state.stopped():
+                self._baseline_load.pop(instance_id, None)
+                continue
+            if instance_id in self.pipeline_queue or instance.state is Pipeline.State.PAUSED:
+                continue
+            info = self.pipeline_queue.info(instance_id)
+            load = info.cost if info else 1
+            status = instance.status()
+            in_flight = (status.get("avg_fps") or 0) * (status.get("avg_pipeline_latency") or 0)
+            if in_flight:
+                baseline = self._baseline_load.setdefault(instance_id, in_flight)
+                load *= in_flight / baseline
+            active_load[instance_id] = load
+        return active_load
+
     def _get_next_pipeline_identifier(self):
-        if (self.max_running_pipelines > 0):
-            if (self.running_pipelines >= self.max_running_pipelines):
-                return None
+        can_start = (self.max_running_pipelines <= 0
+                     or self.running_pipelines < self.max_running_pipelines)
+        paused = [instance_id for instance_id in self.pipeline_queue
+                  if self.pipeline_instances[instance_id].state is Pipeline.State.PAUSED]
+        if not (can_start or paused):
+            return None
 
-        try:
-            if (self.pipeline_queue):
-                return self.pipeline_queue.popleft()
-        except Exception:
-            pass
-
-        return None
+        pipeline_identifier, preempt = self.pipeline_queue.admit(
+            self._get_active_load(), can_start, paused)
+        for instance_id in preempt:
+            # paused instances keep their running slot and queue again
+            if self.pipeline_instances[instance_id].pause():
+                self.pipeline_queue.append(instance_id)
+        return pipeline_identifier
 
     def _start(self):
-        pipeline_identifier = self._get_next_pipeline_identifier()
-        if (pipeline_identifier):
+        while True:
+            pipeline_identifier = self._get_next_pipeline_identifier()
+            if not pipeline_identifier:
+                return
             pipeline_to_start = self.pipeline_instances[pipeline_identifier]
+            if pipeline_to_start.state is Pipeline.State.PAUSED:
+                pipeline_to_start.resume()
+                continue
             with self._run_counter_lock:
                 self.running_pipelines += 1
             pipeline_to_start.start()
@@ -346,16 +392,37 @@ class PipelineManager:
 
     def get_all_instance_status(self):
         results = []
-        for pipeline_instance in self.pipeline_instances.values():
-            results.append(pipeline_instance.status())
+        for instance_id, pipeline_instance in list(self.pipeline_instances.items()):
+            results.append(self._add_queue_status(instance_id, pipeline_instance.status()))
         return results
 
     def get_instance_status(self, instance_id, name=None, version=None):
         if self.instance_exists(instance_id, name, version):
             status = self.pipeline_instances[instance_id].status()
-            return status
+            return self._add_queue_status(instance_id, status)
         return None
 
+    def _add_queue_status(self, instance_id, status):
+        position = self.pipeline_queue.position(instance_id)
+        if position is None:
+            return status
+        status["queue_position"] = position
+        status["estimated_start_time"] = self._estimate_start_time(position)
+        return status
+
+    def _estimate_start_time(self, position):
+        # one of the parallel running instances completes every
+        # average duration / parallel instances seconds
+        durations = [instance.stop_time - instance.start_time
+                     for instance in list(self.pipeline_instances.values())
+                     if instance.state is Pipeline.State.COMPLETED
+                     and instance.start_time is not None and instance.stop_time is not None]
+        if not durations:
+            return None
+        parallel = (self.max_running_pipelines if self.max_running_pipelines > 0
+                    else max(self.running_pipelines, 1))
+        return time.time() + position * (sum(durations) / len(durations)) / parallel
+
     def stop_instance(self, instance_id, name=None, version=None):
         if self.instance_exists(instance_id, name, version):
             try:
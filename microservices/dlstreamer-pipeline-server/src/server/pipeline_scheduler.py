@@ -0,0 +1,186 @@
+#
+# Apache v2 license
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+#
+
+"""Admission of queued pipeline instances in PipelineManager.
+"""
+import itertools
+import math
+from collections import namedtuple
+from threading import Lock
+
+# cost of one 1920x1080 stream, the unit of device capacity
+REFERENCE_PIXELS = 1920 * 1080
+DEFAULT_DEVICE = "CPU"
+
+SchedulingInfo = namedtuple("SchedulingInfo",
+                            ["priority", "cost", "device", "preemptible", "sequence"])
+
+
+class PipelineScheduler():
+    """Queue of pipeline instances waiting to start, admitted in FIFO order.
+
+    PipelineManager appends created instances and asks ``admit`` for the next
+    one whenever a pipeline is created or finishes. Subclasses override
+    ``_order`` and ``admit`` to implement a different admission policy.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._queue = []
+        self._info = {}
+        self._sequence = itertools.count()
+
+    def append(self, identifier, request=None):
+        with self._lock:
+            if identifier not in self._info:
+                self._info[identifier] = self.get_scheduling_info(request, next(self._sequence))
+            self._queue.append(identifier)
+            self._queue.sort(key=self._order)
+
+    def remove(self, identifier):
+        with self._lock:
+            self._queue.remove(identifier)
+
+    def position(self, identifier):
+        """1-based position of identifier in the queue, None if not queued"""
+        with self._lock:
+            if identifier in self._queue:
+                return self._queue.index(identifier) + 1
+        return None
+
+    def info(self, identifier):
+        with self._lock:
+            return self._info.get(identifier)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._queue)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._queue))
+
+    def __contains__(self, identifier):
+        with self._lock:
+            return identifier in self._queue
+
+    def _order(self, identifier):
+        return self._info[identifier].sequence
+
+    def admit(self, active_load, can_start=True, resumable=()):
+        """Select the next instance to run.
+
+        :param dict active_load: Load of each running instance keyed by id
+        :param bool can_start: False when no new instance may be started,
+            only paused instances (resumable) can be admitted
+        :param resumable: Queued ids of paused instances
+        :returns: Tuple of the admitted id (or None) and the running ids to
+            pause to make room for it
+        """
+        with self._lock:
+            self._forget_finished(active_load)
+            for identifier in self._queue:
+                if can_start or identifier in resumable:
+                    self._queue.remove(identifier)
+                    return identifier, []
+        return None, []
+
+    def _forget_finished(self, active_load):
+        self._info = {identifier: info for identifier, info in self._info.items()
+                      if identifier in self._queue or identifier in active_load}
+
+    @staticmethod
+    def get_scheduling_info(request, sequence=0):
+        """Scheduling hints of a pipeline request.
+
+        ``request["scheduling"]`` may set ``priority`` (higher runs first),
+        ``device``, ``preemptible`` and the estimated ``cost``. Without a cost,
+        it is estimated as ``streams`` times the ``resolution`` ("WIDTHxHEIGHT")
+        relative to a 1080p stream.
+        """
+        request = request or {}
+        scheduling = request.get("scheduling") or {}
+        parameters = request.get("parameters") or {}
+        cost = scheduling.get("cost")
+        if cost is None:
+            width, height = 1920, 1080
+            resolution = scheduling.get("resolution")
+            if resolution:
+                width, height = (int(value) for value in str(resolution).lower().split("x"))
+            cost = scheduling.get("streams", 1) * width * height / REFERENCE_PIXELS
+        device = scheduling.get("device") or parameters.get("detection-device") or DEFAULT_DEVICE
+        return SchedulingInfo(int(scheduling.get("priority", 0)),
+                              float(cost),
+                              str(device).split(".")[0].upper(),
+                              bool(scheduling.get("preemptible", False)),
+                              sequence)
+
+
+class PriorityScheduler(PipelineScheduler):
+    """Admit by priority, then arrival, within per device capacity.
+
+    ``device_capacity`` maps device names (CPU, GPU, NPU ...) to the load
+    they sustain, in cost units (1 per 1080p stream). Devices not listed are
+    not limited. A running instance counts with its estimated cost, which
+    PipelineManager scales by its measured load (average frames in flight,
+    fps times pipeline latency) relative to the first load it reported. An
+    instance is always admitted on a device with nothing running, even if
+    its cost exceeds the capacity.
+
+    An instance that does not fit blocks lower priority instances on its
+    device. A non preemptible instance (a live stream) that does not fit
+    pauses lower priority preemptible instances on its device until it
+    fits. Paused instances are queued again and resume when capacity frees.
+    """
+
+    def __init__(self, device_capacity=None):
+        super().__init__()
+        self.device_capacity = dict(device_capacity or {})
+
+    def _order(self, identifier):
+        info = self._info[identifier]
+        return (-info.priority, info.sequence)
+
+    def admit(self, active_load, can_start=True, resumable=()):
+        with self._lock:
+            self._forget_finished(active_load)
+            device_load = {}
+            for identifier, load in active_load.items():
+                device = self._info[identifier].device if identifier in self._info else DEFAULT_DEVICE
+                device_load[device] = device_load.get(device, 0) + load
+            blocked = set()
+            for identifier in self._queue:
+                info = self._info[identifier]
+                if info.device in blocked or not (can_start or identifier in resumable):
+                    continue
+                capacity = self.device_capacity.get(info.device, math.inf)
+                load = device_load.get(info.device, 0)
+                if info.device not in device_load or load + info.cost <= capacity:
+                    self._queue.remove(identifier)
+                    return identifier, []
+                preempt = [] if info.preemptible else self._preemption(
+                    info, active_load, capacity - load - info.cost)
+                if preempt:
+                    self._queue.remove(identifier)
+                    return identifier, preempt
+                blocked.add(info.device)
+        return None, []
+
+    def _preemption(self, info, active_load, headroom):
+        victims = sorted((identifier for identifier in active_load
+                          if identifier in self._info
+                          and self._info[identifier].device == info.device
+                          and self._info[identifier].preemptible
+                          and self._info[identifier].priority < info.priority),
+                         key=lambda identifier: (self._info[identifier].priority,
+                                                 -self._info[identifier].sequence))
+        preempt = []
+        for identifier in victims:
+            if headroom >= 0:
+                break
+            preempt.append(identifier)
+            headroom += active_load[identifier]
+        return preempt if headroom >= 0 else []
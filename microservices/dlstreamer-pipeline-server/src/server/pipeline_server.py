@@ -10,6 +10,7 @@ from collections import defaultdict
 from collections import namedtuple
 from src.server.arguments import parse_options
 from src.server.pipeline_manager import PipelineManager
+from src.server.pipeline_scheduler import PriorityScheduler
 from src.server.model_manager import ModelManager
 from src.server.common.utils import logging
 
@@ -69,8 +70,11 @@ class __PipelineServer:
             if (self._instance):
                 result = self._pipeline_server.pipeline_manager.get_instance_status(self._instance)
 
-                if 'avg_pipeline_latency' not in result:
-                    result['avg_pipeline_latency'] = None
+                for key in ('avg_pipeline_latency', 'pipeline_latency', 'element_latency',
+                            'startup_time', 'model_instances',
+                            'queue_position', 'estimated_start_time'):
+                    if key not in result:
+                        result[key] = None
 
                 if (not self._status_named_tuple):
                     self._status_named_tuple = namedtuple(
@@ -140,7 +144,8 @@ class __PipelineServer:
                 os.path.abspath(os.path.join(self.options.config_path,
                                              self.options.pipeline_dir)),
                 max_running_pipelines=self.options.max_running_pipelines,
-                ignore_init_errors=self.options.ignore_init_errors)
+                ignore_init_errors=self.options.ignore_init_errors,
+                scheduler=PriorityScheduler(self.options.device_capacity))
             self._stopped = False
 
     def __del__(self):
@@ -0,0 +1,103 @@
+#
+# Apache v2 license
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+#
+
+"""Zero-copy Gst.Buffer over memory owned by Python objects or mapped files.
+"""
+import itertools
+import mmap
+import os
+from threading import Lock
+
+import gi
+
+gi.require_version('Gst', '1.0')
+# pylint: disable=wrong-import-position
+import numpy as np
+from gi.repository import Gst
+from gstgva.util import G_DESTROY_NOTIFY, libgst
+# pylint: enable=wrong-import-position
+
+# GST_MEMORY_FLAG_READONLY, elements writing in place copy the memory first
+MEMORY_FLAG_READONLY = 1 << 1
+
+# owners of wrapped memory keyed by the user data passed to GStreamer
+_owners = {}
+_owners_lock = Lock()
+_keys = itertools.count(1)
+
+
+def _release(key):
+    """Destroy notify of wrapped memory, called by GStreamer from any thread
+    once the last buffer referencing the memory is freed.
+    """
+    with _owners_lock:
+        entry = _owners.pop(key, None)
+    if entry is None:
+        return
+    array, mapping = entry
+    # the array exports the mapping's buffer, drop it before closing
+    del entry, array
+    if mapping is not None:
+        try:
+            mapping.close()
+        except BufferError:
+            # still exported elsewhere, closed when garbage collected
+            pass
+
+
+# must outlive every wrapped memory
+_release_notify = G_DESTROY_NOTIFY(_release)
+
+
+def _wrap(array, mapping=None):
+    buffer = Gst.Buffer.new()
+    if array.nbytes == 0:
+        if mapping is not None:
+            mapping.close()
+        return buffer
+    with _owners_lock:
+        key = next(_keys)
+        _owners[key] = (array, mapping)
+    memory = libgst.gst_memory_new_wrapped(MEMORY_FLAG_READONLY, array.ctypes.data,
+                                           array.nbytes, 0, array.nbytes, key,
+                                           _release_notify)
+    if not memory:
+        _release(key)
+        raise RuntimeError("Couldn't wrap memory in GstMemory")
+    libgst.gst_buffer_append_memory(hash(buffer), memory)
+    return buffer
+
+
+def wrap_data(data):
+    """Gst.Buffer sharing the memory of data.
+
+    :param data: bytes, bytearray, memoryview, mmap or NumPy array. The object
+        is kept referenced until GStreamer releases the buffer and must not be
+        modified meanwhile. Non contiguous arrays and views are copied once.
+    :rtype: Gst.Buffer
+    """
+    if isinstance(data, (np.ndarray, memoryview)):
+        array = np.ascontiguousarray(data)
+    else:
+        array = np.frombuffer(data, dtype=np.uint8)
+    return _wrap(array.reshape(-1).view(np.uint8))
+
+
+def wrap_file(path):
+    """Gst.Buffer over a read only memory map of the file at path.
+
+    Pages are read on demand by the elements consuming the buffer, the file
+    content is never copied into the Python heap. The mapping is closed when
+    GStreamer releases the buffer.
+
+    :param str path: File to map
+    :rtype: Gst.Buffer
+    """
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return Gst.Buffer.new()
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    return _wrap(np.frombuffer(mapping, dtype=np.uint8), mapping)
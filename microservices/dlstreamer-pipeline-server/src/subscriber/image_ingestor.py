@@ -15,6 +15,7 @@ import json
 import time
 
 from src.common.log import get_logger
+from src.server.wrapped_buffer import wrap_data, wrap_file
 
 gi.require_version('Gst', '1.0')
 
@@ -55,20 +56,23 @@ class ImageIngestor:
             try:
                 item = request_queue.get(timeout=1)
                 blob = None
+                buf = None
                 self.log.info("Recevied request by image ingestor queue")
 
                 # fetch any user metadata from the request
-                additional_meta = item.get("custom_meta_data", {})
+                # copied, the caller's dict is not modified
+                additional_meta = dict(item.get("custom_meta_data") or {})
+                if "correlation_id" in item:
+                    # returned in the metadata, routes the response to its caller
+                    additional_meta["correlation_id"] = item["correlation_id"]
 
                 # TODO: If the item contains a feature_vector, add it to the additional_meta dict
 
                 if item["source"]["type"] == "file":
                     fp = item["source"]["path"]
                     additional_meta.update({"source_path": fp})
-                    with open(fp,"rb") as f:
-                        # Do something with the image and send it to gst input queue
-                        blob = f.read()
-                    additional_meta["source_path"] = fp
+                    # memory map the image instead of reading it into a bytes copy
+                    buf = wrap_file(fp)
 
                 elif item["source"]["type"] == "base64_image":
                     # Convert base64 encoded string into image blob
@@ -76,12 +80,14 @@ class ImageIngestor:
                     additional_meta.update({"source_data": "base64_image"})
                     blob = base64.b64decode(base64_str)
 
-                # Creating GstSample from raw bytes blob
-                bufferLength = len(blob)
+                elif item["source"]["type"] == "bytes":
+                    # image uploaded with a multipart batch request
+                    additional_meta.update({"source_data": item["source"].get("name", "bytes")})
+                    blob = item["source"]["data"]
 
-                # Allocate GstBuffer
-                buf = Gst.Buffer.new_allocate(None, bufferLength, None)
-                buf.fill(0, blob)
+                if blob is not None:
+                    # share the blob memory with the GstBuffer
+                    buf = wrap_data(blob)
 
                 # update any additional metadata
                 if additional_meta:
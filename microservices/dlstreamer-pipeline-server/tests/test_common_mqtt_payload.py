@@ -0,0 +1,58 @@
+#
+# Apache v2 license
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import pytest
+import base64
+import json
+
+import numpy as np
+
+from utils import mqtt_payload
+from utils.mqtt_payload import encode_payload, decode_payload, check_payload_format
+
+METADATA = {'frame_id': 1, 'objects': [{'label': 'Person', 'score': 0.5}]}
+
+class TestMqttPayload:
+
+    @pytest.mark.parametrize('payload_format', ['json', 'binary', 'msgpack'])
+    @pytest.mark.parametrize('blob', [None, b'\x00\xffframe', np.arange(12, dtype=np.uint8).reshape(12, 1)])
+    def test_round_trip(self, payload_format, blob):
+        if payload_format == 'msgpack':
+            pytest.importorskip('msgpack')
+        payload = encode_payload(METADATA, blob, payload_format)
+        metadata, decoded_blob = decode_payload(payload, payload_format)
+        assert metadata == METADATA
+        if blob is None:
+            assert decoded_blob is None
+        else:
+            assert decoded_blob == bytes(blob)
+
+    def test_json_compatible(self):
+        payload = encode_payload(METADATA, b'Test')
+        assert json.loads(payload) == {'metadata': METADATA,
+                                       'blob': base64.b64encode(b'Test').decode('utf-8')}
+        assert json.loads(encode_payload(METADATA)) == {'metadata': METADATA, 'blob': ''}
+
+    def test_binary_framing(self):
+        payload = encode_payload(METADATA, b'Test', 'binary')
+        meta = json.dumps(METADATA).encode('utf-8')
+        assert payload == len(meta).to_bytes(4, 'big') + meta + b'Test'
+
+    @pytest.mark.parametrize('payload', [b'\x00', b'\x00\x00\x00\x10{}'])
+    def test_binary_invalid(self, payload):
+        with pytest.raises(ValueError):
+            decode_payload(payload, 'binary')
+
+    def test_invalid_format(self):
+        with pytest.raises(ValueError):
+            check_payload_format('xml')
+        with pytest.raises(ValueError):
+            encode_payload(METADATA, None, 'xml')
+
+    def test_msgpack_missing(self, monkeypatch):
+        monkeypatch.setattr(mqtt_payload, 'msgpack', None)
+        with pytest.raises(ValueError):
+            check_payload_format('msgpack')
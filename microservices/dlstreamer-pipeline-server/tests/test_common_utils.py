@@ -6,9 +6,11 @@
 
 import pytest
 import cv2
+import numpy as np
 from unittest.mock import MagicMock
 from gstgva.video_frame import VideoFrame
 import utils.publisher_utils as utils
+from src.common import gva_events
 
 
 class TestUtils:
@@ -57,65 +59,69 @@ class TestUtils:
             if expected == TypeError:
                 assert expected == type(e)
 
-    @pytest.mark.parametrize('detection', [True, False])
-    def test_gva_meta_regions(self, detection):
+    @pytest.mark.parametrize('tensors_number, detection, expected_tensor', [
+        (1, True, {'name': 'detection', 'confidence': 0.8, 'label_id': 1, 'label': 'vehicle'}),
+        (1, False, {'name': 'tensor1', 'confidence': 0.8, 'label_id': 1, 'label': 'person'}),
+        (2, True, {'name': 'tensor1', 'confidence': 0.8, 'label_id': 1, 'label': 'vehicle'}),
+    ])
+    def test_gva_meta_regions(self, mocker, tensors_number, detection, expected_tensor):
+        mocker.patch('utils.publisher_utils.GLib.quark_to_string',
+                     side_effect={7: 'vehicle'}.get)
         mocked_result = MagicMock(spec=VideoFrame)
-        #Mocked regions
-        rect = MagicMock()
-        rect.configure_mock(x=150, y=60, w=50, h=90)
+        mocked_result.regions_array.return_value = np.array(
+            [(0, 0, 150, 60, 50, 90, 1, 0.8, 5, 7, tensors_number, detection),
+             (1, 0, 10, 20, 30, 40, -1, np.nan, -1, 7, 1, True),
+             (2, 0, 10, 20, 30, 40, -1, np.nan, -1, 7, 0, False)],
+            dtype=VideoFrame.REGIONS_DTYPE)
+        # Regions read tensor by tensor
         tensor = MagicMock()
         tensor.name.return_value = "tensor1"
         tensor.confidence.return_value = 0.8
         tensor.label_id.return_value = 1
         tensor.is_detection.return_value = detection
         tensor.label.return_value = "person"
-
         region = MagicMock()
-        region.label.return_value = 'vehicle'
-        region.rect.return_value = rect
         region.tensors.return_value = [tensor]
-        region.object_id = MagicMock(return_value="object_id1")
-        mocked_result.regions.return_value = [region]
+        mocked_result.regions.return_value = [region, MagicMock(), MagicMock()]
 
         gva_meta = utils.get_gva_meta_regions(mocked_result)
-        if not detection:
-            assert gva_meta == [{
-                'x':
-                    150,
-                'y':
-                    60,
-                'width':
-                    50,
-                'height':
-                    90,
-                'object_id':
-                    "object_id1",
-                'tensor': [{
-                    'name': 'tensor1',
-                    'confidence': 0.8,
-                    'label_id': 1,
-                    'label': 'person'
-                }]
-            }]
-        else:
-            assert gva_meta == [{
-                'x':
-                    150,
-                'y':
-                    60,
-                'width':
-                    50,
-                'height':
-                    90,
-                'object_id':
-                    "object_id1",
-                'tensor': [{
-                    'name': 'tensor1',
-                    'confidence': 0.8,
-                    'label_id': 1,
-                    'label': 'vehicle'
-                }]
-            }]
+        assert gva_meta == [{
+            'x': 150, 'y': 60, 'width': 50, 'height': 90, 'object_id': 5,
+            'tensor': [expected_tensor]
+        }, {
+            'x': 10, 'y': 20, 'width': 30, 'height': 40, 'object_id': None,
+            'tensor': [{'name': 'detection', 'confidence': None, 'label_id': None,
+                        'label': 'vehicle'}]
+        }, {
+            'x': 10, 'y': 20, 'width': 30, 'height': 40, 'object_id': None,
+            'tensor': []
+        }]
+        if tensors_number == 1 and detection:
+            mocked_result.regions.assert_not_called()
+
+    def test_gva_meta_region_columns(self):
+        regions = utils.GvaMetaRegions([10, 100], [20, 200], [30, 50], [40, 60], [1, 2],
+                                       [(('detection', 0.9, 0, 'person'),), ()])
+        assert len(regions) == 2
+        assert regions.boxes_x1y1x2y2().tolist() == [[10, 20, 40, 60], [100, 200, 150, 260]]
+        assert regions.labels() == ['person', None]
+        assert regions.scores() == [0.9, None]
+        gva_meta = regions.to_list()
+        assert gva_meta[0] == {'x': 10, 'y': 20, 'height': 40, 'width': 30, 'object_id': 1,
+                               'tensor': [{'name': 'detection', 'confidence': 0.9,
+                                           'label_id': 0, 'label': 'person'}]}
+        assert utils.GvaMetaRegions.from_list(gva_meta).to_list() == gva_meta
+
+    @pytest.mark.parametrize('bboxes, expected', [
+        ([[10, 20, 40, 60], [100, 200, 150, 260]], [1, 2]),
+        ([[100, 200, 150, 260], [10, 20, 40, 60]], [2, 1]),
+        ([[100, 200, 150, 260], [0, 0, 1, 1], [10.5, 20, 40, 60]], [2, None, None]),
+        ([], []),
+    ])
+    def test_gva_meta_match_object_ids(self, bboxes, expected):
+        regions = utils.GvaMetaRegions([10, 100], [20, 200], [30, 50], [40, 60], [1, 2],
+                                       [(), ()])
+        assert regions.match_object_ids(bboxes) == expected
 
     def test_get_gva_meta_messages(self):
         mocked_frame = MagicMock(spec=VideoFrame)
@@ -125,3 +131,12 @@ class TestUtils:
         meta_data = {}
         utils.get_gva_meta_messages(mocked_frame, meta_data)
         assert meta_data['key1'] == 'value1' and meta_data['key2'] == 'value2'
+
+    def test_get_gva_meta_messages_events_ref(self):
+        mocked_frame = MagicMock(spec=VideoFrame)
+        mocked_frame.messages.return_value = [
+            '{"key1": "value1"}', gva_events.cache.put([{"event-type": "zone-entry"}])
+        ]
+        meta_data = {}
+        utils.get_gva_meta_messages(mocked_frame, meta_data)
+        assert meta_data == {'key1': 'value1', 'events': [{"event-type": "zone-entry"}]}
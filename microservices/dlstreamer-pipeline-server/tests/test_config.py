@@ -282,6 +282,13 @@ class TestConfigHandler:
         assert ch.eii_mode == False
         assert ch._app_cfg == "test_data"
 
+    def test_read_app_cfg(self, mocker):
+        mocker.patch("builtins.open", mocker.mock_open(read_data=json.dumps({"config": "test_data"})))
+        ch = config.PipelineServerConfig._ConfigHandler()
+        mocker.patch("builtins.open", mocker.mock_open(read_data=json.dumps({"config": "new_data"})))
+        assert ch.read_app_cfg() == "new_data"
+        assert ch.get_app_cfg() == "test_data"
+
     @pytest.fixture
     def config_handler_eis(self, mocker, monkeypatch):
         monkeypatch.setenv("READ_CONFIG_FROM_FILE_ENV", "True")
@@ -314,6 +321,10 @@ class TestConfigHandler:
         config_handler_eis._app_cfg = "test_data"
         assert config_handler_eis.get_app_cfg() == "test_data"
 
+    def test_read_app_cfg_eii(self, config_handler_eis):
+        config_handler_eis._cfg_mgr.get_app_config.return_value.get_dict.return_value = {"pipelines": []}
+        assert config_handler_eis.read_app_cfg() == {"pipelines": []}
+
     def side_effect_get_interface(self,i):
         data = {0:"cfg1", 1:"cfg2"}
         return data[i]
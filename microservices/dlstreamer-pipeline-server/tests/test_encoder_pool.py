@@ -0,0 +1,79 @@
+#
+# Apache v2 license
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import pytest
+import random
+import threading
+import time
+from unittest.mock import MagicMock
+import src.common.log
+
+from src.publisher.common.encoder_pool import EncoderPool
+
+src.common.log.configure_logging('DEBUG', False)
+
+class TestEncoderPool:
+
+    def test_invalid_workers(self):
+        with pytest.raises(ValueError):
+            EncoderPool(0, MagicMock(), MagicMock())
+
+    def test_publish_in_order(self):
+        published = []
+
+        def encode(frame, meta_data):
+            time.sleep(random.uniform(0, 0.01))
+            return frame, meta_data
+
+        pool = EncoderPool(4, encode, lambda frame, meta_data: published.append(meta_data['frame_id']))
+        for frame_id in range(50):
+            pool.submit(b'frame', {'frame_id': frame_id})
+        pool.stop()
+        assert published == list(range(50))
+        stats = pool.stats()
+        assert stats['workers'] == 4
+        assert stats['max_pending'] == 8
+        assert stats['queue_depth'] == 0
+        assert stats['encode_latency']['count'] == 50
+
+    def test_encode_error_skips_frame(self):
+        published = []
+        error_fn = MagicMock()
+
+        def encode(frame, meta_data):
+            if meta_data['frame_id'] == 1:
+                raise RuntimeError('encode failed')
+            return frame, meta_data
+
+        pool = EncoderPool(2, encode, lambda frame, meta_data: published.append(meta_data['frame_id']),
+                           error_fn=error_fn)
+        for frame_id in range(3):
+            pool.submit(b'frame', {'frame_id': frame_id})
+        pool.stop()
+        assert published == [0, 2]
+        error_fn.assert_called_once()
+        assert pool.stats()['queue_depth'] == 0
+
+    def test_blocking_publish(self):
+        release = threading.Event()
+        encoded = []
+
+        def encode(frame, meta_data):
+            encoded.append(meta_data['frame_id'])
+            return frame, meta_data
+
+        pool = EncoderPool(2, encode, lambda frame, meta_data: release.wait(5), max_pending=4)
+        for frame_id in range(4):
+            pool.submit(b'frame', {'frame_id': frame_id})
+        # Frames are encoded and stats reported while the first frame is being published
+        deadline = time.time() + 5
+        while (len(encoded) < 4 or pool.stats()['queue_depth'] != 3) and time.time() < deadline:
+            time.sleep(0.01)
+        assert sorted(encoded) == [0, 1, 2, 3]
+        assert pool.stats()['queue_depth'] == 3
+        release.set()
+        pool.stop()
+        assert pool.stats()['queue_depth'] == 0
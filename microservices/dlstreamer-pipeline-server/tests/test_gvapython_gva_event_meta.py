@@ -0,0 +1,123 @@
+#
+# Apache v2 license
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             'user_scripts', 'gvapython', 'gva_event_meta'))
+# pylint: disable=wrong-import-position
+import gva_event_meta
+import gva_event_convert
+from src.common import gva_events
+
+
+class FakeFrame:
+    """Stand-in for gstgva VideoFrame message (GVAJSONMeta) API"""
+
+    def __init__(self, messages=None):
+        self._messages = list(messages or [])
+
+    def messages(self):
+        return list(self._messages)
+
+    def add_message(self, message):
+        self._messages.append(message)
+
+    def remove_message(self, message):
+        self._messages.remove(message)
+
+
+@pytest.fixture
+def store(mocker):
+    event_cache = gva_events.EventCache(max_lists=4)
+    mocker.patch.object(gva_events, 'cache', event_cache)
+    return event_cache
+
+
+class TestGvaEventMeta:
+
+    def test_add_and_remove_events(self, store, mocker):
+        dumps = mocker.spy(gva_event_meta.json, 'dumps')
+        frame = FakeFrame()
+        gva_event_meta.add_event(frame, "zone-entry", {"related-objects": [0]})
+        gva_event_meta.add_event(frame, "zone-exit", {"related-objects": [1]})
+        # a single reference message, events are not serialized
+        assert len(frame.messages()) == 1
+        assert gva_events.is_ref(frame.messages()[0])
+        dumps.assert_not_called()
+        assert gva_event_meta.events(frame) == [
+            {"event-type": "zone-entry", "related-objects": [0]},
+            {"event-type": "zone-exit", "related-objects": [1]}]
+        gva_event_meta.remove_event(frame, {"event-type": "zone-entry", "related-objects": [0]})
+        assert gva_event_meta.events(frame) == [{"event-type": "zone-exit", "related-objects": [1]}]
+        assert len(frame.messages()) == 1
+        gva_event_meta.remove_events(frame)
+        assert frame.messages() == []
+        assert gva_event_meta.events(frame) == []
+
+    def test_events_returns_copy(self, store):
+        frame = FakeFrame()
+        gva_event_meta.add_event(frame, "zone-entry", {})
+        gva_event_meta.events(frame).clear()
+        assert len(gva_event_meta.events(frame)) == 1
+
+    def test_cached_events_not_parsed(self, store, mocker):
+        frame = FakeFrame()
+        gva_event_meta.add_event(frame, "zone-entry", {})
+        loads = mocker.spy(gva_event_meta.json, 'loads')
+        gva_event_meta.add_event(frame, "zone-exit", {})
+        assert gva_event_meta.events(frame) == [{"event-type": "zone-entry"}, {"event-type": "zone-exit"}]
+        loads.assert_not_called()
+
+    def test_existing_events_message(self, store):
+        frame = FakeFrame([json.dumps({"events": [{"event-type": "old"}]})])
+        assert gva_event_meta.events(frame) == [{"event-type": "old"}]
+        gva_event_meta.add_event(frame, "new", {})
+        assert gva_event_meta.events(frame) == [{"event-type": "old"}, {"event-type": "new"}]
+        assert len(frame.messages()) == 1
+
+    def test_shared_message(self, store):
+        # tee'd buffers carry the same events message
+        frame = FakeFrame()
+        gva_event_meta.add_event(frame, "zone-entry", {})
+        branch = FakeFrame(frame.messages())
+        assert gva_event_meta.pop_events(frame) == [{"event-type": "zone-entry"}]
+        assert gva_event_meta.events(branch) == [{"event-type": "zone-entry"}]
+        gva_event_meta.add_event(branch, "zone-exit", {})
+        assert gva_event_meta.events(branch) == [{"event-type": "zone-entry"}, {"event-type": "zone-exit"}]
+        assert gva_event_meta.events(FakeFrame([json.dumps({"events": [{"event-type": "zone-entry"}]})])) == \
+            [{"event-type": "zone-entry"}]
+
+    def test_cache_is_bounded(self, store):
+        frames = [FakeFrame() for _ in range(6)]
+        for index, frame in enumerate(frames):
+            gva_event_meta.add_event(frame, "zone-entry", {"index": index})
+        assert len(store) == 4
+        assert gva_event_meta.events(frames[0]) == []
+        assert gva_event_meta.events(frames[5]) == [{"event-type": "zone-entry", "index": 5}]
+
+
+class TestGvaEventConvert:
+
+    def test_process_frame(self, store):
+        frame = FakeFrame([json.dumps({"objects": [{"id": 1}], "resolution": {}})])
+        gva_event_meta.add_event(frame, "zone-entry", {"related-objects": [0]})
+        assert gva_event_convert.process_frame(frame) is True
+        messages = frame.messages()
+        assert len(messages) == 1
+        assert json.loads(messages[0]) == {"objects": [{"id": 1}], "resolution": {},
+                                           "events": [{"event-type": "zone-entry", "related-objects": [0]}]}
+        assert gva_event_meta.events(frame) == []
+
+    def test_process_frame_without_events(self, store):
+        message = json.dumps({"objects": []})
+        frame = FakeFrame([message])
+        assert gva_event_convert.process_frame(frame) is True
+        assert frame.messages() == [message]
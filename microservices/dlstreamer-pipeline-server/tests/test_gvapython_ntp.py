@@ -0,0 +1,93 @@
+#
+# Apache v2 license
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from gvapython.timestamp import ntp
+from gvapython.timestamp.ntp import NTPTimeStamp
+
+
+def ntp_response(offset, delay):
+    response = MagicMock()
+    response.offset = offset
+    response.delay = delay
+    return response
+
+
+@pytest.fixture
+def clock(mocker):
+    now = {"monotonic": 100.0, "time": 1000.0}
+    mocker.patch.object(ntp, 'monotonic', side_effect=lambda: now["monotonic"])
+    mocker.patch.object(ntp, 'time', side_effect=lambda: now["time"])
+    return now
+
+
+@pytest.fixture
+def client(mocker):
+    mock_client = mocker.patch.object(ntp.ntplib, 'NTPClient').return_value
+    mock_client.request.return_value = ntp_response(0.5, 0.02)
+    return mock_client
+
+
+class TestNTPTimeStamp:
+
+    def test_invalid_args(self, client):
+        with pytest.raises(ValueError):
+            NTPTimeStamp('pool.ntp.org', poll_interval=0)
+
+    def test_process_uses_cached_offset(self, client, clock):
+        stamp = NTPTimeStamp('pool.ntp.org', poll_interval=3600, max_staleness=10)
+        stamp.stop()
+        client.request.assert_called_once_with('pool.ntp.org')
+        frame = MagicMock()
+        clock["monotonic"] += 2
+        assert stamp.process(frame) is True
+        assert stamp.process(frame) is True
+        # no NTP request per frame
+        client.request.assert_called_once()
+        message = json.loads(frame.add_message.call_args[0][0])
+        assert message['ntp_timestamp'] == ntp.ctime(1002.5)
+        assert message['ntp_offset_age'] == 2
+        assert message['ntp_uncertainty'] == pytest.approx(0.01 + 2 * ntp.FREQUENCY_TOLERANCE)
+        assert message['ntp_stale'] is False
+
+    def test_stale_offset(self, client, clock):
+        stamp = NTPTimeStamp('pool.ntp.org', poll_interval=3600, max_staleness=10)
+        stamp.stop()
+        clock["monotonic"] += 11
+        frame = MagicMock()
+        stamp.process(frame)
+        assert json.loads(frame.add_message.call_args[0][0])['ntp_stale'] is True
+
+    def test_filter_prefers_lowest_delay_and_estimates_drift(self, client, clock):
+        stamp = NTPTimeStamp('pool.ntp.org', poll_interval=3600)
+        stamp.stop()
+        # local clock runs 100 ppm slow compared to NTP time
+        for i, delay in enumerate((0.05, 0.01, 0.08), start=1):
+            clock["monotonic"] += 100
+            clock["time"] += 100
+            stamp._update(ntp_response(0.5 + i * 0.01, delay))
+        best_local, best_offset, best_delay, drift, last_local = stamp._estimate
+        assert best_local == 300.0
+        assert best_delay == 0.01
+        assert drift == pytest.approx(1e-4)
+        assert last_local == 400.0
+        ntp_time, age, _ = stamp._get_timestamp()
+        assert age == 0
+        # best sample offset extrapolated by the drift: 400 + 900.52 + 100 * 1e-4
+        assert ntp_time == pytest.approx(1300.53)
+
+    def test_poll_keeps_running_on_error(self, client, clock, mocker):
+        stamp = NTPTimeStamp('pool.ntp.org', poll_interval=3600)
+        stamp.stop()
+        stamp._stop = MagicMock()
+        stamp._stop.wait.side_effect = [False, False, True]
+        client.request.side_effect = [Exception("timeout"), ntp_response(0.7, 0.02)]
+        stamp._poll()
+        assert len(stamp._samples) == 2
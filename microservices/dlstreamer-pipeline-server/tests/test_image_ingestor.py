@@ -79,13 +79,12 @@ class TestImageIngestor:
         img_ing_obj.stop_ev.is_set.side_effect = [False, True]
         mock_request_queue = MagicMock()
         mock_request_queue.get.return_value = {"source": {"type": "file", "path": "test_image.jpg"}}
-        mock_open_func = mocker.patch('builtins.open', mocker.mock_open(read_data=b'test_image_data'))
-        mock_gst_buffer = mocker.patch('gi.repository.Gst.Buffer.new_allocate', return_value=MagicMock())
+        mock_wrap_file = mocker.patch('src.subscriber.image_ingestor.wrap_file', return_value=MagicMock())
         mock_gst_sample = mocker.patch('gi.repository.Gst.Sample', return_value=MagicMock())
         mock_gst_queue = mocker.patch.object(img_ing_obj, 'gst_queue')
         mock_error_handler = mocker.patch.object(img_ing_obj, 'error_handler')
         img_ing_obj._run(mock_request_queue)
-        mock_gst_buffer.assert_called_once_with(None, len(b'test_image_data'), None)
+        mock_wrap_file.assert_called_once_with("test_image.jpg")
         mock_gst_sample.assert_called_once()
         mock_gst_queue.put.assert_called_once_with(mock_gst_sample())
         mock_error_handler.assert_not_called()
@@ -97,18 +96,43 @@ class TestImageIngestor:
         base64_str = base64.b64encode(b'test_image_data').decode('utf-8')
         mock_request_queue = MagicMock()
         mock_request_queue.get.return_value = {"source": {"type": "base64_image", "data": base64_str}}
-        mock_gst_buffer = mocker.patch('gi.repository.Gst.Buffer.new_allocate', return_value=MagicMock())
+        mock_wrap_data = mocker.patch('src.subscriber.image_ingestor.wrap_data', return_value=MagicMock())
         mock_gst_sample = mocker.patch('gi.repository.Gst.Sample', return_value=MagicMock())
         mock_gst_queue = mocker.patch.object(img_ing_obj, 'gst_queue')
         mock_error_handler = mocker.patch.object(img_ing_obj, 'error_handler')
         img_ing_obj._run(mock_request_queue)
         decoded_blob = base64.b64decode(base64_str)
-        mock_gst_buffer.assert_called_once_with(None, len(decoded_blob), None)
+        mock_wrap_data.assert_called_once_with(decoded_blob)
         mock_gst_sample.assert_called_once()
         mock_gst_queue.put.assert_called_once_with(mock_gst_sample())
         mock_error_handler.assert_not_called()
 
 
+    def test_run_bytes_with_correlation_id(self, mocker, img_ing_obj):
+        mocked_event = mocker.patch('src.subscriber.image_ingestor.th.Event')
+        img_ing_obj.stop_ev = mocked_event
+        img_ing_obj.stop_ev.is_set.side_effect = [False, True]
+        mock_request_queue = MagicMock()
+        custom_meta_data = {"camera": "cam1"}
+        mock_request_queue.get.return_value = {"correlation_id": "req1",
+                                               "custom_meta_data": custom_meta_data,
+                                               "source": {"type": "bytes", "name": "a.jpg",
+                                                          "data": b'test_image_data'}}
+        mock_wrap_data = mocker.patch('src.subscriber.image_ingestor.wrap_data', return_value=MagicMock())
+        mocker.patch('gi.repository.Gst.Sample', return_value=MagicMock())
+        mocker.patch.object(img_ing_obj, 'gst_queue')
+        mock_add_meta = mocker.patch('src.subscriber.image_ingestor.GVAJSONMeta.add_json_meta')
+        mock_error_handler = mocker.patch.object(img_ing_obj, 'error_handler')
+        img_ing_obj._run(mock_request_queue)
+        mock_wrap_data.assert_called_once_with(b'test_image_data')
+        meta = json.loads(mock_add_meta.call_args[0][1])
+        assert meta["correlation_id"] == "req1"
+        assert meta["source_data"] == "a.jpg"
+        assert meta["camera"] == "cam1"
+        assert custom_meta_data == {"camera": "cam1"}
+        mock_error_handler.assert_not_called()
+
+
     @pytest.mark.parametrize('exception, expected',
                              [(queue.Empty(), None)])
     def test_run_errors(self, mocker, caplog, img_ing_obj, exception, expected):
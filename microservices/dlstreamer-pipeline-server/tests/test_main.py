@@ -0,0 +1,74 @@
+#
+# Apache v2 license
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import pytest
+import sys
+from unittest.mock import MagicMock
+
+# Mocked modules - cfgmgr
+mocked_cfgmgr = MagicMock()
+sys.modules['cfgmgr.config_manager'] = mocked_cfgmgr
+
+import src.__main__ as server_main
+
+
+@pytest.fixture
+def main_module(mocker):
+    # log is created when the module runs as __main__
+    mocker.patch.object(server_main, 'log', MagicMock(), create=True)
+    mocker.patch.object(server_main, 'exit_handler')
+    model_registry_client = mocker.patch.object(server_main, 'ModelRegistryClient')
+    yield server_main, model_registry_client.return_value
+
+
+class TestUpdateModelPaths:
+    def test_models_downloaded(self, main_module):
+        module, client = main_module
+        client.is_ready = True
+        client.get_model_path.return_value = {"pipeline": "/models/model.xml"}
+        cfg = MagicMock()
+        assert module.update_model_paths(cfg) is client
+        client.start_download_models.assert_called_once_with(pipelines_cfg=cfg.get_pipelines_config())
+        cfg.update_pipeline_config.assert_called_once_with({"pipeline": "/models/model.xml"})
+
+    def test_registry_not_ready(self, main_module):
+        module, client = main_module
+        client.is_ready = False
+        cfg = MagicMock()
+        assert module.update_model_paths(cfg) is client
+        client.start_download_models.assert_not_called()
+        cfg.update_pipeline_config.assert_not_called()
+
+
+class TestReloadConfig:
+    def test_reconciled(self, main_module, mocker):
+        module, client = main_module
+        client.is_ready = True
+        client.get_model_path.return_value = {}
+        mgr = mocker.patch.object(module, 'pipeline_server_mgr')
+        mgr.reconcile.return_value = True
+        module.reload_config({"config": {}})
+        mgr.config.set_app_config.assert_called_once_with({"config": {}})
+        mgr.reconcile.assert_called_once_with(mgr.config.get_app_config())
+        client.start_download_models.assert_called_once()
+        module.exit_handler.assert_not_called()
+
+    def test_restart_when_not_reconciled(self, main_module, mocker):
+        module, client = main_module
+        client.is_ready = False
+        mgr = mocker.patch.object(module, 'pipeline_server_mgr')
+        mgr.reconcile.return_value = False
+        module.reload_config({"config": {}})
+        module.exit_handler.assert_called_once()
+
+    def test_restart_on_failure(self, main_module, mocker):
+        module, client = main_module
+        client.is_ready = True
+        client.start_download_models.side_effect = RuntimeError("download failed")
+        mgr = mocker.patch.object(module, 'pipeline_server_mgr')
+        module.reload_config({"config": {}})
+        mgr.reconcile.assert_not_called()
+        module.exit_handler.assert_called_once()
@@ -21,6 +21,7 @@ sys.modules['cfgmgr.config_manager'] = mocked_cfgmgr
 from src.manager import PipelineServerManager
 from src.manager import Pipeline
 from src.manager import PipelineInstance
+from src.manager import ImagePublisher
 
 
 class TestPipelineInstance:
@@ -124,21 +125,56 @@ class TestPipelineInstance:
         with pytest.raises(ValueError, match="Invalid instance id"):
             pipeline_instance.execute_request(invalid_instance_id, request)
     
-    def test_execute_request_clear_response_queue(self, pipeline_instance, mocker):
+    def test_execute_request_correlation_id(self, pipeline_instance, mocker):
         pipeline_instance.source_type = "image_ingestor"
         pipeline_instance.instance_id = "valid_instance_id"
         pipeline_instance.is_async = False
         pipeline_instance.is_appdest = True
         pipeline_instance.publisher = MagicMock()
-        pipeline_instance.publisher.image_publisher = MagicMock()
-        pipeline_instance.publisher.image_publisher.response_queue = MagicMock()
-        pipeline_instance.publisher.image_publisher.response_queue.empty.side_effect = [False, False, True]
-        pipeline_instance.publisher.image_publisher.response_queue.get_nowait.side_effect = [None, queue.Empty]
+        pipeline_instance.publisher.image_publisher = MagicMock(spec=ImagePublisher)
+        pipeline_instance.publisher.image_publisher.wait.return_value = (b"frame", {"objects": []})
         pipeline_instance.ingestor = MagicMock()
-        pipeline_instance.ingestor.request_queue = MagicMock()
-        request = {"timeout": 5, "publish_frame": True}
+        request = {"timeout": 5, "publish_frame": True, "correlation_id": "req1"}
         data, err = pipeline_instance.execute_request("valid_instance_id", request)
-        assert pipeline_instance.publisher.image_publisher.response_queue.get_nowait.call_count == 2
+        assert err is None
+        pipeline_instance.publisher.image_publisher.expect.assert_called_once_with("req1")
+        pipeline_instance.publisher.image_publisher.wait.assert_called_once_with("req1", 5)
+        assert pipeline_instance.ingestor.request_queue.put.call_args[0][0]["correlation_id"] == "req1"
+        assert json.loads(data) == {"metadata": {"objects": []},
+                                    "blob": base64.b64encode(b"frame").decode("utf-8")}
+
+    def test_execute_batch_request(self, pipeline_instance):
+        pipeline_instance.source_type = "image_ingestor"
+        pipeline_instance.instance_id = "valid_instance_id"
+        pipeline_instance.is_async = False
+        pipeline_instance.is_appdest = True
+        pipeline_instance.publisher = MagicMock()
+        pipeline_instance.publisher.image_publisher = MagicMock(spec=ImagePublisher)
+        pipeline_instance.publisher.image_publisher.wait.side_effect = [(b"frame", {"id": 1}), None]
+        pipeline_instance.ingestor = MagicMock()
+        requests = [{"source": {"type": "file", "path": "a.jpg"}, "correlation_id": "a"},
+                    {"source": {"type": "file", "path": "b.jpg"}, "correlation_id": "b"}]
+        results, err = pipeline_instance.execute_batch_request("valid_instance_id", requests, timeout=1)
+        assert err is None
+        # all requests are submitted before waiting for the first response
+        assert pipeline_instance.ingestor.request_queue.put.call_count == 2
+        assert results == [{"correlation_id": "a", "metadata": {"id": 1}, "blob": ""},
+                           {"correlation_id": "b", "error": "Request execution timed out"}]
+
+    def test_image_publisher_keeps_batch_responses(self):
+        image_publisher = ImagePublisher()
+        image_publisher.start()
+        try:
+            for correlation_id in ("a", "b", "c"):
+                image_publisher.expect(correlation_id)
+            # more responses than the queue holds, the pipeline waits instead of dropping
+            for correlation_id in ("a", "b", "c"):
+                image_publisher.queue.append((b"frame", {"correlation_id": correlation_id}))
+            for correlation_id in ("a", "b", "c"):
+                assert image_publisher.wait(correlation_id, 5) == (b"frame", {"correlation_id": correlation_id})
+            assert image_publisher.queue.dropped == 0
+        finally:
+            image_publisher.stop()
 
     def test_execute_request_queue_full(self, pipeline_instance, mocker):
         pipeline_instance.source_type = "image_ingestor"
@@ -146,8 +182,7 @@ class TestPipelineInstance:
         pipeline_instance.is_async = False
         pipeline_instance.is_appdest = True
         pipeline_instance.publisher = MagicMock()
-        pipeline_instance.publisher.image_publisher = MagicMock()
-        pipeline_instance.publisher.image_publisher.response_queue = MagicMock()
+        pipeline_instance.publisher.image_publisher = MagicMock(spec=ImagePublisher)
         pipeline_instance.ingestor = MagicMock()
         pipeline_instance.ingestor.request_queue = MagicMock()
         pipeline_instance.ingestor.request_queue.put.side_effect = queue.Full
@@ -156,6 +191,18 @@ class TestPipelineInstance:
         assert data is None
         assert err == "Could not execute requeust due to timeout."
 
+    def test_execute_request_invalid_publisher(self, pipeline_instance):
+        pipeline_instance.source_type = "image_ingestor"
+        pipeline_instance.instance_id = "valid_instance_id"
+        pipeline_instance.is_async = False
+        pipeline_instance.is_appdest = True
+        pipeline_instance.publisher = MagicMock()
+        pipeline_instance.ingestor = MagicMock()
+        data, err = pipeline_instance.execute_request("valid_instance_id", {"timeout": 5})
+        assert data is None
+        assert err == "Invalid publisher type for image ingestor"
+        pipeline_instance.ingestor.request_queue.put.assert_not_called()
+
     def test_stop(self, pipeline_instance):
         mock_publisher = MagicMock()
         mock_publisher.publishers = [MagicMock(), MagicMock()]
@@ -363,6 +410,21 @@ class TestPipelineServerManager:
         pipeline_server_manager.pserv.pipeline_manager.get_all_instance_status.assert_called_once()
         assert result == status
 
+    def test_get_instance_status_publishers(self, pipeline_server_manager):
+        mock_pipeline_instance = MagicMock()
+        mock_pipeline_instance.get_publisher_status.return_value = [{"type": "MQTTPublisher", "dropped": 0}]
+        mock_pipeline_instance.get_encoder_status.return_value = {"workers": 2, "queue_depth": 1}
+        Pipeline._INSTANCES["instance1"].update({"obj": mock_pipeline_instance, "params": {}})
+        pipeline_server_manager.pserv = MagicMock()
+        pipeline_server_manager.pserv.pipeline_manager.get_instance_status.return_value = {"id": "instance1"}
+        try:
+            result = pipeline_server_manager.get_instance_status("instance1")
+        finally:
+            Pipeline._INSTANCES.pop("instance1")
+        assert result == {"id": "instance1",
+                          "publishers": [{"type": "MQTTPublisher", "dropped": 0}],
+                          "encoder": {"workers": 2, "queue_depth": 1}}
+
     def test_stop_instance(self, mocker, pipeline_server_manager):
         mock_pipeline_instance = MagicMock()
         mock_pipeline_instance.instance_id = "mock_instance_id"
@@ -501,5 +563,55 @@ class TestPipelineServerManager:
         mocker.patch.object(pipeline_server_manager, 'stop_pipelines', return_value=None)
         pipeline_server_manager.stop()
         pipeline_server_manager.pserv.stop.assert_called_once()
-            
-    
\ No newline at end of file
+
+    def test_reconcile_settings_changed(self, pipeline_server_manager):
+        pipeline_server_manager.app_config = {'pipelines': [], 'logging': {'level': 'INFO'}}
+        assert pipeline_server_manager.reconcile({'pipelines': [], 'logging': {'level': 'DEBUG'}}) is False
+
+    def test_reconcile(self, mocker, pipeline_server_manager):
+        unchanged = {'name': 'unchanged', 'source': 'gstreamer', 'pipeline': 'videotestsrc ! appsink'}
+        changed = {'name': 'changed', 'source': 'gstreamer',
+                   'pipeline': 'videotestsrc ! gvadetect model=a.xml model-instance-id=inst0 ! '
+                               'gvaclassify model=c.xml model-instance-id=inst1 ! appsink'}
+        removed = {'name': 'removed', 'source': 'gstreamer', 'pipeline': 'videotestsrc ! appsink'}
+        added = {'name': 'added', 'source': 'gstreamer', 'pipeline': 'videotestsrc ! appsink', 'auto_start': True}
+        pipeline_server_manager.app_config = {'pipelines': [unchanged, changed, removed]}
+        pipeline_server_manager.pserv = MagicMock()
+        pipeline_server_manager._GVAELEMENT_MODEL_INSTANCE_ID = {
+            "gvadetect": {"inst0": {'id': 'old_id'}},
+            "gvaclassify": {"inst1": {'id': 'old_id'}},
+            "gvainference": {}
+        }
+        pipeline_server_manager._PIPELINES = {name: MagicMock(version=name, auto_start=False)
+                                              for name in ('unchanged', 'changed', 'removed')}
+        rest_instance = MagicMock(version='changed', is_running=True, request={'source': 'rest'})
+        unchanged_instance = MagicMock(version='unchanged', is_running=True)
+        mocker.patch.dict(Pipeline._INSTANCES, {'rest_id': {'obj': rest_instance},
+                                                'unchanged_id': {'obj': unchanged_instance}}, clear=True)
+        mocker.patch.object(pipeline_server_manager, 'stop_instance')
+        mocker.patch.object(pipeline_server_manager, 'start_instance', return_value=('new_id', None))
+        mocker.patch("src.manager.shutil.rmtree")
+        new_pipelines = {'added': MagicMock(auto_start=True, pipeline_config={'payload': {'p': 1}}),
+                         'changed': MagicMock(auto_start=False)}
+        new_pipelines['added'].start.return_value = 'auto_id'
+
+        def initialize(versions=None):
+            for version in versions:
+                pipeline_server_manager._PIPELINES[version] = new_pipelines[version]
+        mocker.patch.object(pipeline_server_manager, '_initialize_pipelines', side_effect=initialize)
+
+        new_changed = dict(changed, pipeline=changed['pipeline'].replace('c.xml', 'd.xml'))
+        assert pipeline_server_manager.reconcile({'pipelines': [unchanged, new_changed, added]}) is True
+
+        pipeline_server_manager.stop_instance.assert_called_once_with('rest_id')
+        assert 'unchanged_id' in Pipeline._INSTANCES
+        assert 'removed' not in pipeline_server_manager._PIPELINES
+        pipeline_server_manager._initialize_pipelines.assert_called_once_with(versions=['added', 'changed'])
+        pipeline_server_manager.pserv.pipeline_manager.reload_pipelines.assert_called_once()
+        pipeline_server_manager.start_instance.assert_called_once_with(
+            'user_defined_pipelines', 'changed', {'source': 'rest'})
+        new_pipelines['added'].start.assert_called_once_with(request={'p': 1})
+        # gvadetect definition is unchanged and keeps its loaded model
+        assert 'inst0' in pipeline_server_manager._GVAELEMENT_MODEL_INSTANCE_ID['gvadetect']
+        assert 'inst1' not in pipeline_server_manager._GVAELEMENT_MODEL_INSTANCE_ID['gvaclassify']
+        pipeline_server_manager.pserv.pipeline_manager.release_model_instance.assert_called_once_with('inst1')
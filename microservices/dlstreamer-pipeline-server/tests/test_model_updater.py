@@ -9,8 +9,12 @@ This file contains tests associated to the functions in the model_updater.py fil
 """
 # pylint: disable=protected-access, import-error
 
+import hashlib
+import io
 import os
+import zipfile
 import pytest
+import requests
 from unittest.mock import patch, MagicMock
 from itertools import product
 from src.model_updater import ModelRegistryClient, ModelQueryParams
@@ -195,40 +199,109 @@ def test_get_model(mocker, model_params, expected_model_metadata, status_code, r
         assert model == expected_model_metadata
 
 
-@pytest.mark.parametrize("model_id, expected", [
-    ("0", None),
-    ("1", b'Hello, world!'),
-    ("3", None)
-], ids=["not_connected", "success", "wrong_content_type"])
-def test_get_model_artifacts_zip_file_data(mocker, model_id, expected, request):
-    """Test the model registry client's get_model_artifacts_zip_file_data method
+def _zip_bytes(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zip_file:
+        for name, content in files.items():
+            zip_file.writestr(name, content)
+    return buffer.getvalue()
 
-    Args:
-        mocker : Object used to mock other variables and classes
-        model_id: The id associated to a fake model
-    """
-    client = get_mock_model_registry_client(mocker)
 
-    if request.node.callspec.id == "not_connected":
-        client._is_connected = False
-        data = client._get_model_artifacts_zip_file_data(model_id)
-        assert data is None
-
-    elif request.node.callspec.id in ("success", "wrong_content_type"):
-        mock_get = mocker.patch('src.model_updater.ModelRegistryClient._send_request')
-        mock_response = mocker.Mock()
-        byte_string = b'Hello, world!'
-        mock_response.headers = {"Content-Type": "application/zip"}
-        mock_response.content = byte_string
+def _zip_response(mocker, data, status_code=200, content_type="application/zip",
+                  headers=None, fail_after=None):
+    """Streamed response, raises ChunkedEncodingError after fail_after bytes"""
+    mock_response = mocker.Mock()
+    mock_response.status_code = status_code
+    mock_response.headers = {"Content-Type": content_type, **(headers or {})}
 
-        if request.node.callspec.id == "wrong_content_type":
-            mock_response.headers = {"Content-Type": "plain/text"}
-            mock_response.content = "test"
+    def iter_content(chunk_size):
+        if fail_after is None:
+            yield data
+        else:
+            yield data[:fail_after]
+            raise requests.exceptions.ChunkedEncodingError("connection reset")
+    mock_response.iter_content.side_effect = iter_content
+    return mock_response
 
-        mock_get.return_value = mock_response
 
-        data = client._get_model_artifacts_zip_file_data(model_id)
-        assert data == expected
+@pytest.fixture
+def download_client(mocker, tmp_path):
+    mocker.patch.dict(os.environ, {"MR_URL": "http://fakeurl.com",
+                                   "MR_SAVED_MODELS_DIR": str(tmp_path)})
+    mocker.patch("src.model_updater.time.sleep")
+    return get_mock_model_registry_client(mocker)
+
+
+def test_get_model_artifacts_zip_file(mocker, download_client):
+    data = _zip_bytes({"model/model.xml": b"<xml/>"})
+    mock_send = mocker.patch.object(download_client, "_send_request",
+                                    return_value=_zip_response(
+                                        mocker, data, headers={"Content-Length": str(len(data))}))
+    zip_file_path = download_client._get_model_artifacts_zip_file("1")
+    assert os.path.basename(zip_file_path) == hashlib.sha256(data).hexdigest() + ".zip"
+    with open(zip_file_path, "rb") as zip_file:
+        assert zip_file.read() == data
+    # cached, not downloaded again
+    assert download_client._get_model_artifacts_zip_file("1") == zip_file_path
+    assert mock_send.call_count == 1
+
+
+def test_get_model_artifacts_zip_file_resume(mocker, download_client):
+    data = _zip_bytes({"model/model.xml": b"<xml/>" * 100})
+    mock_send = mocker.patch.object(download_client, "_send_request", side_effect=[
+        _zip_response(mocker, data, headers={"Content-Length": str(len(data))}, fail_after=100),
+        _zip_response(mocker, data[100:], status_code=206,
+                      headers={"Content-Range": f"bytes 100-{len(data) - 1}/{len(data)}"})])
+    zip_file_path = download_client._get_model_artifacts_zip_file("1")
+    with open(zip_file_path, "rb") as zip_file:
+        assert zip_file.read() == data
+    assert mock_send.call_args_list[1][1]["headers"] == {"Range": "bytes=100-"}
+
+
+@pytest.mark.parametrize("response_kwargs", [
+    {"content_type": "plain/text"},
+    {"headers": {"Content-Length": "1"}},
+    {"status_code": 404},
+], ids=["wrong_content_type", "size_mismatch", "not_found"])
+def test_get_model_artifacts_zip_file_errors(mocker, download_client, response_kwargs):
+    data = _zip_bytes({"model/model.xml": b"<xml/>"})
+    mocker.patch.object(download_client, "_send_request",
+                        return_value=_zip_response(mocker, data, **response_kwargs))
+    assert download_client._get_model_artifacts_zip_file("1") is None
+
+
+def test_get_model_artifacts_zip_file_retries_exhausted(mocker, download_client):
+    data = _zip_bytes({"model/model.xml": b"<xml/>" * 100})
+    mock_send = mocker.patch.object(download_client, "_send_request",
+                                    side_effect=lambda **kwargs: _zip_response(
+                                        mocker, data, fail_after=10))
+    mock_sleep = mocker.patch("src.model_updater.time.sleep")
+    download_client._download_retries = 6
+    assert download_client._get_model_artifacts_zip_file("1") is None
+    assert mock_send.call_count == download_client._download_retries + 1
+    # exponential backoff between attempts, capped
+    assert [c[0][0] for c in mock_sleep.call_args_list] == [1, 2, 4, 8, 16, 30]
+
+
+def test_download_models_shared_model(mocker, download_client):
+    model = {
+        "id": "model_id",
+        "name": "model_name",
+        "version": "1",
+        "precision": ["FP32"],
+    }
+    data = _zip_bytes({"model/": b"", "model/FP32/model_name.xml": b"<xml/>"})
+    mocker.patch.object(download_client, "_get_model", return_value=model)
+    mock_send = mocker.patch.object(download_client, "_send_request",
+                                    side_effect=lambda **kwargs: _zip_response(mocker, data))
+    pipelines_cfg = [{"name": name, "model_params": [{"name": "model_name"}]}
+                     for name in ("pipeline1", "pipeline2", "pipeline3")]
+    is_artifacts_saved, msg = download_client.download_models(pipelines_cfg)
+    assert is_artifacts_saved
+    assert mock_send.call_count == 1
+    model_dirpath = os.path.join(download_client._saved_models_dir, "model_name_m-1_fp32")
+    assert os.path.exists(os.path.join(model_dirpath, "FP32", "model_name.xml"))
+    assert not os.path.exists(model_dirpath + ".part")
 
 @pytest.fixture
 def setup_model_registry_client(mocker, tmp_path):
@@ -264,9 +337,9 @@ def test_successful_download_and_save(setup_model_registry_client, pipelines_cfg
         "origin": "geti",
         "category": "category"
     }
-    zip_file_data = b"fake_zip_file_data"
+    zip_file_path = "/fake/dir/fake.zip"
     with patch.object(model_downloader, '_get_model', return_value=model), \
-         patch.object(model_downloader, '_get_model_artifacts_zip_file_data', return_value=zip_file_data), \
+         patch.object(model_downloader, '_get_model_artifacts_zip_file', return_value=zip_file_path), \
          patch('os.makedirs'), \
          patch('os.path.exists', return_value=False), \
          patch('builtins.open', new_callable=MagicMock), \
@@ -296,7 +369,7 @@ def test_permission_error(setup_model_registry_client, pipelines_cfg):
     }
 
     with patch.object(model_downloader, '_get_model', return_value=model), \
-         patch.object(model_downloader, '_get_model_artifacts_zip_file_data', side_effect=PermissionError):
+         patch.object(model_downloader, '_get_model_artifacts_zip_file', side_effect=PermissionError):
         is_artifacts_saved, msg = model_downloader.download_models(pipelines_cfg)
         assert not is_artifacts_saved
         assert "Insufficient permissions" in msg
@@ -13,6 +13,7 @@ import src
 
 import src.common
 from src.publisher.mqtt.mqtt_publisher import MQTTPublisher
+from utils.mqtt_payload import decode_payload
 
 @pytest.fixture
 def setup(mocker):
@@ -84,6 +85,29 @@ class TestMqttPublisher:
         
         pub_obj.client.publish.assert_called_once()
 
+    @pytest.mark.parametrize('payload_format', ['json', 'binary'])
+    def test_publish_mqtt_payload_format(self, setup, payload_format):
+        app_cfg = setup
+        app_cfg['payload_format'] = payload_format
+        app_cfg['publish_frame'] = True
+
+        pub_obj = MQTTPublisher(app_cfg)
+        pub_obj.client.is_connected.return_value = True
+        pub_obj.filter = None
+
+        frame = b"Test"
+        metadata = {'key1': 'value1', 'key2': 'value1'}
+        pub_obj._publish(frame, metadata)
+
+        payload = pub_obj.client.publish.call_args.kwargs['payload']
+        assert decode_payload(payload, payload_format) == (metadata, frame)
+
+    def test_invalid_payload_format(self, setup):
+        app_cfg = setup
+        app_cfg['payload_format'] = 'xml'
+        with pytest.raises(ValueError):
+            MQTTPublisher(app_cfg)
+
     def test_broker_not_connected(self, capfd, setup):
         app_cfg = setup
 
@@ -2,17 +2,32 @@ import os
 import time
 import threading
 import pytest
-import requests
 from unittest import mock
 from src.opentelemetry.opentelemetryexport import OpenTelemetryExporter
 
 
 @pytest.fixture
-def otel_exporter():
+def pipeline_server_mgr():
+    """Pipeline server manager with one running and one stopped instance."""
+    manager = mock.Mock()
+    manager.get_all_instance_status.return_value = [
+        {"id": "pipeline1", "state": mock.Mock(name="State"), "avg_fps": 30},
+        {"id": "pipeline2", "state": "COMPLETED", "avg_fps": 25},
+    ]
+    manager.get_all_instance_status.return_value[0]["state"].name = "RUNNING"
+    manager.pserv.pipeline_manager.pipeline_instances = {
+        "pipeline1": mock.Mock(frame_count=300),
+        "pipeline2": mock.Mock(frame_count=100),
+    }
+    return manager
+
+
+@pytest.fixture
+def otel_exporter(pipeline_server_mgr):
     """Fixture to create an OpenTelemetryExporter instance."""
     with mock.patch("src.opentelemetry.opentelemetryexport.get_logger") as mock_logger:
         mock_logger.return_value = mock.Mock()
-        exporter = OpenTelemetryExporter()
+        exporter = OpenTelemetryExporter(pipeline_server_mgr)
 
         # Mock the CPU and memory gauges
         exporter.cpu_usage = mock.Mock()
@@ -21,25 +36,26 @@ def otel_exporter():
         return exporter
 
 
-@mock.patch("src.opentelemetry.opentelemetryexport.requests.get")
-def test_fetch_pipeline_fps_success(mock_get, otel_exporter):
-    """Test fetching pipeline FPS data when API request is successful."""
-    mock_get.return_value.status_code = 200
-    mock_get.return_value.json.return_value = [
-        {"id": "pipeline1", "state": "RUNNING", "avg_fps": 30},
-        {"id": "pipeline2", "state": "STOPPED", "avg_fps": 25},
-    ]
-
+def test_fetch_pipeline_fps_success(otel_exporter, pipeline_server_mgr):
+    """Test fetching FPS of running pipelines from the pipeline server manager."""
     fps_data = otel_exporter.fetch_pipeline_fps()
     
     assert fps_data == {"pipeline1": 30}
     otel_exporter.log.debug.assert_called()
 
 
-@mock.patch("src.opentelemetry.opentelemetryexport.requests.get")
-def test_fetch_pipeline_fps_failure(mock_get, otel_exporter):
-    """Test handling of API request failure."""
-    mock_get.side_effect = requests.RequestException("API request failed")
+def test_fetch_pipeline_status_cached(otel_exporter, pipeline_server_mgr):
+    """Test that all callbacks of an export share one status collection."""
+    status = otel_exporter.fetch_pipeline_status()
+    otel_exporter.fetch_pipeline_fps()
+
+    assert status[0]["frame_count"] == 300
+    assert pipeline_server_mgr.get_all_instance_status.call_count == 1
+
+
+def test_fetch_pipeline_fps_failure(otel_exporter, pipeline_server_mgr):
+    """Test handling of pipeline status failure."""
+    pipeline_server_mgr.get_all_instance_status.side_effect = RuntimeError("status failed")
 
     fps_data = otel_exporter.fetch_pipeline_fps()
     
@@ -47,17 +63,17 @@ def test_fetch_pipeline_fps_failure(mock_get, otel_exporter):
     otel_exporter.log.error.assert_called()
 
 
-@mock.patch("src.opentelemetry.opentelemetryexport.psutil.cpu_percent")
-@mock.patch("src.opentelemetry.opentelemetryexport.psutil.Process")
-def test_get_container_stats(mock_process, mock_cpu, otel_exporter):
-    """Test fetching CPU and memory usage statistics."""
-    mock_cpu.return_value = 50.5
-    mock_process.return_value.memory_info.return_value.rss = 2048576
+def test_get_container_stats(otel_exporter):
+    """Test fetching CPU and memory usage statistics without blocking."""
+    otel_exporter._process = mock.Mock()
+    otel_exporter._process.cpu_percent.return_value = 50.5
+    otel_exporter._process.memory_info.return_value.rss = 2048576
 
     cpu, memory = otel_exporter.get_container_stats()
     
     assert cpu == 50.5
     assert memory == 2048576
+    otel_exporter._process.cpu_percent.assert_called_with(interval=None)
 
 
 @mock.patch("src.opentelemetry.opentelemetryexport.metrics.Observation")
@@ -73,6 +89,59 @@ def test_fps_callback(mock_fetch_fps, mock_observation, otel_exporter):
     mock_observation.assert_called_with(30, {"pipeline_id": "pipeline1"})
 
 
+def test_fetch_pipeline_latency(otel_exporter, pipeline_server_mgr):
+    """Test extracting latency percentiles of running pipelines."""
+    latency = {"count": 10, "unmatched": 0, "avg": 0.2, "max": 0.5, "p50": 0.2, "p95": 0.4, "p99": 0.5}
+    pipeline_server_mgr.get_all_instance_status.return_value = [
+        {"id": "pipeline1", "state": "RUNNING", "avg_fps": 30,
+         "pipeline_latency": latency, "element_latency": {"detection": latency}},
+        {"id": "pipeline2", "state": "RUNNING", "avg_fps": 25},
+        {"id": "pipeline3", "state": "COMPLETED", "avg_fps": 25, "pipeline_latency": latency},
+    ]
+
+    latency_data = otel_exporter.fetch_pipeline_latency()
+
+    assert latency_data == {"pipeline1": {"pipeline": latency, "elements": {"detection": latency}}}
+
+
+@mock.patch("src.opentelemetry.opentelemetryexport.metrics.Observation")
+@mock.patch("src.opentelemetry.opentelemetryexport.OpenTelemetryExporter.fetch_pipeline_latency")
+def test_latency_callbacks(mock_fetch_latency, mock_observation, otel_exporter):
+    """Test the pipeline and element latency observable gauge callbacks."""
+    latency = {"p50": 0.2, "p95": 0.4, "p99": 0.5}
+    mock_fetch_latency.return_value = {"pipeline1": {"pipeline": latency, "elements": {"detection": latency}}}
+
+    assert len(otel_exporter.latency_callback(None)) == 3
+    mock_observation.assert_any_call(0.4, {"pipeline_id": "pipeline1", "quantile": "p95"})
+
+    assert len(otel_exporter.element_latency_callback(None)) == 3
+    mock_observation.assert_called_with(0.5, {"pipeline_id": "pipeline1", "element": "detection", "quantile": "p99"})
+
+
+@mock.patch("src.opentelemetry.opentelemetryexport.metrics.Observation")
+def test_publisher_and_encoder_callbacks(mock_observation, otel_exporter, pipeline_server_mgr):
+    """Test frame count, publisher queue and encoder pool callbacks."""
+    pipeline_server_mgr.get_all_instance_status.return_value = [
+        {"id": "pipeline1", "state": "RUNNING", "avg_fps": 30,
+         "publishers": [{"type": "MQTTPublisher", "size": 3, "dropped": 7}],
+         "encoder": {"queue_depth": 2, "encode_latency": {"count": 4, "avg": 0.005, "max": 0.009,
+                                                           "p50": 0.004, "p95": 0.008, "p99": 0.009}}},
+    ]
+
+    assert len(otel_exporter.frame_count_callback(None)) == 1
+    mock_observation.assert_called_with(300, {"pipeline_id": "pipeline1"})
+
+    otel_exporter.publisher_queue_callback(None)
+    mock_observation.assert_called_with(3, {"pipeline_id": "pipeline1", "publisher": "MQTTPublisher", "index": 0})
+    otel_exporter.publisher_dropped_callback(None)
+    mock_observation.assert_called_with(7, {"pipeline_id": "pipeline1", "publisher": "MQTTPublisher", "index": 0})
+
+    otel_exporter.encoder_queue_callback(None)
+    mock_observation.assert_called_with(2, {"pipeline_id": "pipeline1"})
+    assert len(otel_exporter.encode_latency_callback(None)) == 3
+    mock_observation.assert_called_with(0.009, {"pipeline_id": "pipeline1", "quantile": "p99"})
+
+
 def test_start(otel_exporter):
     """Test starting the exporter thread."""
     with mock.patch.object(threading.Thread, "start") as mock_start:
@@ -122,8 +191,6 @@ def test_export_metrics(mock_get_stats, otel_exporter):
     "SERVICE_NAME": "test_service",
     "OTEL_COLLECTOR_HOST": "test_host",
     "OTEL_COLLECTOR_PORT": "9999",
-    "PIPELINE_API_HOST": "api_host",
-    "REST_SERVER_PORT": "9090",
     "OTEL_EXPORT_INTERVAL_MILLIS": "5000"
 })
 @mock.patch("src.opentelemetry.opentelemetryexport.OTLPMetricExporter")
@@ -136,7 +203,6 @@ def test_init(mock_reader, mock_exporter):
         exporter = OpenTelemetryExporter()
         
         assert exporter.collector_url == "http://test_host:9999/v1/metrics"
-        assert exporter.api_url == "http://api_host:9090/pipelines/status"
         assert exporter.otlp_exporter == mock_exporter.return_value
 
         # Ensure the meter is properly initialized (not checking type)
@@ -145,3 +211,45 @@ def test_init(mock_reader, mock_exporter):
         assert exporter.memory_usage is not None  
         
         mock_reader.assert_called()
+
+
+@mock.patch.dict(os.environ, {"OTEL_PROMETHEUS_PORT": "9464"})
+@mock.patch("src.opentelemetry.opentelemetryexport.OTLPMetricExporter")
+@mock.patch("src.opentelemetry.opentelemetryexport.PeriodicExportingMetricReader")
+@mock.patch("src.opentelemetry.opentelemetryexport.MeterProvider")
+@mock.patch("opentelemetry.exporter.prometheus.PrometheusMetricReader")
+@mock.patch("prometheus_client.start_http_server")
+def test_init_prometheus(mock_start_http_server, mock_prometheus_reader, mock_meter_provider,
+                         mock_reader, mock_exporter):
+    """Test the optional Prometheus scrape endpoint is started once."""
+    with mock.patch("src.opentelemetry.opentelemetryexport.get_logger"), \
+         mock.patch("src.opentelemetry.opentelemetryexport._prometheus_server_port", None):
+        OpenTelemetryExporter()
+        exporter = OpenTelemetryExporter()
+
+    mock_start_http_server.assert_called_once_with(9464)
+    assert mock_meter_provider.call_args[1]["metric_readers"] == [
+        mock_reader.return_value, mock_prometheus_reader.return_value]
+    exporter._running = True
+    exporter._thread = mock.Mock()
+    exporter.stop()
+    mock_prometheus_reader.return_value.shutdown.assert_called_once()
+
+
+@mock.patch.dict(os.environ, {"OTEL_PROMETHEUS_PORT": "9464"})
+@mock.patch("src.opentelemetry.opentelemetryexport.OTLPMetricExporter")
+@mock.patch("src.opentelemetry.opentelemetryexport.PeriodicExportingMetricReader")
+@mock.patch("src.opentelemetry.opentelemetryexport.MeterProvider")
+@mock.patch("opentelemetry.exporter.prometheus.PrometheusMetricReader")
+@mock.patch("prometheus_client.start_http_server", side_effect=OSError("Address already in use"))
+def test_init_prometheus_port_in_use(mock_start_http_server, mock_prometheus_reader, mock_meter_provider,
+                                     mock_reader, mock_exporter):
+    """Test the exporter starts without the Prometheus endpoint when its port is in use."""
+    with mock.patch("src.opentelemetry.opentelemetryexport.get_logger") as mock_logger, \
+         mock.patch("src.opentelemetry.opentelemetryexport._prometheus_server_port", None):
+        exporter = OpenTelemetryExporter()
+
+    mock_start_http_server.assert_called_once_with(9464)
+    mock_logger.return_value.error.assert_called_once()
+    assert exporter._prometheus_reader is None
+    assert mock_meter_provider.call_args[1]["metric_readers"] == [mock_reader.return_value]
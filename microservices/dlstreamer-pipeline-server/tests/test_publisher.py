@@ -12,11 +12,12 @@ from unittest.mock import MagicMock
 import sys
 import src.common.log
 from gi.repository import Gst
-from gstgva.util import gst_buffer_data
 from src.server.gstreamer_app_source import GvaFrameData
 
 from src.publisher.publisher import Publisher
 from src.publisher.mqtt.mqtt_publisher import MQTTPublisher
+from src.publisher.common.publisher_queue import PublisherQueue
+from utils import publisher_utils as utils
 
 from collections import namedtuple
 from enum import Enum
@@ -188,8 +189,7 @@ class TestPublisher:
         mocked_result = MagicMock(spec=Gst.Sample)
         mocked_result.get_caps.return_value = Gst.Caps.from_string(caps)
 
-        mocked_gst_buffer = mocker.patch("src.publisher.publisher.gst_buffer_data")
-        mocked_gst_buffer.return_value.__enter__.return_value = b"Test"
+        mocker.patch("src.publisher.publisher.MappedFrame", return_value=b"Test")
 
         try:
             frame, meta_data = pub_obj._get_gst_buffer_info(mocked_result)
@@ -217,6 +217,15 @@ class TestPublisher:
         pub_obj._publish(frame, meta_data)
         pub_obj.publishers[1].queue.append.assert_called_once_with((frame, meta_data))
 
+    def test_get_queue_stats(self, pub_obj):
+        publisher = MagicMock()
+        publisher.queue = PublisherQueue(4, 'drop-newest')
+        publisher.queue.append((b'frame', {}))
+        pub_obj.publishers = [publisher, MagicMock()]
+        stats = pub_obj.get_queue_stats()
+        assert stats == [{'type': 'MagicMock', 'policy': 'drop-newest', 'size': 1,
+                          'capacity': 4, 'enqueued': 1, 'dropped': 0}]
+
 
     @pytest.mark.parametrize('cfg, frame, meta_data, video_frame',
                              [({'encoding': {'level': 95,'type': 'jpeg'}}, 
@@ -386,6 +395,24 @@ class TestPublisher:
         assert object_id == expected_id, f"Expected object ID to be {expected_id} when tracking is {'enabled' if tracking_enabled else 'disabled'}"
     
 
+    def test_add_tracking_info_columns(self, pub_obj):
+        pub_obj.tracking = True
+        meta_data = {'annotations': {'objects': [{'bbox': [50, 50, 60, 70]}, {'bbox': [10, 10, 50, 50]}]},
+                     'gva_meta': utils.GvaMetaRegions([10, 50], [10, 50], [40, 10], [40, 20], [1, 2],
+                                                      [(), ()])}
+        pub_obj._add_tracking_info(meta_data)
+        assert [obj['object_id'] for obj in meta_data['annotations']['objects']] == [2, 1]
+        assert meta_data['gva_meta'] == []
+
+    def test_convert_inference_result_columns(self, pub_obj):
+        metadata = {'gva_meta': utils.GvaMetaRegions([457], [496], [167], [414], [None],
+                                                     [(('detection', 0.98, 1, 'Person'),)])}
+        pub_obj._convert_inference_result(metadata)
+        assert metadata['annotations']['objects'] == [{
+            'bbox': [457, 496, 624, 910], 'label': 'Person', 'score': 0.98,
+            'attributes': {'occluded': False, 'rotation': 0.0}}]
+        assert 'gva_meta' not in metadata
+
     def test_convert_inference_result(self, pub_obj):
         metadata = {'gva_meta': [{'x': 457, 'y': 496, 'height': 414, 'width': 167, 'object_id': None, 'tensor': [{'name': 'detection', 'confidence': 0.9830476641654968, 'label_id': 1, 'label':'Person'}]}]}
         expected = ['annotations', 'annotation_type', 'last_modified', 'export_code']
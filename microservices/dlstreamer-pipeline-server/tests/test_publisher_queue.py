@@ -0,0 +1,86 @@
+#
+# Apache v2 license
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import pytest
+import threading as th
+import time
+
+from src.publisher.common.publisher_queue import PublisherQueue
+
+class TestPublisherQueue:
+
+    @pytest.mark.parametrize('maxlen, policy',
+                             [(0, 'drop-oldest'),
+                              (-1, 'drop-oldest'),
+                              (None, 'drop-oldest'),
+                              (10, 'invalid')])
+    def test_init_invalid(self, maxlen, policy):
+        with pytest.raises(ValueError):
+            PublisherQueue(maxlen, policy)
+
+    def test_popleft_empty(self):
+        pub_queue = PublisherQueue(2)
+        with pytest.raises(IndexError):
+            pub_queue.popleft(timeout=0)
+        with pytest.raises(IndexError):
+            pub_queue.popleft(timeout=0.01)
+
+    @pytest.mark.parametrize('policy, expected_items, expected_results',
+                             [('drop-oldest', [2, 3], [True, True, True]),
+                              ('drop-newest', [1, 2], [True, True, False])])
+    def test_append_full(self, policy, expected_items, expected_results):
+        pub_queue = PublisherQueue(2, policy)
+        results = [pub_queue.append(item) for item in (1, 2, 3)]
+        assert results == expected_results
+        assert [pub_queue.popleft(timeout=0) for _ in range(len(pub_queue))] == expected_items
+        assert pub_queue.stats() == {
+            'policy': policy,
+            'size': 0,
+            'capacity': 2,
+            'enqueued': 3 if policy == 'drop-oldest' else 2,
+            'dropped': 1
+        }
+
+    def test_append_block(self):
+        pub_queue = PublisherQueue(1, 'block')
+        pub_queue.append(1)
+        appended = th.Event()
+
+        def producer():
+            pub_queue.append(2)
+            appended.set()
+
+        producer_th = th.Thread(target=producer)
+        producer_th.start()
+        assert not appended.wait(0.05)
+        assert pub_queue.popleft(timeout=0) == 1
+        assert appended.wait(1)
+        producer_th.join()
+        assert pub_queue.popleft(timeout=0) == 2
+        assert pub_queue.stats()['dropped'] == 0
+
+    def test_popleft_wakes_on_append(self):
+        pub_queue = PublisherQueue(2)
+        timer = th.Timer(0.05, pub_queue.append, args=('item',))
+        timer.start()
+        start = time.monotonic()
+        assert pub_queue.popleft(timeout=5) == 'item'
+        assert time.monotonic() - start < 5
+        timer.join()
+
+    def test_close(self):
+        pub_queue = PublisherQueue(1, 'block')
+        pub_queue.append(1)
+        producer_th = th.Thread(target=pub_queue.append, args=(2,))
+        producer_th.start()
+        pub_queue.close()
+        producer_th.join(1)
+        assert not producer_th.is_alive()
+        assert pub_queue.append(3) is False
+        assert pub_queue.stats()['dropped'] == 2
+        assert pub_queue.popleft(timeout=None) == 1
+        with pytest.raises(IndexError):
+            pub_queue.popleft(timeout=None)
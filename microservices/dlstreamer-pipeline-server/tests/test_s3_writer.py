@@ -5,7 +5,11 @@
 #
 
 import base64
+import io
 import json
+import tarfile
+import threading as th
+import time
 from unittest.mock import MagicMock
 
 import pytest
@@ -29,6 +33,56 @@ def setup(mocker):
     mocker.patch('src.publisher.s3.s3_writer.S3Client')
     yield app_cfg
 
+class FakeS3Client():
+    """In-memory stand-in for a MinIO/S3 server"""
+
+    def __init__(self, *args, **kwargs):
+        self.objects = {}
+        self.multipart = []
+        self.fail = False
+        self.active = 0
+        self.max_active = 0
+        self.lock = th.Lock()
+
+    def bucket_exists(self, s3_bucket_name):
+        return True
+
+    def publish(self, s3_bucket_name, object_name, payload):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.01)
+        with self.lock:
+            self.active -= 1
+            if self.fail:
+                return False
+            self.objects[object_name] = payload
+        return True
+
+    def publish_multipart(self, s3_bucket_name, object_name, payload, part_size):
+        self.multipart.append(object_name)
+        return self.publish(s3_bucket_name, object_name, payload)
+
+
+@pytest.fixture
+def fake_s3(mocker):
+    src.common.log.configure_logging('DEBUG', False)
+    fake_client = FakeS3Client()
+    mocker.patch('src.publisher.s3.s3_writer.S3Client', return_value=fake_client)
+    yield fake_client
+
+
+def frame_meta(i):
+    return {'caps': 'image/jpeg', 'encoding_type': 'jpeg', 'img_handle': f'img{i:03d}'}
+
+
+def wait_for(condition, timeout=5):
+    end = time.monotonic() + timeout
+    while not condition() and time.monotonic() < end:
+        time.sleep(0.01)
+    return condition()
+
+
 class TestS3Writer:
     def test_stop(self, mocker, setup):
         app_cfg = setup
@@ -65,3 +119,61 @@ class TestS3Writer:
     #         result = fetch_data()
         
     #     assert result == mock_response
+
+    def test_upload_pool(self, fake_s3):
+        s3_obj = S3Writer({"bucket": "test", "folder_prefix": "prefix", "upload_workers": 4})
+        s3_obj.start()
+        for i in range(20):
+            s3_obj.queue.append((b"frame%d" % i, frame_meta(i)))
+        assert wait_for(lambda: s3_obj.get_upload_stats()['completed'] == 20)
+        s3_obj.stop()
+        assert fake_s3.objects["prefix/img005.jpg"] == b"frame5"
+        assert len(fake_s3.objects) == 20
+        assert fake_s3.max_active > 1
+        stats = s3_obj.get_upload_stats()
+        assert stats['failed'] == 0
+        assert stats['backlog'] == 0
+        assert stats['latency']['count'] == 20
+
+    def test_multipart(self, fake_s3):
+        s3_obj = S3Writer({"bucket": "test", "folder_prefix": "prefix", "multipart_threshold": 10})
+        s3_obj._publish(b"small", frame_meta(0))
+        s3_obj._publish(b"large frame data", frame_meta(1))
+        assert fake_s3.multipart == ["prefix/img001.jpg"]
+        assert len(fake_s3.objects) == 2
+
+    def test_upload_failure(self, fake_s3):
+        fake_s3.fail = True
+        s3_obj = S3Writer({"bucket": "test", "folder_prefix": "prefix", "block": True})
+        s3_obj._upload_task(s3_obj._publish, b"frame", frame_meta(0))
+        stats = s3_obj.get_upload_stats()
+        assert stats['failed'] == 1
+        assert stats['completed'] == 0
+        assert s3_obj.s3write_complete.is_set()
+
+    def test_bundle(self, fake_s3):
+        s3_obj = S3Writer({"bucket": "test", "folder_prefix": "prefix", "block": True,
+                           "bundle": {"max_frames": 3, "interval": 60}})
+        assert s3_obj.s3_metadata_write_wait is False
+        s3_obj.start()
+        for i in range(7):
+            s3_obj.queue.append((b"frame%d" % i, frame_meta(i)))
+        assert wait_for(lambda: len(fake_s3.objects) == 2)
+        s3_obj.stop()
+        assert sorted(fake_s3.objects) == ["prefix/bundle_img000_3.tar",
+                                           "prefix/bundle_img003_3.tar",
+                                           "prefix/bundle_img006_1.tar"]
+        with tarfile.open(fileobj=io.BytesIO(fake_s3.objects["prefix/bundle_img003_3.tar"])) as tar:
+            assert tar.getnames() == ["prefix/img003.jpg", "prefix/img003.json",
+                                      "prefix/img004.jpg", "prefix/img004.json",
+                                      "prefix/img005.jpg", "prefix/img005.json"]
+            assert tar.extractfile("prefix/img004.jpg").read() == b"frame4"
+            assert json.loads(tar.extractfile("prefix/img004.json").read()) == frame_meta(4)
+
+    def test_bundle_interval(self, fake_s3):
+        s3_obj = S3Writer({"bucket": "test", "folder_prefix": "prefix",
+                           "bundle": {"max_frames": 100, "interval": 0.05}})
+        s3_obj.start()
+        s3_obj.queue.append((b"frame", frame_meta(0)))
+        assert wait_for(lambda: "prefix/bundle_img000_1.tar" in fake_s3.objects)
+        s3_obj.stop()
@@ -7,6 +7,7 @@
 import pytest
 from unittest.mock import MagicMock, patch
 from src.server.gstreamer_pipeline import GStreamerPipeline
+from src.server.pipeline import Pipeline
 import time
 import json
 from gi.repository import Gst, GLib
@@ -286,24 +287,35 @@ class TestGStreamerPipeline:
         assert result == Gst.FlowReturn.ERROR
 
     @pytest.mark.parametrize(
-        "pts, sum_latency, count_latency",
+        "pts, count_latency",
         [
-            (1234, 20, 1),
-            (123, 0, 0)
+            (1234, 1),
+            (123, 0)
         ])
-    def test_appsink_probe_callback(self, mocker,Gst,gstreamer_pipeline,pts,sum_latency,count_latency):
-        mocker.patch.object(time,'time',return_value = 30)
+    def test_appsink_probe_callback(self, mocker,Gst,gstreamer_pipeline,pts,count_latency):
         mock_info = MagicMock()
         mock_buffer = MagicMock()
         mock_buffer.pts = pts
         mock_info.get_buffer.return_value = mock_buffer
-        gstreamer_pipeline.latency_times = {1234: 10}
+        gstreamer_pipeline.pipeline_latency.begin(1234, now=10)
+        mocker.patch.object(gstreamer_pipeline.pipeline_latency, 'end',
+                            wraps=gstreamer_pipeline.pipeline_latency.end)
         result = gstreamer_pipeline.appsink_probe_callback(None, mock_info, gstreamer_pipeline)
         mock_info.get_buffer.assert_called_once()
-        assert gstreamer_pipeline.sum_pipeline_latency == sum_latency
-        assert gstreamer_pipeline.count_pipeline_latency == count_latency
+        gstreamer_pipeline.pipeline_latency.end.assert_called_once_with(pts)
+        assert gstreamer_pipeline.pipeline_latency.count == count_latency
+        assert gstreamer_pipeline.startup_time is None
         assert result == Gst.PadProbeReturn.OK
 
+    def test_appsink_probe_callback_startup_time(self, mocker, Gst, gstreamer_pipeline):
+        mocker.patch.object(time, 'time', return_value=12.5)
+        gstreamer_pipeline._launch_time = 10
+        gstreamer_pipeline.appsink_probe_callback(None, MagicMock(), gstreamer_pipeline)
+        assert gstreamer_pipeline.startup_time == 2.5
+        time.time.return_value = 20
+        gstreamer_pipeline.appsink_probe_callback(None, MagicMock(), gstreamer_pipeline)
+        assert gstreamer_pipeline.startup_time == 2.5
+
     def test_source_setup_callback(self, mocker, gstreamer_pipeline):
         mock_src_element = MagicMock()
         gstreamer_pipeline._unset_properties = [
@@ -322,12 +334,43 @@ class TestGStreamerPipeline:
         mock_buffer = MagicMock()
         mock_buffer.pts = 10
         mock_info.get_buffer.return_value = mock_buffer
-        mocker.patch.object(time,'time',return_value = 50)
+        mock_begin = mocker.patch.object(gstreamer_pipeline.pipeline_latency, 'begin')
         result = gstreamer_pipeline.source_probe_callback(None, mock_info, gstreamer_pipeline)
-        assert 10 in gstreamer_pipeline.latency_times
-        assert gstreamer_pipeline.latency_times[10] == 50
+        mock_begin.assert_called_once_with(10)
         assert result == Gst.PadProbeReturn.OK
 
+    def test_element_probe_callbacks(self, gstreamer_pipeline, Gst):
+        tracker = MagicMock()
+        mock_info = MagicMock()
+        mock_info.get_buffer.return_value.pts = 10
+        assert gstreamer_pipeline.element_sink_probe_callback(None, mock_info, tracker) == Gst.PadProbeReturn.OK
+        tracker.begin.assert_called_once_with(10)
+        assert gstreamer_pipeline.element_src_probe_callback(None, mock_info, tracker) == Gst.PadProbeReturn.OK
+        tracker.end.assert_called_once_with(10)
+
+    def test_set_element_latency_probes(self, gstreamer_pipeline, Gst):
+        gstreamer_pipeline.pipeline = MagicMock()
+        mock_source = MagicMock()
+        mock_sink = MagicMock()
+        mock_element = MagicMock()
+        mock_element.get_parent.return_value = gstreamer_pipeline.pipeline
+        mock_element.get_name.return_value = "detection"
+        mock_element.sinkpads = [MagicMock()]
+        mock_element.srcpads = [MagicMock()]
+        mock_tee = MagicMock()
+        mock_tee.get_parent.return_value = gstreamer_pipeline.pipeline
+        mock_tee.sinkpads = [MagicMock()]
+        mock_tee.srcpads = [MagicMock(), MagicMock()]
+        gstreamer_pipeline.pipeline.iterate_elements.return_value = [mock_source, mock_element, mock_tee, mock_sink]
+        gstreamer_pipeline._set_element_latency_probes(mock_source, mock_sink)
+        assert list(gstreamer_pipeline.element_latency) == ["detection"]
+        tracker = gstreamer_pipeline.element_latency["detection"]
+        mock_element.sinkpads[0].add_probe.assert_called_once_with(
+            Gst.PadProbeType.BUFFER, gstreamer_pipeline.element_sink_probe_callback, tracker)
+        mock_element.srcpads[0].add_probe.assert_called_once_with(
+            Gst.PadProbeType.BUFFER, gstreamer_pipeline.element_src_probe_callback, tracker)
+        mock_tee.sinkpads[0].add_probe.assert_not_called()
+
     def test_source_pad_added_callback(self, mocker, gstreamer_pipeline,Gst):
         mock_pad = MagicMock()
         mock_add_probe = mocker.patch.object(mock_pad, 'add_probe')
@@ -500,18 +543,41 @@ class TestGStreamerPipeline:
         mock_state = MagicMock()
         gstreamer_pipeline.state = mock_state
         mocker.patch.object(gstreamer_pipeline,'get_avg_fps',return_value = 10)
-        gstreamer_pipeline.count_pipeline_latency = 2
-        gstreamer_pipeline.sum_pipeline_latency = 50
-        expected_status = {
-            "id": "test_id",
-            "state": mock_state,
-            "avg_fps": 10,
-            "start_time": 15,
-            "elapsed_time": 0,
-            "message": "Debug",
-            "avg_pipeline_latency": 25}
+        gstreamer_pipeline.pipeline_latency.begin(1, now=0)
+        gstreamer_pipeline.pipeline_latency.begin(2, now=10)
+        gstreamer_pipeline.pipeline_latency.end(1, now=20)
+        gstreamer_pipeline.pipeline_latency.end(2, now=40)
+        gstreamer_pipeline.element_latency = {"detection": MagicMock(count=1, snapshot=MagicMock(return_value={"avg": 5})),
+                                              "idle": MagicMock(count=0)}
         result = gstreamer_pipeline.status()
-        assert result == expected_status
+        assert result["id"] == "test_id"
+        assert result["avg_pipeline_latency"] == 25
+        assert result["pipeline_latency"]["count"] == 2
+        assert result["pipeline_latency"]["max"] == 30
+        assert result["pipeline_latency"]["p50"] == 25
+        assert result["element_latency"] == {"detection": {"avg": 5}}
+
+    def test_status_with_model_instances(self, mocker, gstreamer_pipeline):
+        mocker.patch.object(gstreamer_pipeline, 'get_avg_fps', return_value=10)
+        gstreamer_pipeline.startup_time = 1.5
+        gstreamer_pipeline.model_instances = [{"element": "detection", "model_instance_id": "inst0",
+                                               "cache_hit": True}]
+        result = gstreamer_pipeline.status()
+        assert result["startup_time"] == 1.5
+        assert result["model_instances"] == gstreamer_pipeline.model_instances
+
+    def test_pause_and_resume(self, gstreamer_pipeline, Gst):
+        assert gstreamer_pipeline.pause() is False
+        gstreamer_pipeline.pipeline = MagicMock()
+        gstreamer_pipeline.state = Pipeline.State.RUNNING
+        assert gstreamer_pipeline.pause() is True
+        gstreamer_pipeline.pipeline.set_state.assert_called_once_with(Gst.State.PAUSED)
+        assert gstreamer_pipeline.state is Pipeline.State.PAUSED
+        assert not gstreamer_pipeline.state.stopped()
+        assert gstreamer_pipeline.resume() is True
+        gstreamer_pipeline.pipeline.set_state.assert_called_with(Gst.State.PLAYING)
+        assert gstreamer_pipeline.state is Pipeline.State.RUNNING
+        assert gstreamer_pipeline.resume() is False
 
     def test_delete_pipeline_with_lock(self,gstreamer_pipeline,mocker):
         mock_state = MagicMock()
@@ -586,6 +652,14 @@ class TestGStreamerPipeline:
         mock_app_destination.finish.assert_called_once()
         gstreamer_pipeline._finished_callback.assert_called_once()
 
+    def test_release_model_instance(self):
+        cached = MagicMock()
+        GStreamerPipeline._inference_element_cache = {'GstGvaDetect_model1': cached,
+                                                      'GstGvaClassify_model1': cached,
+                                                      'GstGvaDetect_other_model1': cached}
+        GStreamerPipeline.release_model_instance('model1')
+        assert GStreamerPipeline._inference_element_cache == {'GstGvaDetect_other_model1': cached}
+
     def test_delete_pipeline_with_error_state(self, mocker, gstreamer_pipeline):
         gstreamer_pipeline._cal_avg_fps = MagicMock()
         mock_pipeline = MagicMock()
@@ -605,6 +679,22 @@ class TestGStreamerPipeline:
         assert gstreamer_pipeline._app_destinations == []
         gstreamer_pipeline._finished_callback.assert_called_once()
 
+    def test_delete_pipeline_with_error_state_shared_instance(self, mocker, gstreamer_pipeline):
+        gstreamer_pipeline._cal_avg_fps = MagicMock()
+        mock_state = mocker.patch('src.server.gstreamer_pipeline.Pipeline.State',return_value = MagicMock())
+        other_pipeline = MagicMock()
+        shared = GStreamerPipeline.CachedElement(MagicMock(), [gstreamer_pipeline, other_pipeline])
+        single = GStreamerPipeline.CachedElement(MagicMock(), [gstreamer_pipeline])
+        gstreamer_pipeline._cached_element_keys = ['GstGvaDetect_shared_1', 'GstGvaClassify_shared_2']
+        gstreamer_pipeline._shared_element_keys = ['GstGvaDetect_shared_1', 'GstGvaClassify_shared_2']
+        mocker.patch.object(GStreamerPipeline, '_inference_element_cache',
+                            {'GstGvaDetect_shared_1': shared, 'GstGvaClassify_shared_2': single})
+        gstreamer_pipeline._delete_pipeline(mock_state.ERROR)
+        other_pipeline.stop.assert_not_called()
+        assert GStreamerPipeline._inference_element_cache == {'GstGvaDetect_shared_1': shared}
+        assert shared.pipelines == [other_pipeline]
+        gstreamer_pipeline._finished_callback.assert_called_once()
+
     def test_verify_and_set_frame_destinations_rtsp(self, mocker, gstreamer_pipeline):
         gstreamer_pipeline.request["destination"]["frame"] = {"type":"rtsp","path":"rtsppath"}
         mock_app_sink_element = MagicMock()
@@ -689,6 +779,78 @@ class TestGStreamerPipeline:
         gstreamer_pipeline._cache_inference_elements()
         assert gstreamer_pipeline._inference_element_cache == {'GstGvaDetect_model1':Cache(mock_element1,[gstreamer_pipeline]),'GstGvaClassify_model2': Cache(mock_element2,[gstreamer_pipeline])}
         assert gstreamer_pipeline._cached_element_keys == ['GstGvaDetect_model1','GstGvaClassify_model2']
+        assert gstreamer_pipeline.model_instances == [
+            {"element": "model1", "model_instance_id": "model1", "cache_hit": False},
+            {"element": "model2", "model_instance_id": "model2", "cache_hit": False}]
+        GStreamerPipeline._inference_element_cache.clear()
+
+    def test_cache_inference_elements_hit(self, mocker, gstreamer_pipeline):
+        mock_prop = MagicMock()
+        mock_prop.name = "model-instance-id"
+        mock_element = MagicMock()
+        mock_element.__gtype__ = MagicMock()
+        mock_element.__gtype__.name = 'GstGvaDetect'
+        mock_element.list_properties.return_value = [mock_prop]
+        mock_element.get_property.side_effect = lambda x: "detection" if x == "name" else "inst0"
+        gstreamer_pipeline.pipeline = MagicMock()
+        gstreamer_pipeline.pipeline.iterate_elements.return_value = [mock_element]
+        mocker.patch.dict(GStreamerPipeline._inference_element_cache,
+                          {'GstGvaDetect_inst0': GStreamerPipeline.CachedElement(MagicMock(), [])})
+        gstreamer_pipeline._cache_inference_elements()
+        assert gstreamer_pipeline.model_instances == [
+            {"element": "detection", "model_instance_id": "inst0", "cache_hit": True}]
+
+    @staticmethod
+    def _inference_element(gtype_name, properties):
+        element = MagicMock()
+        element.__gtype__ = MagicMock()
+        element.__gtype__.name = gtype_name
+        props = []
+        for name in properties:
+            prop = MagicMock()
+            prop.name = name
+            props.append(prop)
+        element.list_properties.return_value = props
+        element.get_property.side_effect = properties.get
+        element.set_property.side_effect = properties.__setitem__
+        return element
+
+    def test_set_shared_model_instance_id(self, gstreamer_pipeline):
+        settings = {"model": "/models/FP16/model.xml", "device": "GPU", "nireq": 2,
+                    "batch-size": 1, "model-proc": None, "ie-config": ""}
+        first = self._inference_element('GstGvaDetect', dict(settings, **{"model-instance-id": None}))
+        second = self._inference_element('GstGvaDetect', dict(settings, **{"model-instance-id": None}))
+        other_device = self._inference_element('GstGvaDetect', dict(settings, **{"model-instance-id": None,
+                                                                                 "device": "CPU"}))
+        classify = self._inference_element('GstGvaClassify', dict(settings, **{"model-instance-id": None}))
+        other_preprocessing = self._inference_element('GstGvaDetect', dict(settings, **{"model-instance-id": None,
+                                                                                        "pre-process-backend": "va"}))
+        explicit = self._inference_element('GstGvaDetect', dict(settings, **{"model-instance-id": "inst0"}))
+        gstreamer_pipeline.pipeline = MagicMock()
+        gstreamer_pipeline.pipeline.iterate_elements.return_value = [first, second, other_device,
+                                                                     classify, other_preprocessing, explicit]
+        gstreamer_pipeline._set_shared_model_instance_id()
+        first_id = first.get_property("model-instance-id")
+        assert first_id.startswith("shared_")
+        assert second.get_property("model-instance-id") == first_id
+        assert other_device.get_property("model-instance-id") not in (None, first_id)
+        assert classify.get_property("model-instance-id") not in (None, first_id)
+        assert other_preprocessing.get_property("model-instance-id") not in (None, first_id)
+        explicit.set_property.assert_not_called()
+        assert gstreamer_pipeline._shared_element_keys.count('GstGvaDetect_' + first_id) == 2
+
+    def test_set_model_cache_dir(self, gstreamer_pipeline, tmp_path):
+        gstreamer_pipeline._options.model_cache_dir = str(tmp_path / "cache")
+        unset = self._inference_element('GstGvaDetect', {"ie-config": None})
+        other = self._inference_element('GstGvaClassify', {"ie-config": "CPU_THREADS_NUM=4"})
+        configured = self._inference_element('GstGvaDetect', {"ie-config": "CACHE_DIR=/cache"})
+        gstreamer_pipeline.pipeline = MagicMock()
+        gstreamer_pipeline.pipeline.iterate_elements.return_value = [unset, other, configured]
+        gstreamer_pipeline._set_model_cache_dir()
+        assert (tmp_path / "cache").is_dir()
+        assert unset.get_property("ie-config") == "CACHE_DIR={}".format(tmp_path / "cache")
+        assert other.get_property("ie-config") == "CPU_THREADS_NUM=4,CACHE_DIR={}".format(tmp_path / "cache")
+        configured.set_property.assert_not_called()
 
     def test_bus_call(self, mocker, gstreamer_pipeline,Gst):
         # Testcase for Gst.MessageType.APPLICATION, Gst.MessageType.EOS and Gst.MessageType.ERROR
@@ -757,6 +919,8 @@ class TestGStreamerPipeline:
         mock_set_bus_messages_flag = mocker.patch.object(gstreamer_pipeline, '_set_bus_messages_flag')
         mock_set_default_models = mocker.patch.object(gstreamer_pipeline, '_set_default_models')
         mock_set_model_property = mocker.patch.object(gstreamer_pipeline, '_set_model_property')
+        mock_set_model_cache_dir = mocker.patch.object(gstreamer_pipeline, '_set_model_cache_dir')
+        mock_set_shared_model_instance_id = mocker.patch.object(gstreamer_pipeline, '_set_shared_model_instance_id')
         mock_cache_inference_elements = mocker.patch.object(gstreamer_pipeline, '_cache_inference_elements')
         mock_set_model_instance_id = mocker.patch.object(gstreamer_pipeline, '_set_model_instance_id')
         mock_set_source_and_sink = mocker.patch.object(gstreamer_pipeline, '_set_source_and_sink')
@@ -775,6 +939,8 @@ class TestGStreamerPipeline:
         mock_set_properties.assert_called_once()
         mock_set_bus_messages_flag.assert_called_once()
         mock_set_default_models.assert_called_once()
+        mock_set_model_cache_dir.assert_called_once()
+        mock_set_shared_model_instance_id.assert_called_once()
         mock_cache_inference_elements.assert_called_once()
         mock_set_model_property.assert_any_call("model-proc")
         mock_set_model_property.assert_any_call("labels")
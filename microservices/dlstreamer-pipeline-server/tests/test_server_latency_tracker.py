@@ -0,0 +1,79 @@
+#
+# Apache v2 license
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import pytest
+from src.server.latency_tracker import LatencyTracker
+
+
+class TestLatencyTracker:
+
+    def test_invalid_size(self):
+        with pytest.raises(ValueError):
+            LatencyTracker(pending_size=0)
+
+    def test_no_samples(self):
+        tracker = LatencyTracker()
+        assert tracker.snapshot() is None
+        assert tracker.average() is None
+        assert tracker.end(10) is None
+
+    def test_match(self):
+        tracker = LatencyTracker()
+        tracker.begin(10, now=1.0)
+        tracker.begin(20, now=2.0)
+        assert tracker.end(10, now=1.5) == 0.5
+        assert tracker.end(20, now=3.0) == 1.0
+        summary = tracker.snapshot()
+        assert summary["count"] == 2
+        assert summary["unmatched"] == 0
+        assert summary["avg"] == 0.75
+        assert summary["max"] == 1.0
+        assert summary["p50"] == 0.75
+
+    def test_dropped_buffers_are_released(self):
+        tracker = LatencyTracker(pending_size=4)
+        for pts in range(3):
+            tracker.begin(pts, now=0)
+        # buffers 0 and 1 never reach the sink
+        assert tracker.end(2, now=1) == 1
+        assert tracker.unmatched == 2
+        assert tracker.end(0, now=2) is None
+        assert tracker.count == 1
+
+    def test_pending_ring_wraps(self):
+        tracker = LatencyTracker(pending_size=4)
+        for pts in range(10):
+            tracker.begin(pts, now=pts)
+        assert tracker.unmatched == 6
+        assert tracker.end(3, now=10) is None
+        assert tracker.end(9, now=10) == 1
+        assert tracker.unmatched == 9
+
+    def test_percentiles_use_recent_window(self):
+        tracker = LatencyTracker(window_size=100)
+        for pts in range(100):
+            tracker.begin(pts, now=0)
+            tracker.end(pts, now=10)
+        for pts in range(100, 200):
+            tracker.begin(pts, now=0)
+            tracker.end(pts, now=pts - 99)
+        summary = tracker.snapshot()
+        assert summary["count"] == 200
+        assert summary["max"] == 100
+        assert summary["p50"] == pytest.approx(50.5)
+        assert summary["p99"] == pytest.approx(99.01)
+        assert summary["avg"] == pytest.approx((100 * 10 + 5050) / 200)
+
+    def test_observe(self):
+        tracker = LatencyTracker()
+        for latency in (0.001, 0.002, 0.003):
+            tracker.observe(latency)
+        summary = tracker.snapshot()
+        assert summary["count"] == 3
+        assert summary["unmatched"] == 0
+        assert summary["max"] == 0.003
+        assert summary["p50"] == pytest.approx(0.002)
+        assert summary["avg"] == pytest.approx(0.002)
@@ -9,7 +9,9 @@ from unittest import mock
 from unittest.mock import patch, MagicMock
 from collections import defaultdict, deque
 import os
+from src.server.pipeline import Pipeline
 from src.server.pipeline_manager import PipelineManager
+from src.server.pipeline_scheduler import PriorityScheduler
 
 @pytest.fixture
 def pipeline_manager_for_load_pipelines(mocker):
@@ -65,6 +67,16 @@ class TestPipelineManager:
         assert success
         assert pipeline_manager_for_load_pipelines.pipeline_dir in  pipeline_manager_for_load_pipelines.pipelines
 
+    def test_reload_pipelines(self, pipeline_manager):
+        assert pipeline_manager.reload_pipelines() is True
+        pipeline_manager._load_pipelines.assert_called()
+
+    def test_release_model_instance(self, pipeline_manager):
+        gstreamer_type = MagicMock()
+        pipeline_manager.pipeline_types = {'GStreamer': gstreamer_type}
+        pipeline_manager.release_model_instance('model1')
+        gstreamer_type.release_model_instance.assert_called_once_with('model1')
+
     def test_pipeline_exists(self, pipeline_manager, mocker):
         pipeline_manager.pipelines = {'pipeline1': {'v1': {}}}
         assert pipeline_manager.pipeline_exists('pipeline1', 'v1')
@@ -166,19 +178,85 @@ class TestPipelineManager:
     @pytest.mark.parametrize(
     "max_running_pipelines, running_pipelines, pipeline_queue, expected_result",
     [
-        (5, 3, deque(['pipeline1', 'pipeline2']), 'pipeline1'),
-        (5, 5, deque(['pipeline1', 'pipeline2']), None),
-        (5, 6, deque(['pipeline1', 'pipeline2']), None),
-        (5, 3, deque([]), None),
-        (5, 3, "pipeline", None)
+        (5, 3, ['pipeline1', 'pipeline2'], 'pipeline1'),
+        (5, 5, ['pipeline1', 'pipeline2'], None),
+        (5, 6, ['pipeline1', 'pipeline2'], None),
+        (5, 3, [], None),
+        (-1, 8, ['pipeline1'], 'pipeline1')
     ])
     def test_get_next_pipeline_identifier(self, pipeline_manager, max_running_pipelines, running_pipelines, pipeline_queue, expected_result):
         pipeline_manager.max_running_pipelines = max_running_pipelines
         pipeline_manager.running_pipelines = running_pipelines
-        pipeline_manager.pipeline_queue = pipeline_queue
+        pipeline_manager.pipeline_instances = {identifier: MagicMock(state=Pipeline.State.QUEUED)
+                                               for identifier in pipeline_queue}
+        for identifier in pipeline_queue:
+            pipeline_manager.pipeline_queue.append(identifier)
         result = pipeline_manager._get_next_pipeline_identifier()
         assert result == expected_result
 
+    @staticmethod
+    def _instance(state, avg_fps=0, avg_pipeline_latency=None):
+        instance = MagicMock(state=state)
+        instance.status.return_value = {"avg_fps": avg_fps, "avg_pipeline_latency": avg_pipeline_latency}
+        return instance
+
+    def test_get_next_pipeline_identifier_capacity(self, pipeline_manager):
+        pipeline_manager.pipeline_queue = PriorityScheduler({"GPU": 2})
+        pipeline_manager.pipeline_instances = {
+            "running": self._instance(Pipeline.State.RUNNING, avg_fps=30),
+            "next": self._instance(Pipeline.State.QUEUED)}
+        pipeline_manager.pipeline_queue.append("running", {"scheduling": {"device": "GPU"}})
+        pipeline_manager.pipeline_queue.append("next", {"scheduling": {"device": "GPU"}})
+        assert pipeline_manager._get_next_pipeline_identifier() == "running"
+        # no latency reported yet, counts with its estimated cost
+        assert pipeline_manager._get_active_load() == {"running": 1.0}
+        # first report, 30 fps * 0.02 s = 0.6 frames in flight is the baseline
+        pipeline_manager.pipeline_instances["running"].status.return_value["avg_pipeline_latency"] = 0.02
+        assert pipeline_manager._get_active_load() == {"running": 1.0}
+        # 1.5 frames in flight, 2.5 times the baseline, no headroom
+        pipeline_manager.pipeline_instances["running"].status.return_value["avg_pipeline_latency"] = 0.05
+        assert pipeline_manager._get_next_pipeline_identifier() is None
+        pipeline_manager.pipeline_instances["running"].status.return_value["avg_pipeline_latency"] = 0.02
+        assert pipeline_manager._get_next_pipeline_identifier() == "next"
+
+    def test_start_preempts_and_resumes(self, pipeline_manager):
+        pipeline_manager.pipeline_queue = PriorityScheduler({"CPU": 1})
+        batch = self._instance(Pipeline.State.QUEUED)
+        batch.start.side_effect = lambda: setattr(batch, "state", Pipeline.State.RUNNING)
+        batch.pause.side_effect = lambda: setattr(batch, "state", Pipeline.State.PAUSED) or True
+        batch.resume.side_effect = lambda: setattr(batch, "state", Pipeline.State.RUNNING) or True
+        live = self._instance(Pipeline.State.QUEUED)
+        live.start.side_effect = lambda: setattr(live, "state", Pipeline.State.RUNNING)
+        pipeline_manager.pipeline_instances = {"batch": batch}
+        pipeline_manager.pipeline_queue.append("batch", {"scheduling": {"priority": -1, "preemptible": True}})
+        pipeline_manager._start()
+        batch.start.assert_called_once()
+        pipeline_manager.pipeline_instances["live"] = live
+        pipeline_manager.pipeline_queue.append("live")
+        pipeline_manager._start()
+        batch.pause.assert_called_once()
+        live.start.assert_called_once()
+        assert list(pipeline_manager.pipeline_queue) == ["batch"]
+        assert pipeline_manager.get_instance_status("batch")["queue_position"] == 1
+        live.state = Pipeline.State.COMPLETED
+        pipeline_manager._pipeline_finished()
+        batch.resume.assert_called_once()
+        assert batch.start.call_count == 1
+        assert len(pipeline_manager.pipeline_queue) == 0
+        assert pipeline_manager.running_pipelines == 1
+
+    def test_estimate_start_time(self, pipeline_manager, mocker):
+        mocker.patch('src.server.pipeline_manager.time.time', return_value=1000)
+        pipeline_manager.max_running_pipelines = 2
+        pipeline_manager.pipeline_instances = {
+            "done1": MagicMock(state=Pipeline.State.COMPLETED, start_time=0, stop_time=10),
+            "done2": MagicMock(state=Pipeline.State.COMPLETED, start_time=0, stop_time=30),
+            "queued": MagicMock(state=Pipeline.State.QUEUED, start_time=None, stop_time=None)}
+        assert pipeline_manager._estimate_start_time(3) == 1030
+        del pipeline_manager.pipeline_instances["done1"]
+        del pipeline_manager.pipeline_instances["done2"]
+        assert pipeline_manager._estimate_start_time(3) is None
+
     @pytest.mark.parametrize(
     "value, expected_result",
     [
@@ -209,14 +287,14 @@ class TestPipelineManager:
         pipeline_manager._start.assert_called_once()
 
     def test_start_pipeline_manager(self,pipeline_manager,mocker):
-        mocker.patch.object(pipeline_manager,'_get_next_pipeline_identifier',return_value='instance_id')
+        mocker.patch.object(pipeline_manager,'_get_next_pipeline_identifier',side_effect=['instance_id', None])
         mock_instance = MagicMock()
         pipeline_manager.pipeline_instances = {'instance_id': mock_instance}
         pipeline_manager.running_pipelines = 0
         mocker.patch.object(mock_instance,'start')
         pipeline_manager._start()
         assert pipeline_manager.running_pipelines == 1
-        pipeline_manager._get_next_pipeline_identifier.assert_called_once()
+        assert pipeline_manager._get_next_pipeline_identifier.call_count == 2
         mock_instance.start.assert_called_once()
     
     def test_validate_config(self,pipeline_manager,mocker):
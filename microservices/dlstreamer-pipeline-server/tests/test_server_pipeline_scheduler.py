@@ -0,0 +1,93 @@
+#
+# Apache v2 license
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import pytest
+
+from src.server.pipeline_scheduler import PipelineScheduler, PriorityScheduler
+
+
+class TestPipelineScheduler:
+
+    def test_fifo(self):
+        scheduler = PipelineScheduler()
+        scheduler.append("first", {"scheduling": {"priority": -5}})
+        scheduler.append("second", {"scheduling": {"priority": 5}})
+        assert list(scheduler) == ["first", "second"]
+        assert scheduler.position("second") == 2
+        assert scheduler.admit({}) == ("first", [])
+        assert scheduler.admit({"first": 1}, can_start=False) == (None, [])
+        assert scheduler.admit({"first": 1}, can_start=False, resumable=["second"]) == ("second", [])
+        assert len(scheduler) == 0
+        assert scheduler.position("second") is None
+
+    @pytest.mark.parametrize(
+        "request_value, expected",
+        [
+            (None, (0, 1.0, "CPU", False)),
+            ({"parameters": {"detection-device": "gpu.1"}}, (0, 1.0, "GPU", False)),
+            ({"scheduling": {"priority": 2, "device": "NPU", "cost": 3, "preemptible": True}},
+             (2, 3.0, "NPU", True)),
+            ({"scheduling": {"streams": 4, "resolution": "960x540"}}, (0, 1.0, "CPU", False)),
+        ])
+    def test_get_scheduling_info(self, request_value, expected):
+        info = PipelineScheduler.get_scheduling_info(request_value, 7)
+        assert (info.priority, info.cost, info.device, info.preemptible) == expected
+        assert info.sequence == 7
+
+
+class TestPriorityScheduler:
+
+    def test_priority_order(self):
+        scheduler = PriorityScheduler()
+        scheduler.append("batch", {"scheduling": {"priority": -1}})
+        scheduler.append("live1")
+        scheduler.append("live2")
+        assert list(scheduler) == ["live1", "live2", "batch"]
+        assert [scheduler.admit({})[0] for _ in range(3)] == ["live1", "live2", "batch"]
+
+    def test_device_capacity(self):
+        scheduler = PriorityScheduler({"GPU": 2})
+        scheduler.append("running", {"scheduling": {"device": "GPU"}})
+        assert scheduler.admit({}) == ("running", [])
+        scheduler.append("large", {"scheduling": {"device": "GPU", "cost": 2}})
+        scheduler.append("small", {"scheduling": {"device": "GPU", "priority": -1}})
+        scheduler.append("cpu", {"scheduling": {"priority": -1}})
+        # large does not fit and blocks lower priority GPU work, CPU is not limited
+        assert scheduler.admit({"running": 1}) == ("cpu", [])
+        assert scheduler.admit({"running": 1}) == (None, [])
+        assert scheduler.admit({}) == ("large", [])
+
+    def test_oversized_instance_runs_alone(self):
+        scheduler = PriorityScheduler({"GPU": 1})
+        scheduler.append("huge", {"scheduling": {"device": "GPU", "cost": 4}})
+        assert scheduler.admit({}) == ("huge", [])
+
+    def test_preemption(self):
+        scheduler = PriorityScheduler({"CPU": 2})
+        for identifier, priority in (("batch1", -2), ("batch2", -1), ("fixed", -1)):
+            scheduler.append(identifier, {"scheduling": {"priority": priority,
+                                                         "preemptible": identifier != "fixed"}})
+        active = {}
+        for _ in range(3):
+            identifier, _ = scheduler.admit(active)
+            active[identifier] = 0.5
+        scheduler.append("live", {"scheduling": {"cost": 1}})
+        # lowest priority first until live fits
+        assert scheduler.admit(active) == ("live", ["batch1"])
+        scheduler.append("batch1")
+        assert scheduler.position("batch1") == 1
+        active.pop("batch1")
+        active["live"] = 1
+        scheduler.append("live2", {"scheduling": {"cost": 2}})
+        # not enough preemptible load to make room
+        assert scheduler.admit(active, can_start=True, resumable=["batch1"]) == (None, [])
+
+    def test_preemptible_instance_does_not_preempt(self):
+        scheduler = PriorityScheduler({"CPU": 1})
+        scheduler.append("batch", {"scheduling": {"priority": -1, "preemptible": True}})
+        assert scheduler.admit({})[0] == "batch"
+        scheduler.append("other", {"scheduling": {"preemptible": True}})
+        assert scheduler.admit({"batch": 1}) == (None, [])
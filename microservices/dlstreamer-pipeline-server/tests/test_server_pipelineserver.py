@@ -64,10 +64,13 @@ class TestPipelineServer:
         options.max_running_pipelines = 5
         options.ignore_init_errors = False
         options.network_preference - "network"
+        options.device_capacity = {"GPU": 8}
         mock_parse = mocker.patch('src.server.pipeline_server.parse_options', return_value = options)
+        mock_scheduler = mocker.patch('src.server.pipeline_server.PriorityScheduler')
         pipeline_server.start(options)
         mock_model_manager.assert_called_once_with("/path/to/config/models",pipeline_server.options.network_preference,pipeline_server.options.ignore_init_errors)
-        mock_pipeline_manager.assert_called_once_with(pipeline_server.model_manager,"/path/to/config/pipelines",max_running_pipelines=pipeline_server.options.max_running_pipelines,ignore_init_errors=pipeline_server.options.ignore_init_errors)
+        mock_scheduler.assert_called_once_with({"GPU": 8})
+        mock_pipeline_manager.assert_called_once_with(pipeline_server.model_manager,"/path/to/config/pipelines",max_running_pipelines=pipeline_server.options.max_running_pipelines,ignore_init_errors=pipeline_server.options.ignore_init_errors,scheduler=mock_scheduler.return_value)
         mock_parse.assert_called_once()
         assert not pipeline_server._stopped
 
@@ -0,0 +1,79 @@
+#
+# Apache v2 license
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import ctypes
+import mmap
+
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+
+from src.server import wrapped_buffer
+
+
+@pytest.fixture
+def libgst(mocker):
+    mock_libgst = MagicMock()
+    mock_libgst.gst_memory_new_wrapped.return_value = 1234
+    mocker.patch.object(wrapped_buffer, 'libgst', mock_libgst)
+    mocker.patch.object(wrapped_buffer, 'Gst')
+    yield mock_libgst
+
+
+class TestWrappedBuffer:
+
+    def _wrapped(self, libgst):
+        flags, address, maxsize, offset, size, key, notify = \
+            libgst.gst_memory_new_wrapped.call_args[0]
+        assert flags == wrapped_buffer.MEMORY_FLAG_READONLY
+        assert (maxsize, offset) == (size, 0)
+        return address, size, key
+
+    @pytest.mark.parametrize('data', [b'abcd',
+                                      bytearray(b'abcd'),
+                                      memoryview(b'abcd'),
+                                      np.frombuffer(b'abcd', dtype=np.uint8)])
+    def test_wrap_data(self, libgst, data):
+        wrapped_buffer.wrap_data(data)
+        address, size, key = self._wrapped(libgst)
+        assert size == 4
+        assert ctypes.string_at(address, size) == b'abcd'
+        assert key in wrapped_buffer._owners
+        libgst.gst_buffer_append_memory.assert_called_once()
+        wrapped_buffer._release(key)
+        assert key not in wrapped_buffer._owners
+
+    def test_wrap_data_shares_array(self, libgst):
+        frame = np.zeros((2, 3, 3), dtype=np.uint8)
+        wrapped_buffer.wrap_data(frame)
+        address, size, key = self._wrapped(libgst)
+        assert (address, size) == (frame.ctypes.data, frame.nbytes)
+        wrapped_buffer._release(key)
+
+    def test_wrap_file(self, libgst, tmp_path):
+        path = tmp_path / "image.png"
+        path.write_bytes(b'image-data')
+        wrapped_buffer.wrap_file(str(path))
+        _, size, key = self._wrapped(libgst)
+        assert size == len(b'image-data')
+        mapping = wrapped_buffer._owners[key][1]
+        assert isinstance(mapping, mmap.mmap)
+        with pytest.raises(TypeError):
+            mapping[0] = 0
+        wrapped_buffer._release(key)
+        assert mapping.closed
+
+    def test_wrap_empty_file(self, libgst, tmp_path):
+        path = tmp_path / "empty.png"
+        path.write_bytes(b'')
+        wrapped_buffer.wrap_file(str(path))
+        libgst.gst_memory_new_wrapped.assert_not_called()
+
+    def test_wrap_failure_releases_owner(self, libgst):
+        libgst.gst_memory_new_wrapped.return_value = None
+        with pytest.raises(RuntimeError):
+            wrapped_buffer.wrap_data(b'abcd')
+        assert not wrapped_buffer._owners
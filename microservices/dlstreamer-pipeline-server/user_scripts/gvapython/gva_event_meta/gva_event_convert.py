@@ -19,11 +19,12 @@ def process_frame(frame):
     return True
 
 def add_events_message(frame):
-    events = gva_event_meta.events(frame)
+    events = gva_event_meta.pop_events(frame)
     if not events:
         return
-    gva_event_meta.remove_events(frame)
     for message in frame.messages():
+        if '"objects"' not in message:
+            continue
         message_obj = json.loads(message)
         if "objects" in message_obj:
             frame.remove_message(message)
@@ -5,56 +5,69 @@
 #
 
 import json
+from src.common import gva_events
 from src.server.common.utils import logging
 
 logger = logging.get_logger('gva_event_meta', is_static=True)
 '''
 The gva_event_meta module is a set of APIs for developers to add, remove, and get events.
-GVAJSONMeta (frame message) is utilized for storing events.
-To avoid multiple "events" entries, already existing events are retrieved,
-removed from frame, updated with the new event, and stored back to the frame.
+Events are kept as Python lists in the src.common.gva_events cache, the frame only carries
+a small reference message (GVAJSONMeta). Adding or removing an event neither parses nor
+serializes frame messages, the events are serialized once by gva_event_convert, or by the
+publisher for pipelines without gva_event_convert.
+Frames carrying an {"events": [...]} message, e.g. from earlier versions, are taken over
+on first access.
 '''
 
+
 def add_event(frame, event_type, attributes):
     event = {'event-type': event_type}
     for key, value in attributes.items():
         event[key] = value
-    existing_events = _get_events(frame)
-    existing_events.append(event)
-    remove_events(frame)
-    events_message = {"events": existing_events}
-    frame.add_message(json.dumps(events_message))
+    message, existing_events = _find_events(frame)
+    _set_events(frame, message, existing_events + [event])
 
 def remove_event(frame, event):
-    events = _get_events(frame)
-    if events:
-        events.remove(event)
-        remove_events(frame)
-        events_message = {"events": events}
-        frame.add_message(json.dumps(events_message))
+    message, existing_events = _find_events(frame)
+    if existing_events:
+        existing_events.remove(event)
+        _set_events(frame, message, existing_events)
 
 def events(frame):
-    return _get_events(frame)
+    return _find_events(frame)[1]
 
-def _get_events(frame):
-    events = []
-    for message in frame.messages():
-        try:
-            message_obj = json.loads(message)
-            if "events" in message_obj:
-                events = message_obj["events"]
-                break
-        except Exception as error:
-            logger.error(error)
-    return events
+def pop_events(frame):
+    '''Remove the events message from frame and return its events, used by gva_event_convert'''
+    message, existing_events = _find_events(frame)
+    if message is not None:
+        frame.remove_message(message)
+    return existing_events
 
 def remove_events(frame):
-    messages = frame.messages()
-    for message in messages:
+    pop_events(frame)
+
+def _find_events(frame):
+    '''Events message of frame and a new list of its events'''
+    for message in frame.messages():
+        if gva_events.is_ref(message):
+            cached_events = gva_events.cache.get(message)
+            if cached_events is None:
+                logger.warning("Events of frame were dropped from the events cache")
+                return message, []
+            return message, list(cached_events)
+        if '"events"' not in message:
+            continue
         try:
             message_obj = json.loads(message)
-            if "events" in message_obj.keys():
-                frame.remove_message(message)
-                return
         except Exception as error:
             logger.error(error)
+            continue
+        # events merged into the objects message by gva_event_convert are not taken over
+        if isinstance(message_obj, dict) and "events" in message_obj and "objects" not in message_obj:
+            return message, list(message_obj["events"])
+    return None, []
+
+def _set_events(frame, message, new_events):
+    if message is not None:
+        frame.remove_message(message)
+    frame.add_message(gva_events.cache.put(new_events))
@@ -8,20 +8,20 @@
 """
 
 import logging
-import base64
-import json
 import os
 import datetime
 
 from utils.mqtt_client import MQTTClient
 from utils import publisher_utils as utils
+from utils.mqtt_payload import encode_payload, check_payload_format, PAYLOAD_FORMAT_JSON
 
 
 class MQTTPublisher:
     """MQTT Publisher
     """
 
-    def __init__(self, topic="dlstreamer_pipeline_results", publish_frame=False, qos=0, protocol=4, tls=None):
+    def __init__(self, topic="dlstreamer_pipeline_results", publish_frame=False, qos=0, protocol=4, tls=None,
+                 payload_format=PAYLOAD_FORMAT_JSON):
         """Constructor
         """
         self.log = logging.getLogger('MQTT_PUBLISHER')
@@ -33,6 +33,8 @@ class MQTTPublisher:
         self.publish_frame = publish_frame
         self.qos = qos
         self.protocol = protocol
+        check_payload_format(payload_format)
+        self.payload_format = payload_format
 
         self.frame_id = 0
         self.client = MQTTClient(self.host, self.port, self.topic, self.qos, self.protocol, tls)
@@ -61,10 +63,7 @@ class MQTTPublisher:
             image_format = video_info.to_caps().get_structure(0).get_value('format')
             metadata["img_format"]=image_format
 
-            # Update final response (msg)   
-            msg = dict()
-            msg["metadata"]=metadata
-
+            blob = None
             if self.publish_frame:
                 #Channels
                 if image_format == 'RGBA' or image_format == 'BGRA':
@@ -78,13 +77,9 @@ class MQTTPublisher:
                     image, _, _ = utils.encode_frame("jpeg", 85, frame=image, height=video_info.height,
                                                     width=video_info.width, channels=channels, meta_data=metadata)
                     image = image[1]
+                blob = image
 
-                base64_enc_frame = base64.b64encode(image.tobytes()).decode('utf-8')
-                msg["blob"]=base64_enc_frame
-            else:
-                msg["blob"] = ""
-
-            msg = json.dumps(msg)
+            msg = encode_payload(metadata, blob, self.payload_format)
             self.log.info(f'Publishing message to: {self.topic}')
             self.client.publish(self.topic, payload=msg)
 
@@ -5,26 +5,59 @@
 #
 
 import json
-from time import ctime, sleep
+import threading
+from collections import deque
+from time import ctime, monotonic, sleep, time
 
 import ntplib
 import requests
 
+# NTP frequency tolerance (PHI) in seconds per second, bounds clock drift
+# when no drift estimate is available
+FREQUENCY_TOLERANCE = 15e-6
+MAX_DRIFT = 500e-6
+
 
 class NTPTimeStamp:
+    """Stamp frames with NTP time without querying the NTP server per frame.
+
+    A background thread polls the server every ``poll_interval`` seconds and
+    keeps the offset between the local monotonic clock and NTP time. Of the
+    last ``samples`` polls, the one with the smallest round trip delay is used
+    (NTP clock filter) and drift is estimated from the offset trend, so
+    ``process`` only reads the monotonic clock.
+    """
 
-    def __init__(self, ntp_server):
+    def __init__(self, ntp_server, poll_interval=64, max_staleness=1024, samples=8):
+        """Constructor
+        :param str ntp_server: NTP server address
+        :param float poll_interval: Seconds between NTP requests
+        :param float max_staleness: Age in seconds after which the cached offset
+            is reported as stale (``ntp_stale`` in the frame message)
+        :param int samples: Number of recent polls used to filter the offset
+        """
+        if poll_interval <= 0 or max_staleness <= 0 or samples <= 0:
+            raise ValueError('poll_interval, max_staleness and samples must be positive')
         self.ntp_server = ntp_server
+        self.poll_interval = poll_interval
+        self.max_staleness = max_staleness
         self._client = ntplib.NTPClient()
+        self._samples = deque(maxlen=samples)
+        self._lock = threading.Lock()
+        self._estimate = None
+        self._stop = threading.Event()
 
         self._verify_connection(max_retries=10)
 
+        self._thread = threading.Thread(target=self._poll, daemon=True)
+        self._thread.start()
+
     def _verify_connection(self, max_retries=10):
         connected = False
         retries = 0
         while not connected:
             try:
-                self._client.request(self.ntp_server)
+                self._update(self._client.request(self.ntp_server))
                 connected = True
             except requests.exceptions.ConnectionError:
                 if retries > max_retries:
@@ -35,9 +68,56 @@ class NTPTimeStamp:
                 retries += 1
         print('Established Connection to NTP server at', self.ntp_server)
 
+    def _poll(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self._update(self._client.request(self.ntp_server))
+            except Exception as error:
+                print('Failed to query NTP server at', self.ntp_server, ':', error)
+
+    def _update(self, response):
+        # response.offset is relative to the wall clock, rebase it on the
+        # monotonic clock so wall clock steps do not affect frame timestamps
+        local = monotonic()
+        offset = time() + response.offset - local
+        with self._lock:
+            self._samples.append((local, offset, max(response.delay, 0.0)))
+            self._estimate = self._filter()
+
+    def _filter(self):
+        best_local, best_offset, best_delay = min(self._samples, key=lambda sample: sample[2])
+        drift = 0.0
+        if len(self._samples) > 2:
+            mean_local = sum(sample[0] for sample in self._samples) / len(self._samples)
+            mean_offset = sum(sample[1] for sample in self._samples) / len(self._samples)
+            variance = sum((sample[0] - mean_local) ** 2 for sample in self._samples)
+            if variance > 0:
+                drift = sum((sample[0] - mean_local) * (sample[1] - mean_offset)
+                            for sample in self._samples) / variance
+                drift = max(-MAX_DRIFT, min(MAX_DRIFT, drift))
+        # time of the last successful poll, for the offset age
+        last_local = self._samples[-1][0]
+        return best_local, best_offset, best_delay, drift, last_local
+
+    def stop(self):
+        """Stop polling the NTP server"""
+        self._stop.set()
+
     def _get_timestamp(self):
-        return ctime(self._client.request(self.ntp_server).tx_time)
+        local = monotonic()
+        with self._lock:
+            best_local, best_offset, best_delay, drift, last_local = self._estimate
+        elapsed = local - best_local
+        ntp_time = local + best_offset + drift * elapsed
+        uncertainty = best_delay / 2 + (abs(drift) + FREQUENCY_TOLERANCE) * elapsed
+        return ntp_time, local - last_local, uncertainty
 
     def process(self, frame):
-        frame.add_message(json.dumps({'ntp_timestamp': self._get_timestamp()}))
+        ntp_time, age, uncertainty = self._get_timestamp()
+        frame.add_message(json.dumps({
+            'ntp_timestamp': ctime(ntp_time),
+            'ntp_offset_age': age,
+            'ntp_uncertainty': uncertainty,
+            'ntp_stale': age > self.max_staleness
+        }))
         return True
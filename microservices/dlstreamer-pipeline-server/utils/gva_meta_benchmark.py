@@ -0,0 +1,127 @@
+#
+# Apache v2 license
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+#
+
+""" Compare per frame CPU time of ROI metadata assembly, tracking id lookup and
+DCaaS conversion: region dictionaries read through VideoFrame.regions()
+against columnar GvaMetaRegions read through VideoFrame.regions_array().
+
+Frames are real Gst buffers carrying GstVideoRegionOfInterestMeta attached
+with gstgva, like the output of gvadetect and gvatrack.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+import gi
+gi.require_version('Gst', '1.0')
+gi.require_version('GstVideo', '1.0')
+# pylint: disable=wrong-import-position
+from gi.repository import Gst, GstVideo
+from gstgva import VideoFrame
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.publisher_utils import GvaMetaRegions
+
+WIDTH, HEIGHT = 1920, 1080
+
+
+def make_frame(num_objects, classification):
+    """Video frame with num_objects tracked detections"""
+    video_info = GstVideo.VideoInfo()
+    video_info.set_format(GstVideo.VideoFormat.BGRX, WIDTH, HEIGHT)
+    frame = VideoFrame(Gst.Buffer.new_allocate(None, video_info.size, None), video_info)
+    for i in range(num_objects):
+        roi = frame.add_region((i * 37) % (WIDTH - 100), (i * 53) % (HEIGHT - 200), 60, 120,
+                               "person", 0.5 + (i % 50) / 100)
+        roi.detection()['label_id'] = 0
+        roi.set_object_id(i + 1)
+        if classification:
+            tensor = roi.add_tensor("classification")
+            tensor['label'] = "adult"
+            tensor['label_id'] = 1
+            tensor['confidence'] = 0.9
+    return frame
+
+
+def annotation_boxes(frame):
+    """Boxes of the annotations converted by gvametaconvert, in region order"""
+    return [[r.rect().x, r.rect().y, r.rect().x + r.rect().w, r.rect().y + r.rect().h]
+            for r in frame.regions()]
+
+
+def dicts(frame, bboxes):
+    """Region dictionaries, bbox equality join and list to array conversion"""
+    gva_meta = []
+    for region in frame.regions():
+        rect = region.rect()
+        gva_meta.append({
+            "x": rect.x, "y": rect.y, "height": rect.h, "width": rect.w,
+            "object_id": region.object_id(),
+            "tensor": [{"name": t.name(), "confidence": t.confidence(),
+                        "label_id": t.label_id(),
+                        "label": region.label() if t.is_detection() else t.label()}
+                       for t in region.tensors()]})
+    objects = [{"bbox": list(bbox)} for bbox in bboxes]
+    for annotation in objects:
+        for region in gva_meta:
+            if annotation["bbox"] == [region["x"], region["y"],
+                                      region["x"] + region["width"],
+                                      region["y"] + region["height"]]:
+                annotation["object_id"] = region["object_id"]
+                break
+    boxes = np.array([[a["x"], a["y"], a["width"], a["height"]] for a in gva_meta])
+    boxes = np.concatenate([boxes[:, :2], boxes[:, :2] + boxes[:, 2:]], axis=-1).tolist()
+    labels = [a["tensor"][0]["label"] for a in gva_meta]
+    scores = [a["tensor"][0]["confidence"] for a in gva_meta]
+    return gva_meta, [a.get("object_id") for a in objects], boxes, labels, scores
+
+
+def columns(frame, bboxes):
+    """GvaMetaRegions, index join and vectorized box conversion"""
+    regions = GvaMetaRegions.from_video_frame(frame)
+    objects = [{"bbox": list(bbox)} for bbox in bboxes]
+    for annotation, object_id in zip(
+            objects, regions.match_object_ids([a["bbox"] for a in objects])):
+        annotation["object_id"] = object_id
+    return (regions.to_list(), [a["object_id"] for a in objects],
+            regions.boxes_x1y1x2y2().tolist(), regions.labels(), regions.scores())
+
+
+def run(assemble, frame, bboxes, iterations):
+    """CPU time per frame in us"""
+    start = time.process_time()
+    for _ in range(iterations):
+        assemble(frame, bboxes)
+    return (time.process_time() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--objects", type=int, nargs="+", default=[1, 20, 200],
+                        help="number of detected objects per frame (default: 1 20 200)")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--classification", action="store_true",
+                        help="add a classification tensor to every region")
+    args = parser.parse_args()
+
+    Gst.init(None)
+    print("{:<8} {:>12} {:>12} {:>10}".format("objects", "dicts us", "columns us", "speedup"))
+    for num_objects in args.objects:
+        frame = make_frame(num_objects, args.classification)
+        bboxes = annotation_boxes(frame)
+        assert dicts(frame, bboxes) == columns(frame, bboxes)
+        dicts_us = run(dicts, frame, bboxes, args.iterations)
+        columns_us = run(columns, frame, bboxes, args.iterations)
+        print("{:<8} {:>12.1f} {:>12.1f} {:>9.1f}x".format(
+            num_objects, dicts_us, columns_us, dicts_us / columns_us))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#
+# Apache v2 license
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+#
+
+""" Encode/decode MQTT payloads carrying frame metadata and an optional frame blob.
+
+Supported payload formats:
+    - json: {"metadata": {...}, "blob": "<base64 frame or empty string>"} (default)
+    - binary: 4 byte big-endian metadata length, UTF-8 JSON metadata, raw frame bytes
+    - msgpack: {"metadata": {...}, "blob": <raw frame bytes or None>} packed with msgpack
+"""
+
+import base64
+import json
+import struct
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+PAYLOAD_FORMAT_JSON = "json"
+PAYLOAD_FORMAT_BINARY = "binary"
+PAYLOAD_FORMAT_MSGPACK = "msgpack"
+PAYLOAD_FORMATS = (PAYLOAD_FORMAT_JSON, PAYLOAD_FORMAT_BINARY, PAYLOAD_FORMAT_MSGPACK)
+
+_BINARY_HEADER = struct.Struct(">I")
+
+
+def check_payload_format(payload_format):
+    """Validate payload format
+
+    :param payload_format: one of PAYLOAD_FORMATS
+    :type: string
+    """
+    if payload_format not in PAYLOAD_FORMATS:
+        raise ValueError("Invalid payload_format '{}'. Supported formats: {}".format(
+            payload_format, ", ".join(PAYLOAD_FORMATS)))
+    if payload_format == PAYLOAD_FORMAT_MSGPACK and msgpack is None:
+        raise ValueError("payload_format 'msgpack' requires the msgpack python package")
+
+
+def _blob_view(blob):
+    """Flat byte view of a bytes-like blob (bytes, memoryview, numpy array), copies only non-contiguous data"""
+    view = memoryview(blob)
+    if not view.c_contiguous:
+        return memoryview(view.tobytes())
+    if view.ndim != 1 or view.format != 'B':
+        view = view.cast('B')
+    return view
+
+
+def encode_payload(metadata, blob=None, payload_format=PAYLOAD_FORMAT_JSON):
+    """Serialize metadata and frame blob into a MQTT payload
+
+    :param metadata: frame metadata
+    :type: dict
+    :param blob: frame, None to publish metadata only
+    :type: bytes-like
+    :param payload_format: one of PAYLOAD_FORMATS
+    :type: string
+    :return: Return payload
+    :rtype: str for json, bytes otherwise
+    """
+    if payload_format == PAYLOAD_FORMAT_JSON:
+        msg = dict()
+        msg["metadata"] = metadata
+        msg["blob"] = base64.b64encode(_blob_view(blob)).decode('utf-8') if blob is not None else ""
+        return json.dumps(msg)
+
+    if payload_format == PAYLOAD_FORMAT_BINARY:
+        meta = json.dumps(metadata).encode('utf-8')
+        parts = [_BINARY_HEADER.pack(len(meta)), meta]
+        if blob is not None:
+            parts.append(_blob_view(blob))
+        return b"".join(parts)
+
+    if payload_format == PAYLOAD_FORMAT_MSGPACK:
+        check_payload_format(payload_format)
+        blob = _blob_view(blob) if blob is not None else None
+        return msgpack.packb({"metadata": metadata, "blob": blob}, use_bin_type=True)
+
+    check_payload_format(payload_format)
+
+
+def decode_payload(payload, payload_format=PAYLOAD_FORMAT_JSON):
+    """Deserialize a MQTT payload produced by encode_payload
+
+    :param payload: MQTT message payload
+    :type: bytes or str
+    :param payload_format: one of PAYLOAD_FORMATS
+    :type: string
+    :return: Return metadata and frame blob (None when no frame was published)
+    :rtype: tuple(dict, bytes)
+    """
+    if payload_format == PAYLOAD_FORMAT_JSON:
+        msg = json.loads(payload)
+        blob = msg.get("blob")
+        return msg.get("metadata"), base64.b64decode(blob) if blob else None
+
+    if payload_format == PAYLOAD_FORMAT_BINARY:
+        payload = memoryview(payload)
+        if len(payload) < _BINARY_HEADER.size:
+            raise ValueError("Binary payload too short")
+        (meta_len,) = _BINARY_HEADER.unpack_from(payload)
+        meta_end = _BINARY_HEADER.size + meta_len
+        if len(payload) < meta_end:
+            raise ValueError("Binary payload truncated")
+        metadata = json.loads(payload[_BINARY_HEADER.size:meta_end].tobytes().decode('utf-8'))
+        blob = payload[meta_end:].tobytes() if len(payload) > meta_end else None
+        return metadata, blob
+
+    if payload_format == PAYLOAD_FORMAT_MSGPACK:
+        check_payload_format(payload_format)
+        msg = msgpack.unpackb(payload, raw=False)
+        return msg.get("metadata"), msg.get("blob")
+
+    check_payload_format(payload_format)
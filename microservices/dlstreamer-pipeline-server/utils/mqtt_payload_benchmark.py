@@ -0,0 +1,89 @@
+#
+# Apache v2 license
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+#
+
+""" Compare MQTT payload formats: payload size, throughput and CPU time per message.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# pylint: disable=wrong-import-position
+from utils.mqtt_payload import encode_payload, decode_payload, PAYLOAD_FORMATS
+
+
+def make_metadata(num_objects):
+    """Metadata resembling gvametaconvert output with num_objects detections"""
+    return {
+        "frame_id": 0,
+        "img_handle": "A1B2C3D4E5",
+        "height": 1080,
+        "width": 1920,
+        "channels": 3,
+        "encoding_type": "jpeg",
+        "encoding_level": 85,
+        "objects": [{
+            "detection": {
+                "bounding_box": {"x_min": 0.1, "y_min": 0.2, "x_max": 0.3, "y_max": 0.4},
+                "confidence": 0.87,
+                "label": "person",
+                "label_id": 0
+            },
+            "h": 120, "w": 60, "x": 200, "y": 300,
+            "region_id": i
+        } for i in range(num_objects)]
+    }
+
+
+def run(payload_format, metadata, blob, iterations):
+    """Encode and decode the same message iterations times
+
+    :return: payload size in bytes, encode and decode CPU time per message in us
+    """
+    payload = encode_payload(metadata, blob, payload_format)
+
+    start = time.process_time()
+    for _ in range(iterations):
+        payload = encode_payload(metadata, blob, payload_format)
+    encode_us = (time.process_time() - start) / iterations * 1e6
+
+    start = time.process_time()
+    for _ in range(iterations):
+        decode_payload(payload, payload_format)
+    decode_us = (time.process_time() - start) / iterations * 1e6
+
+    return len(payload), encode_us, decode_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--blob-size", type=int, default=200 * 1024,
+                        help="frame blob size in bytes, 0 for metadata only (default: 200 KiB, ~1080p JPEG)")
+    parser.add_argument("--objects", type=int, default=20,
+                        help="number of detected objects in metadata (default: 20)")
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    metadata = make_metadata(args.objects)
+    blob = os.urandom(args.blob_size) if args.blob_size else None
+
+    print("{:<8} {:>12} {:>12} {:>12} {:>14}".format(
+        "format", "bytes/msg", "encode us", "decode us", "MB/s (enc)"))
+    for payload_format in PAYLOAD_FORMATS:
+        try:
+            size, encode_us, decode_us = run(payload_format, metadata, blob, args.iterations)
+        except ValueError as e:
+            print("{:<8} skipped: {}".format(payload_format, e))
+            continue
+        mb_per_s = size / encode_us if encode_us else float("inf")
+        print("{:<8} {:>12} {:>12.1f} {:>12.1f} {:>14.1f}".format(
+            payload_format, size, encode_us, decode_us, mb_per_s))
+
+
+if __name__ == "__main__":
+    main()
@@ -13,13 +13,15 @@ import json
 import codecs
 import pickle
 
+from gi.repository import GLib
+from src.common import gva_events
 from geti_sdk.utils import show_image_with_annotation_scene
 
 def encode_frame(enc_type, enc_level, frame, height, width, channels, meta_data=None):
     """Helper method to encode given frame
 
-    :param frame: input frame
-    :type: bytes
+    :param frame: input frame, read-only views such as MappedFrame are not copied
+    :type: bytes-like
     :param height: height of the input frame
     :type: int
     :param width: width of the input frame
@@ -93,6 +95,143 @@ def get_gva_tensors(video_frame):
 
     return tensor_meta, tensor_data
 
+class GvaMetaRegions:
+    """ROI metadata of a frame stored per column.
+
+    Bounding boxes are kept in NumPy arrays so that conversions apply to all
+    regions of the frame at once, the tensors of each region are kept as
+    (name, confidence, label_id, label) tuples. ``to_list`` returns the
+    region dictionaries published as ``gva_meta``.
+    """
+
+    def __init__(self, x=(), y=(), width=(), height=(), object_ids=(), tensors=()):
+        self.x = np.asarray(x)
+        self.y = np.asarray(y)
+        self.width = np.asarray(width)
+        self.height = np.asarray(height)
+        self.object_ids = list(object_ids)
+        self.tensors = list(tensors)
+
+    @classmethod
+    def from_video_frame(cls, video_frame):
+        """Read the regions of a gstgva.video_frame.VideoFrame.
+
+        Boxes, object ids and detection results of all regions come from a
+        single ``regions_array`` walk of the ROI metadata. Only regions with
+        tensors other than one detection tensor, e.g. gvaclassify results,
+        are read tensor by tensor.
+        """
+        regions = video_frame.regions_array()
+        roi_types = regions['roi_type'].tolist()
+        labels = {roi_type: GLib.quark_to_string(roi_type) for roi_type in set(roi_types)}
+        detection_only = regions['detection'] & (regions['tensors_number'] == 1)
+        tensors = [(('detection',
+                     None if confidence != confidence else confidence,
+                     None if label_id < 0 else label_id,
+                     labels[roi_type]),) if detection else ()
+                   for detection, confidence, label_id, roi_type in zip(
+                       detection_only.tolist(), regions['confidence'].tolist(),
+                       regions['label_id'].tolist(), roi_types)]
+
+        other = set(np.flatnonzero(~detection_only & (regions['tensors_number'] > 0)).tolist())
+        if other:
+            for index, region in enumerate(video_frame.regions()):
+                if index in other:
+                    tensors[index] = cls._region_tensors(region, labels[roi_types[index]])
+
+        object_ids = [None if object_id < 0 else object_id
+                      for object_id in regions['object_id'].tolist()]
+        return cls(regions['x'], regions['y'], regions['w'], regions['h'], object_ids, tensors)
+
+    @staticmethod
+    def _region_tensors(region, region_label):
+        """(name, confidence, label_id, label) of each tensor of a region"""
+        return tuple((tensor.name(), tensor.confidence(), tensor.label_id(),
+                      region_label if tensor.is_detection() else tensor.label())
+                     for tensor in region.tensors())
+
+    @classmethod
+    def from_list(cls, gva_meta):
+        """Build from the list of region dictionaries returned by ``to_list``"""
+        return cls([meta['x'] for meta in gva_meta],
+                   [meta['y'] for meta in gva_meta],
+                   [meta['width'] for meta in gva_meta],
+                   [meta['height'] for meta in gva_meta],
+                   [meta.get('object_id') for meta in gva_meta],
+                   [tuple((tensor['name'], tensor['confidence'],
+                           tensor['label_id'], tensor['label'])
+                          for tensor in meta.get('tensor', []))
+                    for meta in gva_meta])
+
+    def __len__(self):
+        return len(self.object_ids)
+
+    def to_list(self):
+        """Region dictionaries with keys x, y, height, width, object_id and tensor"""
+        return [{
+            'x': x,
+            'y': y,
+            'height': height,
+            'width': width,
+            'object_id': object_id,
+            'tensor': [{
+                'name': name,
+                'confidence': confidence,
+                'label_id': label_id,
+                'label': label
+            } for name, confidence, label_id, label in tensors]
+        } for x, y, width, height, object_id, tensors in zip(
+            self.x.tolist(), self.y.tolist(), self.width.tolist(),
+            self.height.tolist(), self.object_ids, self.tensors)]
+
+    def boxes_x1y1x2y2(self):
+        """Bounding boxes as (x1, y1, x2, y2) array of shape (n, 4)"""
+        if not len(self):
+            return np.empty((0, 4))
+        return np.stack((self.x, self.y, self.x + self.width, self.y + self.height), axis=1)
+
+    def labels(self):
+        """Label of the first tensor of each region, None without tensor"""
+        return [tensors[0][3] if tensors else None for tensors in self.tensors]
+
+    def scores(self):
+        """Confidence of the first tensor of each region, None without tensor"""
+        return [tensors[0][1] if tensors else None for tensors in self.tensors]
+
+    def match_object_ids(self, bboxes):
+        """Object id of the region with each (x1, y1, x2, y2) bounding box.
+
+        Annotations converted from the same frame list the regions in order,
+        they are joined by index once the boxes are verified to be equal.
+        Otherwise boxes are looked up by value, None when no region matches.
+
+        :param bboxes: (x1, y1, x2, y2) of each annotation
+        :type: List
+        :rtype: List
+        """
+        boxes = self.boxes_x1y1x2y2()
+        if len(bboxes) == len(boxes):
+            try:
+                if np.array_equal(np.asarray(bboxes, dtype=float), boxes):
+                    return list(self.object_ids)
+            except (TypeError, ValueError):
+                pass
+        ids = {}
+        for box, object_id in zip(map(tuple, boxes.tolist()), self.object_ids):
+            ids.setdefault(box, object_id)
+        return [ids.get(tuple(bbox)) for bbox in bboxes]
+
+
+def get_gva_meta_region_columns(video_frame):
+    """Helper method to get gva regions in columnar form
+
+    :param video_frame: Video Frame containing ROI and associated messages
+    :type: gstgva.video_frame.VideoFrame
+    :return: ROI meta data
+    :rtype: GvaMetaRegions
+    """
+    return GvaMetaRegions.from_video_frame(video_frame)
+
 def get_gva_meta_regions(video_frame):
     """Helper method to get gva region
 
@@ -101,38 +240,7 @@ def get_gva_meta_regions(video_frame):
     :return: ROI meta data
     :rtype: Dict
     """
-    gva_meta = []
-    regions = list(video_frame.regions())
-    for region in regions:
-        rect = region.rect()
-        meta = {
-            'x': rect.x,
-            'y': rect.y,
-            'height': rect.h,
-            'width': rect.w,
-            'object_id': region.object_id(),
-        }
-
-        tensors = list(region.tensors())
-        tensor_meta = []
-        for tensor in tensors:
-            tmeta = {
-                'name': tensor.name(),
-                'confidence': tensor.confidence(),
-                'label_id': tensor.label_id()
-            }
-
-            if not tensor.is_detection():
-                tmeta['label'] = tensor.label()
-            else:
-                tmeta['label'] = region.label()
-
-            tensor_meta.append(tmeta)
-
-        meta['tensor'] = tensor_meta
-        gva_meta.append(meta)
-
-    return gva_meta
+    return GvaMetaRegions.from_video_frame(video_frame).to_list()
 
 def get_gva_meta_messages(video_frame, meta_data):
     """Helper method to get gva messages
@@ -145,5 +253,9 @@ def get_gva_meta_messages(video_frame, meta_data):
     messages = list(video_frame.messages())
     # Add all messages
     for msg in messages:
+        if gva_events.is_ref(msg):
+            # events added by gva_event_meta and not merged by gva_event_convert
+            meta_data['events'] = list(gva_events.cache.get(msg) or [])
+            continue
         msg = json.loads(msg)
         meta_data.update(msg)
\ No newline at end of file
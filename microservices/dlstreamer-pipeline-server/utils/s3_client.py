@@ -7,8 +7,11 @@
 """ S3 Client for connecting to broker and publishing messages.
 """
 
+import io
+
 import boto3
 import botocore
+from boto3.s3.transfer import TransferConfig
 from src.common.log import get_logger
 
 class S3Client():
@@ -55,6 +58,8 @@ class S3Client():
         :type: string
         :param metadata: frame metadata (flat json only)    
         :type: dict
+        :return: True if upload succeeded
+        :rtype: bool
         """
 
         try:
@@ -65,11 +70,14 @@ class S3Client():
             )
             if not (resp['ResponseMetadata']['HTTPStatusCode'] == 200):
                 self.log.error(f"Error uploading frame data: {object_name} to S3 storage")
+                return False
             else:
                 self.log.debug(f"Uploaded frame data at uri: s3://{s3_bucket_name}/{object_name} to S3 storage")
+                return True
             
         except botocore.exceptions.ClientError as e:
             self.log.info(f"Error uploading frame data: {e}")
+            return False
 
     def publish(self, s3_bucket_name, object_name, payload):
         """Store frame in S3 storage
@@ -82,8 +90,31 @@ class S3Client():
         
         ## If this function is called, we are assuming the bucket is created
         ## In cae the bucket is not created, this function will never be called. It will return from the S3Writer _publish method
-        self.upload_image_data(s3_bucket_name=s3_bucket_name, object_name=object_name, frame_data=payload, metadata=None)
+        return self.upload_image_data(s3_bucket_name=s3_bucket_name, object_name=object_name, frame_data=payload, metadata=None)
     
+    def publish_multipart(self, s3_bucket_name, object_name, payload, part_size):
+        """Store large frame in S3 storage using multipart upload, parts are uploaded concurrently
+
+        :param s3_bucket_name: bucket name 
+        :type: string
+        :param object_name: name/ path of object (img_handle) 
+        :type: string
+        :param payload: Frame blob
+        :type: bytes
+        :param part_size: size of each part in bytes, minimum 5 MiB except for the last part
+        :type: int
+        :return: True if upload succeeded
+        :rtype: bool
+        """
+        config = TransferConfig(multipart_threshold=part_size, multipart_chunksize=part_size)
+        try:
+            self.client.upload_fileobj(io.BytesIO(payload), s3_bucket_name, object_name, Config=config)
+            self.log.debug(f"Uploaded frame data at uri: s3://{s3_bucket_name}/{object_name} to S3 storage")
+            return True
+        except (botocore.exceptions.ClientError, boto3.exceptions.S3UploadFailedError) as e:
+            self.log.info(f"Error uploading frame data: {e}")
+            return False
+
     def stop(self):
         """Stop S3 Client
         """
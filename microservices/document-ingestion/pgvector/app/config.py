@@ -36,6 +36,19 @@ It generates embeddings for documents, stores them in PGVector, and saves the do
     LOCAL_STORE_PREFIX: str = ...
 
     BATCH_SIZE: int = ...
+    DELETE_BATCH_SIZE: int = 1000  # Chunks deleted per transaction
+    DB_POOL_MAX_SIZE: int = 20  # Maximum connections of the database connection pool
+
+    # Background ingestion jobs
+    INGESTION_WORKERS: int = 4  # Worker threads parsing and embedding documents
+    INGESTION_JOBS_PER_BUCKET: int = 2  # Jobs of a bucket running at the same time
+    INGESTION_JOBS_RETAINED: int = 1000  # Finished jobs kept for status queries
+
+    # URL ingestion
+    CRAWLER_MAX_CONNECTIONS: int = 20  # Concurrent connections fetching URLs
+    CRAWLER_MAX_CONNECTIONS_PER_HOST: int = 4  # Concurrent requests to the same host
+    CRAWLER_TIMEOUT: float = 5  # Timeout of each request in seconds
+    URL_INGESTION_WORKERS: int = 4  # URLs parsed and embedded at the same time
 
     # MINIO Configuration
     DEFAULT_BUCKET: str = ...
@@ -0,0 +1,111 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import asyncio
+import ssl
+import httpx
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from .logger import logger
+
+
+@dataclass
+class FetchResult:
+    """Result of fetching a URL."""
+
+    url: str
+    valid: bool
+    status_code: Optional[int] = None
+    content: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    ssl_error: Optional[str] = None
+
+    @property
+    def not_modified(self) -> bool:
+        """True if the content did not change since the validators sent in the request."""
+        return self.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def _ssl_error(error: Exception) -> Optional[str]:
+    # httpx wraps the SSL error of a failed TLS handshake in its connection errors
+    while error is not None:
+        if isinstance(error, ssl.SSLError):
+            return str(error)
+        error = error.__cause__ or error.__context__
+    return None
+
+
+async def fetch_urls(
+    urls: List[str],
+    validate: Callable[[str], bool],
+    validators: Optional[Dict[str, Tuple[Optional[str], Optional[str]]]] = None,
+    max_connections: int = 20,
+    max_connections_per_host: int = 4,
+    timeout: float = 5,
+) -> List[FetchResult]:
+    """
+    Fetches URLs concurrently over a pooled HTTP client. Each URL is validated with
+    `validate` before it is requested. At most `max_connections_per_host` requests are
+    sent to the same host at a time. Redirects are not followed.
+
+    Args:
+        urls (List[str]): URLs to fetch.
+        validate (Callable[[str], bool]): Returns whether a URL may be fetched.
+        validators (Optional[Dict[str, Tuple[Optional[str], Optional[str]]]]): ETag and
+            Last-Modified of the previously fetched content of URLs. They are sent as
+            If-None-Match and If-Modified-Since, the server replies 304 if unchanged.
+        max_connections (int): Maximum number of concurrent connections.
+        max_connections_per_host (int): Maximum number of concurrent requests per host.
+        timeout (float): Timeout of each request in seconds.
+
+    Returns:
+        List[FetchResult]: The result of each URL, in the order of `urls`. A URL is valid
+        if it passed validation and was fetched with status 200 or 304. The SSL error of a
+        URL whose TLS handshake failed is in `ssl_error`.
+    """
+
+    validators = validators or {}
+    host_limits = {}
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+
+    async with httpx.AsyncClient(limits=limits, timeout=timeout, follow_redirects=False, trust_env=True) as client:
+
+        async def fetch(url: str) -> FetchResult:
+            if not await asyncio.to_thread(validate, url):
+                logger.info(f"Invalid URL skipped: {url}")
+                return FetchResult(url, valid=False)
+
+            headers = {}
+            etag, last_modified = validators.get(url, (None, None))
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+            host = urlparse(url).netloc
+            semaphore = host_limits.setdefault(host, asyncio.Semaphore(max_connections_per_host))
+            try:
+                async with semaphore:
+                    response = await client.get(url, headers=headers)
+
+            except httpx.HTTPError as e:
+                logger.error(f"Error fetching URL {url}: {e}")
+                return FetchResult(url, valid=False, ssl_error=_ssl_error(e))
+
+            if response.status_code not in (HTTPStatus.OK, HTTPStatus.NOT_MODIFIED):
+                logger.info(f"Failed to fetch URL: {url} with status code {response.status_code}")
+                return FetchResult(url, valid=False, status_code=response.status_code)
+
+            return FetchResult(
+                url,
+                valid=True,
+                status_code=response.status_code,
+                content=response.text if response.status_code == HTTPStatus.OK else None,
+                etag=response.headers.get("ETag") or etag,
+                last_modified=response.headers.get("Last-Modified") or last_modified,
+            )
+
+        return await asyncio.gather(*(fetch(url) for url in urls))
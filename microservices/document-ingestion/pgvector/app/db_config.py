@@ -34,8 +34,11 @@ def get_db_connection_pool() -> ConnectionPool:
             hostname = result.hostname
             port = result.port
 
+            # Each document or URL being ingested holds a connection for its transaction
+            # and uses another one for the embedding cache
             connection_pool = ConnectionPool(
-                f"user={username} password={password} host={hostname} port={port} dbname={database}"
+                f"user={username} password={password} host={hostname} port={port} dbname={database}",
+                max_size=config.DB_POOL_MAX_SIZE,
             )
         except Exception as e:
             logger.error(f"Error creating connection pool: {e}")
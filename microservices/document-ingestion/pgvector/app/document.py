@@ -5,16 +5,15 @@ import psycopg
 from fastapi import UploadFile, HTTPException
 from http import HTTPStatus
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Tuple
 from langchain_community.document_loaders import UnstructuredFileLoader
 from langchain_community.document_loaders import PyPDFLoader
-from langchain_core.documents import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
-from langchain_postgres.vectorstores import PGVector
 from .logger import logger
 from .config import Settings
-from .db_config import pool_execution
+from .jobs import IngestionJob
+from .store import DataStore
+from .vector_store import delete_sources, file_hash, get_document_catalog, get_source_hash, sync_texts
 from .utils import get_separators
 
 config = Settings()
@@ -54,9 +53,9 @@ async def save_temp_file(file: UploadFile, bucket_name: str, filename: str) -> s
 async def get_documents_embeddings() -> list:
     """
     Retrieves a list of document embeddings from the database, including file names and bucket names.
-    This function queries the database to fetch distinct file sources and bucket names
-    associated with a specific index name. The results are processed to extract the file
-    names and bucket names, which are returned as a list of dictionaries.
+    This function reads the documents ingested in the configured index from the document
+    catalog, which has one row per document, and returns their file names and bucket names
+    as a list of dictionaries.
 
     Returns:
         list: A list of dictionaries, where each dictionary contains:
@@ -67,35 +66,39 @@ async def get_documents_embeddings() -> list:
         Exception: If there is an issue with the database query or execution.
     """
 
-    file_list = []
-    query = "SELECT DISTINCT \
-    lpc.cmetadata ->> 'source' as source, lpc.cmetadata ->> 'bucket' as bucket \
-    FROM \
-    langchain_pg_embedding lpc JOIN langchain_pg_collection lpcoll \
-    ON lpc.collection_id = lpcoll.uuid WHERE lpcoll.name = %(index_name)s \
-    AND lpc.cmetadata ->> 'source' IS NOT NULL \
-    AND lpc.cmetadata ->> 'bucket' IS NOT NULL"
-
-    params = {"index_name": config.INDEX_NAME}
-    result_rows = pool_execution(query, params)
-
-    # Extract bucket name and filenames from returned query result
+    # Documents are listed from the document catalog, without scanning the embeddings
     file_list = [
-        {"file_name": row[0].split("/")[-1], "bucket_name": row[1]} for row in result_rows
+        {"file_name": entry["filename"], "bucket_name": entry["bucket"]}
+        for entry in get_document_catalog()
+        if entry["bucket"] and entry["filename"]
     ]
 
     return file_list
 
 
-def ingest_to_pgvector(doc_path: Path, bucket: str):
+def ingest_to_pgvector(doc_path: Path, bucket: str, job: Optional[IngestionJob] = None,
+                       source_name: Optional[str] = None) -> List[str]:
     """
     Ingests a document into a PostgreSQL database with PGVector extension for vector embeddings.
     This function processes a document, splits it into chunks, generates embeddings for each chunk,
     and uploads the embeddings to a PGVector collection in batches.
 
+    A document uploaded again to the same bucket with the same `source_name` replaces the
+    previous version incrementally: if the file hash is unchanged, the document is not parsed
+    again. Otherwise only new or changed chunks are embedded, and chunks of the previous
+    version which are no longer part of the document are deleted.
+
     Args:
         doc_path (Path): The file path to the document to be ingested.
         bucket (str): The name of the bucket associated with the document metadata.
+        job (Optional[IngestionJob]): Job reporting the pages parsed, chunks embedded
+            and batches written, if the document is ingested by a background job.
+        source_name (Optional[str]): Name identifying the document across uploads, the
+            name of the uploaded file. Defaults to the name of `doc_path`.
+
+    Returns:
+        List[str]: Names of stored files no longer referenced by embeddings, the uploaded
+        file if the document is unchanged or the files of the previous version otherwise.
 
     Raises:
         HTTPException: If no text is found in the document or if an error occurs during ingestion.
@@ -103,6 +106,16 @@ def ingest_to_pgvector(doc_path: Path, bucket: str):
 
 
     try:
+        source = {"bucket": bucket, "source_name": source_name or doc_path.name}
+        digest = file_hash(doc_path)
+
+        # The catalog records the content hash once all chunks of a version are stored
+        if get_source_hash(source) == digest:
+            logger.info(f"Document {source['source_name']} is unchanged, skipping ingestion.")
+            if job:
+                job.add_progress(files_unchanged=1)
+            return [doc_path.name]
+
         if doc_path.suffix.lower() == ".pdf":
             loader = PyPDFLoader(doc_path)
         else:
@@ -112,41 +125,26 @@ def ingest_to_pgvector(doc_path: Path, bucket: str):
             chunk_size=config.CHUNK_SIZE, chunk_overlap=config.CHUNK_OVERLAP, add_start_index=True,separators=get_separators()
         )
 
-        chunks = loader.load_and_split(text_splitter)
+        pages = loader.load()
+        chunks = text_splitter.split_documents(pages)
+        if job:
+            job.add_progress(pages_parsed=len(pages), chunks_total=len(chunks))
+
         if not chunks:
             raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail="No text found in the document for ingestion.")
 
-        documents = [
-            Document(
-                page_content=chunk.page_content,
-                metadata={"bucket": bucket, "filename": doc_path.name, **chunk.metadata},
-            )
-            for chunk in chunks
-        ]
-
-        embedder = OpenAIEmbeddings(
-            openai_api_key="EMPTY",
-            openai_api_base="{}".format(config.TEI_ENDPOINT_URL),
-            model=config.EMBEDDING_MODEL_NAME,
-            tiktoken_enabled=False
+        # Embed and write new or changed chunks in batches to handle large files
+        stats = sync_texts(
+            texts=[chunk.page_content for chunk in chunks],
+            metadatas=[
+                {**source, "filename": doc_path.name, "content_hash": digest, **chunk.metadata}
+                for chunk in chunks
+            ],
+            source=source,
+            job=job,
         )
 
-        # Batch upload documents to handle large files
-        batch_size = config.BATCH_SIZE
-        for i in range(0, len(documents), batch_size):
-            batch_documents = documents[i : i + batch_size]
-
-            _ = PGVector.from_documents(
-                documents=batch_documents,
-                embedding=embedder,
-                collection_name=config.INDEX_NAME,
-                connection=config.PG_CONNECTION_STRING,
-                use_jsonb=True
-            )
-
-            logger.info(
-                f"Processed batch {i // batch_size + 1}/{(len(documents) - 1) // batch_size + 1}"
-            )
+        return [file_name for file_name in stats["stored_filenames"] if file_name != doc_path.name]
 
     except HTTPException as e:
         raise e
@@ -156,6 +154,43 @@ def ingest_to_pgvector(doc_path: Path, bucket: str):
         raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail="Internal Server Error")
 
 
+def ingest_documents(job: IngestionJob, documents: List[Tuple[Path, str, str]]):
+    """
+    Runs a background ingestion job for uploaded documents. Each document is ingested
+    from its temporary file, which is deleted once ingested or if the job fails. Stored
+    files no longer referenced by embeddings after ingestion are deleted from the DataStore.
+
+    Args:
+        job (IngestionJob): The job reporting ingestion progress.
+        documents (List[Tuple[Path, str, str]]): Temporary file path, bucket name and
+            uploaded file name of each document.
+
+    Raises:
+        HTTPException: If ingestion of a document fails. Remaining documents are not ingested.
+    """
+
+    job.set_progress(files_total=len(documents), files_ingested=0, files_unchanged=0, pages_parsed=0,
+                     chunks_total=0, chunks_embedded=0, chunks_cached=0, chunks_unchanged=0,
+                     chunks_deleted=0, batches_written=0)
+    try:
+        for temp_path, bucket_name, source_name in documents:
+            superseded = ingest_to_pgvector(doc_path=temp_path, bucket=bucket_name, job=job, source_name=source_name)
+            job.add_progress(files_ingested=1)
+            logger.info(f"Job {job.id}: {temp_path.name} ingested")
+
+            for file_name in superseded:
+                try:
+                    DataStore.delete_document(bucket_name, file_name)
+                except Exception as ex:
+                    logger.error(f"Error deleting superseded file {file_name}: {ex}")
+
+    finally:
+        # Delete temporary files after ingestion
+        for temp_path, _, _ in documents:
+            temp_path.unlink(missing_ok=True)
+        logger.info("Temporary files cleaned up!")
+
+
 async def delete_embeddings(
     bucket_name: str, file_name: Optional[str], delete_all: bool = False
 ) -> bool:
@@ -185,43 +220,19 @@ async def delete_embeddings(
         # If `delete_all` is True, embeddings for all files in given bucket will be deleted,
         # irrespective of whether a `file_name` is provided or not.
         if delete_all:
-            query = """
-            DELETE FROM langchain_pg_embedding WHERE EXISTS (
-                SELECT * FROM langchain_pg_collection WHERE
-                langchain_pg_embedding.collection_id = langchain_pg_collection.uuid AND
-                langchain_pg_collection.name = %(indexname)s AND
-                langchain_pg_embedding.cmetadata ->> 'bucket' = %(bucket)s
-            )
-            """
-            params = {"indexname": config.INDEX_NAME, "bucket": bucket_name}
+            filters = {"bucket": bucket_name}
 
         elif file_name:
-            query = """
-            DELETE FROM langchain_pg_embedding WHERE EXISTS (
-                SELECT 1 FROM langchain_pg_collection WHERE
-                langchain_pg_embedding.collection_id = langchain_pg_collection.uuid AND
-                langchain_pg_collection.name = %(indexname)s AND
-                langchain_pg_embedding.cmetadata ->> 'filename' = %(filename)s AND
-                langchain_pg_embedding.cmetadata ->> 'bucket' = %(bucket)s
-            )
-            """
-
-            params = {
-                "indexname": config.INDEX_NAME,
-                "filename": file_name,
-                "bucket": bucket_name,
-            }
+            filters = {"bucket": bucket_name, "filename": file_name}
 
         else:
             raise ValueError(
                 "Invalid Arguments: file_name is required if delete_all is False."
             )
 
-        result = pool_execution(query, params)
-        if result:
-            return bool(result)
-        else:
-            raise ValueError(result)
+        # Chunks are deleted in batches, without locking the embeddings table for long
+        delete_sources(filters)
+        return True
 
     except psycopg.Error as e:
         raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail=f"PSYCOPG Error: {e}")
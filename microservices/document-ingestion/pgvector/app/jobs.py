@@ -0,0 +1,152 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from threading import Lock
+from typing import Callable, Optional
+from .logger import logger
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class IngestionJob:
+    """
+    State and progress of a background ingestion job. Progress counters are
+    updated by the worker running the job and read by the `/jobs/{job_id}` API.
+    """
+
+    def __init__(self, tenant: str):
+        self.id = uuid.uuid4().hex
+        self.tenant = tenant
+        self.status = JobStatus.QUEUED
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.progress = {}
+        self._lock = Lock()
+
+    def set_progress(self, **values):
+        """Sets the given progress counters to the given values."""
+        with self._lock:
+            self.progress.update(values)
+
+    def add_progress(self, **increments):
+        """Increments the given progress counters by the given values."""
+        with self._lock:
+            for key, value in increments.items():
+                self.progress[key] = self.progress.get(key, 0) + value
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "job_id": self.id,
+                "bucket_name": self.tenant,
+                "status": self.status.value,
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "progress": dict(self.progress),
+            }
+
+
+class IngestionJobQueue:
+    """
+    Runs ingestion jobs on a bounded pool of worker threads, so that parsing,
+    embedding and database writes do not block the event loop serving the API.
+
+    At most `max_jobs_per_tenant` jobs of a tenant (bucket) run at a time, further
+    jobs of that tenant wait in a FIFO queue without holding a worker. The most
+    recent `max_finished_jobs` finished jobs are kept for status queries.
+    """
+
+    def __init__(self, max_workers: int, max_jobs_per_tenant: int, max_finished_jobs: int = 1000):
+        self.max_jobs_per_tenant = max(1, max_jobs_per_tenant)
+        self.max_finished_jobs = max_finished_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="ingestion")
+        self._lock = Lock()
+        self._jobs = {}
+        self._finished = OrderedDict()
+        self._pending = {}
+        self._running = {}
+
+    def submit(self, tenant: str, fn: Callable, *args) -> IngestionJob:
+        """
+        Queues `fn(job, *args)` as a job of the given tenant.
+
+        Args:
+            tenant (str): Tenant the job is accounted to, the bucket name.
+            fn (Callable): Function running the job. It receives the job as first
+                argument to report progress.
+
+        Returns:
+            IngestionJob: The queued job.
+        """
+
+        job = IngestionJob(tenant)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._pending.setdefault(tenant, deque()).append((job, fn, args))
+            self._dispatch(tenant)
+
+        logger.info(f"Ingestion job {job.id} queued for bucket {tenant}")
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _dispatch(self, tenant: str):
+        # Caller holds self._lock
+        pending = self._pending.get(tenant)
+        while pending and self._running.get(tenant, 0) < self.max_jobs_per_tenant:
+            job, fn, args = pending.popleft()
+            self._running[tenant] = self._running.get(tenant, 0) + 1
+            self._executor.submit(self._run, job, fn, args)
+
+        if not pending:
+            self._pending.pop(tenant, None)
+
+    def _run(self, job: IngestionJob, fn: Callable, args: tuple):
+        job.status = JobStatus.RUNNING
+        job.started_at = time.time()
+        status = JobStatus.FAILED
+
+        try:
+            fn(job, *args)
+            status = JobStatus.COMPLETED
+            logger.info(f"Ingestion job {job.id} completed")
+
+        except Exception as ex:
+            job.error = getattr(ex, "detail", None) or str(ex)
+            logger.error(f"Ingestion job {job.id} failed: {ex}")
+
+        finally:
+            with self._lock:
+                self._running[job.tenant] -= 1
+                if not self._running[job.tenant]:
+                    del self._running[job.tenant]
+                self._finish(job)
+                job.finished_at = time.time()
+                job.status = status
+                self._dispatch(job.tenant)
+
+    def _finish(self, job: IngestionJob):
+        # Caller holds self._lock
+        self._finished[job.id] = job
+        while len(self._finished) > self.max_finished_jobs:
+            finished_id, _ = self._finished.popitem(last=False)
+            self._jobs.pop(finished_id, None)
@@ -3,26 +3,45 @@
 
 import os
 import psycopg
+import threading
 import uvicorn
+from contextlib import asynccontextmanager
 from http import HTTPStatus
 from pathlib import Path
 from fastapi import FastAPI, HTTPException, File, Query, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BeforeValidator
 from typing import Annotated, List, Optional
 from .logger import logger
 from .config import Settings
 from .db_config import get_db_connection_pool
-from .document import get_documents_embeddings, ingest_to_pgvector, save_temp_file, delete_embeddings
+from .document import get_documents_embeddings, ingest_documents, save_temp_file, delete_embeddings
+from .jobs import IngestionJobQueue
 from .url import get_urls_embedding, ingest_url_to_pgvector, delete_embeddings_url
 from .utils import check_tables_exist, Validation
 from .store import DataStore
+from .vector_store import prepare_metadata_queries
 
 config = Settings()
 pool = get_db_connection_pool()
+job_queue = IngestionJobQueue(
+    config.INGESTION_WORKERS, config.INGESTION_JOBS_PER_BUCKET, config.INGESTION_JOBS_RETAINED
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create the document catalog and metadata indexes in background, building
+    # indexes on a large embeddings table must not delay serving requests.
+    threading.Thread(target=prepare_metadata_queries, name="metadata-indexes", daemon=True).start()
+    yield
 
-app = FastAPI(title=config.APP_DISPLAY_NAME, description=config.APP_DESC, root_path="/v1/dataprep")
+
+app = FastAPI(
+    title=config.APP_DISPLAY_NAME, description=config.APP_DESC, root_path="/v1/dataprep", lifespan=lifespan
+)
 
 # Add CORS middleware
 app.add_middleware(
@@ -107,14 +126,16 @@ async def ingest_document(
     ]
 ) -> dict:
     """
-    Ingest documents into the system.
+    Upload documents to the Object Storage and queue a background job creating their embeddings.
 
     Args:
         files (list[UploadFile]): A file or multiple files to be ingested.
 
     Returns:
-        dict: A status message indicating the result of the ingestion.
+        dict: A status message and the id of the ingestion job. Progress of the
+        job is reported by `GET /jobs/{job_id}`.
     """
+    documents = []
     try:
         if files:
             if not isinstance(files, list):
@@ -128,16 +149,16 @@ async def ingest_document(
                         status_code=HTTPStatus.BAD_REQUEST,
                         detail=f"Unsupported file format: {file_extension}. Supported formats are: pdf, txt, docx",
                     )
-                else:
-                    logger.info(
-                        f"file: {file.filename} uploaded to DataStore successfully!"
-                    )
 
+            for file in files:
                 # Upload files to Data Store
                 try:
-                    result = DataStore.upload_document(file)
+                    result = await run_in_threadpool(DataStore.upload_document, file)
                     bucket_name = result["bucket"]
                     uploaded_filename = result["file"]
+                    logger.info(
+                        f"file: {file.filename} uploaded to DataStore successfully!"
+                    )
 
                 except Exception as ex:
                     logger.error(f"Internal Error: {ex}")
@@ -146,37 +167,61 @@ async def ingest_document(
                         detail="Some unknown error ocurred. Please try later!",
                     )
 
-                try:
-                    # Save file in temporary file on disk to ingest it
-                    temp_path: Path = await save_temp_file(
-                        file, bucket_name, uploaded_filename
-                    )
-                    logger.info(f"Temporary path of saved file: {temp_path}")
-                    ingest_to_pgvector(doc_path=temp_path, bucket=bucket_name)
+                # Save file in temporary file on disk to ingest it in background
+                temp_path: Path = await save_temp_file(
+                    file, bucket_name, uploaded_filename
+                )
+                logger.info(f"Temporary path of saved file: {temp_path}")
+                documents.append((temp_path, bucket_name, os.path.basename(file.filename)))
 
-                except Exception as e:
-                    raise HTTPException(
-                        status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
-                        detail=f"Unexpected error while ingesting data. Exception: {e}",
-                    )
+        if not documents:
+            return {"status": 200, "message": "No documents to ingest"}
 
-                finally:
-                    # Delete temporary file after ingestion
-                    if "temp_path" in locals():  # check if temp_path variable exist
-                        Path(temp_path).unlink()
-                        logger.info("Temporary file cleaned up!")
+        job = job_queue.submit(documents[0][1], ingest_documents, documents)
 
-        result = {"status": 200, "message": "Data preparation succeeded"}
+        result = {"status": 200, "message": "Data preparation started", "job_id": job.id}
 
         return result
 
     except HTTPException as e:
+        for temp_path, _, _ in documents:
+            Path(temp_path).unlink(missing_ok=True)
         raise e
 
     except Exception as e:
+        for temp_path, _, _ in documents:
+            Path(temp_path).unlink(missing_ok=True)
         raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail=str(e))
 
 
+@app.get(
+    "/jobs/{job_id}",
+    tags=["Data Preparation APIs"],
+    summary="Get status and progress of a document ingestion job.",
+    response_model=dict,
+)
+async def get_job(job_id: str) -> dict:
+    """
+    Retrieve the status and progress of an ingestion job.
+
+    Args:
+        job_id (str): Id of the job returned by `POST /documents`.
+
+    Returns:
+        dict: Status of the job (queued, running, completed or failed), the error
+        of a failed job and its progress: files ingested, pages parsed, chunks
+        embedded and batches written.
+    """
+
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail=f"Job {job_id} does not exist."
+        )
+
+    return job.to_dict()
+
+
 @app.delete(
     "/documents",
     tags=["Data Preparation APIs"],
@@ -367,7 +412,7 @@ async def ingest_links(urls: list[str]) -> dict:
     """
     try:
         if urls:
-            ingest_url_to_pgvector(urls)
+            await run_in_threadpool(ingest_url_to_pgvector, urls)
 
         result = {"status": 200, "message": "Data preparation succeeded"}
         return result
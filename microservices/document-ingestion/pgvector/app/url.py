@@ -1,45 +1,39 @@
 # Copyright (C) 2025 Intel Corporation
 # SPDX-License-Identifier: Apache-2.0
 
-import requests
+import asyncio
 import psycopg
 import ipaddress
 import socket
 from urllib.parse import urlparse
 from http import HTTPStatus
 from fastapi import HTTPException
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
-from langchain_postgres.vectorstores import PGVector
 from .logger import logger
 from .config import Settings
-from .db_config import pool_execution
-from .utils import get_separators, parse_html
+from .crawler import FetchResult, fetch_urls
+from .utils import get_separators, parse_html_content
+from .vector_store import (
+    content_hash, delete_sources, get_document_catalog, get_source_hash, get_source_validators, sync_texts,
+    update_source_metadata
+)
 
 config = Settings()
 
 async def get_urls_embedding() -> List[str]:
     """
     Retrieve a list of distinct URLs from the database based on the specified index name.
-    This function executes a SQL query to fetch distinct URLs from the `langchain_pg_embedding`
-    table by joining it with the `langchain_pg_collection` table. The URLs are filtered based
-    on the collection name specified in the configuration.
+    This function reads the URLs ingested in the configured index from the document
+    catalog, which has one row per URL.
 
     Returns:
         List[str]: A list of distinct URLs retrieved from the database.
     """
 
-    url_list = []
-    query = "SELECT DISTINCT \
-    lpc.cmetadata ->> 'url' as url FROM \
-    langchain_pg_embedding lpc JOIN langchain_pg_collection lpcoll \
-    ON lpc.collection_id = lpcoll.uuid WHERE lpcoll.name = %(index_name)s"
-
-    params = {"index_name": config.INDEX_NAME}
-    result_rows = pool_execution(query, params)
-
-    url_list = [row[0] for row in result_rows if row[0]]
+    # URLs are listed from the document catalog, without scanning the embeddings
+    url_list = [entry["url"] for entry in get_document_catalog() if entry["url"]]
 
     return url_list
 
@@ -104,11 +98,81 @@ def validate_url(url: str) -> bool:
         return False
 
 
+def get_url_validators(url_list: List[str]) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+    """
+    Retrieves the ETag and Last-Modified of the content stored for the given URLs from
+    the document catalog, without scanning the embeddings.
+
+    Args:
+        url_list (List[str]): URLs to get the validators of.
+
+    Returns:
+        Dict[str, Tuple[Optional[str], Optional[str]]]: ETag and Last-Modified of each
+        stored URL, which has any of them.
+    """
+
+    rows = get_source_validators([{"url": url} for url in url_list])
+
+    return {source["url"]: (etag, last_modified) for source, etag, last_modified in rows if etag or last_modified}
+
+
+def ingest_fetched_url(result: FetchResult) -> None:
+    """
+    Ingests the fetched content of a URL. Only chunks which changed since the URL was
+    last ingested are embedded, nothing is done if the content is not modified.
+
+    Args:
+        result (FetchResult): The fetched URL.
+
+    Raises:
+        HTTPException: If the HTML content cannot be parsed.
+    """
+
+    source = {"url": result.url}
+    validators = {"etag": result.etag, "last_modified": result.last_modified}
+    if result.not_modified:
+        logger.info(f"URL {result.url} is not modified, skipping ingestion.")
+        return
+
+    try:
+        content = parse_html_content(
+            result.content, result.url, chunk_size=config.CHUNK_SIZE, chunk_overlap=config.CHUNK_OVERLAP
+        )
+    except Exception as e:
+        logger.error(f"Error while parsing HTML content for URL - {result.url}: {e}")
+        raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail=f"Error while parsing URL")
+
+    logger.info(f"[ ingest url ] url: {result.url} content: {content}")
+    # Re-ingest only if the content of the URL changed since last ingestion
+    digest = content_hash(content)
+    if get_source_hash(source) == digest:
+        logger.info(f"Content of URL {result.url} is unchanged, skipping ingestion.")
+        update_source_metadata(source, validators)
+        return
+
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=config.CHUNK_SIZE,
+        chunk_overlap=config.CHUNK_OVERLAP,
+        add_start_index=True,
+        separators=get_separators(),
+    )
+    chunks = text_splitter.split_text(content)
+    sync_texts(
+        texts=chunks,
+        metadatas=[{**source, "content_hash": digest, **validators} for _ in chunks],
+        source=source,
+    )
+
+
 def ingest_url_to_pgvector(url_list: List[str]) -> None:
     """
     Ingests a list of URLs into a PGVector database by fetching their content,
     splitting it into chunks, generating embeddings, and storing them.
 
+    URLs are validated and fetched concurrently, with conditional requests for URLs
+    ingested before. The fetched content is ingested directly, on `URL_INGESTION_WORKERS`
+    threads. No URL is ingested if any of them is invalid.
+
     Args:
         url_list (List[str]): A list of URLs to be ingested.
 
@@ -119,90 +183,42 @@ def ingest_url_to_pgvector(url_list: List[str]) -> None:
 
 
     try:
-        invalid_urls = 0
-        for url in url_list:
-            if not validate_url(url):
-                logger.info(f"Invalid URL skipped: {url}")
-                invalid_urls += 1
-                continue
-
-            try:
-                # Use a custom HTTP adapter to enforce IP-based restrictions
-                with requests.Session() as session:
-                    adapter = requests.adapters.HTTPAdapter()
-                    session.mount("http://", adapter)
-                    session.mount("https://", adapter)
-                    response = session.get(url, timeout=5, allow_redirects=False)
-
-                if response.status_code != HTTPStatus.OK:
-                    logger.info(f"Failed to fetch URL: {url} with status code {response.status_code}")
-                    invalid_urls += 1
-            except Exception as e:
-                logger.error(f"Error fetching URL {url}: {e}")
-                invalid_urls += 1
-
-        if invalid_urls > 0:
-            raise Exception(
-                f"{invalid_urls} / {len(url_list)} URL(s) are invalid.",
-                response.status_code
+        results = asyncio.run(
+            fetch_urls(
+                url_list,
+                validate=validate_url,
+                validators=get_url_validators(url_list),
+                max_connections=config.CRAWLER_MAX_CONNECTIONS,
+                max_connections_per_host=config.CRAWLER_MAX_CONNECTIONS_PER_HOST,
+                timeout=config.CRAWLER_TIMEOUT,
             )
-
-    # If the domain name is wrong, SSLError will be thrown
-    except requests.exceptions.SSLError as e:
-        raise HTTPException(
-            status_code=HTTPStatus.FORBIDDEN, detail=f"SSL Error: {str(e)}"
         )
 
     except Exception as e:
+        logger.error(f"Error fetching URLs: {e}")
         raise HTTPException(
-            status_code=e.args[1], detail=e.args[0]
+            status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail=f"Error while fetching URLs."
         )
 
-    try:
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=config.CHUNK_SIZE,
-            chunk_overlap=config.CHUNK_OVERLAP,
-            add_start_index=True,
-            separators=get_separators(),
+    invalid = [result for result in results if not result.valid]
+    ssl_errors = [result.ssl_error for result in invalid if result.ssl_error]
+    # If the domain name is wrong, the certificate is not verified
+    if ssl_errors:
+        raise HTTPException(
+            status_code=HTTPStatus.FORBIDDEN, detail=f"SSL Error: {ssl_errors[-1]}"
         )
 
-        embedder = OpenAIEmbeddings(
-            openai_api_key="EMPTY",
-            openai_api_base="{}".format(config.TEI_ENDPOINT_URL),
-            model=config.EMBEDDING_MODEL_NAME,
-            tiktoken_enabled=False
+    if invalid:
+        status_codes = [result.status_code for result in invalid if result.status_code]
+        raise HTTPException(
+            status_code=status_codes[-1] if status_codes else HTTPStatus.BAD_REQUEST,
+            detail=f"{len(invalid)} / {len(url_list)} URL(s) are invalid.",
         )
 
-        for url in url_list:
-            try:
-                content = parse_html(
-                    [url], chunk_size=config.CHUNK_SIZE, chunk_overlap=config.CHUNK_OVERLAP
-                )
-            except Exception as e:
-                logger.error(f"Error while parsing HTML content for URL - {url}: {e}")
-                raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail=f"Error while parsing URL")
-
-            logger.info(f"[ ingest url ] url: {url} content: {content}")
-            metadata = [{"url": url}]
-
-            chunks = text_splitter.split_text(content)
-            batch_size = config.BATCH_SIZE
-
-            for i in range(0, len(chunks), batch_size):
-                batch_texts = chunks[i : i + batch_size]
-
-                _ = PGVector.from_texts(
-                    texts=batch_texts,
-                    embedding=embedder,
-                    metadatas=metadata,
-                    collection_name=config.INDEX_NAME,
-                    connection=config.PG_CONNECTION_STRING,
-                    use_jsonb=True
-                )
-
-                logger.info(
-                    f"Processed batch {i // batch_size + 1}/{(len(chunks) - 1) // batch_size + 1}"
-                )
+    try:
+        with ThreadPoolExecutor(max_workers=config.URL_INGESTION_WORKERS) as executor:
+            for _ in executor.map(ingest_fetched_url, results):
+                pass
 
     except Exception as e:
         logger.error(f"Error during ingestion : {e}")
@@ -241,34 +257,22 @@ async def delete_embeddings_url(url: Optional[str], delete_all: bool = False) ->
                 detail="No URLs present in the database.",
             )
 
-            query = "DELETE FROM \
-            langchain_pg_embedding WHERE \
-            collection_id = (SELECT uuid FROM langchain_pg_collection WHERE name = %(indexname)s) \
-            AND cmetadata ? 'url'"
-
-            params = {"indexname": config.INDEX_NAME}
+            filters = {"url": None}
 
         elif url:
             if url not in url_list:
                 raise ValueError(f"URL {url} does not exist in the database.")
             else:
-                query = "DELETE FROM \
-                langchain_pg_embedding WHERE \
-                collection_id = (SELECT uuid FROM langchain_pg_collection WHERE name = %(indexname)s) \
-                AND cmetadata ->> 'url' = %(link)s"
-
-                params = {"indexname": config.INDEX_NAME, "link": url}
+                filters = {"url": url}
 
         else:
             raise ValueError(
                 "Invalid Arguments: url is required if delete_all is False."
             )
 
-        result = pool_execution(query, params)
-        if result:
-            return True
-        else:
-            return False
+        # Chunks are deleted in batches, without locking the embeddings table for long
+        delete_sources(filters)
+        return True
 
     except psycopg.Error as e:
         raise HTTPException(status_code=HTTPStatus.INTERNAL_SERVER_ERROR, detail=f"PSYCOPG Error: {e}")
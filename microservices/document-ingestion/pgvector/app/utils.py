@@ -4,6 +4,7 @@
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import AsyncHtmlLoader
 from langchain_community.document_transformers import Html2TextTransformer
+from langchain_core.documents import Document
 from .db_config import pool_execution
 
 def check_tables_exist() -> bool:
@@ -46,19 +47,17 @@ def get_separators():
     return separators
 
 
-def load_html_content(links, chunk_size=1500, chunk_overlap=50):
+def split_html_documents(docs, chunk_size=1500, chunk_overlap=50):
     """
-    Loads HTML content from the provided links, processes it into text, and splits it into chunks.
+    Processes HTML documents into text and splits it into chunks.
     Args:
-        links (list): A list of URLs to load HTML content from.
+        docs (list): A list of documents with HTML content.
         chunk_size (int, optional): The maximum size of each text chunk. Defaults to 1500.
         chunk_overlap (int, optional): The number of overlapping characters between consecutive chunks. Defaults to 50.
     Returns:
         list: A list of processed and split text documents.
     """
 
-    loader = AsyncHtmlLoader(links, ignore_load_errors=True, trust_env=True)
-    docs = loader.load()
     html2text = Html2TextTransformer()
     docs = list(html2text.transform_documents(docs))
     text_splitter = RecursiveCharacterTextSplitter(
@@ -69,6 +68,23 @@ def load_html_content(links, chunk_size=1500, chunk_overlap=50):
     return docs
 
 
+def load_html_content(links, chunk_size=1500, chunk_overlap=50):
+    """
+    Loads HTML content from the provided links, processes it into text, and splits it into chunks.
+    Args:
+        links (list): A list of URLs to load HTML content from.
+        chunk_size (int, optional): The maximum size of each text chunk. Defaults to 1500.
+        chunk_overlap (int, optional): The number of overlapping characters between consecutive chunks. Defaults to 50.
+    Returns:
+        list: A list of processed and split text documents.
+    """
+
+    loader = AsyncHtmlLoader(links, ignore_load_errors=True, trust_env=True)
+    docs = loader.load()
+
+    return split_html_documents(docs, chunk_size, chunk_overlap)
+
+
 def parse_html(input, chunk_size, chunk_overlap):
     """
     Parses HTML content from the input and combines it into a single string.
@@ -87,6 +103,26 @@ def parse_html(input, chunk_size, chunk_overlap):
 
     return html_content
 
+
+def parse_html_content(html, url, chunk_size, chunk_overlap):
+    """
+    Parses already fetched HTML content into a single string, like `parse_html`.
+    Args:
+        html (str): The HTML content to be parsed.
+        url (str): The URL the content was fetched from.
+        chunk_size (int): The size of each chunk to process the HTML content.
+        chunk_overlap (int): The overlap size between consecutive chunks.
+    Returns:
+        str: A single string containing the combined HTML content from all chunks.
+    """
+
+    docs = split_html_documents([Document(page_content=html, metadata={"source": url})], chunk_size, chunk_overlap)
+    html_content = ""
+    for doc in docs:
+        html_content += doc.page_content + "\n"
+
+    return html_content
+
 class Validation:
     @staticmethod
     def sanitize_input(input: str) -> str | None:
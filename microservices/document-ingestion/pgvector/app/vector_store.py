@@ -0,0 +1,788 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import hashlib
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import List, Optional
+from psycopg import sql
+from psycopg.types.json import Jsonb
+from langchain_openai import OpenAIEmbeddings
+from langchain_postgres.vectorstores import PGVector
+from .logger import logger
+from .config import Settings
+from .db_config import get_db_connection_pool
+from .jobs import IngestionJob
+
+config = Settings()
+
+# Embeddings of chunks keyed by embedding model and chunk hash, shared by all documents and URLs
+EMBEDDING_CACHE_TABLE = "dataprep_embedding_cache"
+
+# One row per ingested document or URL, so that they are listed without scanning the embeddings
+DOCUMENT_CATALOG_TABLE = "dataprep_documents"
+
+# Indexes on the metadata keys chunks are looked up and deleted by
+METADATA_INDEXES = {
+    "ix_cmetadata_gin": "USING gin (cmetadata jsonb_path_ops)",
+    "ix_cmetadata_bucket_filename": "(collection_id, (cmetadata ->> 'bucket'), (cmetadata ->> 'filename'))",
+    "ix_cmetadata_url": "(collection_id, (cmetadata ->> 'url'))",
+}
+
+# Metadata keys sources can be deleted by, they are also columns of the document catalog
+SOURCE_KEYS = ("bucket", "filename", "url")
+
+# HTTP validators of the fetched content of URLs, also columns of the document catalog
+VALIDATOR_KEYS = ("etag", "last_modified")
+
+vector_store = None
+collection_id = None
+embedding_cache_created = False
+document_catalog_created = False
+_store_lock = Lock()
+_catalog_lock = Lock()
+_embedding_cache_lock = Lock()
+
+
+def content_hash(content) -> str:
+    """
+    Computes the SHA-256 hex digest identifying a content.
+
+    Args:
+        content (str | bytes): Text of a chunk or content of a file.
+
+    Returns:
+        str: The hex digest of the content.
+    """
+
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.sha256(content).hexdigest()
+
+
+def file_hash(path) -> str:
+    """
+    Computes the SHA-256 hex digest of a file, reading it in blocks.
+
+    Args:
+        path (Path): Path of the file.
+
+    Returns:
+        str: The hex digest of the file content.
+    """
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_embedder() -> OpenAIEmbeddings:
+    """
+    Creates the client of the TEI embedding service.
+
+    Returns:
+        OpenAIEmbeddings: Embeddings client for the configured model.
+    """
+
+    return OpenAIEmbeddings(
+        openai_api_key="EMPTY",
+        openai_api_base="{}".format(config.TEI_ENDPOINT_URL),
+        model=config.EMBEDDING_MODEL_NAME,
+        tiktoken_enabled=False
+    )
+
+
+def get_vector_store() -> PGVector:
+    """
+    Retrieves the singleton PGVector store of the configured collection. The vector
+    extension, tables and collection are created once, when the store is first used.
+
+    Returns:
+        PGVector: The vector store instance.
+    """
+
+    global vector_store
+    with _store_lock:
+        if vector_store is None:
+            vector_store = PGVector(
+                embeddings=get_embedder(),
+                collection_name=config.INDEX_NAME,
+                connection=config.PG_CONNECTION_STRING,
+                use_jsonb=True
+            )
+    return vector_store
+
+
+def get_collection_id() -> uuid.UUID:
+    """
+    Retrieves the uuid of the configured collection, creating the collection if needed.
+
+    Returns:
+        uuid.UUID: The uuid of the collection in `langchain_pg_collection`.
+    """
+
+    global collection_id
+    if collection_id is None:
+        store = get_vector_store()
+        with get_db_connection_pool().connection() as conn:
+            row = conn.execute(
+                "SELECT uuid FROM langchain_pg_collection WHERE name = %(index_name)s",
+                {"index_name": config.INDEX_NAME}
+            ).fetchone()
+            if row is None:
+                store.create_collection()
+                row = conn.execute(
+                    "SELECT uuid FROM langchain_pg_collection WHERE name = %(index_name)s",
+                    {"index_name": config.INDEX_NAME}
+                ).fetchone()
+        collection_id = row[0]
+    return collection_id
+
+
+def create_embedding_cache():
+    """
+    Creates the embedding cache table if it does not exist. Concurrent calls, also
+    from other processes, create it one at a time, serialized by an advisory lock.
+    """
+
+    global embedding_cache_created
+    with _embedding_cache_lock:
+        if embedding_cache_created:
+            return
+
+        # The vector extension is created with the vector store
+        get_vector_store()
+        with get_db_connection_pool().connection() as conn:
+            # CREATE TABLE IF NOT EXISTS is not safe against concurrent creation of the table
+            conn.execute("SELECT pg_advisory_xact_lock(%s)", (_source_lock_key({"table": EMBEDDING_CACHE_TABLE}),))
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {EMBEDDING_CACHE_TABLE} ("
+                "model TEXT NOT NULL, chunk_hash TEXT NOT NULL, embedding vector NOT NULL, "
+                "PRIMARY KEY (model, chunk_hash))"
+            )
+        embedding_cache_created = True
+
+
+def create_document_catalog():
+    """
+    Creates the document catalog table if it does not exist. When the table is
+    created, it is filled once from the chunks already stored.
+    """
+
+    global document_catalog_created
+    with _catalog_lock:
+        if document_catalog_created:
+            return
+
+        get_vector_store()
+        with get_db_connection_pool().connection() as conn:
+            exists = conn.execute("SELECT to_regclass(%s) IS NOT NULL", (DOCUMENT_CATALOG_TABLE,)).fetchone()[0]
+            if exists:
+                # Catalogs created before the validators of URLs were recorded
+                conn.execute(
+                    f"ALTER TABLE {DOCUMENT_CATALOG_TABLE} "
+                    "ADD COLUMN IF NOT EXISTS etag TEXT, ADD COLUMN IF NOT EXISTS last_modified TEXT"
+                )
+            else:
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {DOCUMENT_CATALOG_TABLE} ("
+                    "collection_id UUID NOT NULL REFERENCES langchain_pg_collection (uuid) ON DELETE CASCADE, "
+                    "source JSONB NOT NULL, bucket TEXT, filename TEXT, url TEXT, chunk_count INTEGER NOT NULL, "
+                    "content_hash TEXT, etag TEXT, last_modified TEXT, ingested_at TIMESTAMPTZ NOT NULL DEFAULT now(), "
+                    "PRIMARY KEY (collection_id, source))"
+                )
+                # Documents ingested before `source_name` was stored are identified by their file name
+                cur = conn.execute(
+                    f"INSERT INTO {DOCUMENT_CATALOG_TABLE} "
+                    "(collection_id, source, bucket, filename, url, chunk_count, content_hash, etag, last_modified) "
+                    "SELECT collection_id, CASE "
+                    "WHEN cmetadata ? 'url' THEN jsonb_build_object('url', cmetadata ->> 'url') "
+                    "WHEN cmetadata ? 'source_name' THEN jsonb_build_object("
+                    "'bucket', cmetadata ->> 'bucket', 'source_name', cmetadata ->> 'source_name') "
+                    "ELSE jsonb_build_object('bucket', cmetadata ->> 'bucket', 'filename', cmetadata ->> 'filename') "
+                    "END, min(cmetadata ->> 'bucket'), min(cmetadata ->> 'filename'), min(cmetadata ->> 'url'), "
+                    "count(*), min(cmetadata ->> 'content_hash'), min(cmetadata ->> 'etag'), "
+                    "min(cmetadata ->> 'last_modified') FROM langchain_pg_embedding "
+                    "WHERE cmetadata ? 'url' OR (cmetadata ? 'bucket' AND cmetadata ? 'filename') "
+                    "GROUP BY 1, 2 ON CONFLICT DO NOTHING"
+                )
+                logger.info(f"Created document catalog with {cur.rowcount} documents and URLs")
+
+        document_catalog_created = True
+
+
+def create_metadata_indexes():
+    """
+    Creates the indexes on the metadata keys of the chunks if they do not exist.
+    Indexes are built concurrently so that ingestion is not blocked on a large
+    table. An index left invalid by an interrupted build is built again.
+    """
+
+    # The embedding table is created with the vector store
+    get_vector_store()
+    with get_db_connection_pool().connection() as conn:
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+        conn.autocommit = True
+        try:
+            invalid = conn.execute(
+                "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE NOT i.indisvalid AND c.relname = ANY(%s)",
+                (list(METADATA_INDEXES),)
+            ).fetchall()
+            for name, in invalid:
+                logger.info(f"Rebuilding invalid index {name}")
+                conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+            for name, definition in METADATA_INDEXES.items():
+                start = time.perf_counter()
+                conn.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON langchain_pg_embedding {definition}")
+                logger.info(f"Index {name} ready in {time.perf_counter() - start:.2f}s")
+        finally:
+            conn.autocommit = False
+
+
+def prepare_metadata_queries():
+    """
+    Creates the embedding cache, the document catalog and the metadata indexes, when
+    the service starts. Errors are logged, lookups and deletes still work without the indexes.
+    """
+
+    try:
+        create_embedding_cache()
+        create_document_catalog()
+        create_metadata_indexes()
+    except Exception as e:
+        logger.error(f"Error creating document catalog and metadata indexes: {e}")
+
+
+def embed_texts(texts: List[str], chunk_hashes: List[str]) -> tuple:
+    """
+    Gets the embeddings of texts. Embeddings of chunks already embedded with the
+    configured model are read from the embedding cache, the others are requested
+    from the embedding service, once per distinct chunk, and added to the cache.
+
+    Args:
+        texts (List[str]): Text of each chunk.
+        chunk_hashes (List[str]): Hash of each chunk.
+
+    Returns:
+        tuple: The embedding of each chunk and the number of chunks found in the cache.
+    """
+
+    create_embedding_cache()
+    model = config.EMBEDDING_MODEL_NAME
+
+    with get_db_connection_pool().connection() as conn:
+        rows = conn.execute(
+            f"SELECT chunk_hash, embedding::text FROM {EMBEDDING_CACHE_TABLE} "
+            "WHERE model = %(model)s AND chunk_hash = ANY(%(hashes)s)",
+            {"model": model, "hashes": list(set(chunk_hashes))}
+        ).fetchall()
+    embeddings = {chunk_hash: json.loads(embedding) for chunk_hash, embedding in rows}
+    cached = sum(1 for chunk_hash in chunk_hashes if chunk_hash in embeddings)
+
+    missing = {}
+    for text, chunk_hash in zip(texts, chunk_hashes):
+        if chunk_hash not in embeddings:
+            missing.setdefault(chunk_hash, text)
+
+    if missing:
+        new_embeddings = get_vector_store().embeddings.embed_documents(list(missing.values()))
+        embeddings.update(zip(missing.keys(), new_embeddings))
+
+        with get_db_connection_pool().connection() as conn:
+            with conn.cursor() as cur:
+                cur.executemany(
+                    f"INSERT INTO {EMBEDDING_CACHE_TABLE} (model, chunk_hash, embedding) "
+                    "VALUES (%s, %s, %s::vector) ON CONFLICT DO NOTHING",
+                    [(model, chunk_hash, _vector_literal(embeddings[chunk_hash])) for chunk_hash in missing]
+                )
+
+    return [embeddings[chunk_hash] for chunk_hash in chunk_hashes], cached
+
+
+def _vector_literal(embedding: List[float]) -> str:
+    return "[" + ",".join(map(str, embedding)) + "]"
+
+
+def write_embeddings(texts: List[str], embeddings: List[List[float]], metadatas: List[dict], conn=None) -> List[str]:
+    """
+    Writes a batch of embeddings to the collection with a single `COPY`.
+
+    Args:
+        texts (List[str]): Text of each chunk.
+        embeddings (List[List[float]]): Embedding of each chunk.
+        metadatas (List[dict]): Metadata of each chunk.
+        conn (Optional[psycopg.Connection]): Connection of the transaction to write the
+            batch in. The batch is committed on a connection of the shared pool if not given.
+
+    Returns:
+        List[str]: Ids of the rows written.
+    """
+
+    if conn is None:
+        with get_db_connection_pool().connection() as conn:
+            return write_embeddings(texts, embeddings, metadatas, conn)
+
+    ids = [str(uuid.uuid4()) for _ in texts]
+    collection = get_collection_id()
+
+    with conn.cursor() as cur:
+        with cur.copy(
+            "COPY langchain_pg_embedding (id, collection_id, embedding, document, cmetadata) FROM STDIN"
+        ) as copy:
+            for id, text, embedding, metadata in zip(ids, texts, embeddings, metadatas):
+                copy.write_row((
+                    id,
+                    collection,
+                    _vector_literal(embedding),
+                    text,
+                    Jsonb(metadata or {}),
+                ))
+
+    return ids
+
+
+def add_texts(texts: List[str], metadatas: List[dict], job: Optional[IngestionJob] = None, conn=None) -> dict:
+    """
+    Embeds texts and writes them to the collection in batches of `BATCH_SIZE`.
+    Embedding and writing are pipelined: while a batch is written to the database,
+    the embeddings of the next batch are requested from the embedding service.
+    The hash of each chunk is added to its metadata as `chunk_hash`.
+
+    Args:
+        texts (List[str]): Text of each chunk.
+        metadatas (List[dict]): Metadata of each chunk.
+        job (Optional[IngestionJob]): Job reporting the chunks embedded and batches written.
+        conn (Optional[psycopg.Connection]): Connection of the transaction to write all
+            batches in. Each batch is committed separately if not given.
+
+    Returns:
+        dict: Number of chunks and the time spent embedding and writing them, in seconds.
+    """
+
+    metadatas = [{**metadata, "chunk_hash": metadata.get("chunk_hash") or content_hash(text)}
+                 for text, metadata in zip(texts, metadatas)]
+    batch_size = config.BATCH_SIZE
+    batches = [(texts[i : i + batch_size], metadatas[i : i + batch_size]) for i in range(0, len(texts), batch_size)]
+    stats = {"chunks": len(texts), "chunks_cached": 0, "embedding_seconds": 0.0, "write_seconds": 0.0}
+
+    def embed(batch_texts, batch_metadatas):
+        start = time.perf_counter()
+        embeddings, cached = embed_texts(batch_texts, [metadata["chunk_hash"] for metadata in batch_metadatas])
+        return embeddings, cached, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding") as executor:
+        next_embeddings = executor.submit(embed, *batches[0]) if batches else None
+        for i, (batch_texts, batch_metadatas) in enumerate(batches):
+            embeddings, cached, embedding_seconds = next_embeddings.result()
+            stats["chunks_cached"] += cached
+            stats["embedding_seconds"] += embedding_seconds
+            if i + 1 < len(batches):
+                next_embeddings = executor.submit(embed, *batches[i + 1])
+
+            write_start = time.perf_counter()
+            write_embeddings(batch_texts, embeddings, batch_metadatas, conn)
+            stats["write_seconds"] += time.perf_counter() - write_start
+
+            if job:
+                job.add_progress(chunks_embedded=len(batch_texts), chunks_cached=cached, batches_written=1)
+
+            logger.info(f"Processed batch {i + 1}/{len(batches)}")
+
+    elapsed = time.perf_counter() - start
+    logger.info(
+        f"Ingested {stats['chunks']} chunks ({stats['chunks_cached']} from embedding cache) in {elapsed:.2f}s "
+        f"({stats['chunks'] / elapsed if elapsed else 0:.1f} chunks/s). "
+        f"Embedding: {stats['embedding_seconds']:.2f}s "
+        f"({stats['chunks'] / stats['embedding_seconds'] if stats['embedding_seconds'] else 0:.1f} chunks/s), "
+        f"write: {stats['write_seconds']:.2f}s "
+        f"({stats['chunks'] / stats['write_seconds'] if stats['write_seconds'] else 0:.1f} chunks/s)"
+    )
+
+    if job:
+        job.add_progress(embedding_seconds=stats["embedding_seconds"], write_seconds=stats["write_seconds"])
+
+    return stats
+
+
+def embed_chunks(texts: List[str], chunk_hashes: List[str], job: Optional[IngestionJob] = None) -> tuple:
+    """
+    Gets the embeddings of chunks in batches of `BATCH_SIZE`, from the embedding cache
+    or the embedding service, without writing the chunks.
+
+    Args:
+        texts (List[str]): Text of each chunk.
+        chunk_hashes (List[str]): Hash of each chunk.
+        job (Optional[IngestionJob]): Job reporting the chunks embedded.
+
+    Returns:
+        tuple: The embedding of each chunk, the number of chunks found in the cache and
+        the time spent embedding them, in seconds.
+    """
+
+    start = time.perf_counter()
+    embeddings, cached = [], 0
+    batch_size = config.BATCH_SIZE
+    for i in range(0, len(texts), batch_size):
+        batch_embeddings, batch_cached = embed_texts(texts[i : i + batch_size], chunk_hashes[i : i + batch_size])
+        embeddings.extend(batch_embeddings)
+        cached += batch_cached
+        if job:
+            job.add_progress(chunks_embedded=len(batch_embeddings), chunks_cached=batch_cached)
+    return embeddings, cached, time.perf_counter() - start
+
+
+def get_source_chunks(source: dict, conn=None) -> List[tuple]:
+    """
+    Retrieves the chunks stored for a source document or URL.
+
+    Args:
+        source (dict): Metadata identifying the source, matched with `cmetadata @> source`.
+        conn (Optional[psycopg.Connection]): Connection of the transaction to read the
+            chunks in. A connection of the shared pool is used if not given.
+
+    Returns:
+        List[tuple]: Id, chunk hash, content hash and file name of each chunk.
+    """
+
+    if conn is None:
+        with get_db_connection_pool().connection() as conn:
+            return get_source_chunks(source, conn)
+
+    return conn.execute(
+        "SELECT id, cmetadata ->> 'chunk_hash', cmetadata ->> 'content_hash', cmetadata ->> 'filename' "
+        "FROM langchain_pg_embedding WHERE collection_id = %(collection_id)s AND cmetadata @> %(source)s",
+        {"collection_id": get_collection_id(), "source": Jsonb(source)}
+    ).fetchall()
+
+
+def get_source_hash(source: dict) -> Optional[str]:
+    """
+    Retrieves the content hash of the version of a source document or URL which was
+    last ingested completely. It is recorded in the document catalog by `sync_texts`
+    once all chunks of the version are stored.
+
+    Args:
+        source (dict): Metadata identifying the source.
+
+    Returns:
+        Optional[str]: The content hash, or None if the source was never ingested completely.
+    """
+
+    create_document_catalog()
+    with get_db_connection_pool().connection() as conn:
+        row = conn.execute(
+            f"SELECT content_hash FROM {DOCUMENT_CATALOG_TABLE} "
+            "WHERE collection_id = %(collection_id)s AND source = %(source)s",
+            {"collection_id": get_collection_id(), "source": Jsonb(source)}
+        ).fetchone()
+    return row[0] if row else None
+
+
+def _source_lock_key(source: dict) -> int:
+    # Key of the transaction level advisory lock of a source, a positive bigint
+    return int(content_hash(json.dumps(source, sort_keys=True))[:15], 16)
+
+
+def update_source_metadata(source: dict, values: dict) -> None:
+    """
+    Merges values into the metadata of all chunks of a source document or URL. The
+    validators of a URL are updated in the document catalog as well.
+
+    Args:
+        source (dict): Metadata identifying the source, matched with `cmetadata @> source`.
+        values (dict): Metadata keys and values to set.
+    """
+
+    create_document_catalog()
+    params = {"values": Jsonb(values), "collection_id": get_collection_id(), "source": Jsonb(source)}
+    validators = [key for key in VALIDATOR_KEYS if key in values]
+    with get_db_connection_pool().connection() as conn:
+        conn.execute(
+            "UPDATE langchain_pg_embedding SET cmetadata = cmetadata || %(values)s "
+            "WHERE collection_id = %(collection_id)s AND cmetadata @> %(source)s",
+            params
+        )
+        if validators:
+            conn.execute(
+                sql.SQL(
+                    "UPDATE {} SET {} WHERE collection_id = %(collection_id)s AND source = %(source)s"
+                ).format(
+                    sql.Identifier(DOCUMENT_CATALOG_TABLE),
+                    sql.SQL(", ").join(
+                        sql.SQL("{} = {}").format(sql.Identifier(key), sql.Placeholder(key)) for key in validators
+                    ),
+                ),
+                {**params, **{key: values[key] for key in validators}}
+            )
+
+
+def get_source_validators(sources: List[dict]) -> List[tuple]:
+    """
+    Retrieves the validators of the content last ingested for sources from the document
+    catalog, by its primary key.
+
+    Args:
+        sources (List[dict]): Metadata identifying each source.
+
+    Returns:
+        List[tuple]: Source, ETag and Last-Modified of each source in the catalog.
+    """
+
+    create_document_catalog()
+    with get_db_connection_pool().connection() as conn:
+        rows = conn.execute(
+            f"SELECT source, etag, last_modified FROM {DOCUMENT_CATALOG_TABLE} "
+            "WHERE collection_id = %(collection_id)s AND source = ANY(%(sources)s)",
+            {"collection_id": get_collection_id(), "sources": [Jsonb(source) for source in sources]}
+        ).fetchall()
+    return rows
+
+
+def sync_texts(texts: List[str], metadatas: List[dict], source: dict, job: Optional[IngestionJob] = None) -> dict:
+    """
+    Re-ingests the chunks of a source document or URL incrementally. Chunks already
+    stored for the source are kept with their embeddings and updated metadata, new or
+    changed chunks are embedded and written, and stored chunks no longer part of the
+    source are deleted. Chunks are matched by `chunk_hash`.
+
+    Chunks not stored yet are embedded first, without a transaction. New chunks, updated
+    and deleted chunks and the document catalog entry are then written in a single short
+    transaction, so a failed ingestion leaves the previous version intact. Concurrent calls
+    for the same source run that transaction one at a time, serialized by an advisory lock
+    it holds. The chunks stored for the source are read again under the lock.
+
+    Args:
+        texts (List[str]): Text of each chunk.
+        metadatas (List[dict]): Metadata of each chunk, including the `source` metadata.
+        source (dict): Metadata identifying the source, matched with `cmetadata @> source`.
+        job (Optional[IngestionJob]): Job reporting the chunks embedded and batches written.
+
+    Returns:
+        dict: Number of chunks unchanged, added and deleted and the file names the
+        chunks were stored with before, with the number of chunks embedded, found in
+        the embedding cache and the time spent embedding and writing them, in seconds.
+    """
+
+    create_document_catalog()
+    metadatas = [{**metadata, "chunk_hash": content_hash(text)} for text, metadata in zip(texts, metadatas)]
+
+    # The embedding service is not called with the advisory lock, row locks and a pooled connection held
+    stored_hashes = {row[1] for row in get_source_chunks(source)}
+    to_embed = {}
+    for text, metadata in zip(texts, metadatas):
+        if metadata["chunk_hash"] not in stored_hashes:
+            to_embed.setdefault(metadata["chunk_hash"], text)
+    embeddings, cached, embedding_seconds = embed_chunks(list(to_embed.values()), list(to_embed), job)
+    embedded = dict(zip(to_embed, embeddings))
+
+    with get_db_connection_pool().connection() as conn:
+        conn.execute("SELECT pg_advisory_xact_lock(%s)", (_source_lock_key(source),))
+        existing = get_source_chunks(source, conn)
+
+        stored = {}
+        for id, chunk_hash, _, _ in existing:
+            stored.setdefault(chunk_hash, []).append(id)
+
+        kept, new_texts, new_metadatas = [], [], []
+        for text, metadata in zip(texts, metadatas):
+            ids = stored.get(metadata["chunk_hash"])
+            if ids:
+                kept.append((Jsonb(metadata), ids.pop()))
+            else:
+                new_texts.append(text)
+                new_metadatas.append(metadata)
+        orphaned = [id for ids in stored.values() for id in ids]
+
+        # Chunks deleted by a concurrent ingestion of the source since they were read
+        missing = {}
+        for text, metadata in zip(new_texts, new_metadatas):
+            if metadata["chunk_hash"] not in embedded:
+                missing.setdefault(metadata["chunk_hash"], text)
+        if missing:
+            missing_embeddings, missing_cached, missing_seconds = embed_chunks(
+                list(missing.values()), list(missing), job
+            )
+            embedded.update(zip(missing, missing_embeddings))
+            cached += missing_cached
+            embedding_seconds += missing_seconds
+
+        write_start = time.perf_counter()
+        batch_size = config.BATCH_SIZE
+        for i in range(0, len(new_texts), batch_size):
+            batch_texts, batch_metadatas = new_texts[i : i + batch_size], new_metadatas[i : i + batch_size]
+            write_embeddings(
+                batch_texts, [embedded[metadata["chunk_hash"]] for metadata in batch_metadatas], batch_metadatas, conn
+            )
+            if job:
+                job.add_progress(batches_written=1)
+
+        with conn.cursor() as cur:
+            if kept:
+                cur.executemany("UPDATE langchain_pg_embedding SET cmetadata = %s WHERE id = %s", kept)
+            if orphaned:
+                cur.execute("DELETE FROM langchain_pg_embedding WHERE id = ANY(%s)", (orphaned,))
+            update_catalog(cur, source, len(texts), metadatas[0] if metadatas else {})
+        write_seconds = time.perf_counter() - write_start
+
+    stats = {
+        "chunks": len(new_texts),
+        "chunks_cached": cached,
+        "embedding_seconds": embedding_seconds,
+        "write_seconds": write_seconds,
+        "chunks_unchanged": len(kept),
+        "chunks_added": len(new_texts),
+        "chunks_deleted": len(orphaned),
+        "stored_filenames": sorted({row[3] for row in existing if row[3]}),
+    }
+    logger.info(
+        f"Synced {source}: {len(kept)} chunks unchanged, {len(new_texts)} added, {len(orphaned)} deleted. "
+        f"Embedding: {embedding_seconds:.2f}s, write: {write_seconds:.2f}s"
+    )
+    if job:
+        job.add_progress(
+            chunks_unchanged=len(kept), chunks_deleted=len(orphaned),
+            embedding_seconds=embedding_seconds, write_seconds=write_seconds
+        )
+
+    return stats
+
+
+def update_catalog(cur, source: dict, chunk_count: int, metadata: dict):
+    """
+    Records the chunk count and metadata of a source in the document catalog, or
+    removes the source from the catalog if it has no chunks.
+
+    Args:
+        cur (psycopg.Cursor): Cursor of the transaction writing the chunks of the source.
+        source (dict): Metadata identifying the source.
+        chunk_count (int): Number of chunks stored for the source.
+        metadata (dict): Metadata of a chunk of the source.
+    """
+
+    params = {"collection_id": get_collection_id(), "source": Jsonb(source)}
+    if not chunk_count:
+        cur.execute(
+            f"DELETE FROM {DOCUMENT_CATALOG_TABLE} WHERE collection_id = %(collection_id)s AND source = %(source)s",
+            params
+        )
+        return
+
+    cur.execute(
+        f"INSERT INTO {DOCUMENT_CATALOG_TABLE} "
+        "(collection_id, source, bucket, filename, url, chunk_count, content_hash, etag, last_modified, ingested_at) "
+        "VALUES (%(collection_id)s, %(source)s, %(bucket)s, %(filename)s, %(url)s, %(chunk_count)s, "
+        "%(content_hash)s, %(etag)s, %(last_modified)s, now()) ON CONFLICT (collection_id, source) DO UPDATE SET "
+        "bucket = EXCLUDED.bucket, filename = EXCLUDED.filename, url = EXCLUDED.url, "
+        "chunk_count = EXCLUDED.chunk_count, content_hash = EXCLUDED.content_hash, "
+        "etag = EXCLUDED.etag, last_modified = EXCLUDED.last_modified, ingested_at = EXCLUDED.ingested_at",
+        {
+            **params,
+            **{key: metadata.get(key) for key in SOURCE_KEYS + VALIDATOR_KEYS},
+            "chunk_count": chunk_count,
+            "content_hash": metadata.get("content_hash"),
+        }
+    )
+
+
+def get_document_catalog() -> List[dict]:
+    """
+    Retrieves the documents and URLs ingested in the collection from the document catalog.
+
+    Returns:
+        List[dict]: Bucket, file name, URL, chunk count, content hash and ingestion time
+        of each document or URL, in the order they were last ingested.
+    """
+
+    create_document_catalog()
+    with get_db_connection_pool().connection() as conn:
+        rows = conn.execute(
+            f"SELECT bucket, filename, url, chunk_count, content_hash, ingested_at FROM {DOCUMENT_CATALOG_TABLE} "
+            "WHERE collection_id = %(collection_id)s ORDER BY ingested_at",
+            {"collection_id": get_collection_id()}
+        ).fetchall()
+
+    keys = ("bucket", "filename", "url", "chunk_count", "content_hash", "ingested_at")
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def delete_sources(filters: dict) -> int:
+    """
+    Deletes the chunks and catalog entries of the documents or URLs matching the
+    filters. The sources are read from the document catalog, then the chunks of each
+    source are deleted in batches of `DELETE_BATCH_SIZE` rows, each batch in its own
+    transaction, so that locks are held briefly and ingestion is not blocked. Each
+    transaction holds the advisory lock of the source taken by `sync_texts`, so that a
+    concurrent ingestion of the source is not interleaved with its deletion. The catalog
+    entry is deleted with the last batch.
+
+    Args:
+        filters (dict): Value of the metadata keys `bucket`, `filename` or `url` of the
+            sources to delete. A value of None matches any source having the key.
+
+    Returns:
+        int: Number of chunks deleted.
+
+    Raises:
+        ValueError: If a filter is not on a source metadata key.
+    """
+
+    if not filters or any(key not in SOURCE_KEYS for key in filters):
+        raise ValueError(f"Invalid filters {filters}, supported keys are: {', '.join(SOURCE_KEYS)}")
+
+    create_document_catalog()
+    params = {key: value for key, value in filters.items() if value is not None}
+    params.update({"collection_id": get_collection_id(), "batch_size": max(1, config.DELETE_BATCH_SIZE)})
+
+    # Literal keys, so that the expression indexes on the metadata keys are used
+    chunk_filters = sql.SQL(" AND ").join(
+        sql.SQL("cmetadata ->> {} IS NOT NULL").format(sql.Literal(key)) if value is None
+        else sql.SQL("cmetadata ->> {} = {}").format(sql.Literal(key), sql.Placeholder(key))
+        for key, value in filters.items()
+    )
+    catalog_filters = sql.SQL(" AND ").join(
+        sql.SQL("{} IS NOT NULL").format(sql.Identifier(key)) if value is None
+        else sql.SQL("{} = {}").format(sql.Identifier(key), sql.Placeholder(key))
+        for key, value in filters.items()
+    )
+
+    delete_batch = sql.SQL(
+        "DELETE FROM langchain_pg_embedding WHERE id IN ("
+        "SELECT id FROM langchain_pg_embedding WHERE collection_id = %(collection_id)s "
+        "AND cmetadata @> %(source)s AND {} LIMIT %(batch_size)s)"
+    ).format(chunk_filters)
+    delete_catalog = sql.SQL(
+        "DELETE FROM {} WHERE collection_id = %(collection_id)s AND source = %(source)s AND {}"
+    ).format(sql.Identifier(DOCUMENT_CATALOG_TABLE), catalog_filters)
+
+    pool = get_db_connection_pool()
+    with pool.connection() as conn:
+        sources = [row[0] for row in conn.execute(
+            sql.SQL(
+                "SELECT source FROM {} WHERE collection_id = %(collection_id)s AND {}"
+            ).format(sql.Identifier(DOCUMENT_CATALOG_TABLE), catalog_filters),
+            params
+        ).fetchall()]
+
+    deleted = 0
+    for source in sources:
+        source_params = {**params, "source": Jsonb(source)}
+        while True:
+            with pool.connection() as conn:
+                conn.execute("SELECT pg_advisory_xact_lock(%s)", (_source_lock_key(source),))
+                batch_deleted = conn.execute(delete_batch, source_params).rowcount
+                if batch_deleted < params["batch_size"]:
+                    conn.execute(delete_catalog, source_params)
+            deleted += batch_deleted
+            if batch_deleted < params["batch_size"]:
+                break
+
+    logger.info(f"Deleted {deleted} chunks of {len(sources)} sources matching {filters}")
+    return deleted
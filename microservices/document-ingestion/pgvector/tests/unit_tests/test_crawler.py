@@ -0,0 +1,191 @@
+import threading
+import time
+import pytest
+from fastapi import HTTPException
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from app.crawler import fetch_urls
+from app.url import ingest_url_to_pgvector
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Serves `/page` with an ETag, `/slow` after a delay and 404 for any other path.
+    The number of concurrent requests is recorded on the server.
+    """
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            server.requests.append((self.path, self.headers.get("If-None-Match")))
+
+        try:
+            if self.path.startswith("/slow"):
+                time.sleep(0.1)
+
+            if self.path.startswith("/page") or self.path.startswith("/slow"):
+                if self.headers.get("If-None-Match") == '"v1"':
+                    self.send_response(HTTPStatus.NOT_MODIFIED)
+                    self.send_header("ETag", '"v1"')
+                    self.end_headers()
+                    return
+
+                body = b"<html><body><p>Stub page</p></body></html>"
+                self.send_response(HTTPStatus.OK)
+                self.send_header("ETag", '"v1"')
+                self.send_header("Content-Type", "text/html")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            else:
+                self.send_error(HTTPStatus.NOT_FOUND)
+
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    """
+    Runs a local HTTP stub server on a free port.
+
+    Yields:
+        ThreadingHTTPServer: The running server, its base URL is in `base_url`.
+    """
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.lock = threading.Lock()
+    server.active = 0
+    server.max_active = 0
+    server.requests = []
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.asyncio
+async def test_fetch_urls_conditional_requests(stub_server):
+    """
+    Test that `fetch_urls` returns the content and ETag of a page, and sends the stored
+    ETag as If-None-Match so that an unchanged page is not downloaded again.
+
+    Assertions:
+        - The first fetch returns status 200 with the content and ETag.
+        - The second fetch with the ETag returns a valid 304 result without content.
+    """
+
+    url = f"{stub_server.base_url}/page"
+
+    result, = await fetch_urls([url], validate=lambda url: True)
+    assert result.valid and result.status_code == HTTPStatus.OK
+    assert "Stub page" in result.content
+    assert result.etag == '"v1"'
+
+    result, = await fetch_urls([url], validate=lambda url: True, validators={url: (result.etag, None)})
+    assert result.valid and result.not_modified
+    assert result.content is None
+    assert result.etag == '"v1"'
+    assert stub_server.requests == [("/page", None), ("/page", '"v1"')]
+
+
+@pytest.mark.asyncio
+async def test_fetch_urls_invalid(stub_server):
+    """
+    Test that URLs failing validation are not requested, and URLs with an error status
+    are invalid. Results are in the order of the given URLs.
+    """
+
+    urls = [f"{stub_server.base_url}/missing", f"{stub_server.base_url}/page", f"{stub_server.base_url}/blocked"]
+
+    results = await fetch_urls(urls, validate=lambda url: not url.endswith("/blocked"))
+
+    assert [result.url for result in results] == urls
+    assert [result.valid for result in results] == [False, True, False]
+    assert results[0].status_code == HTTPStatus.NOT_FOUND
+    assert results[2].status_code is None
+    assert "/blocked" not in [path for path, _ in stub_server.requests]
+
+
+@pytest.mark.asyncio
+async def test_fetch_urls_per_host_limit(stub_server):
+    """
+    Test that at most `max_connections_per_host` requests are sent to the same host at
+    a time, while all URLs are fetched.
+    """
+
+    urls = [f"{stub_server.base_url}/slow?{i}" for i in range(8)]
+
+    results = await fetch_urls(urls, validate=lambda url: True, max_connections_per_host=2)
+
+    assert all(result.valid for result in results)
+    assert len(stub_server.requests) == 8
+    assert stub_server.max_active == 2
+
+
+@pytest.mark.asyncio
+async def test_fetch_urls_ssl_error(stub_server):
+    """
+    Test that a URL whose TLS handshake fails is invalid and reports the SSL error.
+    """
+
+    url = f"https://{stub_server.base_url[len('http://'):]}/page"
+
+    result, = await fetch_urls([url], validate=lambda url: True)
+
+    assert not result.valid
+    assert "SSL" in result.ssl_error
+
+
+def test_ingest_url_ssl_error_forbidden(stub_server):
+    """
+    Test that `ingest_url_to_pgvector` rejects URLs with an SSL error with status 403.
+    """
+
+    url = f"https://{stub_server.base_url[len('http://'):]}/page"
+
+    with patch("app.url.validate_url", return_value=True), \
+         patch("app.url.get_url_validators", return_value={}), \
+         patch("app.url.sync_texts") as mock_sync_texts:
+        with pytest.raises(HTTPException) as error:
+            ingest_url_to_pgvector([url])
+
+    assert error.value.status_code == HTTPStatus.FORBIDDEN
+    assert error.value.detail.startswith("SSL Error:")
+    mock_sync_texts.assert_not_called()
+
+
+def test_ingest_url_reuses_fetched_content(stub_server):
+    """
+    Test that `ingest_url_to_pgvector` ingests the content fetched during validation
+    without downloading the URL again, and stores its ETag with the chunks.
+
+    Mocks:
+        - `validate_url` accepts the local stub server.
+        - `get_url_validators`, `get_source_hash` and `sync_texts` replace the database.
+    """
+
+    url = f"{stub_server.base_url}/page"
+
+    with patch("app.url.validate_url", return_value=True), \
+         patch("app.url.get_url_validators", return_value={}), \
+         patch("app.url.get_source_hash", return_value=None), \
+         patch("app.url.sync_texts") as mock_sync_texts:
+        ingest_url_to_pgvector([url])
+
+    assert stub_server.requests == [("/page", None)]
+    kwargs = mock_sync_texts.call_args.kwargs
+    assert "Stub page" in " ".join(kwargs["texts"])
+    assert kwargs["metadatas"][0]["url"] == url
+    assert kwargs["metadatas"][0]["etag"] == '"v1"'
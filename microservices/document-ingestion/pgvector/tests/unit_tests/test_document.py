@@ -1,7 +1,8 @@
-from unittest.mock import patch, AsyncMock
+from unittest.mock import patch, AsyncMock, MagicMock
 from http import HTTPStatus
 from app.store import DataStore
 import pytest
+import time
 
 def test_get_documents(test_client, monkeypatch):
     """
@@ -46,15 +47,17 @@ def test_ingest_documents(test_client, test_file):
     1. Mocking the external `requests.post` call to simulate file upload and bucket response.
     2. Mocking the `ingest_to_pgvector` function to ensure it is called without executing its logic.
     3. Sending a POST request to the `/documents` endpoint with a sample file and validating the response.
+    4. Polling the `/jobs/{job_id}` endpoint until the background ingestion job completes.
     Args:
         test_client: A test client instance for simulating HTTP requests.
         test_file: A dictionary containing the file path of the test file to be uploaded.
     Mocks:
         - `app.main.DataStore.upload_document`: Simulates the file upload process to the storage bucket.
-        - `app.main.ingest_to_pgvector`: Simulates the ingestion process to the pgvector database.
+        - `app.document.ingest_to_pgvector`: Simulates the ingestion process to the pgvector database.
     Assertions:
         - Ensures the response status code is HTTP 200 (OK).
         - Validates the response JSON structure and content.
+        - Ensures the job completes and the temporary file is cleaned up.
     """
 
     mock_upload_result = {
@@ -70,15 +73,38 @@ def test_ingest_documents(test_client, test_file):
         assert bucket_name == "test_bucket"
         assert uploaded_file_name == "sample-file.txt"
 
-        with patch("app.main.ingest_to_pgvector") as mock_ingest:
-            mock_ingest.return_value = None
+        with patch("app.document.ingest_to_pgvector") as mock_ingest:
+            mock_ingest.return_value = []
 
             response = test_client.post(
                 "/documents",
                 files={"files": ("sample-file.txt", open(test_file["file_path"], "rb"), "text/plain")}
             )
             assert response.status_code == HTTPStatus.OK
-            assert response.json() == {"status": HTTPStatus.OK, "message": "Data preparation succeeded"}
+            job_id = response.json().pop("job_id")
+            assert response.json() == {"status": HTTPStatus.OK, "message": "Data preparation started", "job_id": job_id}
+
+            for _ in range(100):
+                job = test_client.get(f"/jobs/{job_id}").json()
+                if job["status"] not in ("queued", "running"):
+                    break
+                time.sleep(0.05)
+
+            assert job["status"] == "completed"
+            assert job["bucket_name"] == "test_bucket"
+            assert job["progress"]["files_ingested"] == 1
+            assert mock_ingest.call_args.kwargs["source_name"] == "sample-file.txt"
+            temp_path = mock_ingest.call_args.kwargs["doc_path"]
+            assert not temp_path.exists()
+
+
+def test_get_unknown_job(test_client):
+    """
+    Test that the `/jobs/{job_id}` endpoint returns 404 (NOT FOUND) for an unknown job id.
+    """
+
+    response = test_client.get("/jobs/unknown")
+    assert response.status_code == HTTPStatus.NOT_FOUND
 
 
 def test_ingest_unsupported_document(test_client, test_file):
@@ -261,4 +287,53 @@ async def test_download_invalid_documents(test_client):
         response = await test_client.get("/documents/testfile.txt?bucket_name=testbucket")
 
         assert response.status_code == HTTPStatus.NOT_FOUND
-        assert response.json() == {"detail": "File not found"}
\ No newline at end of file
+        assert response.json() == {"detail": "File not found"}
+
+def test_ingest_unchanged_document(test_file):
+    """
+    Test that a document uploaded again with unchanged content is not parsed again and
+    the newly uploaded file is reported as no longer referenced.
+    """
+
+    from app.document import ingest_to_pgvector
+    from app.vector_store import file_hash
+
+    doc_path = test_file["file_path"]
+
+    with patch("app.document.get_source_hash", return_value=file_hash(doc_path)) as mock_hash:
+        with patch("app.document.UnstructuredFileLoader") as mock_loader:
+            with patch("app.document.sync_texts") as mock_sync:
+                superseded = ingest_to_pgvector(doc_path=doc_path, bucket="test_bucket", source_name="sample-file.txt")
+
+    assert superseded == [doc_path.name]
+    assert mock_hash.call_args.args[0] == {"bucket": "test_bucket", "source_name": "sample-file.txt"}
+    mock_loader.assert_not_called()
+    mock_sync.assert_not_called()
+
+
+def test_ingest_incomplete_document(test_file):
+    """
+    Test that a document whose previous ingestion did not complete is ingested again,
+    and the files of the previous version are reported as no longer referenced.
+
+    Mocks:
+        - `get_source_hash`: No content hash recorded in the catalog, the chunks
+          written by the failed ingestion are not considered.
+        - `sync_texts`: Reports the file names the chunks were stored with.
+    """
+
+    from langchain_core.documents import Document
+    from app.document import ingest_to_pgvector
+
+    doc_path = test_file["file_path"]
+    loader = MagicMock()
+    loader.load.return_value = [Document(page_content="This is a sample file", metadata={"page": 0})]
+
+    with patch("app.document.get_source_hash", return_value=None), \
+         patch("app.document.UnstructuredFileLoader", return_value=loader), \
+         patch("app.document.sync_texts", return_value={"stored_filenames": ["old.txt", doc_path.name]}) as mock_sync:
+        superseded = ingest_to_pgvector(doc_path=doc_path, bucket="test_bucket", source_name="sample-file.txt")
+
+    assert superseded == ["old.txt"]
+    assert mock_sync.call_args.kwargs["texts"] == ["This is a sample file"]
+    assert mock_sync.call_args.kwargs["source"] == {"bucket": "test_bucket", "source_name": "sample-file.txt"}
@@ -0,0 +1,79 @@
+import time
+from threading import Event
+from app.jobs import IngestionJobQueue, JobStatus
+
+
+def wait_finished(job, timeout=5):
+    """Waits until the given job completes or fails."""
+    for _ in range(int(timeout / 0.01)):
+        if job.status in (JobStatus.COMPLETED, JobStatus.FAILED):
+            return
+        time.sleep(0.01)
+    raise TimeoutError(f"Job {job.id} did not finish")
+
+
+def test_job_progress_and_failure():
+    """
+    Test that a job reports its progress and a failing job records its error.
+    """
+
+    job_queue = IngestionJobQueue(max_workers=2, max_jobs_per_tenant=2)
+
+    def ingest(job, pages):
+        job.add_progress(pages_parsed=pages)
+        job.add_progress(pages_parsed=pages)
+
+    def fail(job):
+        raise ValueError("No text found")
+
+    job = job_queue.submit("bucket", ingest, 3)
+    failed = job_queue.submit("bucket", fail)
+    wait_finished(job)
+    wait_finished(failed)
+
+    assert job_queue.get(job.id).to_dict()["progress"] == {"pages_parsed": 6}
+    assert job.status == JobStatus.COMPLETED
+    assert failed.to_dict()["status"] == "failed"
+    assert failed.error == "No text found"
+    job_queue.shutdown()
+
+
+def test_jobs_per_tenant_limit():
+    """
+    Test that at most `max_jobs_per_tenant` jobs of a bucket run at a time, while
+    jobs of other buckets are not held back.
+    """
+
+    job_queue = IngestionJobQueue(max_workers=4, max_jobs_per_tenant=1)
+    release = Event()
+
+    def block(job):
+        release.wait(5)
+
+    first = job_queue.submit("bucket1", block)
+    second = job_queue.submit("bucket1", block)
+    other = job_queue.submit("bucket2", lambda job: None)
+
+    wait_finished(other)
+    assert first.status == JobStatus.RUNNING
+    assert second.status == JobStatus.QUEUED
+
+    release.set()
+    wait_finished(first)
+    wait_finished(second)
+    job_queue.shutdown()
+
+
+def test_finished_jobs_retention():
+    """
+    Test that only the most recent finished jobs are kept.
+    """
+
+    job_queue = IngestionJobQueue(max_workers=1, max_jobs_per_tenant=1, max_finished_jobs=2)
+    jobs = [job_queue.submit("bucket", lambda job: None) for _ in range(3)]
+    for job in jobs:
+        wait_finished(job)
+
+    assert job_queue.get(jobs[0].id) is None
+    assert job_queue.get(jobs[2].id) is jobs[2]
+    job_queue.shutdown()
@@ -0,0 +1,307 @@
+import threading
+import uuid
+import pytest
+from unittest.mock import MagicMock, patch
+from app import vector_store
+from app.jobs import IngestionJob
+
+
+def test_write_embeddings():
+    """
+    Test that `write_embeddings` writes one row per chunk with a single COPY on a
+    connection of the shared pool.
+    """
+
+    pool = MagicMock()
+    cursor = pool.connection.return_value.__enter__.return_value.cursor.return_value.__enter__.return_value
+    copy = cursor.copy.return_value.__enter__.return_value
+    collection = uuid.uuid4()
+
+    with patch("app.vector_store.get_db_connection_pool", return_value=pool), \
+         patch("app.vector_store.get_collection_id", return_value=collection):
+        ids = vector_store.write_embeddings(["a", "b"], [[0.5, 1.0], [2.0, 3.0]], [{"url": "u"}, {"url": "u"}])
+
+    assert cursor.copy.call_count == 1
+    rows = [call.args[0] for call in copy.write_row.call_args_list]
+    assert [row[0] for row in rows] == ids
+    assert rows[0][1:4] == (collection, "[0.5,1.0]", "a")
+    assert rows[1][4].obj == {"url": "u"}
+
+
+def test_add_texts_pipelines_embedding_and_writes():
+    """
+    Test that `add_texts` requests the embeddings of the next batch before writing
+    the current batch, and reports progress to the job.
+    """
+
+    events = []
+    next_embedding_requested = threading.Event()
+
+    def embed_texts(texts, chunk_hashes):
+        events.append(("embed", texts[0]))
+        if texts[0] == "t2":
+            next_embedding_requested.set()
+        assert chunk_hashes == [vector_store.content_hash(text) for text in texts]
+        return [[0.0] for _ in texts], 1
+
+    def write_embeddings(texts, embeddings, metadatas, conn=None):
+        if texts[0] == "t0":
+            # Embeddings of the second batch are requested while the first batch is written
+            assert next_embedding_requested.wait(5)
+        events.append(("write", texts[0]))
+        assert len(metadatas) == len(texts)
+
+    job = IngestionJob("bucket")
+
+    with patch("app.vector_store.embed_texts", side_effect=embed_texts), \
+         patch("app.vector_store.write_embeddings", side_effect=write_embeddings), \
+         patch.object(vector_store.config, "BATCH_SIZE", 2):
+        stats = vector_store.add_texts([f"t{i}" for i in range(5)], [{"i": i} for i in range(5)], job)
+
+    assert [event for event in events if event[0] == "write"] == [("write", "t0"), ("write", "t2"), ("write", "t4")]
+    assert events.index(("embed", "t2")) < events.index(("write", "t0"))
+    assert stats["chunks"] == 5
+    assert stats["chunks_cached"] == 3
+    assert job.progress["chunks_embedded"] == 5
+    assert job.progress["batches_written"] == 3
+
+
+def test_embed_texts_uses_cache():
+    """
+    Test that `embed_texts` reads cached embeddings and requests the embeddings of
+    other chunks once per distinct chunk, adding them to the cache.
+    """
+
+    pool = MagicMock()
+    conn = pool.connection.return_value.__enter__.return_value
+    conn.execute.return_value.fetchall.return_value = [("h1", "[1.0,2.0]")]
+    cursor = conn.cursor.return_value.__enter__.return_value
+    store = MagicMock()
+    store.embeddings.embed_documents.return_value = [[3.0, 4.0]]
+
+    with patch("app.vector_store.get_db_connection_pool", return_value=pool), \
+         patch("app.vector_store.get_vector_store", return_value=store), \
+         patch("app.vector_store.create_embedding_cache"):
+        embeddings, cached = vector_store.embed_texts(["a", "b", "b"], ["h1", "h2", "h2"])
+
+    assert embeddings == [[1.0, 2.0], [3.0, 4.0], [3.0, 4.0]]
+    assert cached == 1
+    store.embeddings.embed_documents.assert_called_once_with(["b"])
+    rows = cursor.executemany.call_args.args[1]
+    assert [row[1:] for row in rows] == [("h2", "[3.0,4.0]")]
+
+
+def test_sync_texts():
+    """
+    Test that `sync_texts` embeds new chunks before taking the advisory lock of the
+    source, then keeps unchanged chunks, writes new chunks, deletes orphaned chunks
+    and records the source in the document catalog in one transaction.
+    """
+
+    pool = MagicMock()
+    conn = pool.connection.return_value.__enter__.return_value
+    cursor = conn.cursor.return_value.__enter__.return_value
+    same, removed = vector_store.content_hash("same"), vector_store.content_hash("removed")
+    existing = [("id1", same, "old", "file"), ("id2", removed, "old", "file")]
+    metadata = {"url": "u", "content_hash": "new"}
+    events = []
+
+    def embed_texts(texts, chunk_hashes):
+        events.append(("embed", texts))
+        return [[1.0] for _ in texts], 0
+
+    def get_source_chunks(source, conn=None):
+        events.append(("read", conn))
+        return existing
+
+    conn.execute.side_effect = lambda *args: events.append(("lock", args))
+
+    with patch("app.vector_store.get_db_connection_pool", return_value=pool), \
+         patch("app.vector_store.get_collection_id", return_value=uuid.uuid4()), \
+         patch("app.vector_store.create_document_catalog"), \
+         patch("app.vector_store.get_source_chunks", side_effect=get_source_chunks), \
+         patch("app.vector_store.embed_texts", side_effect=embed_texts), \
+         patch("app.vector_store.write_embeddings") as mock_write:
+        stats = vector_store.sync_texts(["same", "new"], [metadata, metadata], {"url": "u"})
+
+    # Only the new chunk is embedded, before the transaction holding the advisory lock
+    # of the source, in which the stored chunks are read again
+    assert events == [
+        ("read", None),
+        ("embed", ["new"]),
+        ("lock", ("SELECT pg_advisory_xact_lock(%s)", (vector_store._source_lock_key({"url": "u"}),))),
+        ("read", conn),
+    ]
+
+    # New chunks are written in the transaction updating the other chunks and the catalog
+    texts, embeddings, metadatas, write_conn = mock_write.call_args.args
+    assert (texts, embeddings, write_conn) == (["new"], [[1.0]], conn)
+    assert metadatas[0]["chunk_hash"] == vector_store.content_hash("new")
+    kept = cursor.executemany.call_args.args[1]
+    assert [(metadata.obj["chunk_hash"], id) for metadata, id in kept] == [(same, "id1")]
+    delete_call, catalog_call = cursor.execute.call_args_list
+    assert delete_call.args[1] == (["id2"],)
+    assert vector_store.DOCUMENT_CATALOG_TABLE in catalog_call.args[0]
+    catalog_params = catalog_call.args[1]
+    assert catalog_params["source"].obj == {"url": "u"}
+    assert (catalog_params["url"], catalog_params["filename"], catalog_params["chunk_count"]) == ("u", None, 2)
+    assert catalog_params["content_hash"] == "new"
+    assert (catalog_params["etag"], catalog_params["last_modified"]) == (None, None)
+    assert (stats["chunks_unchanged"], stats["chunks_added"], stats["chunks_deleted"]) == (1, 1, 1)
+    assert stats["stored_filenames"] == ["file"]
+
+
+def test_sync_texts_embeds_chunks_deleted_concurrently():
+    """
+    Test that `sync_texts` embeds a stored chunk deleted by a concurrent ingestion
+    of the source between the first read and the advisory lock.
+    """
+
+    pool = MagicMock()
+    same = vector_store.content_hash("same")
+    reads = iter([[("id1", same, "old", "file")], []])
+
+    with patch("app.vector_store.get_db_connection_pool", return_value=pool), \
+         patch("app.vector_store.get_collection_id", return_value=uuid.uuid4()), \
+         patch("app.vector_store.create_document_catalog"), \
+         patch("app.vector_store.get_source_chunks", side_effect=lambda *args: next(reads)), \
+         patch("app.vector_store.embed_texts", return_value=([[1.0]], 1)) as mock_embed, \
+         patch("app.vector_store.write_embeddings") as mock_write:
+        stats = vector_store.sync_texts(["same"], [{"url": "u"}], {"url": "u"})
+
+    assert mock_embed.call_args_list[-1].args == (["same"], [same])
+    assert mock_write.call_args.args[:2] == (["same"], [[1.0]])
+    assert (stats["chunks_added"], stats["chunks_cached"]) == (1, 1)
+
+
+def test_create_embedding_cache_locked():
+    """
+    Test that `create_embedding_cache` creates the table under an advisory lock, once.
+    """
+
+    pool = MagicMock()
+    conn = pool.connection.return_value.__enter__.return_value
+
+    with patch("app.vector_store.get_db_connection_pool", return_value=pool), \
+         patch("app.vector_store.get_vector_store"), \
+         patch.object(vector_store, "embedding_cache_created", False):
+        vector_store.create_embedding_cache()
+        vector_store.create_embedding_cache()
+
+    lock_call, create_call = conn.execute.call_args_list
+    assert "pg_advisory_xact_lock" in lock_call.args[0]
+    assert create_call.args[0].startswith(f"CREATE TABLE IF NOT EXISTS {vector_store.EMBEDDING_CACHE_TABLE}")
+
+
+def test_get_source_validators():
+    """
+    Test that `get_source_validators` reads the validators from the document catalog
+    by its primary key, without scanning the embeddings.
+    """
+
+    pool = MagicMock()
+    conn = pool.connection.return_value.__enter__.return_value
+    conn.execute.return_value.fetchall.return_value = [({"url": "u"}, '"v1"', None)]
+    collection = uuid.uuid4()
+
+    with patch("app.vector_store.get_db_connection_pool", return_value=pool), \
+         patch("app.vector_store.get_collection_id", return_value=collection), \
+         patch("app.vector_store.create_document_catalog"):
+        rows = vector_store.get_source_validators([{"url": "u"}, {"url": "v"}])
+
+    assert rows == [({"url": "u"}, '"v1"', None)]
+    query, params = conn.execute.call_args.args
+    assert query.startswith(f"SELECT source, etag, last_modified FROM {vector_store.DOCUMENT_CATALOG_TABLE}")
+    assert "langchain_pg_embedding" not in query
+    assert params["collection_id"] == collection
+    assert [source.obj for source in params["sources"]] == [{"url": "u"}, {"url": "v"}]
+
+
+def test_update_source_metadata_validators():
+    """
+    Test that `update_source_metadata` updates the validators of a URL in its chunks
+    and in the document catalog.
+    """
+
+    pool = MagicMock()
+    conn = pool.connection.return_value.__enter__.return_value
+
+    with patch("app.vector_store.get_db_connection_pool", return_value=pool), \
+         patch("app.vector_store.get_collection_id", return_value=uuid.uuid4()), \
+         patch("app.vector_store.create_document_catalog"):
+        vector_store.update_source_metadata({"url": "u"}, {"etag": '"v2"', "last_modified": None})
+
+    chunks_call, catalog_call = conn.execute.call_args_list
+    assert chunks_call.args[1]["values"].obj == {"etag": '"v2"', "last_modified": None}
+    assert catalog_call.args[0].as_string(None) == (
+        f'UPDATE "{vector_store.DOCUMENT_CATALOG_TABLE}" SET "etag" = %(etag)s, "last_modified" = %(last_modified)s '
+        "WHERE collection_id = %(collection_id)s AND source = %(source)s"
+    )
+    assert catalog_call.args[1]["etag"] == '"v2"'
+
+
+def test_delete_sources_in_batches():
+    """
+    Test that `delete_sources` reads the matching sources from the document catalog,
+    then deletes the chunks of each source in batches of `DELETE_BATCH_SIZE`, each on
+    its own connection holding the advisory lock of the source, until a batch is not
+    full, and deletes the catalog entry of the source with that batch.
+    """
+
+    pool = MagicMock()
+    conn = pool.connection.return_value.__enter__.return_value
+    sources = [{"bucket": "b", "source_name": "f"}, {"bucket": "b", "source_name": "g"}]
+    rowcounts = iter([2, 1, 0])
+    queries = []
+
+    def execute(query, params):
+        queries.append((query if isinstance(query, str) else query.as_string(None), params))
+        result = MagicMock()
+        result.fetchall.return_value = [(source,) for source in sources]
+        if "LIMIT" in queries[-1][0]:
+            result.rowcount = next(rowcounts)
+        return result
+
+    conn.execute.side_effect = execute
+
+    with patch("app.vector_store.get_db_connection_pool", return_value=pool), \
+         patch("app.vector_store.get_collection_id", return_value=uuid.uuid4()), \
+         patch("app.vector_store.create_document_catalog"), \
+         patch.object(vector_store.config, "DELETE_BATCH_SIZE", 2):
+        deleted = vector_store.delete_sources({"bucket": "b", "filename": "f"})
+
+    assert deleted == 3
+    # The catalog read, then two batches of the first source and one of the second
+    assert pool.connection.call_count == 4
+    select = queries[0][0]
+    assert select.startswith(f'SELECT source FROM "{vector_store.DOCUMENT_CATALOG_TABLE}"')
+    assert '"bucket" = %(bucket)s AND "filename" = %(filename)s' in select
+
+    batches = queries[1:]
+    kinds = ["lock" if "pg_advisory_xact_lock" in query else "catalog" if query.startswith(
+        f'DELETE FROM "{vector_store.DOCUMENT_CATALOG_TABLE}"') else "chunks" for query, _ in batches]
+    assert kinds == ["lock", "chunks", "lock", "chunks", "catalog", "lock", "chunks", "catalog"]
+    assert [params for query, params in batches if "pg_advisory_xact_lock" in query] == [
+        (vector_store._source_lock_key(sources[0]),),
+        (vector_store._source_lock_key(sources[0]),),
+        (vector_store._source_lock_key(sources[1]),),
+    ]
+    chunks_query, chunks_params = batches[1]
+    assert "LIMIT %(batch_size)s" in chunks_query
+    assert "cmetadata @> %(source)s AND cmetadata ->> 'bucket' = %(bucket)s AND cmetadata ->> 'filename' = %(filename)s" in chunks_query
+    assert chunks_params["source"].obj == sources[0]
+    assert batches[4][1]["source"].obj == sources[0]
+    assert batches[7][1]["bucket"] == "b"
+
+
+def test_delete_sources_invalid_filters():
+    """
+    Test that `delete_sources` rejects filters on other metadata keys, without
+    deleting anything.
+    """
+
+    with patch("app.vector_store.get_db_connection_pool") as mock_pool:
+        with pytest.raises(ValueError):
+            vector_store.delete_sources({"source": "x"})
+
+    mock_pool.assert_not_called()